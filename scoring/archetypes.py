@@ -0,0 +1,316 @@
+"""Vectorized archetype matching, the batch twin of ``src/utils/weightedMatching.ts``.
+
+``matchAllArchetypes`` scores one user at a time in scalar loops and builds
+the explanation text for every archetype as it goes. Here the archetype
+ideal ranges, ``TRAIT_WEIGHTS``, math/risk ranges and hard constraints are
+held as arrays, and a whole batch of profiles is scored against every
+archetype in one pass. Explanations are only built on request::
+
+    python scoring/archetypes.py --bench 1000000
+    python scoring/archetypes.py --profiles profiles.json
+
+``final_score`` is computed with the same float operations in the same order
+as the TypeScript, so scores are bit-identical and the ranking and
+``match_level`` agree; ``test_parity.py`` checks this against the TS module
+itself. The tables below mirror ``INVESTMENT_ARCHETYPES`` and must be edited
+together with it (the parity tests fail until they are). Needs ``numpy``.
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+
+TRAIT_LABELS = {
+    "openness": "开放性",
+    "conscientiousness": "尽责性",
+    "extraversion": "外向性",
+    "agreeableness": "宜人性",
+    "neuroticism": "神经质",
+}
+
+TRAIT_WEIGHTS = {
+    "neuroticism": 2.5,
+    "conscientiousness": 2.0,
+    "openness": 1.5,
+    "extraversion": 1.2,
+    "agreeableness": 1.0,
+}
+
+# Highest first, with the lower bound of each level; anything below the last is 不太匹配.
+MATCH_LEVELS = ("极度匹配", "高度匹配", "较为匹配", "一般匹配", "不太匹配")
+LEVEL_THRESHOLDS = (85, 70, 55, 40)
+
+
+def _constraint(trait, condition, threshold, penalty, reason):
+    return {"trait": trait, "condition": condition, "threshold": threshold, "penalty": penalty, "reason": reason}
+
+
+ARCHETYPES = [
+    {
+        "name": "趋势跟踪者",
+        "ideal_ranges": {"openness": [7, 9], "conscientiousness": [6, 8], "extraversion": [5, 8],
+                         "agreeableness": [4, 6], "neuroticism": [2, 4]},
+        "math_range": [60, 100],
+        "risk_range": [6, 9],
+        "hard_constraints": [
+            _constraint("neuroticism", "max", 6, 3.0, "趋势跟踪需要极强的情绪控制力，神经质过高会导致频繁止损"),
+            _constraint("conscientiousness", "min", 5, 2.0, "趋势跟踪需要严格执行交易纪律，尽责性过低容易冲动交易"),
+        ],
+    },
+    {
+        "name": "波段交易者",
+        "ideal_ranges": {"openness": [6, 8], "conscientiousness": [7, 9], "extraversion": [7, 9],
+                         "agreeableness": [4, 6], "neuroticism": [2, 5]},
+        "math_range": [70, 100],
+        "risk_range": [7, 10],
+        "hard_constraints": [
+            _constraint("extraversion", "min", 6, 2.5, "波段交易需要快速决策和执行，外向性过低反应速度不足"),
+            _constraint("neuroticism", "max", 6, 3.0, "频繁交易会放大情绪波动，神经质过高容易做出错误决策"),
+            _constraint("conscientiousness", "min", 6, 2.0, "波段交易需要严格的止损纪律，尽责性不足容易亏损"),
+        ],
+    },
+    {
+        "name": "价值投资者",
+        "ideal_ranges": {"openness": [4, 7], "conscientiousness": [8, 10], "extraversion": [3, 6],
+                         "agreeableness": [7, 9], "neuroticism": [2, 4]},
+        "math_range": [50, 100],
+        "risk_range": [3, 6],
+        "hard_constraints": [
+            _constraint("conscientiousness", "min", 7, 3.0, "价值投资需要极强的耐心和长期持有能力，尽责性不足难以坚持"),
+            _constraint("neuroticism", "max", 5, 2.5, "价值投资需要忍受短期波动，神经质过高容易在底部割肉"),
+            _constraint("extraversion", "max", 7, 1.5, "价值投资需要耐心等待，过于外向可能导致频繁换股"),
+        ],
+    },
+    {
+        "name": "指数基金投资者",
+        "ideal_ranges": {"openness": [4, 7], "conscientiousness": [7, 9], "extraversion": [3, 6],
+                         "agreeableness": [6, 9], "neuroticism": [3, 6]},
+        "math_range": [40, 100],
+        "risk_range": [2, 5],
+        "hard_constraints": [
+            _constraint("conscientiousness", "min", 6, 2.0, "指数基金定投需要长期坚持，尽责性不足容易半途而废"),
+            _constraint("openness", "max", 8, 1.5, "指数基金投资策略简单，过于开放可能导致频繁更换策略"),
+        ],
+    },
+    {
+        "name": "量化交易者",
+        "ideal_ranges": {"openness": [8, 10], "conscientiousness": [8, 10], "extraversion": [4, 7],
+                         "agreeableness": [4, 7], "neuroticism": [2, 4]},
+        "math_range": [80, 100],
+        "risk_range": [6, 9],
+        "hard_constraints": [
+            _constraint("openness", "min", 7, 3.0, "量化交易需要持续学习和创新，开放性不足难以开发有效策略"),
+            _constraint("conscientiousness", "min", 7, 2.5, "量化交易需要严格执行系统信号，尽责性不足容易主观干预"),
+            _constraint("neuroticism", "max", 5, 2.0, "量化交易需要信任系统，神经质过高容易在回撤时放弃策略"),
+        ],
+    },
+    {
+        "name": "固定收益投资者",
+        "ideal_ranges": {"openness": [3, 5], "conscientiousness": [7, 9], "extraversion": [3, 5],
+                         "agreeableness": [7, 9], "neuroticism": [4, 7]},
+        "math_range": [30, 100],
+        "risk_range": [1, 3],
+        "hard_constraints": [
+            _constraint("openness", "max", 6, 2.0, "固定收益投资策略保守，过于开放可能导致冒险尝试高风险产品"),
+            _constraint("extraversion", "max", 6, 1.5, "固定收益投资不需要频繁操作，过于外向可能导致不必要的交易"),
+        ],
+    },
+]
+
+
+def to_fixed(value, digits):
+    """``Number.prototype.toFixed``: exact binary value, ties rounded up (Python's format rounds ties to even)."""
+    return str(Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def score_in_range(values, lo, hi):
+    """``scoreInRange`` over arrays: 100 inside ``[lo, hi]``, minus 10 per point outside, floored at 0.
+
+    Outside the range exactly one of ``lo - values`` and ``values - hi`` is
+    positive and it is the TS ``distance``; inside both are <= 0 and the clip
+    gives 100, so this is bit-identical without the branches.
+    """
+    distance = np.maximum(lo - values, values - hi)
+    return np.clip(100 - distance * 10, 0, 100)
+
+
+def level_codes(final):
+    """Index into ``MATCH_LEVELS`` for every score."""
+    codes = np.full(np.shape(final), len(LEVEL_THRESHOLDS), dtype=np.int8)
+    for code, threshold in reversed(list(enumerate(LEVEL_THRESHOLDS))):
+        codes[final >= threshold] = code
+    return codes
+
+
+@dataclass
+class BatchScores:
+    """Scores of ``n`` profiles against ``a`` archetypes; every array is ``(n, a)``."""
+
+    final: np.ndarray
+    base: np.ndarray
+    penalties: np.ndarray
+    levels: np.ndarray
+
+    @cached_property
+    def best(self):
+        """Best archetype per profile; on ties the first in table order, as ``Array.sort`` is stable."""
+        return np.argmax(self.final, axis=1)
+
+    @cached_property
+    def best_score(self):
+        return self.final[np.arange(len(self.final)), self.best]
+
+    @cached_property
+    def order(self):
+        """Archetype indices per profile, best first, in ``matchAllArchetypes`` order."""
+        return np.argsort(-self.final, axis=1, kind="stable")
+
+
+class ArchetypeEngine:
+    def __init__(self, archetypes=ARCHETYPES, trait_weights=TRAIT_WEIGHTS):
+        self.archetypes = archetypes
+        self.names = [a["name"] for a in archetypes]
+        self.weights = [float(trait_weights[t]) for t in TRAITS]
+        self.total_weight = 0.0
+        for weight in self.weights:
+            self.total_weight += weight
+
+        self.lo = np.array([[a["ideal_ranges"][t][0] for t in TRAITS] for a in archetypes], dtype=float)
+        self.hi = np.array([[a["ideal_ranges"][t][1] for t in TRAITS] for a in archetypes], dtype=float)
+        self.math_range = np.array([a["math_range"] for a in archetypes], dtype=float)
+        self.risk_range = np.array([a["risk_range"] for a in archetypes], dtype=float)
+
+        # Hard constraints padded to the longest list; padding has penalty 0, so it adds nothing.
+        width = max(len(a["hard_constraints"]) for a in archetypes)
+        shape = (len(archetypes), width)
+        self.constraint_trait = np.zeros(shape, dtype=np.intp)
+        self.constraint_max = np.zeros(shape, dtype=bool)
+        self.constraint_threshold = np.zeros(shape)
+        self.constraint_penalty = np.zeros(shape)
+        for i, archetype in enumerate(archetypes):
+            for j, c in enumerate(archetype["hard_constraints"]):
+                self.constraint_trait[i, j] = TRAITS.index(c["trait"])
+                self.constraint_max[i, j] = c["condition"] == "max"
+                self.constraint_threshold[i, j] = c["threshold"]
+                self.constraint_penalty[i, j] = c["penalty"]
+
+    def score(self, traits, math, risk):
+        """Score ``traits`` ``(n, 5)`` in ``TRAITS`` order, ``math`` and ``risk`` ``(n,)`` against every archetype."""
+        traits = np.asarray(traits, dtype=float)
+        math = np.asarray(math, dtype=float)[:, None]
+        risk = np.asarray(risk, dtype=float)[:, None]
+
+        # Same accumulation order as the TS loop, so the sums round identically.
+        weighted = 0.0
+        for t, weight in enumerate(self.weights):
+            weighted = weighted + score_in_range(traits[:, t, None], self.lo[:, t], self.hi[:, t]) * weight
+        math_score = score_in_range(math, self.math_range[:, 0], self.math_range[:, 1])
+        risk_score = score_in_range(risk, self.risk_range[:, 0], self.risk_range[:, 1])
+        base = (weighted / self.total_weight) * 0.7 + math_score * 0.15 + risk_score * 0.15
+
+        penalties = 0.0
+        for j in range(self.constraint_trait.shape[1]):
+            values = traits[:, self.constraint_trait[:, j]]
+            threshold = self.constraint_threshold[:, j]
+            violated = np.where(self.constraint_max[:, j], values > threshold, values < threshold)
+            penalties = penalties + np.where(violated, self.constraint_penalty[:, j], 0.0)
+        penalties = np.broadcast_to(penalties, base.shape)
+
+        final = np.maximum(0, base - penalties * 10)
+        return BatchScores(final=final, base=base, penalties=penalties, levels=level_codes(final))
+
+    def explain(self, personality, math, risk, archetype):
+        """The ``explanation`` text ``calculateWeightedMatch`` builds for one profile and archetype index."""
+        a = self.archetypes[archetype]
+        values = np.array([[personality[t] for t in TRAITS]], dtype=float)
+        scores = self.score(values, [math], [risk])
+        final = float(scores.final[0, archetype])
+        level = MATCH_LEVELS[scores.levels[0, archetype]]
+
+        text = f'您的人格特质与"{a["name"]}"的匹配度为{to_fixed(final, 1)}分（{level}）。'
+        reasons = [c["reason"] for c in a["hard_constraints"]
+                   if (personality[c["trait"]] > c["threshold"] if c["condition"] == "max"
+                       else personality[c["trait"]] < c["threshold"])]
+        if reasons:
+            text += "\n\n⚠️ 存在以下不匹配因素：\n" + "\n".join(f"{i + 1}. {r}" for i, r in enumerate(reasons))
+
+        trait_scores = [(TRAIT_LABELS[t], float(score_in_range(values[0, k], self.lo[archetype, k], self.hi[archetype, k])))
+                        for k, t in enumerate(TRAITS)]
+        high = [(label, s) for label, s in trait_scores if s >= 80]
+        if high:
+            text += "\n\n✅ 您的优势：\n" + "\n".join(f"• {label}非常适合（{to_fixed(s, 0)}分）" for label, s in high)
+        low = [(label, s) for label, s in trait_scores if s < 60]
+        if low:
+            text += "\n\n📊 需要注意：\n" + "\n".join(f"• {label}偏离理想区间（{to_fixed(s, 0)}分）" for label, s in low)
+        return text
+
+
+def arrays_from_results(rows):
+    """``(traits, math, risk)`` arrays from ``test_results``-shaped rows.
+
+    ``math`` is ``math_finance_scores.percentage`` and ``risk`` is
+    ``risk_preference_scores.risk_tolerance``, the inputs ResultPage passes
+    to ``matchInvestmentStyleV2``.
+    """
+    traits = np.array([[row["personality_scores"][t] for t in TRAITS] for row in rows], dtype=float).reshape(-1, len(TRAITS))
+    math = np.array([row["math_finance_scores"]["percentage"] for row in rows], dtype=float)
+    risk = np.array([row["risk_preference_scores"]["risk_tolerance"] for row in rows], dtype=float)
+    return traits, math, risk
+
+
+def random_profiles(n, seed=0):
+    """Synthetic profiles in the app's ranges: traits 1-10, math 0-100, risk 1-10."""
+    rng = np.random.default_rng(seed)
+    traits = rng.integers(1, 11, size=(n, len(TRAITS))).astype(float)
+    math = np.round(rng.uniform(0, 100, size=n), 2)
+    risk = rng.integers(1, 11, size=n).astype(float)
+    return traits, math, risk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--profiles", help="JSON list of test_results rows (personality_scores, math_finance_scores, "
+                                           "risk_preference_scores)")
+    source.add_argument("--bench", type=int, metavar="N", help="score N synthetic profiles and report profiles/sec")
+    parser.add_argument("--chunk", type=int, default=65536, help="profiles scored per pass")
+    parser.add_argument("--explain", action="store_true", help="print the best match's explanation (--profiles only)")
+    args = parser.parse_args(argv)
+
+    engine = ArchetypeEngine()
+    if args.profiles:
+        with open(args.profiles, encoding="utf-8") as f:
+            rows = json.load(f)
+        traits, math, risk = arrays_from_results(rows)
+        scores = engine.score(traits, math, risk)
+        for i, row in enumerate(rows):
+            best = scores.best[i]
+            print(f"{row.get('id', i)}\t{engine.names[best]}\t{scores.final[i, best]:.1f}\t{MATCH_LEVELS[scores.levels[i, best]]}")
+            if args.explain:
+                print(engine.explain(row["personality_scores"], math[i], risk[i], best) + "\n")
+        return 0
+
+    traits, math, risk = random_profiles(args.bench)
+    started = time.perf_counter()
+    counts = np.zeros(len(engine.names), dtype=np.int64)
+    for start in range(0, args.bench, args.chunk):
+        stop = start + args.chunk
+        scores = engine.score(traits[start:stop], math[start:stop], risk[start:stop])
+        counts += np.bincount(scores.best, minlength=len(engine.names))
+    elapsed = time.perf_counter() - started
+    print(f"{args.bench} profiles x {len(engine.names)} archetypes in {elapsed:.2f}s "
+          f"({args.bench / elapsed:,.0f} profiles/s)")
+    for name, count in zip(engine.names, counts):
+        print(f"  {name}\t{count}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""Latency and recall of the ``profile_vector`` k-NN index (migration 40).
+
+``get_similar_investors`` finds the nearest stored profiles through the HNSW
+index on ``test_results.profile_vector``. This measures that query at a
+given table size, against a scratch database migrated to the app schema::
+
+    python scoring/knn_bench.py --seed 1000000
+    python scoring/knn_bench.py --queries 2000 --k 50 --ef-search 100 --recall 50
+    python scoring/knn_bench.py --drop-seed
+
+``--seed`` adds synthetic completed results (marked ``"_seed": true`` in
+``personality_scores``, styles from ``archetypes.ArchetypeEngine``); the
+index picks them up as they are inserted. Latency is the client-side round
+trip of the neighbour query over the connection, and recall@k compares the
+index answer with an exact sequential scan for ``--recall`` of the queries.
+``DATABASE_URL`` as for ``rescore.py``. Needs ``numpy`` and ``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import asyncpg
+import numpy as np
+
+import archetypes
+
+NEIGHBOURS = """
+SELECT id
+FROM test_results
+WHERE investment_style IS NOT NULL
+ORDER BY profile_vector <-> $1::vector
+LIMIT $2
+"""
+
+
+def vector_text(traits, math, risk):
+    """pgvector text for a profile, scaled like the ``profile_vector`` column."""
+    return "[" + ",".join(f"{v:g}" for v in [*traits, math / 10, risk]) + "]"
+
+
+async def seed(conn, n, batch=50_000):
+    engine = archetypes.ArchetypeEngine()
+    done = 0
+    while done < n:
+        size = min(batch, n - done)
+        traits, math, risk = archetypes.random_profiles(size, seed=done + 1)
+        scores = engine.score(traits, math, risk)
+        styles = np.array(engine.names, dtype=object)[scores.best].tolist()
+        best_score = scores.best_score.tolist()
+        records = [
+            (json.dumps({**dict(zip(archetypes.TRAITS, t)), "_seed": True}), json.dumps({"percentage": m}),
+             json.dumps({"risk_tolerance": r}), style, score)
+            for t, m, r, style, score in zip(traits.tolist(), math.tolist(), risk.tolist(), styles, best_score)
+        ]
+        await conn.copy_records_to_table(
+            "test_results", records=records,
+            columns=["personality_scores", "math_finance_scores", "risk_preference_scores",
+                     "investment_style", "euclidean_distance"])
+        done += size
+        print(f"seeded {done}/{n}", flush=True)
+
+
+async def bench(conn, queries, k, ef_search, recall):
+    await conn.execute(f"SET hnsw.ef_search = {int(ef_search)}")
+    traits, math, risk = archetypes.random_profiles(queries, seed=12345)
+    vectors = [vector_text(t, m, r) for t, m, r in zip(traits.tolist(), math.tolist(), risk.tolist())]
+    plan = await conn.fetchval("EXPLAIN (FORMAT JSON) " + NEIGHBOURS, vectors[0], k)
+    index = json.loads(plan)[0]["Plan"]
+    while index.get("Plans") and "Index Name" not in index:
+        index = index["Plans"][0]
+    print(f"plan: {index['Node Type']} {index.get('Index Name', '')}")
+
+    stmt = await conn.prepare(NEIGHBOURS)
+    for vector in vectors[:20]:  # warm the cache
+        await stmt.fetch(vector, k)
+    latencies = []
+    answers = []
+    for vector in vectors:
+        started = time.perf_counter()
+        rows = await stmt.fetch(vector, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        answers.append({row[0] for row in rows})
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{queries} queries k={k} ef_search={ef_search}: p50 {p50:.3f} ms  p95 {p95:.3f} ms  p99 {p99:.3f} ms")
+
+    if recall:
+        hits = 0
+        async with conn.transaction():
+            await conn.execute("SET LOCAL enable_indexscan = off")
+            for vector, answer in zip(vectors[:recall], answers):
+                exact = {row[0] for row in await conn.fetch(NEIGHBOURS, vector, k)}
+                hits += len(answer & exact)
+        print(f"recall@{k} over {recall} queries: {hits / (recall * k):.4f}")
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn, server_settings={"search_path": "public, extensions"})
+    try:
+        if args.drop_seed:
+            deleted = await conn.execute("DELETE FROM test_results WHERE personality_scores ? '_seed'")
+            print(deleted)
+            return
+        if args.seed:
+            await seed(conn, args.seed)
+        total = await conn.fetchval("SELECT count(*) FROM test_results WHERE investment_style IS NOT NULL "
+                                    "AND profile_vector IS NOT NULL")
+        print(f"{total} indexed profiles")
+        await bench(conn, args.queries, args.k, args.ef_search, args.recall)
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic profiles first")
+    parser.add_argument("--drop-seed", action="store_true", help="delete the synthetic profiles and exit")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--ef-search", type=int, default=100, help="as set by get_similar_investors")
+    parser.add_argument("--recall", type=int, default=20, help="queries checked against an exact scan (0 to skip)")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+"""Export and check the population norms behind "top X%" (migration 41).
+
+``score_norm_buckets`` holds one count per metric and rounded score, kept
+current by a trigger on ``test_results``. ``get_score_norms()`` returns it as
+a ~1.2 KB JSON artifact that ``src/utils/norms.ts`` turns into O(1)
+percentile lookups; this tool writes that artifact to a file (for a static
+host or an edge function), recounts it from ``test_results`` to catch drift,
+or looks a score up::
+
+    python scoring/norms.py --out public/norms.json
+    python scoring/norms.py --check
+    python scoring/norms.py --lookup openness=7 math=85 risk=4
+
+``--check`` scans the whole table, so run it off-peak; it exits non-zero
+if any bucket differs from the trigger-maintained counts. ``DATABASE_URL``
+as for ``rescore.py``. Needs ``numpy`` and ``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+import asyncpg
+import numpy as np
+
+METRICS = ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism", "math", "risk"]
+
+RECOUNT = """
+SELECT m.metric, m.bucket, count(*)
+FROM test_results t
+CROSS JOIN LATERAL score_norm_metrics(t.personality_scores, t.math_finance_scores, t.risk_preference_scores) m
+WHERE t.profile_vector IS NOT NULL
+GROUP BY m.metric, m.bucket
+"""
+
+
+class NormTable:
+    """Cumulative counts per metric; same mid-rank percentile as ``percentileOf`` in ``norms.ts``."""
+
+    def __init__(self, norms):
+        self.total = norms["total"]
+        self.metrics = {}
+        for metric, hist in norms["metrics"].items():
+            counts = np.asarray(hist["counts"], dtype=np.int64)
+            below = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            self.metrics[metric] = (hist["min"], counts, below)
+
+    def percentile(self, metric, values):
+        """Share of results (0-100) scoring below ``values``, counting ties as half."""
+        if not self.total or metric not in self.metrics:
+            return None
+        lo, counts, below = self.metrics[metric]
+        # Half away from zero like SQL round() (scores are non-negative, so also like Math.round)
+        index = np.floor(np.asarray(values, dtype=float) + 0.5).astype(np.int64) - lo
+        inside = np.clip(index, 0, len(counts) - 1)
+        ranks = np.where(index < 0, 0, np.where(index >= len(counts), self.total,
+                                                 below[inside] + counts[inside] / 2))
+        return ranks / self.total * 100
+
+
+def buckets(norms):
+    """``{(metric, score): count}`` of the non-empty buckets of an artifact."""
+    return {(metric, hist["min"] + i): count
+            for metric, hist in norms["metrics"].items()
+            for i, count in enumerate(hist["counts"]) if count}
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        norms = json.loads(await conn.fetchval("SELECT get_score_norms()::text"))
+        status = 0
+        if args.check:
+            recount = {(metric, bucket): count for metric, bucket, count in await conn.fetch(RECOUNT)}
+            stored = buckets(norms)
+            drift = {key: (stored.get(key, 0), recount.get(key, 0))
+                     for key in stored.keys() | recount.keys() if stored.get(key, 0) != recount.get(key, 0)}
+            for (metric, bucket), (have, want) in sorted(drift.items()):
+                print(f"  {metric:>17} {bucket:>3}: stored {have}, recounted {want}")
+            print(f"{norms['total']} results, {len(stored)} buckets, {len(drift)} drifted")
+            status = 1 if drift else 0
+    finally:
+        await conn.close()
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(norms, f, separators=(",", ":"))
+        print(f"wrote {args.out} ({os.path.getsize(args.out)} bytes, {norms['total']} results)")
+    if args.lookup:
+        table = NormTable(norms)
+        for item in args.lookup:
+            metric, value = item.split("=")
+            pct = table.percentile(metric, float(value))
+            print(f"{metric}={value}: " + ("no data" if pct is None else f"above {pct:.1f}%, top {100 - pct:.1f}%"))
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--out", help="write the norms artifact to this file")
+    parser.add_argument("--check", action="store_true", help="recount from test_results and report drifted buckets")
+    parser.add_argument("--lookup", nargs="+", metavar="METRIC=SCORE", help=f"metrics: {', '.join(METRICS)}")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
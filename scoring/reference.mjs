@@ -0,0 +1,44 @@
+// Runs the TypeScript matcher in src/utils/weightedMatching.ts for the parity tests.
+//
+//   node scoring/reference.mjs tables            -> {TRAIT_WEIGHTS, INVESTMENT_ARCHETYPES}
+//   node scoring/reference.mjs match < in.json   -> matchAllArchetypes for every profile
+//
+// `in.json` is a list of {personality, math, risk}; each answer is the sorted list of
+// {name, final_score, match_level, explanation}. The module is transpiled with the
+// project's own `typescript` devDependency, so nothing is reimplemented here.
+
+import { readFileSync } from 'node:fs';
+import { createRequire } from 'node:module';
+import { dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const require = createRequire(import.meta.url);
+const ts = require('typescript');
+
+const source = join(dirname(fileURLToPath(import.meta.url)), '..', 'src', 'utils', 'weightedMatching.ts');
+const { outputText } = ts.transpileModule(readFileSync(source, 'utf8'), {
+  compilerOptions: { module: ts.ModuleKind.ESNext, target: ts.ScriptTarget.ES2020 }
+});
+const matcher = await import(`data:text/javascript;base64,${Buffer.from(outputText).toString('base64')}`);
+
+const mode = process.argv[2];
+if (mode === 'tables') {
+  process.stdout.write(JSON.stringify({
+    TRAIT_WEIGHTS: matcher.TRAIT_WEIGHTS,
+    INVESTMENT_ARCHETYPES: matcher.INVESTMENT_ARCHETYPES
+  }));
+} else if (mode === 'match') {
+  const profiles = JSON.parse(readFileSync(0, 'utf8'));
+  const answers = profiles.map(({ personality, math, risk }) =>
+    matcher.matchAllArchetypes(personality, math, risk).map(result => ({
+      name: result.archetype.name,
+      final_score: result.final_score,
+      match_level: result.match_level,
+      explanation: result.explanation
+    }))
+  );
+  process.stdout.write(JSON.stringify(answers));
+} else {
+  process.stderr.write('usage: node scoring/reference.mjs tables|match\n');
+  process.exit(2);
+}
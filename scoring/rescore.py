@@ -0,0 +1,181 @@
+"""Re-score stored ``test_results`` after the archetype tables change.
+
+ResultPage stores the best ``matchInvestmentStyleV2`` match in
+``investment_style`` (archetype name) and ``euclidean_distance`` (its
+``final_score``). Editing ``INVESTMENT_ARCHETYPES`` or ``TRAIT_WEIGHTS``
+leaves every earlier row with the old answer. This job streams the table in
+keyset-paginated chunks (``id > last_id ORDER BY id``, never the whole
+table), scores each chunk with ``archetypes.ArchetypeEngine`` and updates
+only the rows whose best archetype or score changed::
+
+    python scoring/rescore.py --dry-run
+    python scoring/rescore.py --chunk 20000
+    python scoring/rescore.py --restart
+
+Progress is checkpointed after every committed chunk, so an interrupted run
+resumes where it stopped. The checkpoint records a fingerprint of the
+tables and is refused if they changed since (``--restart`` starts over).
+The next chunk is read while the current one is written. Rows without
+complete scores are skipped. ``investmentStyles`` in ``calculations.ts`` only
+feeds the legacy ``matchInvestmentStyle`` and no stored column, so it needs
+no backfill. ``DATABASE_URL`` is a direct Postgres connection string (the
+service connection, RLS does not apply). Needs ``numpy`` and ``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import pathlib
+import time
+
+import asyncpg
+import numpy as np
+
+import archetypes
+
+DEFAULT_CHECKPOINT = pathlib.Path(__file__).resolve().parent / ".rescore-checkpoint.json"
+FIRST_ID = "00000000-0000-0000-0000-000000000000"
+
+SELECT_CHUNK = """
+SELECT id,
+       (personality_scores->>'openness')::float8,
+       (personality_scores->>'conscientiousness')::float8,
+       (personality_scores->>'extraversion')::float8,
+       (personality_scores->>'agreeableness')::float8,
+       (personality_scores->>'neuroticism')::float8,
+       (math_finance_scores->>'percentage')::float8,
+       (risk_preference_scores->>'risk_tolerance')::float8,
+       investment_style,
+       euclidean_distance::float8
+FROM test_results
+WHERE id > $1
+ORDER BY id
+LIMIT $2
+"""
+
+UPDATE_CHUNK = """
+UPDATE test_results t
+SET investment_style = u.style,
+    euclidean_distance = u.score::numeric
+FROM unnest($1::uuid[], $2::text[], $3::float8[]) AS u(id, style, score)
+WHERE t.id = u.id
+"""
+
+# Stored scores went through ``numeric``; anything closer than this is the same score.
+SCORE_TOLERANCE = 1e-9
+
+
+def fingerprint(engine):
+    """Hash of the tables the scores depend on; a checkpoint is only valid for the same tables."""
+    tables = {"archetypes": engine.archetypes, "weights": engine.weights}
+    return hashlib.sha256(json.dumps(tables, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def load_checkpoint(path, table_hash, restart):
+    fresh = {"tables": table_hash, "last_id": FIRST_ID, "read": 0, "scored": 0, "changed": 0,
+             "elapsed": 0.0, "transitions": {}}
+    if restart or not os.path.exists(path):
+        return fresh
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint["tables"] != table_hash:
+        raise SystemExit(f"{path} was written for other archetype tables; pass --restart to start over")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def rescore_chunk(engine, rows):
+    """``(ids, styles, scores, transitions)`` of the rows in ``rows`` whose best match changed, and the scored count."""
+    values = np.array([tuple(row[1:8]) for row in rows], dtype=float)
+    complete = ~np.isnan(values).any(axis=1)
+    index = np.flatnonzero(complete)
+    if not len(index):
+        return [], [], [], collections.Counter(), 0
+    scores = engine.score(values[index, :5], values[index, 5], values[index, 6])
+    new_styles = np.array(engine.names, dtype=object)[scores.best]
+    old_styles = np.array([row[8] for row in rows], dtype=object)[index]
+    stored = np.array([row[9] for row in rows], dtype=float)[index]
+    changed = np.flatnonzero((new_styles != old_styles) | ~(np.abs(stored - scores.best_score) <= SCORE_TOLERANCE))
+
+    ids = [rows[i][0] for i in index[changed].tolist()]
+    styles = new_styles[changed].tolist()
+    new_scores = scores.best_score[changed].tolist()
+    transitions = collections.Counter(f"{old} -> {new}" for old, new in zip(old_styles[changed], styles) if old != new)
+    return ids, styles, new_scores, transitions, len(index)
+
+
+async def run(dsn, chunk, checkpoint_path, restart, dry_run, max_rows):
+    engine = archetypes.ArchetypeEngine()
+    checkpoint = load_checkpoint(checkpoint_path, fingerprint(engine), restart)
+    transitions = collections.Counter(checkpoint["transitions"])
+    reader = await asyncpg.connect(dsn)
+    writer = await asyncpg.connect(dsn)
+    started = time.perf_counter()
+    run_rows = 0
+    try:
+        fetch = asyncio.create_task(reader.fetch(SELECT_CHUNK, checkpoint["last_id"], chunk))
+        while True:
+            rows = await fetch
+            if not rows:
+                break
+            last_id = str(rows[-1][0])
+            run_rows += len(rows)
+            more = max_rows is None or run_rows < max_rows
+            if more:
+                fetch = asyncio.create_task(reader.fetch(SELECT_CHUNK, last_id, chunk))
+
+            ids, styles, scores, changes, scored = rescore_chunk(engine, rows)
+            if ids and not dry_run:
+                async with writer.transaction():
+                    await writer.execute(UPDATE_CHUNK, ids, styles, scores)
+
+            transitions.update(changes)
+            elapsed = checkpoint["elapsed"] + time.perf_counter() - started
+            checkpoint.update(last_id=last_id, read=checkpoint["read"] + len(rows),
+                              scored=checkpoint["scored"] + scored, changed=checkpoint["changed"] + len(ids),
+                              transitions=dict(transitions))
+            if not dry_run:
+                save_checkpoint(checkpoint_path, {**checkpoint, "elapsed": elapsed})
+            print(f"{checkpoint['read']:>10} read {checkpoint['changed']:>9} changed  "
+                  f"{run_rows / (time.perf_counter() - started):>9,.0f} rows/s  last id {last_id}", flush=True)
+            if not more:
+                break
+    finally:
+        await reader.close()
+        await writer.close()
+
+    elapsed = time.perf_counter() - started
+    verb = "would change" if dry_run else "changed"
+    print(f"done: {checkpoint['read']} read, {checkpoint['scored']} scored, {checkpoint['changed']} {verb}; "
+          f"this run {run_rows} rows in {elapsed:.1f}s ({run_rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    for transition, count in transitions.most_common():
+        print(f"  {count:>9}  {transition}")
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--chunk", type=int, default=10_000, help="rows per keyset page")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT))
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first row")
+    parser.add_argument("--dry-run", action="store_true", help="count the changes without writing them or a checkpoint")
+    parser.add_argument("--max-rows", type=int, help="stop after about this many rows (resume later)")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    asyncio.run(run(args.dsn, args.chunk, args.checkpoint, args.restart, args.dry_run, args.max_rows))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,114 @@
+"""Parity of ``archetypes.py`` with ``src/utils/weightedMatching.ts``.
+
+The TS module is run through ``reference.mjs`` (Node plus the project's
+``typescript`` devDependency, i.e. after ``pnpm install``) and must agree
+exactly: same tables, same ``final_score`` bits, same ``match_level`` and
+ranking, and the same on-demand explanation text::
+
+    python -m pytest scoring
+"""
+
+import itertools
+import json
+import pathlib
+import shutil
+import subprocess
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import archetypes  # noqa: E402
+
+REFERENCE = pathlib.Path(__file__).resolve().parent / "reference.mjs"
+
+
+def reference(mode, payload=None):
+    if shutil.which("node") is None:
+        pytest.skip("node is not installed")
+    proc = subprocess.run(["node", str(REFERENCE), mode], input=json.dumps(payload or []),
+                          capture_output=True, text=True, encoding="utf-8")
+    if proc.returncode != 0 and "Cannot find module 'typescript'" in proc.stderr:
+        pytest.skip("typescript is not installed (run pnpm install)")
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout)
+
+
+def profiles():
+    """Random profiles plus every trait at the range and constraint edges, half-points included."""
+    traits, math, risk = archetypes.random_profiles(2000, seed=7)
+    cases = [(dict(zip(archetypes.TRAITS, t)), m, r) for t, m, r in zip(traits.tolist(), math.tolist(), risk.tolist())]
+
+    rng = np.random.default_rng(11)
+    edges = [0, 1, 2, 2.5, 3, 4, 4.5, 5, 5.5, 6, 6.5, 7, 7.5, 8, 9, 10, 11]
+    for trait, value in itertools.product(archetypes.TRAITS, edges):
+        base = dict(zip(archetypes.TRAITS, rng.uniform(1, 10, size=5).round(1).tolist()))
+        base[trait] = value
+        cases.append((base, float(rng.choice([0, 29.5, 30, 40, 50, 59.99, 60, 70, 80, 100])), float(rng.integers(0, 12))))
+    for math, risk in itertools.product([0, 12.345, 39.9, 40, 79.99, 80, 100, 104], [0, 1, 2.5, 3, 5, 6, 9, 10, 11]):
+        cases.append((dict(zip(archetypes.TRAITS, [6, 7, 5, 5, 4])), math, risk))
+    return cases
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return profiles()
+
+
+@pytest.fixture(scope="module")
+def expected(cases):
+    return reference("match", [{"personality": p, "math": m, "risk": r} for p, m, r in cases])
+
+
+@pytest.fixture(scope="module")
+def scores(cases):
+    traits = np.array([[p[t] for t in archetypes.TRAITS] for p, _, _ in cases])
+    return archetypes.ArchetypeEngine().score(traits, [m for _, m, _ in cases], [r for _, _, r in cases])
+
+
+def test_tables_match_typescript():
+    tables = reference("tables")
+    assert tables["TRAIT_WEIGHTS"] == archetypes.TRAIT_WEIGHTS
+    ts = [{key: a[key] for key in ("name", "ideal_ranges", "math_range", "risk_range")}
+          | {"hard_constraints": [{key: c[key] for key in ("trait", "condition", "threshold", "penalty", "reason")}
+                                  for c in a["hard_constraints"]]}
+          for a in tables["INVESTMENT_ARCHETYPES"]]
+    assert ts == archetypes.ARCHETYPES
+
+
+def test_final_scores_are_identical(cases, expected, scores):
+    engine = archetypes.ArchetypeEngine()
+    for i, answer in enumerate(expected):
+        for result in answer:
+            a = engine.names.index(result["name"])
+            assert scores.final[i, a] == result["final_score"], (cases[i], result["name"])
+            assert archetypes.MATCH_LEVELS[scores.levels[i, a]] == result["match_level"], (cases[i], result["name"])
+
+
+def test_ranking_is_identical(cases, expected, scores):
+    engine = archetypes.ArchetypeEngine()
+    for i, answer in enumerate(expected):
+        assert [engine.names[a] for a in scores.order[i]] == [r["name"] for r in answer], cases[i]
+
+
+def test_explanations_are_identical(cases, expected):
+    engine = archetypes.ArchetypeEngine()
+    for (personality, math, risk), answer in list(zip(cases, expected))[::7]:
+        for result in answer:
+            assert engine.explain(personality, math, risk, engine.names.index(result["name"])) == result["explanation"]
+
+
+def test_batch_scores_do_not_depend_on_chunking():
+    engine = archetypes.ArchetypeEngine()
+    traits, math, risk = archetypes.random_profiles(10_000, seed=3)
+    whole = engine.score(traits, math, risk)
+    parts = [engine.score(traits[i:i + 999], math[i:i + 999], risk[i:i + 999]) for i in range(0, 10_000, 999)]
+    assert np.array_equal(whole.final, np.concatenate([p.final for p in parts]))
+    assert np.array_equal(whole.order, np.concatenate([p.order for p in parts]))
+
+
+def test_to_fixed_rounds_ties_up_like_javascript():
+    assert archetypes.to_fixed(0.25, 1) == "0.3"
+    assert archetypes.to_fixed(62.5, 0) == "63"
+    assert archetypes.to_fixed(0.35, 1) == "0.3"  # 0.35 is 0.34999... in binary, as in JS
+    assert archetypes.to_fixed(100.0, 1) == "100.0"
@@ -0,0 +1,55 @@
+import React, { useState } from 'react';
+import { Button } from '@/components/ui/button';
+import { useToast } from '@/hooks/use-toast';
+import { adminApi } from '@/db/adminApi';
+import type { AdminExportFormat, AdminExportTable } from '@/types/types';
+import { Download, Loader2 } from 'lucide-react';
+
+interface ExportButtonsProps {
+  table: AdminExportTable;
+}
+
+// 导出整张表（服务端流式生成，不受列表已加载页数限制）
+const ExportButtons: React.FC<ExportButtonsProps> = ({ table }) => {
+  const { toast } = useToast();
+  const [exporting, setExporting] = useState<AdminExportFormat | null>(null);
+
+  const handleExport = async (format: AdminExportFormat) => {
+    setExporting(format);
+    try {
+      const success = await adminApi.exportTable(table, format);
+      if (!success) {
+        toast({
+          title: '导出失败',
+          description: '无法导出数据，请稍后重试',
+          variant: 'destructive'
+        });
+      }
+    } finally {
+      setExporting(null);
+    }
+  };
+
+  return (
+    <div className="flex gap-2">
+      {(['csv', 'ndjson'] as AdminExportFormat[]).map((format) => (
+        <Button
+          key={format}
+          size="sm"
+          variant="outline"
+          disabled={exporting !== null}
+          onClick={() => handleExport(format)}
+        >
+          {exporting === format ? (
+            <Loader2 className="h-4 w-4 mr-2 animate-spin" />
+          ) : (
+            <Download className="h-4 w-4 mr-2" />
+          )}
+          导出 {format.toUpperCase()}
+        </Button>
+      ))}
+    </div>
+  );
+};
+
+export default ExportButtons;
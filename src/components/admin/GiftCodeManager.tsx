@@ -16,7 +16,8 @@ import {
   Loader2,
   Calendar,
   Users,
-  Sparkles
+  Sparkles,
+  Download
 } from 'lucide-react';
 
 const GiftCodeManager: React.FC = () => {
@@ -27,6 +28,8 @@ const GiftCodeManager: React.FC = () => {
   const [maxRedemptions, setMaxRedemptions] = useState(1);
   const [expiresInDays, setExpiresInDays] = useState<number | undefined>(undefined);
   const [freeAnalysesCount, setFreeAnalysesCount] = useState(15);
+  const [batchCount, setBatchCount] = useState(100);
+  const [generatingBatch, setGeneratingBatch] = useState(false);
 
   useEffect(() => {
     loadGiftCodes();
@@ -80,6 +83,31 @@ const GiftCodeManager: React.FC = () => {
     }
   };
 
+  // 按上面的参数批量生成，直接下载 CSV
+  const handleGenerateBatch = async () => {
+    setGeneratingBatch(true);
+    try {
+      const success = await giftCodeApi.generateGiftCodes(batchCount, maxRedemptions, expiresInDays, freeAnalysesCount);
+      if (!success) {
+        throw new Error('批量生成失败');
+      }
+      toast({
+        title: '生成成功',
+        description: `已生成 ${batchCount} 个礼品码并下载 CSV`
+      });
+      await loadGiftCodes();
+    } catch (error) {
+      console.error('Error generating codes:', error);
+      toast({
+        title: '生成失败',
+        description: '无法批量生成礼品码，请稍后重试',
+        variant: 'destructive'
+      });
+    } finally {
+      setGeneratingBatch(false);
+    }
+  };
+
   const handleCopyCode = (code: string) => {
     navigator.clipboard.writeText(code);
     toast({
@@ -207,6 +235,45 @@ const GiftCodeManager: React.FC = () => {
               </Button>
             </div>
           </div>
+
+          <div className="mt-6 grid grid-cols-1 md:grid-cols-3 gap-4 border-t pt-6">
+            <div className="space-y-2">
+              <Label htmlFor="batchCount">批量数量</Label>
+              <Input
+                id="batchCount"
+                type="number"
+                min="1"
+                max="10000"
+                value={batchCount}
+                onChange={(e) => setBatchCount(Math.min(10000, parseInt(e.target.value) || 1))}
+                placeholder="100"
+              />
+              <p className="text-xs text-muted-foreground">
+                按上面的参数一次生成多个礼品码（最多 10000 个），生成后下载 CSV
+              </p>
+            </div>
+
+            <div className="flex items-start pt-8">
+              <Button
+                variant="outline"
+                onClick={handleGenerateBatch}
+                disabled={generatingBatch}
+                className="w-full"
+              >
+                {generatingBatch ? (
+                  <>
+                    <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+                    生成中...
+                  </>
+                ) : (
+                  <>
+                    <Download className="mr-2 h-4 w-4" />
+                    批量生成并下载
+                  </>
+                )}
+              </Button>
+            </div>
+          </div>
         </CardContent>
       </Card>
 
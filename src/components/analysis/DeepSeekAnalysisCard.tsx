@@ -17,9 +17,9 @@ const DeepSeekAnalysisCard = ({ analysis }: DeepSeekAnalysisCardProps) => {
   const locale = language === 'zh' ? 'zh-CN' : 'en-US'
   const paragraphs = analysis.analysis_content.split('\n\n').filter(p => p.trim());
 
-  const handleSaveLocal = () => {
+  const handleSaveLocal = async () => {
     try {
-      deepseekAnalysisStorage.saveAnalysis(analysis);
+      await deepseekAnalysisStorage.saveAnalysis(analysis);
       alert(language === 'zh' ? '已保存到本地浏览器' : 'Saved to local browser');
     } catch (e) {
       console.error(e);
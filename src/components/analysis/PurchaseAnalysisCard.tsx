@@ -94,6 +94,7 @@ const PurchaseAnalysisCard = ({ testResultId, onPurchaseComplete, paymentEnabled
   const [redeemingCode, setRedeemingCode] = useState(false);
   const [generationProgress, setGenerationProgress] = useState(0);
   const [generationStage, setGenerationStage] = useState<string>('');
+  const [streamedText, setStreamedText] = useState('');
 
   useEffect(() => {
     loadPricingInfo();
@@ -181,6 +182,7 @@ const PurchaseAnalysisCard = ({ testResultId, onPurchaseComplete, paymentEnabled
     setIsProcessing(true);
     setGenerationProgress(0);
     setGenerationStage('准备中...');
+    setStreamedText('');
     
     // 进度模拟器 - 基于时间估算
     const progressInterval = setInterval(() => {
@@ -204,7 +206,14 @@ const PurchaseAnalysisCard = ({ testResultId, onPurchaseComplete, paymentEnabled
       setGenerationStage('正在生成分析...');
       setGenerationProgress(30);
       
-      const analysis = await deepseekApi.generateAnalysisFree(testResultId, testData || {}, lang);
+      // 流式生成，边生成边显示
+      const analysis = await deepseekApi.generateAnalysisFree(
+        testResultId,
+        testData || {},
+        lang,
+        undefined,
+        (text) => setStreamedText((prev) => prev + text)
+      );
       
       clearInterval(progressInterval);
       clearTimeout(stageTimeout1);
@@ -404,6 +413,11 @@ const PurchaseAnalysisCard = ({ testResultId, onPurchaseComplete, paymentEnabled
                     <span className="text-primary font-medium">{Math.round(generationProgress)}%</span>
                   </div>
                   <Progress value={generationProgress} className="h-2" />
+                  {streamedText && (
+                    <div className="max-h-64 overflow-y-auto whitespace-pre-wrap rounded-md bg-background/60 p-3 text-sm text-muted-foreground">
+                      {streamedText}
+                    </div>
+                  )}
                 </div>
               )}
               
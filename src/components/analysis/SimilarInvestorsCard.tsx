@@ -0,0 +1,64 @@
+import { useEffect, useState } from 'react';
+import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
+import { Progress } from '@/components/ui/progress';
+import { Users } from 'lucide-react';
+import { testResultApi } from '@/db/api';
+import type { SimilarInvestorStat } from '@/types/types';
+
+interface SimilarInvestorsCardProps {
+  testResultId: string;
+  investmentStyle: string;
+  // 更新本次结果后再查询，保证本次的风格已写入
+  ready: boolean;
+}
+
+const SimilarInvestorsCard = ({ testResultId, investmentStyle, ready }: SimilarInvestorsCardProps) => {
+  const [stats, setStats] = useState<SimilarInvestorStat[]>([]);
+
+  useEffect(() => {
+    if (!ready) return;
+    testResultApi.getSimilarInvestors(testResultId).then(setStats);
+  }, [testResultId, ready]);
+
+  const total = stats.reduce((sum, s) => sum + s.investors, 0);
+  // 样本太少时不展示，避免误导
+  if (total < 10) {
+    return null;
+  }
+
+  return (
+    <Card>
+      <CardHeader>
+        <div className="flex items-center gap-3">
+          <div className="p-2 rounded-lg bg-primary/10">
+            <Users className="h-5 w-5 text-primary" />
+          </div>
+          <div>
+            <CardTitle>相似投资者</CardTitle>
+            <CardDescription>与您的人格特质、数学能力和风险偏好最接近的 {total} 位投资者的风格分布</CardDescription>
+          </div>
+        </div>
+      </CardHeader>
+      <CardContent>
+        <div className="space-y-3">
+          {stats.map(stat => (
+            <div key={stat.investment_style} className="space-y-1">
+              <div className="flex items-center justify-between text-sm">
+                <span className={stat.investment_style === investmentStyle ? 'font-bold text-primary' : 'font-medium'}>
+                  {stat.investment_style}
+                  {stat.investment_style === investmentStyle && '（与您相同）'}
+                </span>
+                <span className="text-muted-foreground">
+                  {stat.investors} 人 · {(stat.share * 100).toFixed(0)}%
+                </span>
+              </div>
+              <Progress value={stat.share * 100} />
+            </div>
+          ))}
+        </div>
+      </CardContent>
+    </Card>
+  );
+};
+
+export default SimilarInvestorsCard;
@@ -2,7 +2,7 @@ import { Alert, AlertDescription } from '@/components/ui/alert';
 import { Button } from '@/components/ui/button';
 import { Dialog, DialogContent, DialogDescription, DialogFooter, DialogHeader, DialogTitle } from '@/components/ui/dialog';
 import { Info, Download, AlertTriangle } from 'lucide-react';
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { storageUtils } from '@/utils/localStorage';
 import { useToast } from '@/hooks/use-toast';
 
@@ -13,11 +13,15 @@ interface LocalStorageNoticeProps {
 const LocalStorageNotice = ({ variant = 'compact' }: LocalStorageNoticeProps) => {
   const { toast } = useToast();
   const [isOpen, setIsOpen] = useState(false);
-  const [storageUsage, setStorageUsage] = useState(storageUtils.getStorageUsage());
+  const [storageUsage, setStorageUsage] = useState<{ used: number; total: number; percentage: number } | null>(null);
 
-  const handleExport = () => {
+  useEffect(() => {
+    storageUtils.getStorageUsage().then(setStorageUsage);
+  }, []);
+
+  const handleExport = async () => {
     try {
-      const data = storageUtils.exportAllData();
+      const data = await storageUtils.exportAllData();
       const blob = new Blob([data], { type: 'application/json' });
       const url = URL.createObjectURL(blob);
       const a = document.createElement('a');
@@ -41,10 +45,10 @@ const LocalStorageNotice = ({ variant = 'compact' }: LocalStorageNoticeProps) =>
     }
   };
 
-  const handleClearData = () => {
+  const handleClearData = async () => {
     if (window.confirm('确定要清空所有本地数据吗？此操作不可恢复！建议先导出备份。')) {
-      storageUtils.clearAllAppData();
-      setStorageUsage(storageUtils.getStorageUsage());
+      await storageUtils.clearAllAppData();
+      setStorageUsage(await storageUtils.getStorageUsage());
       
       toast({
         title: '数据已清空',
@@ -74,7 +78,7 @@ const LocalStorageNotice = ({ variant = 'compact' }: LocalStorageNoticeProps) =>
         </AlertDescription>
       </Alert>
 
-      {storageUsage.percentage > 70 && (
+      {storageUsage && storageUsage.percentage > 70 && (
         <Alert variant="destructive">
           <AlertTriangle className="h-4 w-4" />
           <AlertDescription>
@@ -95,7 +99,9 @@ const LocalStorageNotice = ({ variant = 'compact' }: LocalStorageNoticeProps) =>
       </div>
 
       <div className="text-xs text-muted-foreground space-y-1">
-        <p>存储使用情况: {(storageUsage.used / 1024).toFixed(2)} KB / {(storageUsage.total / 1024).toFixed(2)} KB</p>
+        {storageUsage && (
+          <p>存储使用情况: {(storageUsage.used / 1024).toFixed(2)} KB / {(storageUsage.total / 1024).toFixed(2)} KB</p>
+        )}
         <p>
           注意：只有<strong>用户登录</strong>和<strong>支付验证</strong>功能使用服务器，
           其他所有数据都保存在您的设备上。
@@ -1,6 +1,47 @@
 import { supabase } from './supabase';
-import { getCurrentUser } from '@/utils/auth';
-import type { Profile, SystemSetting, TestSubmission, AdminLog, AdminStatistics, UserPricingInfo } from '@/types/types';
+import { getCurrentUser, getCurrentSession } from '@/utils/auth';
+import { pickSaveFile, saveResponse, discardSaveFile } from '@/utils/download';
+import { featureFlags } from './featureFlags';
+import type { Profile, SystemSetting, TestSubmission, AdminLog, AdminStatistics, UserPricingInfo, Page, PageCursor, AdminExportTable, AdminExportFormat } from '@/types/types';
+
+// 按 (created_at, id) 倒序取一页，cursor 为上一页最后一行。
+// 条件由 (created_at, id) 联合索引直接定位，翻到第几页耗时都一样
+async function fetchPage<T extends PageCursor>(
+  table: string,
+  label: string,
+  limit: number,
+  cursor?: PageCursor | null
+): Promise<Page<T>> {
+  try {
+    let query = supabase
+      .from(table)
+      .select('*')
+      .order('created_at', { ascending: false })
+      .order('id', { ascending: false })
+      .limit(limit);
+    if (cursor) {
+      // created_at <= 游标 作为索引范围条件，OR 只过滤游标时刻那几行（单独的 OR 会从头扫描索引）
+      query = query
+        .lte('created_at', cursor.created_at)
+        .or(`created_at.lt."${cursor.created_at}",id.lt.${cursor.id}`);
+    }
+    const { data, error } = await query;
+
+    if (error) {
+      console.error(`Error getting ${label}:`, error);
+      return { rows: [], nextCursor: null };
+    }
+    const rows = (data || []) as T[];
+    const last = rows[rows.length - 1];
+    return {
+      rows,
+      nextCursor: rows.length === limit ? { created_at: last.created_at, id: last.id } : null
+    };
+  } catch (error) {
+    console.error(`Error getting ${label}:`, error);
+    return { rows: [], nextCursor: null };
+  }
+}
 
 // 管理员相关API
 export const adminApi = {
@@ -70,39 +111,41 @@ export const adminApi = {
     }
   },
 
-  // 获取测试提交记录
-  async getTestSubmissions(limit = 100): Promise<TestSubmission[]> {
+  // 获取测试提交记录（游标分页）
+  async getTestSubmissions(limit = 100, cursor?: PageCursor | null): Promise<Page<TestSubmission>> {
+    return fetchPage<TestSubmission>('test_submissions', 'test submissions', limit, cursor);
+  },
+
+  // 获取按IP分组的测试统计
+  async getTestsByIP(): Promise<{ ip_address: string; count: number; country: string | null; city: string | null }[]> {
     try {
       const { data, error } = await supabase
-        .from('test_submissions')
-        .select('*')
-        .order('created_at', { ascending: false })
-        .limit(limit);
+        .rpc('get_tests_by_ip');
 
       if (error) {
-        console.error('Error getting test submissions:', error);
+        console.error('Error getting tests by IP:', error);
         return [];
       }
       return data || [];
     } catch (error) {
-      console.error('Error getting test submissions:', error);
+      console.error('Error getting tests by IP:', error);
       return [];
     }
   },
 
-  // 获取按IP分组的测试统计
-  async getTestsByIP(): Promise<{ ip_address: string; count: number; country: string | null; city: string | null }[]> {
+  // 获取按国家/地区分组的测试统计
+  async getTestsByCountry(): Promise<{ country: string | null; count: number; updated_at: string }[]> {
     try {
       const { data, error } = await supabase
-        .rpc('get_tests_by_ip');
+        .rpc('get_tests_by_country');
 
       if (error) {
-        console.error('Error getting tests by IP:', error);
+        console.error('Error getting tests by country:', error);
         return [];
       }
       return data || [];
     } catch (error) {
-      console.error('Error getting tests by IP:', error);
+      console.error('Error getting tests by country:', error);
       return [];
     }
   },
@@ -129,29 +172,7 @@ export const adminApi = {
 
   // 获取支付系统状态
   async getPaymentSystemStatus(): Promise<boolean> {
-    try {
-      const { data, error } = await supabase
-        .from('system_settings')
-        .select('setting_value')
-        .eq('setting_key', 'payment_enabled')
-        .maybeSingle();
-
-      if (error) {
-        console.error('Error getting payment system status:', error);
-        return true;
-      }
-      const v = (data as any)?.setting_value;
-      if (typeof v === 'boolean') return v;
-      if (v && typeof v === 'object' && 'value' in v) {
-        const val = (v as any).value;
-        if (typeof val === 'boolean') return val;
-        if (typeof val === 'string') return val === 'true';
-      }
-      return true;
-    } catch (error) {
-      console.error('Error getting payment system status:', error);
-      return true;
-    }
+    return featureFlags.get('payment_enabled');
   },
 
   // 切换支付系统
@@ -181,6 +202,7 @@ export const adminApi = {
       }
       
       console.log('✅ togglePaymentSystem: 成功', data);
+      if (data?.success === true) featureFlags.set('payment_enabled', enabled);
       return data?.success === true;
     } catch (error) {
       console.error('❌ togglePaymentSystem: 异常', error);
@@ -188,24 +210,9 @@ export const adminApi = {
     }
   },
 
-  // 获取管理员日志
-  async getAdminLogs(limit = 100): Promise<AdminLog[]> {
-    try {
-      const { data, error } = await supabase
-        .from('admin_logs')
-        .select('*')
-        .order('created_at', { ascending: false })
-        .limit(limit);
-
-      if (error) {
-        console.error('Error getting admin logs:', error);
-        return [];
-      }
-      return data || [];
-    } catch (error) {
-      console.error('Error getting admin logs:', error);
-      return [];
-    }
+  // 获取管理员日志（游标分页）
+  async getAdminLogs(limit = 100, cursor?: PageCursor | null): Promise<Page<AdminLog>> {
+    return fetchPage<AdminLog>('admin_logs', 'admin logs', limit, cursor);
   },
 
   // 记录管理员操作
@@ -236,23 +243,49 @@ export const adminApi = {
     }
   },
 
-  // 获取所有用户profiles
-  async getAllProfiles(limit = 100): Promise<Profile[]> {
+  // 获取用户profiles（游标分页）
+  async getAllProfiles(limit = 100, cursor?: PageCursor | null): Promise<Page<Profile>> {
+    return fetchPage<Profile>('profiles', 'profiles', limit, cursor);
+  },
+
+  // 导出整张表（admin_export 边缘函数流式生成）。
+  // 支持文件选择器的浏览器直接把响应流写入文件，不占内存；否则下载完成后保存
+  async exportTable(table: AdminExportTable, format: AdminExportFormat): Promise<boolean> {
+    const filename = `${table}-${new Date().toISOString().slice(0, 10)}.${format}`;
+    let fileHandle: any | null = null;
+    let saved = false;
     try {
-      const { data, error } = await supabase
-        .from('profiles')
-        .select('*')
-        .order('created_at', { ascending: false })
-        .limit(limit);
+      // 文件选择器需要在用户点击后立即打开，先选文件再请求
+      fileHandle = await pickSaveFile(filename);
 
-      if (error) {
-        console.error('Error getting profiles:', error);
-        return [];
+      const { data: { session } } = await getCurrentSession();
+      if (!session?.access_token) {
+        console.error('Error exporting table: 用户未认证');
+        return false;
       }
-      return data || [];
+      const response = await fetch(`${import.meta.env.VITE_SUPABASE_URL}/functions/v1/admin_export`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${session.access_token}`,
+          'apikey': import.meta.env.VITE_SUPABASE_ANON_KEY
+        },
+        body: JSON.stringify({ table, format })
+      });
+      if (!response.ok || !response.body) {
+        console.error('Error exporting table:', response.status, await response.text());
+        return false;
+      }
+
+      await saveResponse(response, filename, fileHandle);
+      saved = true;
+      return true;
     } catch (error) {
-      console.error('Error getting profiles:', error);
-      return [];
+      // 取消文件选择也会到这里
+      console.error('Error exporting table:', error);
+      return false;
+    } finally {
+      if (!saved) await discardSaveFile(fileHandle, '导出失败');
     }
   },
 
@@ -434,23 +467,7 @@ export const adminApi = {
 
   // 获取 DeepSeek 功能开关状态
   async getDeepSeekEnabled(): Promise<boolean> {
-    try {
-      const { data, error } = await supabase
-        .from('system_config')
-        .select('config_value')
-        .eq('config_key', 'deepseek_enabled')
-        .maybeSingle();
-
-      if (error) {
-        console.error('Error getting DeepSeek status:', error);
-        return false;
-      }
-
-      return data?.config_value === 'true';
-    } catch (error) {
-      console.error('Error getting DeepSeek status:', error);
-      return false;
-    }
+    return featureFlags.get('deepseek_enabled');
   },
 
   // 更新 DeepSeek 功能开关
@@ -468,6 +485,7 @@ export const adminApi = {
         console.error('Error updating DeepSeek status:', error);
         return false;
       }
+      featureFlags.set('deepseek_enabled', enabled);
 
       // 记录操作
       await this.logAction('update_deepseek_status', 'system_config', undefined, { enabled });
@@ -1,6 +1,6 @@
 import { supabase } from './supabase';
 import { getCurrentSession } from '@/utils/auth';
-import type { User, VerificationCode, TestResult, Report, Order, DeepSeekAnalysis, OrderItem } from '@/types/types';
+import type { User, VerificationCode, TestResult, Report, Order, DeepSeekAnalysis, DeepSeekJob, OrderItem, SimilarInvestorStat, ScoreNorms } from '@/types/types';
 
 // 用户相关API
 export const userApi = {
@@ -264,6 +264,31 @@ export const testResultApi = {
       return false;
     }
     return true;
+  },
+
+  // 与该测试结果最相似的 k 位其他投资者的风格分布（k 近邻索引查询）
+  async getSimilarInvestors(testResultId: string, k = 50): Promise<SimilarInvestorStat[]> {
+    const { data, error } = await supabase.rpc('get_similar_investors', {
+      p_test_result_id: testResultId,
+      p_k: k
+    });
+
+    if (error) {
+      console.error('Error getting similar investors:', error);
+      return [];
+    }
+    return Array.isArray(data) ? data : [];
+  },
+
+  // 人群常模快照（各维度得分分布，由触发器增量维护，无需扫描测试结果）
+  async getScoreNorms(): Promise<ScoreNorms | null> {
+    const { data, error } = await supabase.rpc('get_score_norms');
+
+    if (error) {
+      console.error('Error getting score norms:', error);
+      return null;
+    }
+    return data;
   }
 };
 
@@ -410,42 +435,212 @@ export const paymentApi = {
 };
 
 // DeepSeek分析相关API
+type AnalysisFunction = 'generate_deepseek_analysis' | 'generate_deepseek_analysis_free';
+
+// 有 Realtime 推送时轮询只是兜底；轮询同时会唤醒空闲的后台 worker
+const JOB_POLL_INTERVAL_MS = 5000;
+const JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
+// 以 fetch 直接调用分析 edge function，确保请求体正确序列化
+async function postAnalysisFunction(name: AnalysisFunction, body: Record<string, any>): Promise<Response> {
+  const { data: { session } } = await getCurrentSession();
+  if (!session?.access_token) {
+    throw new Error('用户未认证，请先登录');
+  }
+
+  const supabaseUrl = import.meta.env.VITE_SUPABASE_URL;
+  const supabaseAnonKey = import.meta.env.VITE_SUPABASE_ANON_KEY;
+  if (!supabaseUrl || !supabaseAnonKey) {
+    throw new Error('Supabase 配置缺失');
+  }
+
+  return fetch(`${supabaseUrl}/functions/v1/${name}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${session.access_token}`,
+      'apikey': supabaseAnonKey
+    },
+    body: JSON.stringify(body)
+  });
+}
+
+async function analysisFunctionError(response: Response): Promise<Error> {
+  let data: any = null;
+  try {
+    data = await response.json();
+  } catch {
+    // 非 JSON 响应，按 HTTP 状态报错
+  }
+  if (response.status === 401) {
+    return new Error('认证失败：Token无效或已过期，请重新登录后再试');
+  }
+  return new Error(data?.message || data?.error || `HTTP ${response.status}: ${response.statusText}`);
+}
+
+// 调用分析 edge function，返回响应中的 data
+async function callAnalysisFunction(name: AnalysisFunction, body: Record<string, any>): Promise<any> {
+  const response = await postAnalysisFunction(name, body);
+  if (!response.ok) {
+    throw await analysisFunctionError(response);
+  }
+
+  let data: any = null;
+  try {
+    data = await response.json();
+  } catch {
+    // 非 JSON 响应，下面按 HTTP 状态报错
+  }
+
+  if (data?.code !== 'SUCCESS') {
+    throw new Error(data?.message || data?.error || '服务器响应格式错误');
+  }
+  return data.data;
+}
+
+// 流式调用分析 edge function：逐个读取 SSE 事件，delta 回调增量文本，done 返回保存后的分析
+async function streamAnalysisFunction(
+  name: AnalysisFunction,
+  body: Record<string, any>,
+  onDelta: (text: string) => void
+): Promise<DeepSeekAnalysis> {
+  const response = await postAnalysisFunction(name, { ...body, stream: true });
+  if (!response.ok || !response.body) {
+    throw await analysisFunctionError(response);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let boundary: number;
+    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+      if (event === 'delta') {
+        onDelta(payload.content);
+      } else if (event === 'done') {
+        await reader.cancel();
+        return payload.analysis;
+      } else if (event === 'error') {
+        throw new Error(payload.message || '生成分析失败');
+      }
+    }
+  }
+  // 服务端在客户端断开后仍会完成并保存分析
+  throw new Error('连接中断：分析仍在后台生成，请稍后在测试历史中查看结果');
+}
+
 export const deepseekApi = {
-  // 生成DeepSeek分析（testData从本地存储传入）
-  async generateAnalysis(testResultId: string, orderId: string, testData: any, language: 'zh' | 'en' = 'zh'): Promise<DeepSeekAnalysis | null> {
+  // 生成DeepSeek分析（testData从本地存储传入）：传入 onDelta 时流式生成，否则提交异步任务并等待完成
+  async generateAnalysis(
+    testResultId: string,
+    orderId: string,
+    testData: any,
+    language: 'zh' | 'en' = 'zh',
+    onUpdate?: (job: DeepSeekJob, position: number | null) => void,
+    onDelta?: (text: string) => void
+  ): Promise<DeepSeekAnalysis | null> {
     try {
-      const { data: { session } } = await getCurrentSession();
-      
-      if (!session?.access_token) {
-        console.error('User not authenticated');
-        return null;
+      // 流式：边生成边回调增量文本
+      if (onDelta) {
+        return await streamAnalysisFunction('generate_deepseek_analysis', { testResultId, orderId, testData, language }, onDelta);
       }
 
-      const { data, error } = await supabase.functions.invoke('generate_deepseek_analysis', {
-        body: {
-          testResultId,
-          orderId,
-          testData,
-          language
-        },
-        headers: {
-          Authorization: `Bearer ${session.access_token}`
-        }
+      const result = await callAnalysisFunction('generate_deepseek_analysis', {
+        testResultId,
+        orderId,
+        testData,
+        language,
+        async: true
       });
 
-      if (error) {
-        console.error('Error generating analysis:', error);
-        return null;
+      // 该订单已有分析时直接返回
+      if (result.analysis) {
+        return result.analysis;
       }
 
-      return data.data.analysis;
+      return await this.waitForJob('generate_deepseek_analysis', result.job.id, onUpdate);
     } catch (error) {
       console.error('Error generating analysis:', error);
       return null;
     }
   },
 
-  async generateAnalysisFree(testResultId: string, testData: any, language: 'zh' | 'en' = 'zh'): Promise<DeepSeekAnalysis | null> {
+  // 等待异步分析任务完成：订阅任务行的 Realtime 更新，并定期轮询兜底（Realtime 不可用时仍能完成）
+  waitForJob(
+    name: AnalysisFunction,
+    jobId: string,
+    onUpdate?: (job: DeepSeekJob, position: number | null) => void,
+    timeoutMs = JOB_TIMEOUT_MS
+  ): Promise<DeepSeekAnalysis> {
+    return new Promise((resolve, reject) => {
+      let settled = false;
+      let pollTimer: ReturnType<typeof setTimeout> | undefined;
+
+      const channel = supabase
+        .channel(`deepseek-job-${jobId}`)
+        .on(
+          'postgres_changes',
+          { event: 'UPDATE', schema: 'public', table: 'deepseek_jobs', filter: `id=eq.${jobId}` },
+          () => { void poll(); }
+        )
+        .subscribe();
+
+      const finish = (error: Error | null, analysis?: DeepSeekAnalysis) => {
+        if (settled) return;
+        settled = true;
+        clearTimeout(pollTimer);
+        clearTimeout(deadline);
+        supabase.removeChannel(channel);
+        if (error) reject(error);
+        else resolve(analysis as DeepSeekAnalysis);
+      };
+
+      const deadline = setTimeout(
+        () => finish(new Error('分析生成时间较长，请稍后在测试历史中查看结果')),
+        timeoutMs
+      );
+
+      const poll = async () => {
+        try {
+          const { job, position, analysis } = await callAnalysisFunction(name, { jobId });
+          onUpdate?.(job, position);
+          if (job.status === 'succeeded' && analysis) {
+            finish(null, analysis);
+          } else if (job.status === 'failed') {
+            finish(new Error(job.error || '生成分析失败'));
+          }
+        } catch (error) {
+          console.warn('[waitForJob] 查询任务状态失败:', error);
+        }
+        if (!settled) {
+          clearTimeout(pollTimer);
+          pollTimer = setTimeout(poll, JOB_POLL_INTERVAL_MS);
+        }
+      };
+
+      void poll();
+    });
+  },
+
+  async generateAnalysisFree(
+    testResultId: string,
+    testData: any,
+    language: 'zh' | 'en' = 'zh',
+    onUpdate?: (job: DeepSeekJob, position: number | null) => void,
+    onDelta?: (text: string) => void
+  ): Promise<DeepSeekAnalysis | null> {
     const errorCode = 'GENERATE_FREE_ANALYSIS_ERROR';
     try {
       console.log(`🎁 [${errorCode}] 开始生成免费分析:`, { testResultId, language });
@@ -501,130 +696,28 @@ export const deepseekApi = {
         throw new Error('请求体序列化失败，请检查 testData 格式');
       }
 
-      // 获取 Supabase URL 和 anon key
-      const supabaseUrl = import.meta.env.VITE_SUPABASE_URL;
-      const supabaseAnonKey = import.meta.env.VITE_SUPABASE_ANON_KEY;
-      
-      if (!supabaseUrl || !supabaseAnonKey) {
-        throw new Error('Supabase 配置缺失');
+      // 流式：边生成边回调增量文本，完成后返回保存的分析
+      if (onDelta) {
+        console.log(`📡 [${errorCode}] 流式生成分析...`, { testResultId, language, requestBodySize: serializedBody.length });
+        const analysis = await streamAnalysisFunction('generate_deepseek_analysis_free', requestBody, onDelta);
+        console.log(`✅ [${errorCode}] 免费分析生成成功:`, analysis.id);
+        return analysis;
       }
 
-      const functionUrl = `${supabaseUrl}/functions/v1/generate_deepseek_analysis_free`;
-
-      console.log(`🔐 [${errorCode}] 调用 Edge Function...`, {
+      // 提交异步任务后等待完成：浏览器不再为整个生成过程保持一个请求，
+      // 断线或刷新页面后任务仍在后台继续，结果保存在 deepseek_analyses
+      console.log(`📬 [${errorCode}] 提交分析任务...`, {
         testResultId,
         language,
-        hasAccessToken: !!session.access_token,
-        tokenLength: session.access_token?.length || 0,
-        tokenPrefix: session.access_token ? session.access_token.substring(0, 30) + '...' : 'N/A',
         testDataKeys: Object.keys(cleanTestData).slice(0, 10),
-        requestBodySize: serializedBody.length,
-        functionUrl
+        requestBodySize: serializedBody.length
       });
-      
-      // 使用 fetch API 直接调用 Edge Function，确保请求体正确序列化
-      // 添加超时处理（60秒，因为生成分析可能需要较长时间）
-      const controller = new AbortController();
-      const timeoutId = setTimeout(() => controller.abort(), 60000); // 60秒超时
-      
-      let response: Response;
-      try {
-        response = await fetch(functionUrl, {
-          method: 'POST',
-        headers: { 
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${session.access_token}`,
-            'apikey': supabaseAnonKey
-          },
-          body: serializedBody, // 使用已序列化的 JSON 字符串
-          signal: controller.signal
-        });
-        clearTimeout(timeoutId);
-      } catch (fetchError) {
-        clearTimeout(timeoutId);
-        
-        // 如果是超时或连接关闭，尝试从数据库获取已生成的分析
-        if (fetchError instanceof Error && (
-          fetchError.name === 'AbortError' || 
-          fetchError.message.includes('ERR_CONNECTION_CLOSED') ||
-          fetchError.message.includes('network')
-        )) {
-          console.warn(`⚠️ [${errorCode}_TIMEOUT] 请求超时或连接关闭，尝试从数据库获取分析...`);
-          
-          // 等待几秒让 Edge Function 完成
-          await new Promise(resolve => setTimeout(resolve, 3000));
-          
-          // 尝试从数据库获取最新生成的分析
-          try {
-            // 使用 deepseekApi 对象的方法（因为这是在对象方法内部）
-            const { data: existingAnalysis, error: fetchError } = await supabase
-              .from('deepseek_analyses')
-              .select()
-              .eq('test_result_id', testResultId)
-              .order('created_at', { ascending: false })
-              .limit(1)
-              .maybeSingle();
-            
-            if (!fetchError && existingAnalysis) {
-              console.log(`✅ [${errorCode}_RECOVER] 从数据库恢复分析:`, existingAnalysis.id);
-              return existingAnalysis;
-        }
-          } catch (recoverError) {
-            console.error(`❌ [${errorCode}_RECOVER] 恢复失败:`, recoverError);
-          }
-          
-          throw new Error('请求超时：分析可能正在生成中，请稍后刷新页面查看结果');
-        }
-        
-        throw fetchError;
-      }
-
-      // 检查响应状态
-      if (!response.ok) {
-        let errorMessage = '生成分析失败';
-        try {
-          const errorData = await response.json();
-          errorMessage = errorData.message || errorData.error || errorMessage;
-        } catch {
-          errorMessage = `HTTP ${response.status}: ${response.statusText}`;
-        }
-        
-        console.error(`❌ [${errorCode}_003] Edge Function 调用失败:`, {
-          status: response.status,
-          statusText: response.statusText,
-          errorMessage,
-          hasAccessToken: !!session.access_token,
-          tokenLength: session.access_token?.length || 0
-        });
-        
-        // 根据错误类型提供更详细的错误信息
-        if (response.status === 401) {
-          throw new Error('认证失败：Token无效或已过期，请重新登录后再试');
-        } else if (response.status === 400) {
-          throw new Error(errorMessage || '请求参数错误');
-        } else if (response.status === 500) {
-          throw new Error(errorMessage || '服务器错误，请稍后重试');
-        } else {
-          throw new Error(errorMessage || '生成分析失败');
-        }
-      }
-
-      // 解析响应数据
-      let data: any;
-      try {
-        data = await response.json();
-      } catch (parseError) {
-        console.error(`❌ [${errorCode}_004] 解析响应失败:`, parseError);
-        throw new Error('服务器响应格式错误');
-      }
-
-      if (!data || data.code !== 'SUCCESS' || !data.data || !data.data.analysis) {
-        console.error(`❌ [${errorCode}_004] 返回数据格式错误:`, data);
-        throw new Error(data?.message || '返回数据格式错误');
-      }
+      const { job } = await callAnalysisFunction('generate_deepseek_analysis_free', { ...requestBody, async: true });
+      console.log(`✅ [${errorCode}] 分析任务已入队:`, { jobId: job.id, status: job.status });
 
-      console.log(`✅ [${errorCode}] 免费分析生成成功:`, data.data.analysis.id);
-      return data.data.analysis;
+      const analysis = await this.waitForJob('generate_deepseek_analysis_free', job.id, onUpdate);
+      console.log(`✅ [${errorCode}] 免费分析生成成功:`, analysis.id);
+      return analysis;
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : String(error);
       console.error(`❌ [${errorCode}_005] 生成免费分析异常:`, {
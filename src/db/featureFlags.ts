@@ -0,0 +1,120 @@
+import { supabase } from './supabase';
+
+// 功能开关客户端：进程内缓存 + Realtime 推送更新
+// 开关由 feature_flags 表提供（迁移 47，触发器从 system_config / system_settings 同步）。
+// 缓存在 TTL 内直接返回，同一时刻的并发请求合并为一次查询（一次拿到全部开关）；
+// 管理员切换开关后，feature_flags 的 Realtime 变更直接写进缓存并通知订阅者。
+// Realtime 断开时最多在 TTL 后读到新值
+export type FeatureFlag = 'deepseek_enabled' | 'payment_enabled';
+
+const FLAG_TTL_MS = 60 * 1000;
+
+// 表中没有该开关或查询失败时的取值，与原 adminApi 行为一致
+const FLAG_FALLBACKS: Record<FeatureFlag, boolean> = {
+  deepseek_enabled: false,
+  payment_enabled: true
+};
+
+type FlagListener = (flag: FeatureFlag, enabled: boolean) => void;
+
+const cache = new Map<FeatureFlag, boolean>();
+let expiresAt = 0;
+let pending: Promise<void> | null = null;
+const listeners = new Set<FlagListener>();
+let channelStarted = false;
+
+function isFeatureFlag(flag: unknown): flag is FeatureFlag {
+  return typeof flag === 'string' && flag in FLAG_FALLBACKS;
+}
+
+function store(flag: FeatureFlag, enabled: boolean) {
+  const previous = cache.get(flag) ?? FLAG_FALLBACKS[flag];
+  cache.set(flag, enabled);
+  if (previous !== enabled) {
+    listeners.forEach((listener) => listener(flag, enabled));
+  }
+}
+
+// 首次读取开关时订阅 feature_flags 的变更（整个页面会话共用一个 channel）
+function startChannel() {
+  if (channelStarted) return;
+  channelStarted = true;
+  supabase
+    .channel('feature-flags')
+    .on('postgres_changes', { event: '*', schema: 'public', table: 'feature_flags' }, (payload: any) => {
+      if (payload.eventType === 'DELETE') {
+        // 删除事件只带主键（REPLICA IDENTITY DEFAULT），整体重新查询
+        expiresAt = 0;
+        return;
+      }
+      const row = payload.new;
+      if (row && isFeatureFlag(row.flag)) {
+        store(row.flag, row.enabled === true);
+      }
+    })
+    .subscribe((status) => {
+      if (status !== 'SUBSCRIBED') {
+        console.warn('[featureFlags] Realtime 未连接，开关按 TTL 刷新:', status);
+      }
+    });
+}
+
+async function fetchFlags(): Promise<void> {
+  try {
+    const { data, error } = await supabase
+      .from('feature_flags')
+      .select('flag, enabled');
+
+    if (error) {
+      console.error('Error getting feature flags:', error);
+      return;
+    }
+
+    const seen = new Set<FeatureFlag>();
+    (data || []).forEach((row: any) => {
+      if (isFeatureFlag(row.flag)) {
+        seen.add(row.flag);
+        store(row.flag, row.enabled === true);
+      }
+    });
+    (Object.keys(FLAG_FALLBACKS) as FeatureFlag[])
+      .filter((flag) => !seen.has(flag))
+      .forEach((flag) => store(flag, FLAG_FALLBACKS[flag]));
+    expiresAt = Date.now() + FLAG_TTL_MS;
+  } catch (error) {
+    console.error('Error getting feature flags:', error);
+  }
+}
+
+export const featureFlags = {
+  async get(flag: FeatureFlag): Promise<boolean> {
+    startChannel();
+    if (expiresAt <= Date.now()) {
+      if (!pending) {
+        pending = fetchFlags().finally(() => {
+          pending = null;
+        });
+      }
+      await pending;
+    }
+    return cache.get(flag) ?? FLAG_FALLBACKS[flag];
+  },
+
+  // 本页刚写入开关时直接更新缓存，不等 Realtime 回推
+  set(flag: FeatureFlag, enabled: boolean) {
+    store(flag, enabled);
+  },
+
+  invalidate() {
+    expiresAt = 0;
+  },
+
+  // 开关值变化时回调，返回取消订阅函数
+  subscribe(listener: FlagListener): () => void {
+    startChannel();
+    listeners.add(listener);
+    return () => {
+      listeners.delete(listener);
+    };
+  }
+};
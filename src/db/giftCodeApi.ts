@@ -1,7 +1,11 @@
-import { getCurrentUser } from "@/utils/auth";
+import { getCurrentUser, getCurrentSession } from "@/utils/auth";
+import { pickSaveFile, saveResponse, discardSaveFile } from '@/utils/download';
 import { supabase } from './supabase';
 import type { GiftCode, GiftCodeStats, RedeemGiftCodeResult } from '@/types/types';
 
+// 兑换繁忙时的最多重试次数
+const REDEEM_RETRIES = 2;
+
 // 礼品码相关API
 export const giftCodeApi = {
   // 生成礼品码（管理员）
@@ -106,6 +110,56 @@ export const giftCodeApi = {
     }
   },
 
+  // 批量生成礼品码并下载 CSV（管理员）
+  // 整批在数据库一个事务里生成（generate_gift_codes 边缘函数 → generate_gift_codes_bulk），
+  // 不再逐个码往返请求；失败时一个码都不会留下
+  async generateGiftCodes(count: number, maxRedemptions: number = 1, expiresInDays?: number, freeAnalysesCount: number = 15): Promise<boolean> {
+    const filename = `gift-codes-${new Date().toISOString().slice(0, 10)}-${count}.csv`;
+    let fileHandle: any | null = null;
+    let saved = false;
+    try {
+      // 文件选择器需要在用户点击后立即打开，先选文件再请求
+      fileHandle = await pickSaveFile(filename);
+
+      const { data: { session } } = await getCurrentSession();
+      if (!session?.access_token) {
+        console.error('❌ generateGiftCodes: 用户未认证');
+        return false;
+      }
+
+      console.log('🎁 generateGiftCodes: 开始批量生成', { count, maxRedemptions, expiresInDays, freeAnalysesCount });
+      const response = await fetch(`${import.meta.env.VITE_SUPABASE_URL}/functions/v1/generate_gift_codes`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${session.access_token}`,
+          'apikey': import.meta.env.VITE_SUPABASE_ANON_KEY
+        },
+        body: JSON.stringify({
+          count,
+          max_redemptions: maxRedemptions,
+          expires_in_days: expiresInDays ?? null,
+          free_analyses_count: freeAnalysesCount
+        })
+      });
+      if (!response.ok) {
+        console.error('❌ generateGiftCodes: 生成失败', response.status, await response.text());
+        return false;
+      }
+
+      await saveResponse(response, filename, fileHandle);
+      saved = true;
+      console.log('✅ generateGiftCodes: 成功', count);
+      return true;
+    } catch (error) {
+      // 取消文件选择也会到这里
+      console.error('❌ generateGiftCodes: 异常', error);
+      return false;
+    } finally {
+      if (!saved) await discardSaveFile(fileHandle, '礼品码生成失败');
+    }
+  },
+
   // 获取所有礼品码统计（管理员）
   async getAllGiftCodes(): Promise<GiftCodeStats[]> {
     try {
@@ -198,10 +252,19 @@ export const giftCodeApi = {
         p_user_id: user.id 
       });
 
-      const { data, error } = await supabase.rpc('redeem_gift_code', {
+      // 热门码排队超时（lock_timeout）时数据库返回 retryable，稍等随机时间后重试，错开同一时刻的请求
+      let { data, error } = await supabase.rpc('redeem_gift_code', {
         p_code: code.toUpperCase(),
         p_user_id: user.id
       });
+      for (let retry = 1; !error && data?.retryable && retry <= REDEEM_RETRIES; retry++) {
+        console.warn(`⚠️ [giftCodeApi.redeemGiftCode] 兑换繁忙，第 ${retry} 次重试`);
+        await new Promise((resolve) => setTimeout(resolve, 300 * retry + Math.random() * 500));
+        ({ data, error } = await supabase.rpc('redeem_gift_code', {
+          p_code: code.toUpperCase(),
+          p_user_id: user.id
+        }));
+      }
 
       if (error) {
         console.error(`❌ [${errorCode}_003] 数据库函数调用失败:`, {
@@ -0,0 +1,58 @@
+import * as React from "react";
+import { testResultApi } from "@/db/api";
+import { buildNormTable, type NormTable } from "@/utils/norms";
+import type { ScoreNorms } from "@/types/types";
+
+// 常模变化很慢，浏览器缓存半天，同一页面会话内只请求一次
+const CACHE_KEY = "investment_score_norms";
+const CACHE_TTL_MS = 12 * 60 * 60 * 1000;
+
+let pending: Promise<NormTable | null> | null = null;
+
+function readCache(): ScoreNorms | null {
+  try {
+    const cached = localStorage.getItem(CACHE_KEY);
+    if (!cached) return null;
+    const { savedAt, norms } = JSON.parse(cached);
+    return Date.now() - savedAt < CACHE_TTL_MS ? norms : null;
+  } catch {
+    return null;
+  }
+}
+
+function loadNormTable(): Promise<NormTable | null> {
+  if (!pending) {
+    const cached = readCache();
+    pending = cached
+      ? Promise.resolve(buildNormTable(cached))
+      : testResultApi.getScoreNorms().then(norms => {
+          if (!norms) {
+            pending = null;
+            return null;
+          }
+          try {
+            localStorage.setItem(CACHE_KEY, JSON.stringify({ savedAt: Date.now(), norms }));
+          } catch {
+            // 存储空间不足时只用内存中的常模
+          }
+          return buildNormTable(norms);
+        });
+  }
+  return pending;
+}
+
+export function useScoreNorms(): NormTable | null {
+  const [table, setTable] = React.useState<NormTable | null>(null);
+
+  React.useEffect(() => {
+    let active = true;
+    loadNormTable().then(result => {
+      if (active) setTable(result);
+    });
+    return () => {
+      active = false;
+    };
+  }, []);
+
+  return table;
+}
@@ -4,13 +4,15 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { Button } from '@/components/ui/button';
 import { Switch } from '@/components/ui/switch';
 import { Badge } from '@/components/ui/badge';
+import { Progress } from '@/components/ui/progress';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { useToast } from '@/hooks/use-toast';
 import { useAuth } from '@/contexts/AuthContext';
 import { adminApi } from '@/db/adminApi';
 import GiftCodeManager from '@/components/admin/GiftCodeManager';
 import DeepSeekConfig from '@/components/admin/DeepSeekConfig';
-import type { AdminStatistics, TestSubmission, AdminLog, Profile } from '@/types/types';
+import ExportButtons from '@/components/admin/ExportButtons';
+import type { AdminStatistics, TestSubmission, AdminLog, Profile, PageCursor, AdminExportTable } from '@/types/types';
 import {
   BarChart3,
   Users,
@@ -26,6 +28,11 @@ import {
   Calendar
 } from 'lucide-react';
 
+// 列表每次加载的条数（游标分页）
+const PAGE_SIZE = 50;
+// 地区分布显示的国家/地区数
+const COUNTRY_LIMIT = 10;
+
 const AdminDashboard: React.FC = () => {
   const navigate = useNavigate();
   const { toast } = useToast();
@@ -37,6 +44,12 @@ const AdminDashboard: React.FC = () => {
   const [testSubmissions, setTestSubmissions] = useState<TestSubmission[]>([]);
   const [adminLogs, setAdminLogs] = useState<AdminLog[]>([]);
   const [profiles, setProfiles] = useState<Profile[]>([]);
+  const [testsByCountry, setTestsByCountry] = useState<{ country: string | null; count: number; updated_at: string }[]>([]);
+  // 各列表下一页的游标，null 表示已加载完
+  const [submissionsCursor, setSubmissionsCursor] = useState<PageCursor | null>(null);
+  const [logsCursor, setLogsCursor] = useState<PageCursor | null>(null);
+  const [profilesCursor, setProfilesCursor] = useState<PageCursor | null>(null);
+  const [loadingMore, setLoadingMore] = useState<AdminExportTable | null>(null);
   const [paymentEnabled, setPaymentEnabled] = useState(true);
   const [toggling, setToggling] = useState(false);
 
@@ -81,6 +94,7 @@ const AdminDashboard: React.FC = () => {
       // 加载数据
       await Promise.all([
         loadStatistics(),
+        loadTestsByCountry(),
         loadTestSubmissions(),
         loadAdminLogs(),
         loadProfiles(),
@@ -103,21 +117,53 @@ const AdminDashboard: React.FC = () => {
     setStatistics(stats);
   };
 
-  const loadTestSubmissions = async () => {
-    const submissions = await adminApi.getTestSubmissions(50);
-    setTestSubmissions(submissions);
+  // 占比以全部测试为分母；统计未加载时用各地区之和
+  const countryTotal = statistics?.total_tests || testsByCountry.reduce((sum, r) => sum + Number(r.count), 0);
+
+  const loadTestsByCountry = async () => {
+    const rows = await adminApi.getTestsByCountry();
+    setTestsByCountry(rows);
+  };
+
+  // cursor 为空时加载第一页，否则追加下一页
+  const loadTestSubmissions = async (cursor: PageCursor | null = null) => {
+    const page = await adminApi.getTestSubmissions(PAGE_SIZE, cursor);
+    setTestSubmissions(prev => (cursor ? [...prev, ...page.rows] : page.rows));
+    setSubmissionsCursor(page.nextCursor);
   };
 
-  const loadAdminLogs = async () => {
-    const logs = await adminApi.getAdminLogs(50);
-    setAdminLogs(logs);
+  const loadAdminLogs = async (cursor: PageCursor | null = null) => {
+    const page = await adminApi.getAdminLogs(PAGE_SIZE, cursor);
+    setAdminLogs(prev => (cursor ? [...prev, ...page.rows] : page.rows));
+    setLogsCursor(page.nextCursor);
   };
 
-  const loadProfiles = async () => {
-    const allProfiles = await adminApi.getAllProfiles(50);
-    setProfiles(allProfiles);
+  const loadProfiles = async (cursor: PageCursor | null = null) => {
+    const page = await adminApi.getAllProfiles(PAGE_SIZE, cursor);
+    setProfiles(prev => (cursor ? [...prev, ...page.rows] : page.rows));
+    setProfilesCursor(page.nextCursor);
+  };
+
+  const handleLoadMore = async (table: AdminExportTable) => {
+    setLoadingMore(table);
+    try {
+      if (table === 'test_submissions') await loadTestSubmissions(submissionsCursor);
+      if (table === 'admin_logs') await loadAdminLogs(logsCursor);
+      if (table === 'profiles') await loadProfiles(profilesCursor);
+    } finally {
+      setLoadingMore(null);
+    }
   };
 
+  const renderLoadMore = (table: AdminExportTable, cursor: PageCursor | null) =>
+    cursor && (
+      <div className="flex justify-center pt-2">
+        <Button variant="outline" disabled={loadingMore === table} onClick={() => handleLoadMore(table)}>
+          {loadingMore === table ? '加载中...' : '加载更多'}
+        </Button>
+      </div>
+    );
+
   const loadPaymentStatus = async () => {
     const status = await adminApi.getPaymentSystemStatus();
     setPaymentEnabled(status);
@@ -205,7 +251,10 @@ const AdminDashboard: React.FC = () => {
             </Button>
             <div>
               <h1 className="text-3xl font-bold gradient-text">管理员后台</h1>
-              <p className="text-muted-foreground">系统管理和数据统计</p>
+              <p className="text-muted-foreground">
+                系统管理和数据统计
+                {statistics?.refreshed_at && ` · 统计更新于 ${new Date(statistics.refreshed_at).toLocaleString('zh-CN')}`}
+              </p>
             </div>
           </div>
           <div className="flex items-center gap-3">
@@ -319,6 +368,39 @@ const AdminDashboard: React.FC = () => {
           </CardContent>
         </Card>
 
+        {/* Tests by Country */}
+        <Card>
+          <CardHeader>
+            <CardTitle className="flex items-center gap-2">
+              <MapPin className="h-5 w-5" />
+              地区分布
+            </CardTitle>
+            <CardDescription>按国家/地区统计的测试提交数（前 {COUNTRY_LIMIT} 个）</CardDescription>
+          </CardHeader>
+          <CardContent>
+            {testsByCountry.length === 0 ? (
+              <p className="text-sm text-muted-foreground">暂无数据</p>
+            ) : (
+              <div className="space-y-3">
+                {testsByCountry.slice(0, COUNTRY_LIMIT).map((row) => {
+                  const share = countryTotal ? (Number(row.count) / countryTotal) * 100 : 0;
+                  return (
+                    <div key={row.country ?? 'unknown'} className="space-y-1">
+                      <div className="flex items-center justify-between text-sm">
+                        <span className="font-medium">{row.country || '未知'}</span>
+                        <span className="text-muted-foreground">
+                          {row.count} ({share.toFixed(1)}%)
+                        </span>
+                      </div>
+                      <Progress value={share} className="h-2" />
+                    </div>
+                  );
+                })}
+              </div>
+            )}
+          </CardContent>
+        </Card>
+
         {/* System Control */}
         <Card>
           <CardHeader>
@@ -358,12 +440,15 @@ const AdminDashboard: React.FC = () => {
           {/* Test Submissions */}
           <TabsContent value="tests" className="space-y-4">
             <Card>
-              <CardHeader>
-                <CardTitle className="flex items-center gap-2">
-                  <Activity className="h-5 w-5" />
-                  测试提交记录
-                </CardTitle>
-                <CardDescription>最近 50 条测试记录</CardDescription>
+              <CardHeader className="flex flex-row items-start justify-between space-y-0">
+                <div className="space-y-1.5">
+                  <CardTitle className="flex items-center gap-2">
+                    <Activity className="h-5 w-5" />
+                    测试提交记录
+                  </CardTitle>
+                  <CardDescription>按提交时间倒序，每次加载 {PAGE_SIZE} 条</CardDescription>
+                </div>
+                <ExportButtons table="test_submissions" />
               </CardHeader>
               <CardContent>
                 <div className="space-y-4">
@@ -411,6 +496,7 @@ const AdminDashboard: React.FC = () => {
                       ))}
                     </div>
                   )}
+                  {renderLoadMore('test_submissions', submissionsCursor)}
                 </div>
               </CardContent>
             </Card>
@@ -419,12 +505,15 @@ const AdminDashboard: React.FC = () => {
           {/* User Management */}
           <TabsContent value="users" className="space-y-4">
             <Card>
-              <CardHeader>
-                <CardTitle className="flex items-center gap-2">
-                  <Users className="h-5 w-5" />
-                  用户管理
-                </CardTitle>
-                <CardDescription>管理用户角色和权限</CardDescription>
+              <CardHeader className="flex flex-row items-start justify-between space-y-0">
+                <div className="space-y-1.5">
+                  <CardTitle className="flex items-center gap-2">
+                    <Users className="h-5 w-5" />
+                    用户管理
+                  </CardTitle>
+                  <CardDescription>管理用户角色和权限</CardDescription>
+                </div>
+                <ExportButtons table="profiles" />
               </CardHeader>
               <CardContent>
                 <div className="space-y-4">
@@ -472,6 +561,7 @@ const AdminDashboard: React.FC = () => {
                       ))}
                     </div>
                   )}
+                  {renderLoadMore('profiles', profilesCursor)}
                 </div>
               </CardContent>
             </Card>
@@ -490,12 +580,15 @@ const AdminDashboard: React.FC = () => {
           {/* Admin Logs */}
           <TabsContent value="logs" className="space-y-4">
             <Card>
-              <CardHeader>
-                <CardTitle className="flex items-center gap-2">
-                  <Shield className="h-5 w-5" />
-                  审计日志
-                </CardTitle>
-                <CardDescription>管理员操作记录</CardDescription>
+              <CardHeader className="flex flex-row items-start justify-between space-y-0">
+                <div className="space-y-1.5">
+                  <CardTitle className="flex items-center gap-2">
+                    <Shield className="h-5 w-5" />
+                    审计日志
+                  </CardTitle>
+                  <CardDescription>管理员操作记录</CardDescription>
+                </div>
+                <ExportButtons table="admin_logs" />
               </CardHeader>
               <CardContent>
                 <div className="space-y-4">
@@ -539,6 +632,7 @@ const AdminDashboard: React.FC = () => {
                       ))}
                     </div>
                   )}
+                  {renderLoadMore('admin_logs', logsCursor)}
                 </div>
               </CardContent>
             </Card>
@@ -4,7 +4,7 @@ import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { useToast } from '@/hooks/use-toast';
 import { testResultApi, deepseekApi } from '@/db/api';
-import type { TestResult, DeepSeekAnalysis } from '@/types/types';
+import type { TestResult, DeepSeekAnalysis, ScoreNormMetric } from '@/types/types';
 import { ChevronLeft, Download, Calendar } from 'lucide-react';
 import { format } from 'date-fns';
 import { zhCN, enUS } from 'date-fns/locale';
@@ -12,6 +12,8 @@ import { useLanguage } from '@/contexts/LanguageContext';
 import PersonalityChart from '@/components/PersonalityChart';
 import InvestmentRecommendation from '@/components/InvestmentRecommendation';
 import DeepSeekAnalysisCard from '@/components/analysis/DeepSeekAnalysisCard';
+import { useScoreNorms } from '@/hooks/use-score-norms';
+import { formatPercentile, percentileOf } from '@/utils/norms';
 
 const HistoricalResultPage = () => {
   const navigate = useNavigate();
@@ -23,6 +25,13 @@ const HistoricalResultPage = () => {
   const { language } = useLanguage();
   const dateLocale = language === 'zh' ? zhCN : enUS;
   const dateFormatLong = language === 'zh' ? 'yyyy年MM月dd日 HH:mm' : 'MMM dd, yyyy HH:mm';
+  const normTable = useScoreNorms();
+
+  // 在全体用户中的位置（常模未加载或样本不足时不显示）
+  const renderPercentile = (metric: ScoreNormMetric, value: number) => {
+    const text = normTable && formatPercentile(percentileOf(normTable, metric, value));
+    return text ? <span className="ml-2 text-xs font-normal text-muted-foreground">{text}</span> : null;
+  };
 
   useEffect(() => {
     if (!testId) {
@@ -194,25 +203,40 @@ const HistoricalResultPage = () => {
                 <div className="space-y-2">
                   <div className="flex justify-between">
                     <span className="text-muted-foreground">开放性</span>
-                    <span className="font-medium">{testResult.personality_scores.openness.toFixed(1)}</span>
+                    <span className="font-medium">
+                      {testResult.personality_scores.openness.toFixed(1)}
+                      {renderPercentile('openness', testResult.personality_scores.openness)}
+                    </span>
                   </div>
                   <div className="flex justify-between">
                     <span className="text-muted-foreground">尽责性</span>
-                    <span className="font-medium">{testResult.personality_scores.conscientiousness.toFixed(1)}</span>
+                    <span className="font-medium">
+                      {testResult.personality_scores.conscientiousness.toFixed(1)}
+                      {renderPercentile('conscientiousness', testResult.personality_scores.conscientiousness)}
+                    </span>
                   </div>
                   <div className="flex justify-between">
                     <span className="text-muted-foreground">外向性</span>
-                    <span className="font-medium">{testResult.personality_scores.extraversion.toFixed(1)}</span>
+                    <span className="font-medium">
+                      {testResult.personality_scores.extraversion.toFixed(1)}
+                      {renderPercentile('extraversion', testResult.personality_scores.extraversion)}
+                    </span>
                   </div>
                 </div>
                 <div className="space-y-2">
                   <div className="flex justify-between">
                     <span className="text-muted-foreground">宜人性</span>
-                    <span className="font-medium">{testResult.personality_scores.agreeableness.toFixed(1)}</span>
+                    <span className="font-medium">
+                      {testResult.personality_scores.agreeableness.toFixed(1)}
+                      {renderPercentile('agreeableness', testResult.personality_scores.agreeableness)}
+                    </span>
                   </div>
                   <div className="flex justify-between">
                     <span className="text-muted-foreground">神经质</span>
-                    <span className="font-medium">{testResult.personality_scores.neuroticism.toFixed(1)}</span>
+                    <span className="font-medium">
+                      {testResult.personality_scores.neuroticism.toFixed(1)}
+                      {renderPercentile('neuroticism', testResult.personality_scores.neuroticism)}
+                    </span>
                   </div>
                 </div>
               </div>
@@ -275,7 +299,10 @@ const HistoricalResultPage = () => {
                   <p className="text-3xl font-bold text-primary">
                     {testResult.math_finance_scores.percentage.toFixed(0)}%
                   </p>
-                  <p className="text-sm text-muted-foreground">正确率</p>
+                  <p className="text-sm text-muted-foreground">
+                    正确率
+                    {renderPercentile('math', testResult.math_finance_scores.percentage)}
+                  </p>
                 </div>
                 <div className="text-center">
                   <p className="text-3xl font-bold text-primary">
@@ -304,6 +331,7 @@ const HistoricalResultPage = () => {
                 </h3>
                 <p className="text-muted-foreground">
                   风险承受能力评分: {testResult.risk_preference_scores.risk_tolerance}
+                  {renderPercentile('risk', testResult.risk_preference_scores.risk_tolerance)}
                 </p>
               </div>
             </CardContent>
@@ -4,8 +4,10 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { Button } from '@/components/ui/button';
 import { Alert, AlertDescription, AlertTitle } from '@/components/ui/alert';
 import { CheckCircle2, XCircle, Loader2, ArrowRight } from 'lucide-react';
-import { paymentApi } from '@/db/api';
+import { paymentApi, deepseekApi } from '@/db/api';
 import { useToast } from '@/hooks/use-toast';
+import { testResultStorage, deepseekAnalysisStorage } from '@/utils/localStorage';
+import type { DeepSeekJob } from '@/types/types';
 
 const PaymentSuccessPage = () => {
   const [searchParams] = useSearchParams();
@@ -16,6 +18,8 @@ const PaymentSuccessPage = () => {
   // removed unused paymentVerified state
   const [paymentData, setPaymentData] = useState<any>(null);
   const [error, setError] = useState<string | null>(null);
+  const [jobStatus, setJobStatus] = useState<{ job: DeepSeekJob; position: number | null } | null>(null);
+  const [streamedText, setStreamedText] = useState('');
 
   useEffect(() => {
     const sessionId = searchParams.get('session_id');
@@ -51,7 +55,7 @@ const PaymentSuccessPage = () => {
       });
 
       // 生成DeepSeek分析
-      await generateAnalysis(sessionId);
+      await generateAnalysis(paymentResult);
     } catch (err) {
       console.error('Payment verification error:', err);
       setError('支付验证过程中出现错误');
@@ -59,20 +63,55 @@ const PaymentSuccessPage = () => {
     }
   };
 
-  const generateAnalysis = async (sessionId: string) => {
+  const generateAnalysis = async (paymentResult: any) => {
     try {
       setIsGenerating(true);
 
-      // 从订单中获取test_result_id
-      const { data: order } = await paymentApi.verifyPayment(sessionId);
-      
-      if (!order || !order.orderUpdated) {
+      const { orderId, testResultId } = paymentResult;
+      if (!paymentResult.orderUpdated || !orderId || !testResultId) {
         throw new Error('无法获取订单信息');
       }
 
-      // 这里需要从订单元数据中获取test_result_id
-      // 暂时先跳过，在ResultPage中处理
-      
+      // testData 来自本地保存的测试结果
+      const testResult = await testResultStorage.getTestResultById(testResultId) as any;
+      if (!testResult) {
+        throw new Error('本地找不到对应的测试结果');
+      }
+      const testData = {
+        personality_scores: testResult.personality_scores,
+        math_finance_scores: testResult.math_finance_scores,
+        risk_preference_scores: testResult.risk_preference_scores,
+        trading_characteristics: testResult.trading_characteristics,
+        investment_style: testResult.investment_style,
+        euclidean_distance: testResult.euclidean_distance
+      };
+      const lang = (import.meta as any).env.VITE_DEFAULT_LANGUAGE === 'en' ? 'en' : 'zh';
+
+      // 优先流式生成并实时显示；流中断时改为后台任务等待结果（服务端不会重复生成已保存的分析）
+      let analysis = await deepseekApi.generateAnalysis(
+        testResultId,
+        orderId,
+        testData,
+        lang,
+        undefined,
+        (text) => setStreamedText((prev) => prev + text)
+      );
+      if (!analysis) {
+        // 流中断：清掉已显示的半截内容，改为显示任务状态
+        setStreamedText('');
+        analysis = await deepseekApi.generateAnalysis(
+          testResultId,
+          orderId,
+          testData,
+          lang,
+          (job, position) => setJobStatus({ job, position })
+        );
+      }
+      if (!analysis) {
+        throw new Error('生成失败');
+      }
+      await deepseekAnalysisStorage.saveAnalysis(analysis);
+
       setIsGenerating(false);
       
       toast({
@@ -181,8 +220,15 @@ const PaymentSuccessPage = () => {
               <Loader2 className="h-4 w-4 animate-spin" />
               <AlertTitle>正在生成分析报告</AlertTitle>
               <AlertDescription>
-                DeepSeek AI 正在为您生成专业的投资心理分析，请稍候...
+                {jobStatus?.job.status === 'queued'
+                  ? `排队中${jobStatus.position ? `，前面还有 ${jobStatus.position} 份报告` : ''}，您可以离开本页，稍后在测试历史中查看`
+                  : 'DeepSeek AI 正在为您生成专业的投资心理分析，请稍候...'}
               </AlertDescription>
+              {streamedText && (
+                <div className="mt-3 max-h-72 overflow-y-auto whitespace-pre-wrap text-sm text-muted-foreground">
+                  {streamedText}
+                </div>
+              )}
             </Alert>
           ) : (
             <Alert>
@@ -5,8 +5,9 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/com
 import { useToast } from '@/hooks/use-toast';
 import { useAuth } from '@/contexts/AuthContext';
 import { useTest } from '@/contexts/TestContext';
-import { paymentApi, deepseekApi } from '@/db/api';
+import { paymentApi, deepseekApi, testResultApi } from '@/db/api';
 import { adminApi } from '@/db/adminApi';
+import { featureFlags } from '@/db/featureFlags';
 import {
   matchInvestmentStyleV2,
   generatePersonalityAnalysis,
@@ -15,12 +16,15 @@ import {
   generateTradingCharacteristicsAnalysis,
   generateDetailedRecommendations
 } from '@/utils/calculations';
-import type { ReportData, DeepSeekAnalysis } from '@/types/types';
+import type { ReportData, DeepSeekAnalysis, ScoreNormMetric } from '@/types/types';
 import type { MatchingResult } from '@/utils/weightedMatching';
 import { Download, Home, Printer, TrendingUp, Brain, Calculator, Shield } from 'lucide-react';
 import { testResultStorage } from '@/utils/localStorage';
 import PurchaseAnalysisCard from '@/components/analysis/PurchaseAnalysisCard';
 import DeepSeekAnalysisCard from '@/components/analysis/DeepSeekAnalysisCard';
+import SimilarInvestorsCard from '@/components/analysis/SimilarInvestorsCard';
+import { useScoreNorms } from '@/hooks/use-score-norms';
+import { formatPercentile, percentileOf } from '@/utils/norms';
 
 const ResultPage: React.FC = () => {
   const navigate = useNavigate();
@@ -36,6 +40,14 @@ const ResultPage: React.FC = () => {
   const [matchingResults, setMatchingResults] = useState<MatchingResult[]>([]);
   const [paymentEnabled, setPaymentEnabled] = useState(true);
   const [isCheckingPaymentEnabled, setIsCheckingPaymentEnabled] = useState(true);
+  const [isStyleSaved, setIsStyleSaved] = useState(false);
+  const normTable = useScoreNorms();
+
+  // 在全体用户中的位置（常模未加载或样本不足时不显示）
+  const renderPercentile = (metric: ScoreNormMetric, value: number) => {
+    const text = normTable && formatPercentile(percentileOf(normTable, metric, value));
+    return text ? <div className="text-xs text-muted-foreground mt-1">{text}</div> : null;
+  };
 
   useEffect(() => {
     if (!testId || !personalityScores || !tradingCharacteristics || !mathFinanceScores || !riskPreferenceScores) {
@@ -54,6 +66,12 @@ const ResultPage: React.FC = () => {
     checkPurchaseStatus();
   }, []);
 
+  // 管理员切换开关后实时生效，不用刷新页面
+  useEffect(() => featureFlags.subscribe((flag, enabled) => {
+    if (flag === 'deepseek_enabled') setDeepseekEnabled(enabled);
+    if (flag === 'payment_enabled') setPaymentEnabled(enabled);
+  }), []);
+
   const checkDeepSeekStatus = async () => {
     try {
       const enabled = await adminApi.getDeepSeekEnabled();
@@ -148,7 +166,7 @@ const ResultPage: React.FC = () => {
 
       // 仅本地保存历史
       try {
-        testResultStorage.saveTestResult({
+        await testResultStorage.saveTestResult({
           id: testId || `${Date.now()}`,
           user_id: user.id,
           personality_scores: personalityScores,
@@ -162,6 +180,15 @@ const ResultPage: React.FC = () => {
         console.error('本地保存测试结果失败:', e);
       }
 
+      // 投资风格写回数据库，供相似投资者统计使用
+      if (testId) {
+        await testResultApi.updateTestResult(testId, {
+          investment_style: bestMatch.archetype.name,
+          euclidean_distance: bestMatch.final_score
+        });
+        setIsStyleSaved(true);
+      }
+
       toast({
         title: '报告生成成功',
         description: '您的投资策略评估报告已准备就绪',
@@ -429,6 +456,15 @@ const ResultPage: React.FC = () => {
             </Card>
           )}
 
+          {/* Similar Investors */}
+          {testId && matchingResults.length > 0 && (
+            <SimilarInvestorsCard
+              testResultId={testId}
+              investmentStyle={matchingResults[0].archetype.name}
+              ready={isStyleSaved}
+            />
+          )}
+
           {/* Personality Analysis */}
           <Card>
             <CardHeader>
@@ -446,22 +482,27 @@ const ResultPage: React.FC = () => {
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{personalityScores.openness}</div>
                     <div className="text-xs text-muted-foreground">开放性</div>
+                    {renderPercentile('openness', personalityScores.openness)}
                   </div>
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{personalityScores.conscientiousness}</div>
                     <div className="text-xs text-muted-foreground">尽责性</div>
+                    {renderPercentile('conscientiousness', personalityScores.conscientiousness)}
                   </div>
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{personalityScores.extraversion}</div>
                     <div className="text-xs text-muted-foreground">外向性</div>
+                    {renderPercentile('extraversion', personalityScores.extraversion)}
                   </div>
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{personalityScores.agreeableness}</div>
                     <div className="text-xs text-muted-foreground">宜人性</div>
+                    {renderPercentile('agreeableness', personalityScores.agreeableness)}
                   </div>
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{personalityScores.neuroticism}</div>
                     <div className="text-xs text-muted-foreground">神经质</div>
+                    {renderPercentile('neuroticism', personalityScores.neuroticism)}
                   </div>
                 </div>
               )}
@@ -520,6 +561,7 @@ const ResultPage: React.FC = () => {
                   <div className="text-center">
                     <div className="text-3xl font-bold text-primary">{mathFinanceScores.percentage}%</div>
                     <div className="text-xs text-muted-foreground">正确率</div>
+                    {renderPercentile('math', mathFinanceScores.percentage)}
                   </div>
                   <div className="text-sm text-muted-foreground">
                     答对 {mathFinanceScores.correct_answers} / {mathFinanceScores.total_questions} 题
@@ -546,6 +588,7 @@ const ResultPage: React.FC = () => {
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{riskPreferenceScores.risk_tolerance}/10</div>
                     <div className="text-xs text-muted-foreground">风险承受能力</div>
+                    {renderPercentile('risk', riskPreferenceScores.risk_tolerance)}
                   </div>
                   <div className="text-center">
                     <div className="text-2xl font-bold text-primary">{riskPreferenceScores.loss_aversion}/10</div>
@@ -160,6 +160,47 @@ export interface DeepSeekAnalysis {
   created_at: string;
 }
 
+// DeepSeek 分析异步任务（deepseek_jobs 表）
+export type DeepSeekJobStatus = 'queued' | 'running' | 'succeeded' | 'failed';
+
+export interface DeepSeekJob {
+  id: string;
+  kind: 'paid' | 'free';
+  status: DeepSeekJobStatus;
+  test_result_id: string;
+  order_id: string | null;
+  language: 'zh' | 'en';
+  analysis_id: string | null;
+  error: string | null;
+  attempts: number;
+  enqueued_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
+// 相似投资者统计（get_similar_investors，按投资风格聚合）
+export interface SimilarInvestorStat {
+  investment_style: string;
+  investors: number;
+  share: number;
+  avg_distance: number;
+}
+
+// 人群常模（get_score_norms）：各维度按取整分数的人数分布
+export type ScoreNormMetric = keyof PersonalityScores | 'math' | 'risk';
+
+export interface ScoreNormHistogram {
+  // counts[i] 为分数 min + i 的人数
+  min: number;
+  counts: number[];
+}
+
+export interface ScoreNorms {
+  total: number;
+  generated_at: string;
+  metrics: Partial<Record<ScoreNormMetric, ScoreNormHistogram>>;
+}
+
 // 管理员系统类型
 export type UserRole = 'user' | 'admin';
 
@@ -204,6 +245,20 @@ export interface AdminLog {
   created_at: string;
 }
 
+// 管理后台列表的游标分页（按 created_at, id 倒序），nextCursor 为空表示没有更多
+export interface PageCursor {
+  created_at: string;
+  id: string;
+}
+
+export interface Page<T> {
+  rows: T[];
+  nextCursor: PageCursor | null;
+}
+
+export type AdminExportTable = 'test_submissions' | 'profiles' | 'admin_logs';
+export type AdminExportFormat = 'csv' | 'ndjson';
+
 export interface AdminStatistics {
   total_tests: number;
   unique_users: number;
@@ -214,6 +269,8 @@ export interface AdminStatistics {
   first_time_purchases: number;
   second_time_purchases: number;
   repeat_purchases: number;
+  // 汇总表最近一次更新时间
+  refreshed_at: string | null;
 }
 
 export interface UserPricingInfo {
@@ -263,6 +320,7 @@ export interface RedeemGiftCodeResult {
   message: string;
   free_analyses?: number;
   remaining_analyses?: number;
+  retryable?: boolean; // 兑换人数较多、排队超时，可稍后重试
   errorCode?: string;
   errorDetails?: string;
 }
@@ -0,0 +1,44 @@
+// 保存边缘函数返回的文件（导出、批量礼品码等）
+// 浏览器支持 File System Access API 时边下载边写入用户选择的文件，内存占用与文件大小无关；
+// 否则整体读成 Blob 再通过下载链接保存
+
+// 下载链接点击后多久释放 Blob URL
+const REVOKE_DELAY_MS = 60_000;
+
+// 文件选择器只能在用户点击后立即打开，需要在发请求之前调用。
+// 不支持时返回 null；用户取消会抛出 AbortError
+export async function pickSaveFile(filename: string): Promise<any | null> {
+  const picker = (window as any).showSaveFilePicker;
+  return picker ? await picker({ suggestedName: filename }) : null;
+}
+
+export async function saveResponse(response: Response, filename: string, fileHandle: any | null): Promise<void> {
+  if (fileHandle && response.body) {
+    await response.body.pipeTo(await fileHandle.createWritable());
+    return;
+  }
+  const url = URL.createObjectURL(await response.blob());
+  const link = document.createElement('a');
+  link.href = url;
+  link.download = filename;
+  link.click();
+  // 立即释放会让 Firefox 取消还没开始的下载
+  setTimeout(() => URL.revokeObjectURL(url), REVOKE_DELAY_MS);
+}
+
+// 请求或写入失败时处理已选好的文件：选择器此时已经建好了空文件，
+// 能删除就删除（FileSystemHandle.remove，部分浏览器支持），否则写入失败说明，免得留下看似成功的空文件
+export async function discardSaveFile(fileHandle: any | null, message: string): Promise<void> {
+  if (!fileHandle) return;
+  try {
+    if (typeof fileHandle.remove === 'function') {
+      await fileHandle.remove();
+      return;
+    }
+    const writable = await fileHandle.createWritable();
+    await writable.write(`${message}，请重新下载\n`);
+    await writable.close();
+  } catch (error) {
+    console.error('清理下载文件失败:', error);
+  }
+}
@@ -1,35 +1,40 @@
 // 本地存储工具类
-// 所有测试结果和游戏历史记录都存储在本地浏览器中
+// 所有测试结果和游戏历史记录都存储在本地浏览器中：
+// 测试结果、游戏结果、DeepSeek 分析按条存在 IndexedDB（resultStore），接口均为异步；
+// 当前测试进度和用户偏好仍在 localStorage
 
 import type { TestResult, GameResult, DeepSeekAnalysis } from '@/types/types';
+import { resultStore, LEGACY_STORAGE_KEYS } from './resultStore';
 
 const STORAGE_KEYS = {
-  TEST_RESULTS: 'investment_test_results',
-  GAME_RESULTS: 'investment_game_results',
   CURRENT_TEST: 'investment_current_test',
-  USER_PREFERENCES: 'investment_user_preferences',
-  DEEPSEEK_ANALYSES: 'investment_deepseek_analyses'
+  USER_PREFERENCES: 'investment_user_preferences'
 };
 
+const QUOTA_ERROR = '本地存储空间不足，请清理浏览器数据';
+
+// 按日期升序，与原来按保存顺序追加的数组一致
+function byDate<T>(field: keyof T) {
+  return (a: T, b: T) => String(a[field] ?? '').localeCompare(String(b[field] ?? ''));
+}
+
 // 测试结果本地存储
 export const testResultStorage = {
-  // 保存测试结果
-  saveTestResult(result: TestResult): void {
+  // 保存测试结果（同 ID 覆盖）
+  async saveTestResult(result: TestResult): Promise<void> {
     try {
-      const results = this.getAllTestResults();
-      results.push(result);
-      localStorage.setItem(STORAGE_KEYS.TEST_RESULTS, JSON.stringify(results));
+      await resultStore.put('test_results', result);
     } catch (error) {
       console.error('保存测试结果失败:', error);
-      throw new Error('本地存储空间不足，请清理浏览器数据');
+      throw new Error(QUOTA_ERROR);
     }
   },
 
   // 获取所有测试结果
-  getAllTestResults(): TestResult[] {
+  async getAllTestResults(): Promise<TestResult[]> {
     try {
-      const data = localStorage.getItem(STORAGE_KEYS.TEST_RESULTS);
-      return data ? JSON.parse(data) : [];
+      const results = await resultStore.getAll<TestResult>('test_results');
+      return results.sort(byDate<TestResult>('completed_at'));
     } catch (error) {
       console.error('读取测试结果失败:', error);
       return [];
@@ -37,49 +42,49 @@ export const testResultStorage = {
   },
 
   // 根据ID获取测试结果
-  getTestResultById(id: string): TestResult | null {
-    const results = this.getAllTestResults();
-    return results.find(r => r.id === id) || null;
+  async getTestResultById(id: string): Promise<TestResult | null> {
+    try {
+      return await resultStore.get<TestResult>('test_results', id);
+    } catch (error) {
+      console.error('读取测试结果失败:', error);
+      return null;
+    }
   },
 
   // 删除测试结果
-  deleteTestResult(id: string): void {
-    const results = this.getAllTestResults();
-    const filtered = results.filter(r => r.id !== id);
-    localStorage.setItem(STORAGE_KEYS.TEST_RESULTS, JSON.stringify(filtered));
+  async deleteTestResult(id: string): Promise<void> {
+    await resultStore.delete('test_results', id);
   },
 
   // 清空所有测试结果
-  clearAllTestResults(): void {
-    localStorage.removeItem(STORAGE_KEYS.TEST_RESULTS);
+  async clearAllTestResults(): Promise<void> {
+    await resultStore.clear('test_results');
   },
 
   // 导出测试结果（用于备份）
-  exportTestResults(): string {
-    const results = this.getAllTestResults();
+  async exportTestResults(): Promise<string> {
+    const results = await this.getAllTestResults();
     return JSON.stringify(results, null, 2);
   }
 };
 
 // 游戏结果本地存储
 export const gameResultStorage = {
-  // 保存游戏结果
-  saveGameResult(result: GameResult): void {
+  // 保存游戏结果（同 ID 覆盖）
+  async saveGameResult(result: GameResult): Promise<void> {
     try {
-      const results = this.getAllGameResults();
-      results.push(result);
-      localStorage.setItem(STORAGE_KEYS.GAME_RESULTS, JSON.stringify(results));
+      await resultStore.put('game_results', result);
     } catch (error) {
       console.error('保存游戏结果失败:', error);
-      throw new Error('本地存储空间不足，请清理浏览器数据');
+      throw new Error(QUOTA_ERROR);
     }
   },
 
   // 获取所有游戏结果
-  getAllGameResults(): GameResult[] {
+  async getAllGameResults(): Promise<GameResult[]> {
     try {
-      const data = localStorage.getItem(STORAGE_KEYS.GAME_RESULTS);
-      return data ? JSON.parse(data) : [];
+      const results = await resultStore.getAll<GameResult>('game_results');
+      return results.sort(byDate<GameResult>('completed_at'));
     } catch (error) {
       console.error('读取游戏结果失败:', error);
       return [];
@@ -87,26 +92,29 @@ export const gameResultStorage = {
   },
 
   // 根据游戏类型获取结果
-  getGameResultsByType(gameType: string): GameResult[] {
-    const results = this.getAllGameResults();
-    return results.filter(r => r.game_type === gameType);
+  async getGameResultsByType(gameType: string): Promise<GameResult[]> {
+    try {
+      const results = await resultStore.getAllByIndex<GameResult>('game_results', 'game_type', gameType);
+      return results.sort(byDate<GameResult>('completed_at'));
+    } catch (error) {
+      console.error('读取游戏结果失败:', error);
+      return [];
+    }
   },
 
   // 删除游戏结果
-  deleteGameResult(id: string): void {
-    const results = this.getAllGameResults();
-    const filtered = results.filter(r => r.id !== id);
-    localStorage.setItem(STORAGE_KEYS.GAME_RESULTS, JSON.stringify(filtered));
+  async deleteGameResult(id: string): Promise<void> {
+    await resultStore.delete('game_results', id);
   },
 
   // 清空所有游戏结果
-  clearAllGameResults(): void {
-    localStorage.removeItem(STORAGE_KEYS.GAME_RESULTS);
+  async clearAllGameResults(): Promise<void> {
+    await resultStore.clear('game_results');
   },
 
   // 导出游戏结果
-  exportGameResults(): string {
-    const results = this.getAllGameResults();
+  async exportGameResults(): Promise<string> {
+    const results = await this.getAllGameResults();
     return JSON.stringify(results, null, 2);
   }
 };
@@ -153,41 +161,62 @@ export const userPreferencesStorage = {
 
 // 存储空间检查
 export const storageUtils = {
-  // 检查存储空间使用情况
-  getStorageUsage(): { used: number; total: number; percentage: number } {
-    let used = 0;
+  // 检查存储空间使用情况：结果都在 IndexedDB，用浏览器对本站点的存储估算（含 IndexedDB）和配额；
+  // 不支持 StorageManager 的浏览器退回到只统计 localStorage（按 5MB 计）
+  async getStorageUsage(): Promise<{ used: number; total: number; percentage: number }> {
+    let localUsed = 0;
     for (const key in localStorage) {
       if (localStorage.hasOwnProperty(key)) {
-        used += localStorage[key].length + key.length;
+        localUsed += localStorage[key].length + key.length;
       }
     }
-    
-    // 大多数浏览器的 localStorage 限制是 5-10MB
-    const total = 5 * 1024 * 1024; // 假设 5MB
+
+    let used = localUsed;
+    let total = 5 * 1024 * 1024;
+    try {
+      const estimate = await navigator.storage?.estimate?.();
+      if (estimate?.quota) {
+        // Chrome 的 usage 不含 localStorage，这里一并计入
+        used = (estimate.usage ?? 0) + localUsed;
+        total = estimate.quota;
+      }
+    } catch (error) {
+      console.error('读取存储空间估算失败:', error);
+    }
     const percentage = (used / total) * 100;
-    
+
     return { used, total, percentage };
   },
 
   // 检查是否有足够空间
-  hasEnoughSpace(requiredBytes: number = 1024 * 1024): boolean {
-    const { used, total } = this.getStorageUsage();
+  async hasEnoughSpace(requiredBytes: number = 1024 * 1024): Promise<boolean> {
+    const { used, total } = await this.getStorageUsage();
     return (total - used) > requiredBytes;
   },
 
   // 清理所有应用数据
-  clearAllAppData(): void {
-    Object.values(STORAGE_KEYS).forEach(key => {
+  async clearAllAppData(): Promise<void> {
+    [...Object.values(STORAGE_KEYS), ...LEGACY_STORAGE_KEYS].forEach(key => {
       localStorage.removeItem(key);
     });
+    await Promise.all([
+      testResultStorage.clearAllTestResults(),
+      gameResultStorage.clearAllGameResults(),
+      resultStore.clear('deepseek_analyses')
+    ]);
   },
 
   // 导出所有数据
-  exportAllData(): string {
+  async exportAllData(): Promise<string> {
+    const [testResults, gameResults, deepseekAnalyses] = await Promise.all([
+      testResultStorage.getAllTestResults(),
+      gameResultStorage.getAllGameResults(),
+      deepseekAnalysisStorage.getAllAnalyses()
+    ]);
     const allData = {
-      testResults: testResultStorage.getAllTestResults(),
-      gameResults: gameResultStorage.getAllGameResults(),
-      deepseekAnalyses: deepseekAnalysisStorage.getAllAnalyses(),
+      testResults,
+      gameResults,
+      deepseekAnalyses,
       preferences: userPreferencesStorage.getPreferences(),
       exportDate: new Date().toISOString()
     };
@@ -195,37 +224,46 @@ export const storageUtils = {
   }
 };
 
-// DeepSeek 分析本地存储
+// DeepSeek 分析本地存储（每个测试结果一条，按 test_result_id 覆盖）
 export const deepseekAnalysisStorage = {
-  saveAnalysis(analysis: DeepSeekAnalysis): void {
-    const list = this.getAllAnalyses();
-    // 去重：按 test_result_id 覆盖
-    const filtered = list.filter(a => a.test_result_id !== analysis.test_result_id);
-    filtered.push(analysis);
-    localStorage.setItem(STORAGE_KEYS.DEEPSEEK_ANALYSES, JSON.stringify(filtered));
+  async saveAnalysis(analysis: DeepSeekAnalysis): Promise<void> {
+    try {
+      await resultStore.put('deepseek_analyses', analysis);
+    } catch (error) {
+      console.error('保存分析失败:', error);
+      throw new Error(QUOTA_ERROR);
+    }
   },
 
-  getAllAnalyses(): DeepSeekAnalysis[] {
-    const data = localStorage.getItem(STORAGE_KEYS.DEEPSEEK_ANALYSES);
-    return data ? JSON.parse(data) : [];
+  async getAllAnalyses(): Promise<DeepSeekAnalysis[]> {
+    try {
+      const list = await resultStore.getAll<DeepSeekAnalysis>('deepseek_analyses');
+      return list.sort(byDate<DeepSeekAnalysis>('created_at'));
+    } catch (error) {
+      console.error('读取分析失败:', error);
+      return [];
+    }
   },
 
-  getByTestResultId(testResultId: string): DeepSeekAnalysis | null {
-    const list = this.getAllAnalyses();
-    return list.find(a => a.test_result_id === testResultId) || null;
+  async getByTestResultId(testResultId: string): Promise<DeepSeekAnalysis | null> {
+    try {
+      return await resultStore.get<DeepSeekAnalysis>('deepseek_analyses', testResultId);
+    } catch (error) {
+      console.error('读取分析失败:', error);
+      return null;
+    }
   },
 
-  deleteByTestResultId(testResultId: string): void {
-    const list = this.getAllAnalyses().filter(a => a.test_result_id !== testResultId);
-    localStorage.setItem(STORAGE_KEYS.DEEPSEEK_ANALYSES, JSON.stringify(list));
+  async deleteByTestResultId(testResultId: string): Promise<void> {
+    await resultStore.delete('deepseek_analyses', testResultId);
   },
 
-  exportOne(testResultId: string): string {
-    const a = this.getByTestResultId(testResultId);
+  async exportOne(testResultId: string): Promise<string> {
+    const a = await this.getByTestResultId(testResultId);
     return JSON.stringify(a ?? {}, null, 2);
   },
 
-  exportAll(): string {
-    return JSON.stringify(this.getAllAnalyses(), null, 2);
+  async exportAll(): Promise<string> {
+    return JSON.stringify(await this.getAllAnalyses(), null, 2);
   }
 };
@@ -0,0 +1,46 @@
+// 人群常模百分位
+// 常模是各维度按取整分数的人数分布（score_norm_buckets，见 41 号迁移），
+// 人格五维和风险容忍度各 11 档，数学得分 101 档。构建时累加一次，之后每次查询 O(1)
+
+import type { ScoreNorms, ScoreNormMetric } from '@/types/types';
+
+export interface NormTable {
+  total: number;
+  metrics: Partial<Record<ScoreNormMetric, { min: number; counts: number[]; below: number[] }>>;
+}
+
+// 常模少于该人数时不展示百分位，避免误导
+export const MIN_NORM_SAMPLE = 100;
+
+export function buildNormTable(norms: ScoreNorms): NormTable {
+  const metrics: NormTable['metrics'] = {};
+  for (const metric of Object.keys(norms.metrics) as ScoreNormMetric[]) {
+    const hist = norms.metrics[metric];
+    if (!hist) continue;
+    const below: number[] = [];
+    let sum = 0;
+    for (const count of hist.counts) {
+      below.push(sum);
+      sum += count;
+    }
+    metrics[metric] = { min: hist.min, counts: hist.counts, below };
+  }
+  return { total: norms.total, metrics };
+}
+
+// 得分低于 value 的人数占比（0-100），同分的人计一半；样本不足或没有该维度时返回 null
+export function percentileOf(table: NormTable, metric: ScoreNormMetric, value: number): number | null {
+  const hist = table.metrics[metric];
+  if (!hist || table.total < MIN_NORM_SAMPLE) return null;
+
+  const index = Math.round(value) - hist.min;
+  if (index < 0) return 0;
+  if (index >= hist.counts.length) return 100;
+  return ((hist.below[index] + hist.counts[index] / 2) / table.total) * 100;
+}
+
+// 展示文案：高于 X% 的用户
+export function formatPercentile(percentile: number | null): string | null {
+  if (percentile === null) return null;
+  return `高于 ${Math.min(99, Math.max(1, Math.round(percentile)))}% 的用户`;
+}
@@ -0,0 +1,132 @@
+// 测试结果 / 游戏结果 / DeepSeek 分析的本地存储（IndexedDB）
+// 原来每类记录整体存成 localStorage 里的一个 JSON 数组，每次读写、按 ID 查找都要解析并写回整个数组，
+// 记录多了既慢又容易超出 5MB 配额。这里每条记录单独存一行，按主键 / 索引读写，
+// 数据库在第一次使用时才打开（懒加载），首次打开时把旧的 localStorage 数组一次性迁移过来
+
+const DB_NAME = 'investment_results';
+const DB_VERSION = 1;
+
+export type ResultStoreName = 'test_results' | 'game_results' | 'deepseek_analyses';
+
+type StoreSchema = {
+  keyPath: string;
+  indexes: string[];
+  legacyKey: string; // 迁移来源：原 localStorage 键
+};
+
+// 主键与原实现的去重方式一致：测试 / 游戏结果按 id，DeepSeek 分析按 test_result_id 覆盖
+const SCHEMA: Record<ResultStoreName, StoreSchema> = {
+  test_results: {
+    keyPath: 'id',
+    indexes: ['completed_at'],
+    legacyKey: 'investment_test_results'
+  },
+  game_results: {
+    keyPath: 'id',
+    indexes: ['completed_at', 'game_type'],
+    legacyKey: 'investment_game_results'
+  },
+  deepseek_analyses: {
+    keyPath: 'test_result_id',
+    indexes: ['id', 'created_at'],
+    legacyKey: 'investment_deepseek_analyses'
+  }
+};
+
+export const LEGACY_STORAGE_KEYS = Object.values(SCHEMA).map((s) => s.legacyKey);
+
+let dbPromise: Promise<IDBDatabase> | null = null;
+
+// 建表并在同一个升级事务里迁移旧数据；事务提交后才删除 localStorage 里的旧数组
+function upgrade(db: IDBDatabase, tx: IDBTransaction) {
+  const migrated: string[] = [];
+  (Object.keys(SCHEMA) as ResultStoreName[]).forEach((name) => {
+    const schema = SCHEMA[name];
+    const store = db.createObjectStore(name, { keyPath: schema.keyPath });
+    schema.indexes.forEach((index) => store.createIndex(index, index));
+
+    try {
+      const data = localStorage.getItem(schema.legacyKey);
+      const records = data ? JSON.parse(data) : [];
+      if (Array.isArray(records)) {
+        records
+          .filter((r) => r && r[schema.keyPath] !== undefined && r[schema.keyPath] !== null)
+          .forEach((r) => store.put(r));
+      }
+      migrated.push(schema.legacyKey);
+    } catch (error) {
+      console.error(`迁移本地记录失败 (${schema.legacyKey}):`, error);
+    }
+  });
+  tx.addEventListener('complete', () => {
+    migrated.forEach((key) => localStorage.removeItem(key));
+  });
+}
+
+function openDb(): Promise<IDBDatabase> {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve, reject) => {
+      const request = indexedDB.open(DB_NAME, DB_VERSION);
+      request.onupgradeneeded = (event) => {
+        if (event.oldVersion < 1) upgrade(request.result, request.transaction!);
+      };
+      request.onsuccess = () => {
+        const db = request.result;
+        // 其它标签页升级数据库时让出连接，下次使用重新打开
+        db.onversionchange = () => {
+          db.close();
+          dbPromise = null;
+        };
+        resolve(db);
+      };
+      request.onerror = () => {
+        dbPromise = null;
+        reject(request.error);
+      };
+    });
+  }
+  return dbPromise;
+}
+
+// 在单个事务里执行请求，事务提交后返回结果（写入此时已落盘）
+async function run<T>(
+  name: ResultStoreName,
+  mode: IDBTransactionMode,
+  fn: (store: IDBObjectStore) => IDBRequest<T>
+): Promise<T> {
+  const db = await openDb();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(name, mode);
+    const request = fn(tx.objectStore(name));
+    tx.oncomplete = () => resolve(request.result);
+    tx.onerror = () => reject(tx.error ?? request.error);
+    tx.onabort = () => reject(tx.error ?? request.error);
+  });
+}
+
+export const resultStore = {
+  put<T>(name: ResultStoreName, record: T): Promise<void> {
+    return run(name, 'readwrite', (store) => store.put(record)).then(() => undefined);
+  },
+
+  async get<T>(name: ResultStoreName, key: string): Promise<T | null> {
+    const record = await run<T | undefined>(name, 'readonly', (store) => store.get(key));
+    return record ?? null;
+  },
+
+  getAll<T>(name: ResultStoreName): Promise<T[]> {
+    return run<T[]>(name, 'readonly', (store) => store.getAll());
+  },
+
+  getAllByIndex<T>(name: ResultStoreName, index: string, value: IDBValidKey): Promise<T[]> {
+    return run<T[]>(name, 'readonly', (store) => store.index(index).getAll(value));
+  },
+
+  delete(name: ResultStoreName, key: string): Promise<void> {
+    return run(name, 'readwrite', (store) => store.delete(key)).then(() => undefined);
+  },
+
+  clear(name: ResultStoreName): Promise<void> {
+    return run(name, 'readwrite', (store) => store.clear()).then(() => undefined);
+  }
+};
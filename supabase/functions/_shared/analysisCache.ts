@@ -0,0 +1,83 @@
+import type { SupabaseClient } from "jsr:@supabase/supabase-js@2";
+
+// DeepSeek 分析缓存（表 deepseek_analysis_cache），付费与免费函数共用。
+// 相同的提示词模板 + 测试数据 + 语言 + 模型 + 提示词版本直接复用已生成的分析；
+// 两个函数的提示词不同，缓存按 template 隔离，提示词版本由各函数自己维护（见各自的 PROMPT_VERSION）
+const CACHE_TTL_HOURS = Number(Deno.env.get("DEEPSEEK_CACHE_TTL_HOURS") || "720");
+const cacheEnabled = Deno.env.get("DEEPSEEK_CACHE_DISABLED") !== "true";
+
+export type CacheTemplate = "paid" | "free";
+
+// 只保留进入提示词的字段，递归排序键并去掉空值，使等价的 testData 得到同一个 JSON
+function normalizeForCache(value: any): any {
+  if (Array.isArray(value)) return value.map(normalizeForCache);
+  if (value && typeof value === 'object') {
+    const out: Record<string, any> = {};
+    for (const key of Object.keys(value).sort()) {
+      if (value[key] !== undefined && value[key] !== null) out[key] = normalizeForCache(value[key]);
+    }
+    return out;
+  }
+  return value;
+}
+
+export function createAnalysisCache(supabase: SupabaseClient, template: CacheTemplate, promptVersion: string) {
+  async function analysisCacheKey(testData: any, language: string, model: string): Promise<string> {
+    const material = JSON.stringify({
+      template,
+      testData: normalizeForCache({
+        personality_scores: testData.personality_scores,
+        math_finance_scores: testData.math_finance_scores,
+        risk_preference_scores: testData.risk_preference_scores,
+        trading_characteristics: testData.trading_characteristics,
+        investment_style: testData.investment_style,
+        euclidean_distance: testData.euclidean_distance,
+      }),
+      language,
+      model,
+      promptVersion,
+    });
+    const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(material));
+    return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+  }
+
+  // 缓存读写失败只记录日志，不影响正常生成
+  async function readAnalysisCache(cacheKey: string): Promise<string | null> {
+    if (!cacheEnabled) return null;
+    const { data, error } = await supabase
+      .from('deepseek_analysis_cache')
+      .select('analysis_content')
+      .eq('cache_key', cacheKey)
+      .gt('expires_at', new Date().toISOString())
+      .maybeSingle();
+    if (error) console.error(`⚠️ [analysisCache] 读取缓存失败:`, error);
+    const hit = !!data?.analysis_content;
+    const { error: statsError } = await supabase.rpc('record_deepseek_cache_lookup', {
+      p_cache_key: cacheKey,
+      p_template: template,
+      p_prompt_version: promptVersion,
+      p_hit: hit,
+    });
+    if (statsError) console.error(`⚠️ [analysisCache] 记录命中统计失败:`, statsError);
+    return hit ? data.analysis_content : null;
+  }
+
+  async function writeAnalysisCache(cacheKey: string, language: string, model: string, prompt: string, content: string): Promise<void> {
+    if (!cacheEnabled) return;
+    const { error } = await supabase
+      .from('deepseek_analysis_cache')
+      .upsert({
+        cache_key: cacheKey,
+        template,
+        prompt_version: promptVersion,
+        language,
+        model,
+        analysis_content: content,
+        prompt_used: prompt,
+        expires_at: new Date(Date.now() + CACHE_TTL_HOURS * 3600 * 1000).toISOString(),
+      });
+    if (error) console.error(`⚠️ [analysisCache] 写入缓存失败:`, error);
+  }
+
+  return { analysisCacheKey, readAnalysisCache, writeAnalysisCache };
+}
@@ -0,0 +1,150 @@
+import type { SupabaseClient } from "jsr:@supabase/supabase-js@2";
+import { createSingleFlight } from "./singleFlight.ts";
+
+// 异步任务（deepseek_jobs）：客户端以 async: true 提交后立即拿到 job，后台 worker 以有限并发调用 DeepSeek，
+// 客户端通过 Realtime 订阅任务行（或以 { jobId } 轮询）等待完成。
+// 并发上限是全局的：claim_deepseek_job 统计所有函数实例上正在运行的任务
+declare const EdgeRuntime: { waitUntil(promise: Promise<unknown>): void };
+
+const JOB_MAX_RUNNING = Number(Deno.env.get("DEEPSEEK_JOB_MAX_RUNNING") || "4");
+const JOB_LANES = 2; // 单个函数实例内同时处理的任务数
+const JOB_LEASE_SECONDS = 300; // 超过后视为 worker 已被回收，任务重新排队
+const JOB_COLUMNS = 'id, kind, status, test_result_id, order_id, language, analysis_id, error, attempts, enqueued_at, started_at, finished_at, locked_until';
+
+export type JobKind = "paid" | "free";
+
+type JobQueueOptions = {
+  kind: JobKind;
+  // 生成并保存一个任务的分析，返回保存的 deepseek_analyses 行；失败时抛出，错误信息记到任务上
+  generate: (job: any) => Promise<any>;
+};
+
+export function createJobQueue(supabase: SupabaseClient, { kind, generate }: JobQueueOptions) {
+  const { joinFlight, finishFlight, findFlightAnalysis } = createSingleFlight(supabase);
+
+  async function enqueueJob(fields: Record<string, any>): Promise<any> {
+    const { data: job, error } = await supabase
+      .from('deepseek_jobs')
+      .insert({ kind, ...fields })
+      .select(JOB_COLUMNS)
+      .single();
+    if (!error) return job;
+    if (error.code !== '23505') throw new Error(`提交分析任务失败: ${error.message}`);
+
+    // 同一测试结果和语言已有未完成的任务（双击、重试）：直接返回它
+    const { data: active } = await supabase
+      .from('deepseek_jobs')
+      .select(JOB_COLUMNS)
+      .eq('kind', kind)
+      .eq('test_result_id', fields.test_result_id)
+      .eq('language', fields.language)
+      .in('status', ['queued', 'running'])
+      .maybeSingle();
+    if (!active) throw new Error('提交分析任务失败: 请重试');
+    return active;
+  }
+
+  // 在响应返回后继续消费队列
+  function kickWorkers(): void {
+    EdgeRuntime.waitUntil(drainJobs().catch((error) => console.error(`❌ [deepseekJobs] worker 异常:`, error)));
+  }
+
+  async function drainJobs(): Promise<void> {
+    const lane = async () => {
+      while (true) {
+        const { data: jobs, error } = await supabase.rpc('claim_deepseek_job', {
+          p_kind: kind,
+          p_max_running: JOB_MAX_RUNNING,
+          p_lease_seconds: JOB_LEASE_SECONDS,
+        });
+        if (error) {
+          console.error(`❌ [deepseekJobs] 领取任务失败:`, error);
+          return;
+        }
+        // 队列为空或已达到并发上限；正在运行的任务结束后由其所在实例继续领取
+        if (!jobs || jobs.length === 0) return;
+        await runJob(jobs[0]);
+      }
+    };
+    await Promise.all(Array.from({ length: JOB_LANES }, lane));
+  }
+
+  async function runJob(job: any): Promise<void> {
+    const startedAt = Date.now();
+    console.log(`🛠️ [deepseekJobs] 开始任务:`, {
+      jobId: job.id,
+      kind,
+      attempt: job.attempts,
+      waitMs: startedAt - new Date(job.enqueued_at).getTime(),
+    });
+
+    let analysisId: string | null = null;
+    let jobError: string | null = null;
+    let flightKey: string | null = null;
+    try {
+      // 客户端流中断后改走队列时，流式请求可能仍在后台生成：与它合并而不是重复调用 DeepSeek（免费分析也不会重复扣次数）。
+      // 只复用该 (测试结果, 语言) 正在进行或刚结束的那次生成的结果
+      const requestFlightKey = `${kind}:${job.test_result_id}:${job.language}`;
+      const flight = await joinFlight(requestFlightKey);
+      if (flight.leader) flightKey = requestFlightKey;
+      const shared = !flight.leader && flight.analysisId
+        ? await findFlightAnalysis(flight.analysisId, job.user_id, job.order_id)
+        : null;
+      const analysis = shared ?? await generate(job);
+      analysisId = analysis.id;
+    } catch (error) {
+      jobError = error instanceof Error ? error.message : String(error);
+    } finally {
+      if (flightKey) await finishFlight(flightKey, analysisId);
+    }
+
+    const { error } = await supabase.rpc('complete_deepseek_job', {
+      p_job_id: job.id,
+      p_analysis_id: analysisId,
+      p_error: jobError,
+    });
+    if (error) console.error(`❌ [deepseekJobs] 更新任务状态失败:`, error);
+    console.log(`${jobError ? '❌' : '✅'} [deepseekJobs] 任务结束:`, {
+      jobId: job.id,
+      runMs: Date.now() - startedAt,
+      error: jobError,
+    });
+  }
+
+  // 任务状态、排队位置和完成后的分析；任务不存在（或不属于该用户）时返回 null
+  async function jobStatus(jobId: string, userId: string): Promise<{ job: any; position: number | null; analysis: any } | null> {
+    const { data: job, error } = await supabase
+      .from('deepseek_jobs')
+      .select(JOB_COLUMNS)
+      .eq('id', jobId)
+      .eq('user_id', userId)
+      .maybeSingle();
+    if (error) throw new Error(`查询任务失败: ${error.message}`);
+    if (!job) return null;
+
+    // 没有 worker 在处理（排队中，或租约已过期）时补一次消费
+    if (job.status === 'queued' || (job.status === 'running' && new Date(job.locked_until).getTime() < Date.now())) {
+      kickWorkers();
+    }
+
+    let position: number | null = null;
+    if (job.status === 'queued') {
+      const { count } = await supabase
+        .from('deepseek_jobs')
+        .select('id', { count: 'exact', head: true })
+        .eq('kind', kind)
+        .eq('status', 'queued')
+        .lt('enqueued_at', job.enqueued_at);
+      position = count ?? 0;
+    }
+
+    let analysis = null;
+    if (job.status === 'succeeded' && job.analysis_id) {
+      const { data } = await supabase.from('deepseek_analyses').select('*').eq('id', job.analysis_id).maybeSingle();
+      analysis = data;
+    }
+    return { job, position, analysis };
+  }
+
+  return { enqueueJob, kickWorkers, jobStatus };
+}
@@ -0,0 +1,85 @@
+import type { SupabaseClient } from "jsr:@supabase/supabase-js@2";
+
+// Single-flight：同一 (testResultId, language) 同时只有一个请求调用 DeepSeek（leader），
+// 其余并发请求等待 leader 的结果。租约在 deepseek_generation_flights 表里，跨 isolate 生效；
+// 同一 isolate 内的等待者直接等 leader 的 Promise，不必轮询数据库。
+const FLIGHT_TTL_SECONDS = 180; // leader 租约，需长于最慢的一次 DeepSeek 调用
+const FLIGHT_WAIT_MS = 150_000;
+const FLIGHT_POLL_MS = 500;
+const localFlights = new Map<string, { promise: Promise<string | null>; resolve: (id: string | null) => void }>();
+
+export type Flight = { leader: true } | { leader: false; analysisId: string | null };
+
+export function createSingleFlight(supabase: SupabaseClient) {
+  // 返回 leader: true 时调用方负责生成并调用 finishFlight；否则 analysisId 为 leader 保存的分析
+  async function joinFlight(flightKey: string): Promise<Flight> {
+    const deadline = Date.now() + FLIGHT_WAIT_MS;
+    while (Date.now() < deadline) {
+      const local = localFlights.get(flightKey);
+      if (local) {
+        const analysisId = await local.promise;
+        if (analysisId) return { leader: false, analysisId };
+        continue; // leader 失败，重新竞争
+      }
+
+      const { data: acquired, error } = await supabase.rpc('acquire_deepseek_flight', {
+        p_flight_key: flightKey,
+        p_ttl_seconds: FLIGHT_TTL_SECONDS,
+      });
+      if (error) {
+        // 租约不可用时退化为不合并，不阻塞生成
+        console.error(`⚠️ [singleFlight] 获取租约失败:`, error);
+        return { leader: true };
+      }
+      if (acquired) {
+        let resolve: (id: string | null) => void = () => {};
+        const promise = new Promise<string | null>((r) => { resolve = r; });
+        localFlights.set(flightKey, { promise, resolve });
+        return { leader: true };
+      }
+
+      const analysisId = await waitForFlight(flightKey, deadline);
+      if (analysisId) return { leader: false, analysisId };
+    }
+    return { leader: false, analysisId: null };
+  }
+
+  // 轮询其他 isolate 上的 leader；返回 null 表示 leader 失败或租约过期，应重新竞争
+  async function waitForFlight(flightKey: string, deadline: number): Promise<string | null> {
+    while (Date.now() < deadline) {
+      const { data: flight } = await supabase
+        .from('deepseek_generation_flights')
+        .select('analysis_id, expires_at')
+        .eq('flight_key', flightKey)
+        .maybeSingle();
+      if (!flight) return null;
+      if (flight.analysis_id) return flight.analysis_id;
+      if (new Date(flight.expires_at).getTime() <= Date.now()) return null;
+      await new Promise((r) => setTimeout(r, FLIGHT_POLL_MS));
+    }
+    return null;
+  }
+
+  async function finishFlight(flightKey: string, analysisId: string | null): Promise<void> {
+    localFlights.get(flightKey)?.resolve(analysisId);
+    localFlights.delete(flightKey);
+    const { error } = await supabase.rpc('finish_deepseek_flight', {
+      p_flight_key: flightKey,
+      p_analysis_id: analysisId,
+    });
+    if (error) console.error(`⚠️ [singleFlight] 释放租约失败:`, error);
+  }
+
+  // leader 交出的分析（正在进行或刚结束的那次生成）；只在属于该用户（及该订单）时复用
+  async function findFlightAnalysis(analysisId: string, userId: string, orderId?: string | null): Promise<any> {
+    const { data } = await supabase
+      .from('deepseek_analyses')
+      .select('*')
+      .eq('id', analysisId)
+      .maybeSingle();
+    if (!data || data.user_id !== userId || (orderId && data.order_id !== orderId)) return null;
+    return data;
+  }
+
+  return { joinFlight, finishFlight, findFlightAnalysis };
+}
@@ -0,0 +1,75 @@
+import { corsHeaders } from "./cors.ts";
+
+declare const EdgeRuntime: { waitUntil(promise: Promise<unknown>): void };
+
+// 读取 DeepSeek 的流式响应（OpenAI 兼容的 SSE：data: {...}，以 data: [DONE] 结束），逐段回调 onDelta，返回完整内容
+export async function readDeepSeekStream(response: Response, onDelta: (text: string) => void): Promise<string> {
+  if (!response.body) throw new Error('DeepSeek API 返回空响应');
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  let content = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    let newline: number;
+    while ((newline = buffer.indexOf('\n')) >= 0) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (!line.startsWith('data:')) continue;
+      const payload = line.slice(5).trim();
+      if (payload === '[DONE]') {
+        await reader.cancel();
+        buffer = '';
+        break;
+      }
+      const delta = JSON.parse(payload).choices?.[0]?.delta?.content;
+      if (delta) {
+        content += delta;
+        onDelta(delta);
+      }
+    }
+  }
+  if (!content) throw new Error('DeepSeek API 返回数据格式错误: 缺少 content 字段');
+  return content;
+}
+
+// 以 SSE 返回生成过程：delta（增量文本）、done（保存后的分析）、error。
+// 客户端断开后 send 静默失效，生成和保存照常完成
+export function sseResponse(run: (send: (event: string, data: any) => void) => Promise<void>): Response {
+  const encoder = new TextEncoder();
+  let open = true;
+  const body = new ReadableStream({
+    start(controller) {
+      const send = (event: string, data: any) => {
+        if (!open) return;
+        try {
+          controller.enqueue(encoder.encode(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`));
+        } catch {
+          open = false;
+        }
+      };
+      const task = run(send)
+        .catch((error) => send('error', { message: error instanceof Error ? error.message : String(error) }))
+        .finally(() => {
+          if (open) controller.close();
+        });
+      // 客户端断开后实例也要等生成和保存完成
+      EdgeRuntime.waitUntil(task);
+    },
+    cancel() {
+      open = false;
+    },
+  });
+  return new Response(body, {
+    headers: { "Content-Type": "text/event-stream", "Cache-Control": "no-cache", ...corsHeaders },
+  });
+}
+
+// 已有的分析以同样的流格式返回：整段 delta 加 done
+export function sseResult(analysis: any, extra: Record<string, any> = {}): Response {
+  return sseResponse(async (send) => {
+    send('delta', { content: analysis.analysis_content });
+    send('done', { analysis, ...extra });
+  });
+}
@@ -0,0 +1,146 @@
+import { createClient } from "jsr:@supabase/supabase-js@2";
+
+const supabaseUrl = Deno.env.get("SUPABASE_URL");
+const supabaseKey = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY");
+const supabase = createClient(supabaseUrl, supabaseKey);
+
+// 管理后台流式导出：按 (created_at, id) 倒序的游标分批读取（见 43 号迁移），
+// 每批转成 CSV / NDJSON 后立即写出。内存占用只有一批数据，与表大小无关；
+// 数据边读边发，十万行以上也不会在响应开始前超时
+const BATCH_SIZE = Number(Deno.env.get("ADMIN_EXPORT_BATCH_SIZE") || "1000");
+
+// 可导出的表及列（CSV 表头）
+const EXPORT_TABLES: Record<string, string[]> = {
+  test_submissions: ["id", "user_id", "test_type", "ip_address", "user_agent", "country", "city", "completed", "created_at"],
+  profiles: ["id", "email", "role", "created_at", "updated_at"],
+  admin_logs: ["id", "admin_id", "action", "target_type", "target_id", "details", "ip_address", "created_at"],
+};
+
+const corsHeaders = {
+  "Access-Control-Allow-Origin": "*",
+  "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type",
+  "Access-Control-Expose-Headers": "content-disposition",
+};
+
+function fail(msg: string, code = 400): Response {
+  return new Response(
+    JSON.stringify({ code: "FAIL", message: msg }),
+    { status: code, headers: { "Content-Type": "application/json", ...corsHeaders } }
+  );
+}
+
+type Cursor = { created_at: string; id: string };
+
+// 下一批：游标之前（更早）的行
+async function fetchBatch(table: string, columns: string[], cursor: Cursor | null): Promise<any[]> {
+  let query = supabase
+    .from(table)
+    .select(columns.join(","))
+    .order("created_at", { ascending: false })
+    .order("id", { ascending: false })
+    .limit(BATCH_SIZE);
+  if (cursor) {
+    // created_at <= 游标 作为索引范围条件，OR 只过滤游标时刻那几行（单独的 OR 会从头扫描索引）
+    query = query
+      .lte("created_at", cursor.created_at)
+      .or(`created_at.lt."${cursor.created_at}",id.lt.${cursor.id}`);
+  }
+  const { data, error } = await query;
+  if (error) throw new Error(`读取 ${table} 失败: ${error.message}`);
+  return data || [];
+}
+
+function csvField(value: any): string {
+  if (value === null || value === undefined) return "";
+  const text = typeof value === "object" ? JSON.stringify(value) : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+function formatRows(rows: any[], columns: string[], format: string): string {
+  if (format === "ndjson") {
+    return rows.map((row) => JSON.stringify(row)).join("\n") + "\n";
+  }
+  return rows.map((row) => columns.map((column) => csvField(row[column])).join(",")).join("\r\n") + "\r\n";
+}
+
+// pull 模式：客户端读完上一批才读取下一批，慢速下载不会在内存里堆积数据
+function exportStream(table: string, format: string): ReadableStream<Uint8Array> {
+  const encoder = new TextEncoder();
+  const columns = EXPORT_TABLES[table];
+  let cursor: Cursor | null = null;
+  let exported = 0;
+  const started = Date.now();
+
+  return new ReadableStream({
+    start(controller) {
+      // CSV 带 BOM，Excel 打开中文不乱码
+      if (format === "csv") controller.enqueue(encoder.encode("\uFEFF" + columns.join(",") + "\r\n"));
+    },
+    async pull(controller) {
+      try {
+        const rows = await fetchBatch(table, columns, cursor);
+        if (rows.length > 0) {
+          controller.enqueue(encoder.encode(formatRows(rows, columns, format)));
+          exported += rows.length;
+          const last = rows[rows.length - 1];
+          cursor = { created_at: last.created_at, id: last.id };
+        }
+        if (rows.length < BATCH_SIZE) {
+          console.log(`✅ [adminExport] ${table} 导出完成: ${exported} 行, ${Date.now() - started}ms`);
+          controller.close();
+        }
+      } catch (error) {
+        // 响应头已发出，只能中断流；客户端会收到不完整的下载
+        console.error(`❌ [adminExport] ${table} 导出中断 (已导出 ${exported} 行):`, error);
+        controller.error(error);
+      }
+    },
+    cancel() {
+      console.log(`⚠️ [adminExport] 客户端取消 ${table} 导出 (已导出 ${exported} 行)`);
+    },
+  }, { highWaterMark: 0 });
+}
+
+Deno.serve(async (req) => {
+  try {
+    if (req.method === "OPTIONS") return new Response(null, { headers: corsHeaders });
+    if (req.method !== "POST") return fail("Method not allowed", 405);
+
+    let body: any;
+    try {
+      body = await req.json();
+    } catch {
+      return fail("请求体格式错误", 400);
+    }
+    const table = body?.table;
+    const format = body?.format || "csv";
+    if (!EXPORT_TABLES[table]) return fail(`不支持导出的表: ${table}`, 400);
+    if (format !== "csv" && format !== "ndjson") return fail(`不支持的格式: ${format}`, 400);
+
+    const token = req.headers.get("Authorization")?.replace("Bearer ", "");
+    if (!token) return fail("未授权: 缺少认证token", 401);
+    const { data: { user }, error: authError } = await supabase.auth.getUser(token);
+    if (authError || !user) return fail("认证失败: Token无效或已过期，请重新登录", 401);
+
+    const { data: isAdmin, error: adminError } = await supabase.rpc("is_admin", { uid: user.id });
+    if (adminError) {
+      console.error(`❌ [adminExport] 检查管理员权限失败:`, adminError);
+      return fail("检查权限失败", 500);
+    }
+    if (!isAdmin) return fail("权限不足: 仅管理员可导出", 403);
+
+    console.log(`📤 [adminExport] ${user.email} 导出 ${table} (${format})`);
+    const filename = `${table}-${new Date().toISOString().slice(0, 10)}.${format}`;
+    return new Response(exportStream(table, format), {
+      headers: {
+        "Content-Type": format === "csv" ? "text/csv; charset=utf-8" : "application/x-ndjson",
+        "Content-Disposition": `attachment; filename="${filename}"`,
+        "Cache-Control": "no-cache",
+        ...corsHeaders,
+      },
+    });
+  } catch (error) {
+    console.error(`❌ [adminExport] 异常:`, error);
+    return fail(error instanceof Error ? error.message : String(error), 500);
+  }
+});
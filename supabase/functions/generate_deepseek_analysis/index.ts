@@ -1,13 +1,29 @@
 import { createClient } from "jsr:@supabase/supabase-js@2";
+import { createAnalysisCache } from "../_shared/analysisCache.ts";
+import { createSingleFlight } from "../_shared/singleFlight.ts";
+import { createJobQueue } from "../_shared/deepseekJobs.ts";
+import { corsHeaders } from "../_shared/cors.ts";
+import { readDeepSeekStream, sseResponse, sseResult } from "../_shared/sse.ts";
 
 const supabaseUrl = Deno.env.get("SUPABASE_URL");
 const supabaseKey = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY");
 const supabase = createClient(supabaseUrl, supabaseKey);
 
-const corsHeaders = {
-  "Access-Control-Allow-Origin": "*",
-  "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type",
-};
+// DEEPSEEK_API_URL points the function at another OpenAI-compatible endpoint,
+// e.g. the local mock in tests/perf/mock_deepseek.py for load tests.
+const deepseekApiUrl = Deno.env.get("DEEPSEEK_API_URL") || "https://api.deepseek.com/v1/chat/completions";
+
+const deepseekModel = "deepseek-chat";
+
+// 分析缓存（_shared/analysisCache.ts），按 CACHE_TEMPLATE 与另一个函数隔离。
+// 修改本文件的 buildDeepSeekPrompt 或 system prompt 后必须递增 PROMPT_VERSION，旧缓存随即不再命中，
+// 再调用 invalidate_deepseek_cache('paid', '<新版本>') 清理本模板旧版本的数据。
+const CACHE_TEMPLATE = "paid";
+const PROMPT_VERSION = "v1";
+const { analysisCacheKey, readAnalysisCache, writeAnalysisCache } = createAnalysisCache(supabase, CACHE_TEMPLATE, PROMPT_VERSION);
+
+// Single-flight 租约（_shared/singleFlight.ts）：同一 (testResultId, language) 同时只有一个请求调用 DeepSeek
+const { joinFlight, finishFlight } = createSingleFlight(supabase);
 
 function ok(data: any): Response {
   return new Response(
@@ -220,20 +236,25 @@ ${testData.trading_characteristics ? `
 请现在开始你的专业分析：`;
 }
 
-async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Promise<string> {
+// onDelta 不为空时以流式（stream: true）调用，生成过程中逐段回调
+async function callDeepSeekAPI(
+  prompt: string,
+  language: 'zh' | 'en' = 'zh',
+  onDelta?: (text: string) => void
+): Promise<string> {
   const apiKey = Deno.env.get("DEEPSEEK_API_KEY");
   if (!apiKey) {
     throw new Error("DEEPSEEK_API_KEY未配置");
   }
 
-  const response = await fetch("https://api.deepseek.com/v1/chat/completions", {
+  const response = await fetch(deepseekApiUrl, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
       "Authorization": `Bearer ${apiKey}`,
     },
     body: JSON.stringify({
-      model: "deepseek-chat",
+      model: deepseekModel,
       messages: [
         {
           role: "system",
@@ -248,6 +269,7 @@ async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Pr
       ],
       temperature: 0.7,
       max_tokens: 4000,
+      stream: !!onDelta,
     }),
   });
 
@@ -256,18 +278,94 @@ async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Pr
     throw new Error(`DeepSeek API调用失败: ${error}`);
   }
 
+  if (onDelta) {
+    return await readDeepSeekStream(response, onDelta);
+  }
+
   const data = await response.json();
   return data.choices[0].message.content;
 }
 
+async function findExistingAnalysis(testResultId: string, orderId: string): Promise<any> {
+  const { data } = await supabase
+    .from("deepseek_analyses")
+    .select("*")
+    .eq("test_result_id", testResultId)
+    .eq("order_id", orderId)
+    .maybeSingle();
+  return data;
+}
+
+// 生成并保存一份付费分析；相同测试数据已分析过时直接复用缓存，否则调用DeepSeek API。
+// 同步、流式请求和异步任务共用；onDelta 不为空时流式生成（命中缓存时整段回调一次）
+async function generatePaidAnalysis(
+  userId: string,
+  testResultId: string,
+  orderId: string,
+  testData: any,
+  language: 'zh' | 'en',
+  onDelta?: (text: string) => void
+): Promise<{ analysis: any; cacheHit: boolean }> {
+  const prompt = buildDeepSeekPrompt(testData, language);
+  const cacheKey = await analysisCacheKey(testData, language, deepseekModel);
+  let analysisContent = await readAnalysisCache(cacheKey);
+  const cacheHit = analysisContent !== null;
+  if (cacheHit) {
+    onDelta?.(analysisContent as string);
+  } else {
+    analysisContent = await callDeepSeekAPI(prompt, language, onDelta);
+    await writeAnalysisCache(cacheKey, language, deepseekModel, prompt, analysisContent);
+  }
+
+  // 保存分析结果
+  const testDataSummary = {
+    personality_scores: testData.personality_scores,
+    math_finance_scores: testData.math_finance_scores,
+    risk_preference_scores: testData.risk_preference_scores,
+    trading_characteristics: testData.trading_characteristics,
+    investment_style: testData.investment_style,
+    euclidean_distance: testData.euclidean_distance,
+  };
+
+  const { data: analysis, error: insertError } = await supabase
+    .from("deepseek_analyses")
+    .insert({
+      user_id: userId,
+      test_result_id: testResultId,
+      order_id: orderId,
+      analysis_content: analysisContent,
+      prompt_used: prompt,
+      test_data_summary: testDataSummary,
+    })
+    .select()
+    .single();
+
+  if (insertError) {
+    throw new Error(`保存分析结果失败: ${insertError.message}`);
+  }
+  return { analysis, cacheHit };
+}
+
+// 异步任务（_shared/deepseekJobs.ts）：async: true 时入队，后台 worker 以有限并发生成
+const { enqueueJob, kickWorkers, jobStatus } = createJobQueue(supabase, {
+  kind: 'paid',
+  // 订单已有分析（例如中断的流式请求已保存）时不再生成
+  generate: async (job) => (await findExistingAnalysis(job.test_result_id, job.order_id))
+    ?? (await generatePaidAnalysis(job.user_id, job.test_result_id, job.order_id, job.test_data, job.language)).analysis,
+});
+
 Deno.serve(async (req) => {
+  let flightKey: string | null = null; // 本请求是 single-flight leader 时的租约 key
+  let flightAnalysisId: string | null = null;
   try {
     if (req.method === "OPTIONS") {
       return new Response(null, { headers: corsHeaders });
     }
 
-    const { testResultId, orderId, testData, language } = await req.json();
-    if (!testResultId || !orderId || !testData) {
+    const body = await req.json();
+    const { testResultId, orderId, testData, language, jobId } = body;
+    const streaming = body.stream === true;
+    if (!jobId && (!testResultId || !orderId || !testData)) {
       throw new Error("缺少必要参数");
     }
 
@@ -279,6 +377,12 @@ Deno.serve(async (req) => {
       throw new Error("未授权");
     }
 
+    // 查询异步任务状态（Realtime 不可用时客户端轮询这里）
+    if (jobId) {
+      const status = await jobStatus(jobId, user.id);
+      return status ? ok(status) : fail("任务不存在", 404);
+    }
+
     // 验证订单是否已支付
     const { data: order, error: orderError } = await supabase
       .from("orders")
@@ -292,57 +396,78 @@ Deno.serve(async (req) => {
     }
 
     // 检查是否已有分析结果（避免重复生成）
-    const { data: existingAnalysis } = await supabase
-      .from("deepseek_analyses")
-      .select("*")
-      .eq("test_result_id", testResultId)
-      .eq("order_id", orderId)
-      .maybeSingle();
-
+    const existingAnalysis = await findExistingAnalysis(testResultId, orderId);
     if (existingAnalysis) {
-      return ok({
+      return streaming ? sseResult(existingAnalysis, { cached: true }) : ok({
         analysis: existingAnalysis,
         cached: true
       });
     }
 
-    // 构建提示词并调用DeepSeek API
-    const prompt = buildDeepSeekPrompt(testData, language ?? 'zh');
-    const analysisContent = await callDeepSeekAPI(prompt, language ?? 'zh');
-
-    // 保存分析结果
-    const testDataSummary = {
-      personality_scores: testData.personality_scores,
-      math_finance_scores: testData.math_finance_scores,
-      risk_preference_scores: testData.risk_preference_scores,
-      trading_characteristics: testData.trading_characteristics,
-      investment_style: testData.investment_style,
-      euclidean_distance: testData.euclidean_distance,
-    };
-
-    const { data: analysis, error: insertError } = await supabase
-      .from("deepseek_analyses")
-      .insert({
+    // 异步模式：记录任务后立即返回，由后台 worker 生成
+    if (body.async === true) {
+      const job = await enqueueJob({
         user_id: user.id,
         test_result_id: testResultId,
         order_id: orderId,
-        analysis_content: analysisContent,
-        prompt_used: prompt,
-        test_data_summary: testDataSummary,
-      })
-      .select()
-      .single();
-
-    if (insertError) {
-      throw new Error(`保存分析结果失败: ${insertError.message}`);
+        language: language ?? 'zh',
+        test_data: testData,
+      });
+      kickWorkers();
+      return ok({ job });
+    }
+
+    // 合并并发的重复请求（双击、页面重挂载、重试）：同一测试结果和语言只让一个请求调用 DeepSeek。
+    // 等待者在 leader 完成后重新检查本订单的分析，没有时走缓存路径，不会再调用 LLM
+    const requestFlightKey = `paid:${testResultId}:${language ?? 'zh'}`;
+    const flight = await joinFlight(requestFlightKey);
+    if (flight.leader) {
+      flightKey = requestFlightKey;
+    } else if (!flight.analysisId) {
+      return fail("相同的分析正在生成中，请稍后重试", 503);
+    } else {
+      const sharedAnalysis = await findExistingAnalysis(testResultId, orderId);
+      if (sharedAnalysis) {
+        return streaming ? sseResult(sharedAnalysis, { cached: true, coalesced: true }) : ok({
+          analysis: sharedAnalysis,
+          cached: true,
+          coalesced: true
+        });
+      }
     }
 
+    // 流式模式：边生成边以 SSE 返回，生成在响应流里完成，租约也随之在流结束时释放
+    if (streaming) {
+      const streamFlightKey = flightKey;
+      flightKey = null;
+      return sseResponse(async (send) => {
+        let streamAnalysisId: string | null = null;
+        try {
+          const { analysis, cacheHit } = await generatePaidAnalysis(
+            user.id, testResultId, orderId, testData, language ?? 'zh',
+            (text) => send('delta', { content: text })
+          );
+          streamAnalysisId = analysis.id;
+          send('done', { analysis, cached: false, cache_hit: cacheHit });
+        } finally {
+          if (streamFlightKey) await finishFlight(streamFlightKey, streamAnalysisId);
+        }
+      });
+    }
+
+    const { analysis, cacheHit } = await generatePaidAnalysis(user.id, testResultId, orderId, testData, language ?? 'zh');
+
+    flightAnalysisId = analysis.id;
     return ok({
       analysis,
-      cached: false
+      cached: false,
+      cache_hit: cacheHit
     });
   } catch (error) {
     console.error("生成DeepSeek分析失败:", error);
     return fail(error instanceof Error ? error.message : "生成分析失败", 500);
+  } finally {
+    // leader 结束（成功或失败）后释放租约，唤醒等待者
+    if (flightKey) await finishFlight(flightKey, flightAnalysisId);
   }
 });
@@ -1,13 +1,31 @@
 import { createClient } from "jsr:@supabase/supabase-js@2";
+import { createAnalysisCache } from "../_shared/analysisCache.ts";
+import { createSingleFlight } from "../_shared/singleFlight.ts";
+import { createJobQueue } from "../_shared/deepseekJobs.ts";
+import { corsHeaders } from "../_shared/cors.ts";
+import { readDeepSeekStream, sseResponse, sseResult } from "../_shared/sse.ts";
 
 const supabaseUrl = Deno.env.get("SUPABASE_URL");
 const supabaseKey = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY");
 const supabase = createClient(supabaseUrl, supabaseKey);
 
-const corsHeaders = {
-  "Access-Control-Allow-Origin": "*",
-  "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type",
-};
+// DEEPSEEK_API_URL points the function at another OpenAI-compatible endpoint,
+// e.g. the local mock in tests/perf/mock_deepseek.py for load tests.
+const deepseekApiUrl = Deno.env.get("DEEPSEEK_API_URL") || "https://api.deepseek.com/v1/chat/completions";
+
+// 使用推理模型以获得更深入的分析（可选：deepseek-reasoner 或 deepseek-chat）
+// deepseek-reasoner 提供更强的推理能力，但响应时间可能更长
+const deepseekModel = Deno.env.get("USE_DEEPSEEK_REASONER") === "true" ? "deepseek-reasoner" : "deepseek-chat";
+
+// 分析缓存（_shared/analysisCache.ts），按 CACHE_TEMPLATE 与另一个函数隔离。
+// 修改本文件的 buildDeepSeekPrompt 或 system prompt 后必须递增 PROMPT_VERSION，旧缓存随即不再命中，
+// 再调用 invalidate_deepseek_cache('free', '<新版本>') 清理本模板旧版本的数据。
+const CACHE_TEMPLATE = "free";
+const PROMPT_VERSION = "v1";
+const { analysisCacheKey, readAnalysisCache, writeAnalysisCache } = createAnalysisCache(supabase, CACHE_TEMPLATE, PROMPT_VERSION);
+
+// Single-flight 租约（_shared/singleFlight.ts）：同一 (testResultId, language) 同时只有一个请求调用 DeepSeek
+const { joinFlight, finishFlight, findFlightAnalysis } = createSingleFlight(supabase);
 
 function ok(data: any): Response {
   return new Response(
@@ -23,6 +41,14 @@ function fail(msg: string, code = 400): Response {
   );
 }
 
+// 可预期的业务错误，status 为返回给客户端的 HTTP 状态码
+class AnalysisError extends Error {
+  constructor(message: string, public status = 500) {
+    super(message);
+    this.name = 'AnalysisError';
+  }
+}
+
 function buildDeepSeekPrompt(testData: any, language: 'zh' | 'en' = 'zh'): string {
   if (language === 'en') {
     return `You are a seasoned investment psychologist and financial advisor, skilled at analyzing investment strategies based on Big Five personality traits, financial knowledge and risk preferences.
@@ -265,17 +291,17 @@ ${testData.trading_characteristics ? `
 请现在开始你的高度个性化分析：`;
 }
 
-async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Promise<string> {
+// onDelta 不为空时以流式（stream: true）调用，生成过程中逐段回调
+async function callDeepSeekAPI(
+  prompt: string,
+  language: 'zh' | 'en' = 'zh',
+  onDelta?: (text: string) => void
+): Promise<string> {
   const apiKey = Deno.env.get("DEEPSEEK_API_KEY");
   if (!apiKey) throw new Error("DEEPSEEK_API_KEY未配置");
   
-  // 使用推理模型以获得更深入的分析（可选：deepseek-reasoner 或 deepseek-chat）
-  // deepseek-reasoner 提供更强的推理能力，但响应时间可能更长
-  const useReasoner = Deno.env.get("USE_DEEPSEEK_REASONER") === "true";
-  const model = useReasoner ? "deepseek-reasoner" : "deepseek-chat";
-  
   const requestBody = {
-    model: model,
+    model: deepseekModel,
     messages: [
       { 
         role: "system", 
@@ -287,6 +313,7 @@ async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Pr
     ],
     temperature: 0.7,
     max_tokens: 4000,
+    stream: !!onDelta,
   };
   
   console.log(`📤 [callDeepSeekAPI] 发送请求到 DeepSeek API...`, {
@@ -296,7 +323,7 @@ async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Pr
     hasApiKey: !!apiKey
   });
   
-  const response = await fetch("https://api.deepseek.com/v1/chat/completions", {
+  const response = await fetch(deepseekApiUrl, {
     method: "POST",
     headers: { 
       "Content-Type": "application/json", 
@@ -327,6 +354,10 @@ async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Pr
     }
     throw new Error(errorMessage);
   }
+
+  if (onDelta) {
+    return await readDeepSeekStream(response, onDelta);
+  }
   
   // 解析成功响应
   let data: any;
@@ -385,9 +416,148 @@ async function callDeepSeekAPI(prompt: string, language: 'zh' | 'en' = 'zh'): Pr
   return content;
 }
 
+// 生成一次免费分析：查询并扣除免费次数、创建订单、保存分析。同步、流式请求和异步任务共用。
+// 扣除次数之后的失败会回滚次数；业务错误以 AnalysisError 抛出，带 HTTP 状态码。
+// onDelta 不为空时流式生成（命中缓存时整段回调一次）
+async function generateFreeAnalysis(
+  userId: string,
+  testResultId: string,
+  testData: any,
+  language: 'zh' | 'en',
+  onDelta?: (text: string) => void
+): Promise<{ analysis: any; cacheHit: boolean }> {
+  const errorCode = 'FREE_ANALYSIS_ERROR';
+  let consumed = false;
+
+  try {
+    // 2. 查询免费次数
+    console.log(`🔍 [${errorCode}] 查询免费次数...`);
+    const { data: freeCount, error: freeErr } = await supabase.rpc('get_user_free_analyses', { p_user_id: userId });
+    
+    if (freeErr) {
+      console.error(`❌ [${errorCode}_005] 查询免费次数失败:`, freeErr);
+      throw new AnalysisError(`查询免费次数失败: ${freeErr.message}`, 500);
+    }
+    
+    if (!freeCount || freeCount <= 0) {
+      console.error(`❌ [${errorCode}_006] 无可用免费次数:`, { freeCount });
+      throw new AnalysisError("无可用免费次数", 400);
+    }
+
+    console.log(`✅ [${errorCode}] 用户剩余免费次数:`, freeCount);
+
+    // 3. 先生成分析（不先扣除次数）：优先命中缓存，未命中再调用 DeepSeek API
+    const prompt = buildDeepSeekPrompt(testData, language);
+    const cacheKey = await analysisCacheKey(testData, language, deepseekModel);
+    let analysisContent = await readAnalysisCache(cacheKey);
+    const cacheHit = analysisContent !== null;
+
+    if (cacheHit) {
+      console.log(`⚡ [${errorCode}] 命中分析缓存:`, cacheKey.substring(0, 12));
+      onDelta?.(analysisContent as string);
+    } else {
+      console.log(`🤖 [${errorCode}] 开始调用 DeepSeek API...`);
+      try {
+        analysisContent = await callDeepSeekAPI(prompt, language, onDelta);
+        console.log(`✅ [${errorCode}] DeepSeek API 调用成功`);
+      } catch (apiError) {
+        console.error(`❌ [${errorCode}_007] DeepSeek API 调用失败:`, apiError);
+        // 分析生成失败，不扣除次数，直接返回错误
+        throw new AnalysisError(`DeepSeek API 调用失败: ${apiError instanceof Error ? apiError.message : String(apiError)}`, 500);
+      }
+      await writeAnalysisCache(cacheKey, language, deepseekModel, prompt, analysisContent);
+    }
+
+    // 4. 分析生成成功，现在扣除次数
+    console.log(`💳 [${errorCode}] 扣除免费次数...`);
+    const { data: consumeOk, error: consumeErr } = await supabase.rpc('consume_free_analysis', { p_user_id: userId });
+    
+    if (consumeErr || !consumeOk) {
+      console.error(`❌ [${errorCode}_008] 扣减免费次数失败:`, { consumeErr, consumeOk });
+      // 分析已生成但扣除失败，返回错误（分析内容已生成但未保存）
+      throw new AnalysisError(`扣减免费次数失败: ${consumeErr?.message || '未知错误'}`, 500);
+    }
+    
+    consumed = true; // 标记已扣除
+    console.log(`✅ [${errorCode}] 免费次数扣除成功`);
+
+    // 5. 创建订单
+    console.log(`📝 [${errorCode}] 创建订单...`);
+    const { data: order, error: orderError } = await supabase
+      .from('orders')
+      .insert({
+        user_id: userId,
+        items: [{ name: 'DeepSeek Free Analysis', price: 0, quantity: 1 }],
+        total_amount: 0,
+        currency: 'cny',
+        status: 'completed',
+        test_result_id: testResultId
+        // 注意：orders 表没有 metadata 字段，已移除
+      })
+      .select()
+      .single();
+    
+    if (orderError || !order) {
+      console.error(`❌ [${errorCode}_009] 创建免费订单失败:`, orderError);
+      // 订单创建失败，但次数已扣除，需要回滚
+      await rollbackConsumedAnalysis(userId);
+      throw new AnalysisError(`创建免费订单失败: ${orderError?.message || '未知错误'}`, 500);
+    }
+    
+    console.log(`✅ [${errorCode}] 订单创建成功:`, order.id);
+
+    // 6. 保存分析结果
+    console.log(`💾 [${errorCode}] 保存分析结果...`);
+    const testDataSummary = {
+      personality_scores: testData.personality_scores,
+      math_finance_scores: testData.math_finance_scores,
+      risk_preference_scores: testData.risk_preference_scores,
+      trading_characteristics: testData.trading_characteristics,
+      investment_style: testData.investment_style,
+      euclidean_distance: testData.euclidean_distance,
+    };
+
+    const { data: analysis, error: insertError } = await supabase
+      .from('deepseek_analyses')
+      .insert({
+        user_id: userId,
+        test_result_id: testResultId,
+        order_id: order.id,
+        analysis_content: analysisContent,
+        prompt_used: prompt,
+        test_data_summary: testDataSummary,
+      })
+      .select()
+      .single();
+    
+    if (insertError) {
+      console.error(`❌ [${errorCode}_010] 保存分析结果失败:`, insertError);
+      // 保存失败，但次数已扣除，需要回滚
+      await rollbackConsumedAnalysis(userId);
+      throw new AnalysisError(`保存分析结果失败: ${insertError.message}`, 500);
+    }
+
+    console.log(`✅ [${errorCode}] 分析生成完成:`, analysis.id);
+    return { analysis, cacheHit };
+  } catch (error) {
+    // 意外异常（非已处理的业务错误）且次数已扣除时回滚
+    if (consumed && !(error instanceof AnalysisError)) {
+      await rollbackConsumedAnalysis(userId);
+    }
+    throw error;
+  }
+}
+
+// 异步任务（_shared/deepseekJobs.ts）：async: true 时入队，后台 worker 以有限并发生成
+const { enqueueJob, kickWorkers, jobStatus } = createJobQueue(supabase, {
+  kind: 'free',
+  generate: async (job) => (await generateFreeAnalysis(job.user_id, job.test_result_id, job.test_data, job.language)).analysis,
+});
+
 Deno.serve(async (req) => {
   const errorCode = 'FREE_ANALYSIS_ERROR';
-  let consumedAnalysis = false; // 标记是否已扣除次数，用于失败时回滚
+  let flightKey: string | null = null; // 本请求是 single-flight leader 时的租约 key
+  let flightAnalysisId: string | null = null;
   
   try {
     if (req.method === "OPTIONS") return new Response(null, { headers: corsHeaders });
@@ -456,8 +626,9 @@ Deno.serve(async (req) => {
       return fail(`请求体格式错误: ${errorMsg}`, 400);
     }
 
-    const { testResultId, testData, language } = requestBody || {};
-    if (!testResultId || !testData) {
+    const { testResultId, testData, language, jobId } = requestBody || {};
+    const streaming = requestBody?.stream === true;
+    if (!jobId && (!testResultId || !testData)) {
       console.error(`❌ [${errorCode}_001] 缺少必要参数`);
       return fail("缺少必要参数: testResultId 或 testData", 400);
     }
@@ -513,107 +684,72 @@ Deno.serve(async (req) => {
       lastSignIn: user.last_sign_in_at || 'N/A'
     });
 
-    // 2. 查询免费次数
-    console.log(`🔍 [${errorCode}] 查询免费次数...`);
-    const { data: freeCount, error: freeErr } = await supabase.rpc('get_user_free_analyses', { p_user_id: user.id });
-    
-    if (freeErr) {
-      console.error(`❌ [${errorCode}_005] 查询免费次数失败:`, freeErr);
-      return fail(`查询免费次数失败: ${freeErr.message}`, 500);
-    }
-    
-    if (!freeCount || freeCount <= 0) {
-      console.error(`❌ [${errorCode}_006] 无可用免费次数:`, { freeCount });
-      return fail("无可用免费次数", 400);
+    // 查询异步任务状态（Realtime 不可用时客户端轮询这里）
+    if (jobId) {
+      const status = await jobStatus(jobId, user.id);
+      return status ? ok(status) : fail("任务不存在", 404);
     }
 
-    console.log(`✅ [${errorCode}] 用户剩余免费次数:`, freeCount);
-
-    // 3. 先调用 DeepSeek API 生成分析（不先扣除次数）
-    console.log(`🤖 [${errorCode}] 开始调用 DeepSeek API...`);
-    const prompt = buildDeepSeekPrompt(testData, language ?? 'zh');
-    let analysisContent: string;
-    
-    try {
-      analysisContent = await callDeepSeekAPI(prompt, language ?? 'zh');
-      console.log(`✅ [${errorCode}] DeepSeek API 调用成功`);
-    } catch (apiError) {
-      console.error(`❌ [${errorCode}_007] DeepSeek API 调用失败:`, apiError);
-      // 分析生成失败，不扣除次数，直接返回错误
-      return fail(`DeepSeek API 调用失败: ${apiError instanceof Error ? apiError.message : String(apiError)}`, 500);
-    }
-
-    // 4. 分析生成成功，现在扣除次数
-    console.log(`💳 [${errorCode}] 扣除免费次数...`);
-    const { data: consumeOk, error: consumeErr } = await supabase.rpc('consume_free_analysis', { p_user_id: user.id });
-    
-    if (consumeErr || !consumeOk) {
-      console.error(`❌ [${errorCode}_008] 扣减免费次数失败:`, { consumeErr, consumeOk });
-      // 分析已生成但扣除失败，返回错误（分析内容已生成但未保存）
-      return fail(`扣减免费次数失败: ${consumeErr?.message || '未知错误'}`, 500);
-    }
-    
-    consumedAnalysis = true; // 标记已扣除
-    console.log(`✅ [${errorCode}] 免费次数扣除成功`);
+    // 异步模式：先检查免费次数，记录任务后立即返回，由后台 worker 生成
+    if (requestBody.async === true) {
+      // 中断的流式请求仍在后台生成时，由 worker 通过 single-flight 租约复用它的结果
+      const { data: freeCount, error: freeErr } = await supabase.rpc('get_user_free_analyses', { p_user_id: user.id });
+      if (freeErr) return fail(`查询免费次数失败: ${freeErr.message}`, 500);
+      if (!freeCount || freeCount <= 0) return fail("无可用免费次数", 400);
 
-    // 5. 创建订单
-    console.log(`📝 [${errorCode}] 创建订单...`);
-    const { data: order, error: orderError } = await supabase
-      .from('orders')
-      .insert({
+      const job = await enqueueJob({
         user_id: user.id,
-        items: [{ name: 'DeepSeek Free Analysis', price: 0, quantity: 1 }],
-        total_amount: 0,
-        currency: 'cny',
-        status: 'completed',
-        test_result_id: testResultId
-        // 注意：orders 表没有 metadata 字段，已移除
-      })
-      .select()
-      .single();
-    
-    if (orderError || !order) {
-      console.error(`❌ [${errorCode}_009] 创建免费订单失败:`, orderError);
-      // 订单创建失败，但次数已扣除，需要回滚
-      await rollbackConsumedAnalysis(user.id);
-      return fail(`创建免费订单失败: ${orderError?.message || '未知错误'}`, 500);
+        test_result_id: testResultId,
+        language: language ?? 'zh',
+        test_data: testData,
+      });
+      console.log(`📬 [${errorCode}] 分析任务已入队:`, { jobId: job.id, status: job.status });
+      kickWorkers();
+      return ok({ job });
     }
-    
-    console.log(`✅ [${errorCode}] 订单创建成功:`, order.id);
 
-    // 6. 保存分析结果
-    console.log(`💾 [${errorCode}] 保存分析结果...`);
-    const testDataSummary = {
-      personality_scores: testData.personality_scores,
-      math_finance_scores: testData.math_finance_scores,
-      risk_preference_scores: testData.risk_preference_scores,
-      trading_characteristics: testData.trading_characteristics,
-      investment_style: testData.investment_style,
-      euclidean_distance: testData.euclidean_distance,
-    };
+    // 1.5 合并并发的重复请求：同一测试结果和语言只让一个请求生成，其余等待它的结果
+    const requestFlightKey = `free:${testResultId}:${language ?? 'zh'}`;
+    const flight = await joinFlight(requestFlightKey);
+    if (!flight.leader) {
+      if (!flight.analysisId) {
+        return fail("相同的分析正在生成中，请稍后重试", 503);
+      }
+      const sharedAnalysis = await findFlightAnalysis(flight.analysisId, user.id);
+      if (sharedAnalysis) {
+        console.log(`🔗 [${errorCode}] 复用并发请求的分析结果:`, sharedAnalysis.id);
+        return streaming
+          ? sseResult(sharedAnalysis, { cache_hit: true, coalesced: true })
+          : ok({ analysis: sharedAnalysis, cache_hit: true, coalesced: true });
+      }
+    } else {
+      flightKey = requestFlightKey;
+    }
 
-    const { data: analysis, error: insertError } = await supabase
-      .from('deepseek_analyses')
-      .insert({
-        user_id: user.id,
-        test_result_id: testResultId,
-        order_id: order.id,
-        analysis_content: analysisContent,
-        prompt_used: prompt,
-        test_data_summary: testDataSummary,
-      })
-      .select()
-      .single();
-    
-    if (insertError) {
-      console.error(`❌ [${errorCode}_010] 保存分析结果失败:`, insertError);
-      // 保存失败，但次数已扣除，需要回滚
-      await rollbackConsumedAnalysis(user.id);
-      return fail(`保存分析结果失败: ${insertError.message}`, 500);
+    // 流式模式：边生成边以 SSE 返回，生成在响应流里完成，租约也随之在流结束时释放
+    if (streaming) {
+      const streamFlightKey = flightKey;
+      flightKey = null;
+      return sseResponse(async (send) => {
+        let streamAnalysisId: string | null = null;
+        try {
+          const { analysis, cacheHit } = await generateFreeAnalysis(
+            user.id, testResultId, testData, language ?? 'zh',
+            (text) => send('delta', { content: text })
+          );
+          streamAnalysisId = analysis.id;
+          console.log(`✅ [${errorCode}] 流式分析生成完成:`, analysis.id);
+          send('done', { analysis, cache_hit: cacheHit });
+        } finally {
+          if (streamFlightKey) await finishFlight(streamFlightKey, streamAnalysisId);
+        }
+      });
     }
 
-    console.log(`✅ [${errorCode}] 分析生成完成:`, analysis.id);
-    return ok({ analysis });
+    // 2-6. 查询并扣除免费次数、生成分析、创建订单、保存结果
+    const { analysis, cacheHit } = await generateFreeAnalysis(user.id, testResultId, testData, language ?? 'zh');
+    flightAnalysisId = analysis.id;
+    return ok({ analysis, cache_hit: cacheHit });
   } catch (error) {
     // 安全地序列化错误信息
     let errorMessage = "生成分析失败";
@@ -647,25 +783,11 @@ Deno.serve(async (req) => {
       errorType: error instanceof Error ? error.constructor.name : typeof error
     });
     
-    // 如果已扣除次数，尝试回滚
-    if (consumedAnalysis) {
-      try {
-        const authHeader = req.headers.get("Authorization");
-        const token = authHeader?.replace("Bearer ", "");
-        if (token) {
-          const { data: { user } } = await supabase.auth.getUser(token);
-          if (user) {
-            await rollbackConsumedAnalysis(user.id);
-          }
-        }
-      } catch (rollbackError) {
-        console.error(`❌ [${errorCode}_012] 回滚失败:`, {
-          error: rollbackError instanceof Error ? rollbackError.message : String(rollbackError)
-        });
-      }
-    }
-    
-    return fail(errorMessage, 500);
+    // 已扣除的次数由 generateFreeAnalysis 自行回滚
+    return fail(errorMessage, error instanceof AnalysisError ? error.status : 500);
+  } finally {
+    // leader 结束（成功或失败）后释放租约，唤醒等待者
+    if (flightKey) await finishFlight(flightKey, flightAnalysisId);
   }
 });
 
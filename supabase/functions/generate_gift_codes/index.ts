@@ -0,0 +1,111 @@
+import { createClient } from "jsr:@supabase/supabase-js@2";
+
+const supabaseUrl = Deno.env.get("SUPABASE_URL");
+const supabaseKey = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY");
+const supabase = createClient(supabaseUrl, supabaseKey);
+
+// 批量生成礼品码：整批在 generate_gift_codes_bulk 的一个事务里插入（见 44 号迁移），
+// 结果以 CSV 分块写回，管理员直接下载发给活动渠道
+const MAX_COUNT = 10000;
+const CHUNK_ROWS = 500;
+
+const CSV_COLUMNS = ["code", "free_analyses_count", "max_redemptions", "expires_at", "created_at"];
+
+const corsHeaders = {
+  "Access-Control-Allow-Origin": "*",
+  "Access-Control-Allow-Headers": "authorization, x-client-info, apikey, content-type",
+  "Access-Control-Expose-Headers": "content-disposition",
+};
+
+function fail(msg: string, code = 400): Response {
+  return new Response(
+    JSON.stringify({ code: "FAIL", message: msg }),
+    { status: code, headers: { "Content-Type": "application/json", ...corsHeaders } }
+  );
+}
+
+function positiveInt(value: any, fallback: number | null): number | null {
+  if (value === undefined || value === null || value === "") return fallback;
+  const n = Number(value);
+  return Number.isInteger(n) && n > 0 ? n : NaN;
+}
+
+function csvStream(rows: any[]): ReadableStream<Uint8Array> {
+  const encoder = new TextEncoder();
+  let offset = 0;
+  return new ReadableStream({
+    start(controller) {
+      controller.enqueue(encoder.encode("\uFEFF" + CSV_COLUMNS.join(",") + "\r\n"));
+    },
+    pull(controller) {
+      const chunk = rows.slice(offset, offset + CHUNK_ROWS);
+      offset += chunk.length;
+      // 礼品码只含字母数字，其余列是数字和时间戳，不需要转义
+      controller.enqueue(encoder.encode(
+        chunk.map((row) => CSV_COLUMNS.map((column) => row[column] ?? "").join(",")).join("\r\n") + "\r\n"
+      ));
+      if (offset >= rows.length) controller.close();
+    },
+  });
+}
+
+Deno.serve(async (req) => {
+  try {
+    if (req.method === "OPTIONS") return new Response(null, { headers: corsHeaders });
+    if (req.method !== "POST") return fail("Method not allowed", 405);
+
+    let body: any;
+    try {
+      body = await req.json();
+    } catch {
+      return fail("请求体格式错误", 400);
+    }
+    const count = positiveInt(body?.count, null);
+    const maxRedemptions = positiveInt(body?.max_redemptions, 1);
+    const expiresInDays = positiveInt(body?.expires_in_days, null);
+    const freeAnalysesCount = positiveInt(body?.free_analyses_count, 15);
+    if (!count || count > MAX_COUNT) return fail(`生成数量需在 1-${MAX_COUNT} 之间`, 400);
+    if (Number.isNaN(maxRedemptions) || Number.isNaN(expiresInDays) || Number.isNaN(freeAnalysesCount)) {
+      return fail("参数需为正整数", 400);
+    }
+
+    const token = req.headers.get("Authorization")?.replace("Bearer ", "");
+    if (!token) return fail("未授权: 缺少认证token", 401);
+    const { data: { user }, error: authError } = await supabase.auth.getUser(token);
+    if (authError || !user) return fail("认证失败: Token无效或已过期，请重新登录", 401);
+
+    const { data: isAdmin, error: adminError } = await supabase.rpc("is_admin", { uid: user.id });
+    if (adminError) {
+      console.error(`❌ [giftCodes] 检查管理员权限失败:`, adminError);
+      return fail("检查权限失败", 500);
+    }
+    if (!isAdmin) return fail("权限不足: 仅管理员可生成礼品码", 403);
+
+    const started = Date.now();
+    const { data: codes, error } = await supabase.rpc("generate_gift_codes_bulk", {
+      p_count: count,
+      p_max_redemptions: maxRedemptions,
+      p_expires_in_days: expiresInDays,
+      p_free_analyses_count: freeAnalysesCount,
+      p_created_by: user.id,
+    });
+    if (error) {
+      console.error(`❌ [giftCodes] 批量生成失败:`, error);
+      return fail(`生成失败: ${error.message}`, 500);
+    }
+    console.log(`✅ [giftCodes] ${user.email} 生成 ${codes.length} 个礼品码, ${Date.now() - started}ms`);
+
+    const filename = `gift-codes-${new Date().toISOString().slice(0, 10)}-${codes.length}.csv`;
+    return new Response(csvStream(codes), {
+      headers: {
+        "Content-Type": "text/csv; charset=utf-8",
+        "Content-Disposition": `attachment; filename="${filename}"`,
+        "Cache-Control": "no-cache",
+        ...corsHeaders,
+      },
+    });
+  } catch (error) {
+    console.error(`❌ [giftCodes] 异常:`, error);
+    return fail(error instanceof Error ? error.message : String(error), 500);
+  }
+});
@@ -36,10 +36,11 @@ function fail(msg: string, code = 400): Response {
   );
 }
 
+// 返回已完成的订单（id、test_result_id），失败时返回 null
 async function updateOrderStatus(
   sessionId: string,
   session: Stripe.Checkout.Session
-): Promise<boolean> {
+): Promise<{ id: string; test_result_id: string | null } | null> {
   const { data: order, error: fetchError } = await supabase
     .from("orders")
     .select("id, status, test_result_id, user_id")
@@ -48,16 +49,16 @@ async function updateOrderStatus(
 
   if (fetchError || !order) {
     console.error("查询订单失败:", fetchError);
-    return false;
+    return null;
   }
 
   if (order.status === "completed") {
-    return true;
+    return order;
   }
 
   if (order.status !== "pending") {
     console.error(`订单状态为${order.status},无法完成支付`);
-    return false;
+    return null;
   }
 
   const { error } = await supabase
@@ -74,10 +75,10 @@ async function updateOrderStatus(
 
   if (error) {
     console.error("更新订单失败:", error);
-    return false;
+    return null;
   }
 
-  return true;
+  return order;
 }
 
 Deno.serve(async (req) => {
@@ -108,7 +109,7 @@ Deno.serve(async (req) => {
       });
     }
 
-    const orderUpdated = await updateOrderStatus(sessionId, session);
+    const order = await updateOrderStatus(sessionId, session);
 
     return ok({
       verified: true,
@@ -119,7 +120,10 @@ Deno.serve(async (req) => {
       currency: session.currency,
       customerEmail: session.customer_details?.email,
       customerName: session.customer_details?.name,
-      orderUpdated,
+      orderUpdated: !!order,
+      // PaymentSuccessPage 用这两个字段提交分析任务
+      orderId: order?.id ?? null,
+      testResultId: order?.test_result_id ?? null,
     });
   } catch (error) {
     console.error("验证支付失败:", error);
@@ -0,0 +1,117 @@
+-- DeepSeek 分析结果缓存（内容寻址）
+-- cache_key = sha256(规范化 testData + language + model + prompt_version)，由 edge function 计算
+-- 相同测试数据、语言、模型和提示词版本的请求直接复用已生成的分析，不再调用 DeepSeek
+
+CREATE TABLE IF NOT EXISTS public.deepseek_analysis_cache (
+  cache_key text PRIMARY KEY,
+  prompt_version text NOT NULL,
+  language text NOT NULL,
+  model text NOT NULL,
+  analysis_content text NOT NULL,
+  prompt_used text NOT NULL,
+  hit_count integer NOT NULL DEFAULT 0,
+  created_at timestamptz DEFAULT now(),
+  expires_at timestamptz NOT NULL,
+  last_hit_at timestamptz
+);
+
+CREATE INDEX IF NOT EXISTS idx_deepseek_analysis_cache_expires_at ON public.deepseek_analysis_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_deepseek_analysis_cache_prompt_version ON public.deepseek_analysis_cache(prompt_version);
+
+-- 命中/未命中计数（按天、按提示词版本）
+CREATE TABLE IF NOT EXISTS public.deepseek_cache_stats (
+  day date NOT NULL DEFAULT CURRENT_DATE,
+  prompt_version text NOT NULL,
+  hits bigint NOT NULL DEFAULT 0,
+  misses bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, prompt_version)
+);
+
+-- 只有 service role（edge function）读写缓存；管理员可以查看统计
+ALTER TABLE public.deepseek_analysis_cache ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.deepseek_cache_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can manage analysis cache"
+  ON public.deepseek_analysis_cache FOR ALL
+  USING (auth.jwt()->>'role' = 'service_role');
+
+CREATE POLICY "Service role can manage cache stats"
+  ON public.deepseek_cache_stats FOR ALL
+  USING (auth.jwt()->>'role' = 'service_role');
+
+CREATE POLICY "Admins can view cache stats"
+  ON public.deepseek_cache_stats FOR SELECT
+  TO authenticated USING (is_admin(auth.uid()));
+
+CREATE POLICY "Admins can view analysis cache"
+  ON public.deepseek_analysis_cache FOR SELECT
+  TO authenticated USING (is_admin(auth.uid()));
+
+-- 记录一次缓存查询：命中时同时累加该条缓存的 hit_count
+CREATE OR REPLACE FUNCTION record_deepseek_cache_lookup(
+  p_cache_key text,
+  p_prompt_version text,
+  p_hit boolean
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  INSERT INTO deepseek_cache_stats (day, prompt_version, hits, misses)
+  VALUES (CURRENT_DATE, p_prompt_version, CASE WHEN p_hit THEN 1 ELSE 0 END, CASE WHEN p_hit THEN 0 ELSE 1 END)
+  ON CONFLICT (day, prompt_version) DO UPDATE
+  SET hits = deepseek_cache_stats.hits + EXCLUDED.hits,
+      misses = deepseek_cache_stats.misses + EXCLUDED.misses;
+
+  IF p_hit THEN
+    UPDATE deepseek_analysis_cache
+    SET hit_count = hit_count + 1, last_hit_at = now()
+    WHERE cache_key = p_cache_key;
+  END IF;
+END;
+$$;
+
+-- 失效：提示词模板改动后调用，删除其他版本的缓存和所有已过期的缓存
+-- p_keep_version 为 NULL 时清空全部缓存
+CREATE OR REPLACE FUNCTION invalidate_deepseek_cache(p_keep_version text DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_deleted integer;
+BEGIN
+  DELETE FROM deepseek_analysis_cache
+  WHERE p_keep_version IS NULL
+     OR prompt_version <> p_keep_version
+     OR expires_at <= now();
+  GET DIAGNOSTICS v_deleted = ROW_COUNT;
+  RETURN v_deleted;
+END;
+$$;
+
+-- 命中率报表（security_invoker：按查询者的 RLS 过滤，仅管理员和 service role 可见）
+CREATE OR REPLACE VIEW deepseek_cache_report WITH (security_invoker = true) AS
+SELECT
+  s.day,
+  s.prompt_version,
+  s.hits,
+  s.misses,
+  CASE WHEN s.hits + s.misses > 0
+    THEN round(s.hits::numeric / (s.hits + s.misses), 4)
+    ELSE 0 END AS hit_rate,
+  (SELECT count(*) FROM deepseek_analysis_cache c
+    WHERE c.prompt_version = s.prompt_version AND c.expires_at > now()) AS live_entries
+FROM deepseek_cache_stats s
+ORDER BY s.day DESC, s.prompt_version;
+
+-- SECURITY DEFINER 函数默认对 PUBLIC 开放，这里只留给 service role
+REVOKE EXECUTE ON FUNCTION record_deepseek_cache_lookup(text, text, boolean) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION invalidate_deepseek_cache(text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION record_deepseek_cache_lookup(text, text, boolean) TO service_role;
+GRANT EXECUTE ON FUNCTION invalidate_deepseek_cache(text) TO service_role;
+
+COMMENT ON TABLE deepseek_analysis_cache IS 'DeepSeek 分析结果缓存，按规范化测试数据 + 语言 + 模型 + 提示词版本寻址';
+COMMENT ON TABLE deepseek_cache_stats IS 'DeepSeek 分析缓存每日命中/未命中计数';
+COMMENT ON FUNCTION invalidate_deepseek_cache IS '删除非当前提示词版本及已过期的分析缓存';
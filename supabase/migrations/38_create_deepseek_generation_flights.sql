@@ -0,0 +1,65 @@
+-- DeepSeek 分析生成的 single-flight 租约
+-- 同一 (test_result_id, language) 同时只允许一个请求调用 DeepSeek（leader），
+-- 其余并发请求（双击、页面重挂载、重试）等待 leader 的结果，不再重复消耗 LLM
+-- edge function 可能运行在多个 isolate 上，所以租约放在数据库里
+
+CREATE TABLE IF NOT EXISTS public.deepseek_generation_flights (
+  flight_key text PRIMARY KEY,
+  started_at timestamptz NOT NULL DEFAULT now(),
+  expires_at timestamptz NOT NULL,
+  analysis_id uuid REFERENCES deepseek_analyses(id) ON DELETE CASCADE
+);
+
+ALTER TABLE public.deepseek_generation_flights ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role can manage generation flights"
+  ON public.deepseek_generation_flights FOR ALL
+  USING (auth.jwt()->>'role' = 'service_role');
+
+-- 尝试成为 leader：没有租约或租约已过期（leader 崩溃、结果保留期已过）时获得租约
+CREATE OR REPLACE FUNCTION acquire_deepseek_flight(p_flight_key text, p_ttl_seconds integer)
+RETURNS boolean
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  INSERT INTO deepseek_generation_flights (flight_key, started_at, expires_at, analysis_id)
+  VALUES (p_flight_key, now(), now() + make_interval(secs => p_ttl_seconds), NULL)
+  ON CONFLICT (flight_key) DO UPDATE
+  SET started_at = EXCLUDED.started_at,
+      expires_at = EXCLUDED.expires_at,
+      analysis_id = NULL
+  WHERE deepseek_generation_flights.expires_at <= now();
+
+  RETURN FOUND;
+END;
+$$;
+
+-- leader 结束：成功时记录分析 id 并保留 p_keep_seconds 秒供等待者和紧随其后的重试读取，
+-- 失败时（p_analysis_id 为 NULL）删除租约，让等待者接手
+CREATE OR REPLACE FUNCTION finish_deepseek_flight(p_flight_key text, p_analysis_id uuid, p_keep_seconds integer DEFAULT 30)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  IF p_analysis_id IS NULL THEN
+    DELETE FROM deepseek_generation_flights WHERE flight_key = p_flight_key;
+  ELSE
+    UPDATE deepseek_generation_flights
+    SET analysis_id = p_analysis_id,
+        expires_at = now() + make_interval(secs => p_keep_seconds)
+    WHERE flight_key = p_flight_key;
+  END IF;
+
+  -- 顺带清理过期租约
+  DELETE FROM deepseek_generation_flights WHERE expires_at < now() - interval '1 hour';
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION acquire_deepseek_flight(text, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION finish_deepseek_flight(text, uuid, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION acquire_deepseek_flight(text, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION finish_deepseek_flight(text, uuid, integer) TO service_role;
+
+COMMENT ON TABLE deepseek_generation_flights IS 'DeepSeek 分析生成租约，保证同一测试结果和语言同时只有一次 LLM 调用';
@@ -0,0 +1,150 @@
+-- DeepSeek 分析异步任务队列
+-- 客户端提交任务后立即返回 job id，edge function 在后台以有限并发消费队列，
+-- 客户端通过 Realtime（或轮询）等待任务完成。连接断开、函数超时都不会丢掉已付费的生成
+
+CREATE TABLE IF NOT EXISTS public.deepseek_jobs (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id uuid REFERENCES auth.users(id) NOT NULL,
+  kind text NOT NULL CHECK (kind IN ('paid', 'free')),
+  test_result_id uuid NOT NULL,
+  order_id uuid REFERENCES orders(id),
+  language text NOT NULL DEFAULT 'zh',
+  test_data jsonb NOT NULL,
+  status text NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+  attempts integer NOT NULL DEFAULT 0,
+  analysis_id uuid REFERENCES deepseek_analyses(id),
+  error text,
+  enqueued_at timestamptz NOT NULL DEFAULT now(),
+  started_at timestamptz,
+  finished_at timestamptz,
+  locked_until timestamptz
+);
+
+-- 同一测试结果、语言、类型同时只允许一个未完成的任务，重复提交返回已有任务
+CREATE UNIQUE INDEX IF NOT EXISTS idx_deepseek_jobs_active
+  ON public.deepseek_jobs(kind, test_result_id, language)
+  WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_deepseek_jobs_queue ON public.deepseek_jobs(kind, status, enqueued_at);
+CREATE INDEX IF NOT EXISTS idx_deepseek_jobs_user_id ON public.deepseek_jobs(user_id);
+
+ALTER TABLE public.deepseek_jobs ENABLE ROW LEVEL SECURITY;
+
+-- 用户只能查看自己的任务（Realtime 订阅同样受 RLS 约束）
+CREATE POLICY "Users can view own deepseek jobs"
+  ON public.deepseek_jobs FOR SELECT
+  USING (auth.uid() = user_id);
+
+CREATE POLICY "Service role can manage deepseek jobs"
+  ON public.deepseek_jobs FOR ALL
+  USING (auth.jwt()->>'role' = 'service_role');
+
+CREATE POLICY "Admins can view all deepseek jobs"
+  ON public.deepseek_jobs FOR SELECT
+  TO authenticated USING (is_admin(auth.uid()));
+
+-- 客户端订阅任务状态变化
+ALTER PUBLICATION supabase_realtime ADD TABLE public.deepseek_jobs;
+
+-- 领取一个任务。全局同时运行的任务不超过 p_max_running（对 DeepSeek 的并发上限）。
+-- 租约过期的 running 任务（worker 所在的函数实例被回收）重新排队，超过 p_max_attempts 次则置为失败
+CREATE OR REPLACE FUNCTION claim_deepseek_job(
+  p_kind text,
+  p_max_running integer,
+  p_lease_seconds integer,
+  p_max_attempts integer DEFAULT 3
+)
+RETURNS SETOF deepseek_jobs
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_running integer;
+BEGIN
+  -- 串行化领取，避免并发 worker 同时通过运行数检查
+  PERFORM pg_advisory_xact_lock(hashtext('deepseek_jobs:' || p_kind));
+
+  UPDATE deepseek_jobs
+  SET status = CASE WHEN attempts >= p_max_attempts THEN 'failed' ELSE 'queued' END,
+      error = CASE WHEN attempts >= p_max_attempts THEN '任务多次中断，已放弃' ELSE error END,
+      finished_at = CASE WHEN attempts >= p_max_attempts THEN now() ELSE NULL END,
+      locked_until = NULL
+  WHERE kind = p_kind AND status = 'running' AND locked_until < now();
+
+  SELECT count(*) INTO v_running
+  FROM deepseek_jobs
+  WHERE kind = p_kind AND status = 'running';
+
+  IF v_running >= p_max_running THEN
+    RETURN;
+  END IF;
+
+  RETURN QUERY
+  UPDATE deepseek_jobs
+  SET status = 'running',
+      attempts = attempts + 1,
+      started_at = now(),
+      locked_until = now() + make_interval(secs => p_lease_seconds)
+  WHERE id = (
+    SELECT id FROM deepseek_jobs
+    WHERE kind = p_kind AND status = 'queued'
+    ORDER BY enqueued_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING *;
+END;
+$$;
+
+-- 结束任务：p_error 为 NULL 表示成功
+CREATE OR REPLACE FUNCTION complete_deepseek_job(p_job_id uuid, p_analysis_id uuid, p_error text DEFAULT NULL)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  UPDATE deepseek_jobs
+  SET status = CASE WHEN p_error IS NULL THEN 'succeeded' ELSE 'failed' END,
+      analysis_id = p_analysis_id,
+      error = p_error,
+      finished_at = now(),
+      locked_until = NULL
+  WHERE id = p_job_id AND status = 'running';
+END;
+$$;
+
+-- 队列指标：深度、等待时间（入队到开始）、运行时间（开始到结束），按最近一小时完成的任务统计
+CREATE OR REPLACE VIEW deepseek_job_metrics WITH (security_invoker = true) AS
+SELECT
+  k.kind,
+  (SELECT count(*) FROM deepseek_jobs j WHERE j.kind = k.kind AND j.status = 'queued') AS depth,
+  (SELECT count(*) FROM deepseek_jobs j WHERE j.kind = k.kind AND j.status = 'running') AS running,
+  (SELECT extract(epoch FROM now() - min(j.enqueued_at))
+     FROM deepseek_jobs j WHERE j.kind = k.kind AND j.status = 'queued') AS oldest_queued_seconds,
+  recent.finished,
+  recent.failed,
+  recent.wait_p50_seconds,
+  recent.wait_p95_seconds,
+  recent.run_p50_seconds,
+  recent.run_p95_seconds
+FROM (VALUES ('paid'), ('free')) AS k(kind)
+LEFT JOIN LATERAL (
+  SELECT
+    count(*) AS finished,
+    count(*) FILTER (WHERE j.status = 'failed') AS failed,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY extract(epoch FROM j.started_at - j.enqueued_at)) AS wait_p50_seconds,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY extract(epoch FROM j.started_at - j.enqueued_at)) AS wait_p95_seconds,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY extract(epoch FROM j.finished_at - j.started_at)) AS run_p50_seconds,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY extract(epoch FROM j.finished_at - j.started_at)) AS run_p95_seconds
+  FROM deepseek_jobs j
+  WHERE j.kind = k.kind
+    AND j.status IN ('succeeded', 'failed')
+    AND j.finished_at > now() - interval '1 hour'
+) recent ON true;
+
+REVOKE EXECUTE ON FUNCTION claim_deepseek_job(text, integer, integer, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION complete_deepseek_job(uuid, uuid, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION claim_deepseek_job(text, integer, integer, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION complete_deepseek_job(uuid, uuid, text) TO service_role;
+
+COMMENT ON TABLE deepseek_jobs IS 'DeepSeek 分析异步任务队列';
+COMMENT ON VIEW deepseek_job_metrics IS 'DeepSeek 任务队列深度、等待时间和运行时间';
@@ -0,0 +1,83 @@
+-- 相似投资者查询：人格 + 数学 + 风险向量的 k 近邻索引
+-- profile_vector = [开放性, 尽责性, 外向性, 宜人性, 神经质, 数学得分百分比 / 10, 风险容忍度]，
+-- 七个维度都在 0-10 左右，欧氏距离里数学得分不会压过其他维度
+-- 由生成列维护，新增/更新测试结果时索引随之增量更新，不需要全表扫描或定期重建
+
+CREATE EXTENSION IF NOT EXISTS vector WITH SCHEMA extensions;
+
+ALTER TABLE public.test_results
+  ADD COLUMN IF NOT EXISTS profile_vector extensions.vector(7)
+  GENERATED ALWAYS AS (
+    CASE WHEN personality_scores->>'openness' IS NOT NULL
+          AND personality_scores->>'conscientiousness' IS NOT NULL
+          AND personality_scores->>'extraversion' IS NOT NULL
+          AND personality_scores->>'agreeableness' IS NOT NULL
+          AND personality_scores->>'neuroticism' IS NOT NULL
+          AND math_finance_scores->>'percentage' IS NOT NULL
+          AND risk_preference_scores->>'risk_tolerance' IS NOT NULL
+    THEN ARRAY[
+      (personality_scores->>'openness')::real,
+      (personality_scores->>'conscientiousness')::real,
+      (personality_scores->>'extraversion')::real,
+      (personality_scores->>'agreeableness')::real,
+      (personality_scores->>'neuroticism')::real,
+      (math_finance_scores->>'percentage')::real / 10,
+      (risk_preference_scores->>'risk_tolerance')::real
+    ]::extensions.vector(7)
+    END
+  ) STORED;
+
+-- HNSW 图索引：插入即增量维护，百万级数据下 k 近邻查询亚毫秒。
+-- 只索引已有投资风格的结果（统计只用得到这些行）；历史数据的风格可用 scoring/rescore.py 回填
+CREATE INDEX IF NOT EXISTS idx_test_results_profile_vector
+  ON public.test_results USING hnsw (profile_vector extensions.vector_l2_ops)
+  WHERE investment_style IS NOT NULL;
+
+-- 与某次测试结果最相似的 p_k 位其他用户的投资风格分布（只返回聚合数据）。
+-- 只能查询自己的测试结果（管理员除外）
+CREATE OR REPLACE FUNCTION get_similar_investors(p_test_result_id uuid, p_k integer DEFAULT 50)
+RETURNS TABLE (investment_style text, investors integer, share numeric, avg_distance double precision)
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public, extensions
+-- HNSW 每次最多返回 ef_search 个候选，因此 k 上限为 100
+SET hnsw.ef_search = 100
+AS $$
+DECLARE
+  v_vector extensions.vector(7);
+  v_user_id uuid;
+BEGIN
+  SELECT t.profile_vector, t.user_id INTO v_vector, v_user_id
+  FROM test_results t
+  WHERE t.id = p_test_result_id
+    AND (t.user_id = auth.uid() OR is_admin(auth.uid()));
+
+  IF v_vector IS NULL THEN
+    RETURN;
+  END IF;
+
+  RETURN QUERY
+  WITH neighbours AS (
+    SELECT t.investment_style, t.profile_vector <-> v_vector AS distance
+    FROM test_results t
+    WHERE t.investment_style IS NOT NULL
+      AND t.user_id IS DISTINCT FROM v_user_id
+    ORDER BY t.profile_vector <-> v_vector
+    LIMIT least(greatest(p_k, 1), 100)
+  )
+  SELECT n.investment_style,
+         count(*)::integer,
+         round(count(*)::numeric / sum(count(*)) OVER (), 4),
+         avg(n.distance)
+  FROM neighbours n
+  GROUP BY n.investment_style
+  ORDER BY count(*) DESC, n.investment_style;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION get_similar_investors(uuid, integer) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION get_similar_investors(uuid, integer) TO authenticated;
+
+COMMENT ON COLUMN test_results.profile_vector IS '人格五维 + 数学得分/10 + 风险容忍度，用于相似投资者 k 近邻查询';
+COMMENT ON FUNCTION get_similar_investors IS '与指定测试结果最相似的其他用户的投资风格分布';
@@ -0,0 +1,137 @@
+-- 人群常模：各维度得分的分布直方图，用于"超过 X% 的用户"这类百分位展示
+-- 人格五维和风险容忍度为 0-10 的整数分，数学得分为 0-100 的百分比，
+-- 按取整后的分数分桶，每个维度最多 101 行，整个常模只有几百个计数。
+-- 由 test_results 上的触发器增量维护，读取时不需要扫描 test_results
+
+CREATE TABLE IF NOT EXISTS score_norm_buckets (
+  metric text NOT NULL,
+  bucket smallint NOT NULL,
+  count bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (metric, bucket)
+);
+
+ALTER TABLE score_norm_buckets ENABLE ROW LEVEL SECURITY;
+
+-- 常模只有聚合计数，所有人可读；只由触发器和服务角色写入
+CREATE POLICY "Anyone can view score norms" ON score_norm_buckets
+  FOR SELECT USING (true);
+
+CREATE POLICY "Service role can manage score norms" ON score_norm_buckets
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+
+-- 一次测试结果各维度的分桶，只统计 profile_vector 非空（七个维度都有分数）的结果
+CREATE OR REPLACE FUNCTION score_norm_metrics(
+  p_personality jsonb,
+  p_math jsonb,
+  p_risk jsonb
+)
+RETURNS TABLE (metric text, bucket smallint)
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT m.metric, round(m.value)::smallint
+  FROM (VALUES
+    ('agreeableness', (p_personality->>'agreeableness')::numeric),
+    ('conscientiousness', (p_personality->>'conscientiousness')::numeric),
+    ('extraversion', (p_personality->>'extraversion')::numeric),
+    ('math', (p_math->>'percentage')::numeric),
+    ('neuroticism', (p_personality->>'neuroticism')::numeric),
+    ('openness', (p_personality->>'openness')::numeric),
+    ('risk', (p_risk->>'risk_tolerance')::numeric)
+  ) AS m(metric, value);
+$$;
+
+-- 增量维护：新增结果计入，删除结果扣除，分数变化时先扣旧桶再计新桶。
+-- 每行按固定的 metric 顺序加锁，并发写入不会互相死锁
+CREATE OR REPLACE FUNCTION track_score_norms()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.profile_vector IS NOT NULL THEN
+    INSERT INTO score_norm_buckets (metric, bucket, count)
+    SELECT m.metric, m.bucket, -1
+    FROM score_norm_metrics(OLD.personality_scores, OLD.math_finance_scores, OLD.risk_preference_scores) m
+    ORDER BY m.metric
+    ON CONFLICT (metric, bucket) DO UPDATE SET count = score_norm_buckets.count + EXCLUDED.count;
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.profile_vector IS NOT NULL THEN
+    INSERT INTO score_norm_buckets (metric, bucket, count)
+    SELECT m.metric, m.bucket, 1
+    FROM score_norm_metrics(NEW.personality_scores, NEW.math_finance_scores, NEW.risk_preference_scores) m
+    ORDER BY m.metric
+    ON CONFLICT (metric, bucket) DO UPDATE SET count = score_norm_buckets.count + EXCLUDED.count;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION track_score_norms() FROM PUBLIC, anon, authenticated;
+
+-- 回填期间锁住写入，避免回填和触发器之间漏算或重复计算
+LOCK TABLE test_results IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS track_score_norms_insert_delete ON test_results;
+CREATE TRIGGER track_score_norms_insert_delete
+  AFTER INSERT OR DELETE ON test_results
+  FOR EACH ROW EXECUTE FUNCTION track_score_norms();
+
+-- 只在分数变化时触发，更新投资风格、AI 分析等字段不影响常模
+DROP TRIGGER IF EXISTS track_score_norms_update ON test_results;
+CREATE TRIGGER track_score_norms_update
+  AFTER UPDATE ON test_results
+  FOR EACH ROW
+  WHEN (OLD.personality_scores IS DISTINCT FROM NEW.personality_scores
+        OR OLD.math_finance_scores IS DISTINCT FROM NEW.math_finance_scores
+        OR OLD.risk_preference_scores IS DISTINCT FROM NEW.risk_preference_scores)
+  EXECUTE FUNCTION track_score_norms();
+
+-- 回填已有结果
+INSERT INTO score_norm_buckets (metric, bucket, count)
+SELECT m.metric, m.bucket, count(*)
+FROM test_results t
+CROSS JOIN LATERAL score_norm_metrics(t.personality_scores, t.math_finance_scores, t.risk_preference_scores) m
+WHERE t.profile_vector IS NOT NULL
+GROUP BY m.metric, m.bucket
+ON CONFLICT (metric, bucket) DO UPDATE SET count = EXCLUDED.count;
+
+-- 常模快照：{ total, generated_at, metrics: { 维度: { min, counts } } }，
+-- counts[i] 为分数 min + i 的人数。前端据此一次性算出累计分布后 O(1) 查询百分位，
+-- 也可由 scoring/norms.py 导出为静态文件
+CREATE OR REPLACE FUNCTION get_score_norms()
+RETURNS jsonb
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  WITH ranges AS (
+    SELECT metric, min(bucket)::integer AS lo, max(bucket)::integer AS hi, sum(count) AS total
+    FROM score_norm_buckets
+    WHERE count > 0
+    GROUP BY metric
+  ),
+  dense AS (
+    SELECT r.metric, r.lo, r.total,
+           jsonb_agg(coalesce(b.count, 0) ORDER BY s.bucket) AS counts
+    FROM ranges r
+    CROSS JOIN LATERAL generate_series(r.lo, r.hi) AS s(bucket)
+    LEFT JOIN score_norm_buckets b ON b.metric = r.metric AND b.bucket = s.bucket
+    GROUP BY r.metric, r.lo, r.total
+  )
+  SELECT jsonb_build_object(
+    'total', coalesce((SELECT max(total) FROM dense), 0),
+    'generated_at', now(),
+    'metrics', coalesce(jsonb_object_agg(metric, jsonb_build_object('min', lo, 'counts', counts)), '{}'::jsonb)
+  )
+  FROM dense;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_score_norms() TO anon, authenticated;
+
+COMMENT ON TABLE score_norm_buckets IS '各维度得分分布（按取整分数计数），由触发器随 test_results 增量维护';
+COMMENT ON FUNCTION track_score_norms IS '测试结果增删改时更新 score_norm_buckets';
+COMMENT ON FUNCTION get_score_norms IS '人群常模快照，用于计算各维度百分位';
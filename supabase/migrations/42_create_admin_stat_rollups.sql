@@ -0,0 +1,354 @@
+-- 管理后台统计汇总表
+-- admin_statistics 视图和 get_tests_by_ip() 原来在每次打开管理后台时对 test_submissions / orders 全表
+-- COUNT / COUNT(DISTINCT) / GROUP BY，耗时随提交量线性增长。
+-- 改为由触发器增量维护的汇总表（按天、按 IP、按国家），仪表盘只读汇总行；
+-- "最近 24 小时"的数字仍从明细表按时间索引范围计数，只涉及一天的数据量
+
+-- 按北京时间分日
+CREATE OR REPLACE FUNCTION admin_stat_day(p_at timestamptz)
+RETURNS date
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT (p_at AT TIME ZONE 'Asia/Shanghai')::date;
+$$;
+
+CREATE TABLE IF NOT EXISTS admin_daily_stats (
+  day date PRIMARY KEY,
+  tests bigint NOT NULL DEFAULT 0,
+  new_users bigint NOT NULL DEFAULT 0,
+  payments bigint NOT NULL DEFAULT 0,
+  revenue numeric(14,2) NOT NULL DEFAULT 0,
+  first_time_purchases bigint NOT NULL DEFAULT 0,
+  second_time_purchases bigint NOT NULL DEFAULT 0,
+  repeat_purchases bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS admin_ip_stats (
+  ip_address text NOT NULL,
+  country text,
+  city text,
+  tests bigint NOT NULL DEFAULT 0,
+  last_seen_at timestamptz,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  UNIQUE NULLS NOT DISTINCT (ip_address, country, city)
+);
+
+CREATE INDEX IF NOT EXISTS idx_admin_ip_stats_tests ON admin_ip_stats(tests DESC);
+
+CREATE TABLE IF NOT EXISTS admin_country_stats (
+  country text,
+  tests bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  UNIQUE NULLS NOT DISTINCT (country)
+);
+
+-- 每个用户的提交数，用于维护独立用户数（首次提交当天计入 new_users，最后一条提交删除时扣除）
+CREATE TABLE IF NOT EXISTS admin_stat_users (
+  user_id uuid PRIMARY KEY,
+  first_day date NOT NULL,
+  submissions bigint NOT NULL DEFAULT 0
+);
+
+-- 支付统计里"最近 24 小时"的范围查询
+CREATE INDEX IF NOT EXISTS idx_orders_completed_at ON orders(completed_at) WHERE status = 'completed';
+
+ALTER TABLE admin_daily_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE admin_ip_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE admin_country_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE admin_stat_users ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Admins can view daily stats" ON admin_daily_stats
+  FOR SELECT TO authenticated USING (is_admin(auth.uid()));
+CREATE POLICY "Admins can view ip stats" ON admin_ip_stats
+  FOR SELECT TO authenticated USING (is_admin(auth.uid()));
+CREATE POLICY "Admins can view country stats" ON admin_country_stats
+  FOR SELECT TO authenticated USING (is_admin(auth.uid()));
+
+CREATE POLICY "Service role can manage daily stats" ON admin_daily_stats
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+CREATE POLICY "Service role can manage ip stats" ON admin_ip_stats
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+CREATE POLICY "Service role can manage country stats" ON admin_country_stats
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+CREATE POLICY "Service role can manage stat users" ON admin_stat_users
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+
+-- 一条测试提交计入（p_sign = 1）或扣除（p_sign = -1）汇总
+CREATE OR REPLACE FUNCTION apply_submission_stats(p_row test_submissions, p_sign integer)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_day date := admin_stat_day(p_row.created_at);
+  v_new_users integer := 0;
+  v_inserted boolean;
+  v_left bigint;
+  v_first_day date;
+BEGIN
+  IF p_row.user_id IS NOT NULL THEN
+    IF p_sign > 0 THEN
+      INSERT INTO admin_stat_users (user_id, first_day, submissions)
+      VALUES (p_row.user_id, v_day, 1)
+      ON CONFLICT (user_id) DO UPDATE SET submissions = admin_stat_users.submissions + 1
+      RETURNING (xmax = 0) INTO v_inserted;
+      IF v_inserted THEN
+        v_new_users := 1;
+      END IF;
+    ELSE
+      UPDATE admin_stat_users SET submissions = submissions - 1
+      WHERE user_id = p_row.user_id
+      RETURNING submissions, first_day INTO v_left, v_first_day;
+      IF v_left = 0 THEN
+        DELETE FROM admin_stat_users WHERE user_id = p_row.user_id;
+        UPDATE admin_daily_stats SET new_users = new_users - 1, updated_at = now() WHERE day = v_first_day;
+      END IF;
+    END IF;
+  END IF;
+
+  INSERT INTO admin_daily_stats (day, tests, new_users)
+  VALUES (v_day, p_sign, v_new_users)
+  ON CONFLICT (day) DO UPDATE
+  SET tests = admin_daily_stats.tests + EXCLUDED.tests,
+      new_users = admin_daily_stats.new_users + EXCLUDED.new_users,
+      updated_at = now();
+
+  IF p_row.ip_address IS NOT NULL THEN
+    INSERT INTO admin_ip_stats (ip_address, country, city, tests, last_seen_at)
+    VALUES (p_row.ip_address, p_row.country, p_row.city, p_sign, CASE WHEN p_sign > 0 THEN p_row.created_at END)
+    ON CONFLICT (ip_address, country, city) DO UPDATE
+    SET tests = admin_ip_stats.tests + EXCLUDED.tests,
+        last_seen_at = greatest(admin_ip_stats.last_seen_at, EXCLUDED.last_seen_at),
+        updated_at = now();
+  END IF;
+
+  INSERT INTO admin_country_stats (country, tests)
+  VALUES (p_row.country, p_sign)
+  ON CONFLICT (country) DO UPDATE
+  SET tests = admin_country_stats.tests + EXCLUDED.tests,
+      updated_at = now();
+END;
+$$;
+
+-- 一笔已完成订单计入或扣除汇总（按完成日期分日）
+CREATE OR REPLACE FUNCTION apply_order_stats(p_row orders, p_sign integer)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF p_row.status <> 'completed' THEN
+    RETURN;
+  END IF;
+
+  INSERT INTO admin_daily_stats (day, payments, revenue, first_time_purchases, second_time_purchases, repeat_purchases)
+  VALUES (
+    admin_stat_day(coalesce(p_row.completed_at, p_row.created_at)),
+    p_sign,
+    p_sign * p_row.total_amount,
+    p_sign * (p_row.total_amount = 399)::integer,
+    p_sign * (p_row.total_amount = 299)::integer,
+    p_sign * (p_row.total_amount = 99)::integer
+  )
+  ON CONFLICT (day) DO UPDATE
+  SET payments = admin_daily_stats.payments + EXCLUDED.payments,
+      revenue = admin_daily_stats.revenue + EXCLUDED.revenue,
+      first_time_purchases = admin_daily_stats.first_time_purchases + EXCLUDED.first_time_purchases,
+      second_time_purchases = admin_daily_stats.second_time_purchases + EXCLUDED.second_time_purchases,
+      repeat_purchases = admin_daily_stats.repeat_purchases + EXCLUDED.repeat_purchases,
+      updated_at = now();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION track_submission_stats()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_submission_stats(OLD, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_submission_stats(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION track_order_stats()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_order_stats(OLD, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_order_stats(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- 从明细表全量重算所有汇总表，用于首次回填和核对后修复
+CREATE OR REPLACE FUNCTION refresh_admin_stat_rollups()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  -- 重算期间阻塞写入，避免和触发器的增量更新交错
+  LOCK TABLE test_submissions, orders IN SHARE ROW EXCLUSIVE MODE;
+
+  DELETE FROM admin_daily_stats;
+  DELETE FROM admin_ip_stats;
+  DELETE FROM admin_country_stats;
+  DELETE FROM admin_stat_users;
+
+  INSERT INTO admin_stat_users (user_id, first_day, submissions)
+  SELECT user_id, admin_stat_day(min(created_at)), count(*)
+  FROM test_submissions
+  WHERE user_id IS NOT NULL
+  GROUP BY user_id;
+
+  INSERT INTO admin_daily_stats (day, tests, new_users)
+  SELECT d.day, d.tests, coalesce(u.new_users, 0)
+  FROM (
+    SELECT admin_stat_day(created_at) AS day, count(*) AS tests
+    FROM test_submissions
+    GROUP BY 1
+  ) d
+  LEFT JOIN (
+    SELECT first_day, count(*) AS new_users FROM admin_stat_users GROUP BY first_day
+  ) u ON u.first_day = d.day;
+
+  INSERT INTO admin_daily_stats (day, payments, revenue, first_time_purchases, second_time_purchases, repeat_purchases)
+  SELECT admin_stat_day(coalesce(completed_at, created_at)),
+         count(*),
+         sum(total_amount),
+         count(*) FILTER (WHERE total_amount = 399),
+         count(*) FILTER (WHERE total_amount = 299),
+         count(*) FILTER (WHERE total_amount = 99)
+  FROM orders
+  WHERE status = 'completed'
+  GROUP BY 1
+  ON CONFLICT (day) DO UPDATE
+  SET payments = EXCLUDED.payments,
+      revenue = EXCLUDED.revenue,
+      first_time_purchases = EXCLUDED.first_time_purchases,
+      second_time_purchases = EXCLUDED.second_time_purchases,
+      repeat_purchases = EXCLUDED.repeat_purchases;
+
+  INSERT INTO admin_ip_stats (ip_address, country, city, tests, last_seen_at)
+  SELECT ip_address, country, city, count(*), max(created_at)
+  FROM test_submissions
+  WHERE ip_address IS NOT NULL
+  GROUP BY ip_address, country, city;
+
+  INSERT INTO admin_country_stats (country, tests)
+  SELECT country, count(*)
+  FROM test_submissions
+  GROUP BY country;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION apply_submission_stats(test_submissions, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION apply_order_stats(orders, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION track_submission_stats() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION track_order_stats() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION refresh_admin_stat_rollups() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_admin_stat_rollups() TO service_role;
+
+DROP TRIGGER IF EXISTS track_submission_stats_insert_delete ON test_submissions;
+CREATE TRIGGER track_submission_stats_insert_delete
+  AFTER INSERT OR DELETE ON test_submissions
+  FOR EACH ROW EXECUTE FUNCTION track_submission_stats();
+
+-- 标记完成（completed）等更新不影响汇总，不触发
+DROP TRIGGER IF EXISTS track_submission_stats_update ON test_submissions;
+CREATE TRIGGER track_submission_stats_update
+  AFTER UPDATE OF user_id, ip_address, country, city, created_at ON test_submissions
+  FOR EACH ROW EXECUTE FUNCTION track_submission_stats();
+
+DROP TRIGGER IF EXISTS track_order_stats_insert_delete ON orders;
+CREATE TRIGGER track_order_stats_insert_delete
+  AFTER INSERT OR DELETE ON orders
+  FOR EACH ROW EXECUTE FUNCTION track_order_stats();
+
+DROP TRIGGER IF EXISTS track_order_stats_update ON orders;
+CREATE TRIGGER track_order_stats_update
+  AFTER UPDATE OF status, total_amount, completed_at, created_at ON orders
+  FOR EACH ROW EXECUTE FUNCTION track_order_stats();
+
+-- 回填（与触发器在同一事务内，回填期间的写入会等待迁移提交）
+SELECT refresh_admin_stat_rollups();
+
+-- 仪表盘统计改为读汇总表，列与原视图一致，新增 refreshed_at（汇总最近一次更新时间）
+CREATE OR REPLACE VIEW admin_statistics AS
+SELECT
+  (SELECT COALESCE(SUM(tests), 0)::bigint FROM admin_daily_stats) as total_tests,
+  (SELECT COALESCE(SUM(new_users), 0)::bigint FROM admin_daily_stats) as unique_users,
+  (SELECT COALESCE(SUM(payments), 0)::bigint FROM admin_daily_stats) as total_payments,
+  (SELECT COALESCE(SUM(revenue), 0) FROM admin_daily_stats) as total_revenue,
+  (SELECT COUNT(*) FROM test_submissions WHERE created_at > now() - interval '24 hours') as tests_today,
+  (SELECT COUNT(*) FROM orders WHERE status = 'completed' AND completed_at > now() - interval '24 hours') as payments_today,
+  (SELECT COALESCE(SUM(first_time_purchases), 0)::bigint FROM admin_daily_stats) as first_time_purchases,
+  (SELECT COALESCE(SUM(second_time_purchases), 0)::bigint FROM admin_daily_stats) as second_time_purchases,
+  (SELECT COALESCE(SUM(repeat_purchases), 0)::bigint FROM admin_daily_stats) as repeat_purchases,
+  (SELECT MAX(updated_at) FROM admin_daily_stats) as refreshed_at;
+
+-- 按 IP 统计改为读汇总表，返回格式不变
+CREATE OR REPLACE FUNCTION get_tests_by_ip()
+RETURNS TABLE (
+  ip_address text,
+  count bigint,
+  country text,
+  city text
+)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT s.ip_address, s.tests, s.country, s.city
+  FROM admin_ip_stats s
+  WHERE s.tests > 0
+  ORDER BY s.tests DESC
+  LIMIT 100;
+$$;
+
+-- 按国家/地区统计
+CREATE OR REPLACE FUNCTION get_tests_by_country()
+RETURNS TABLE (
+  country text,
+  count bigint,
+  updated_at timestamptz
+)
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT s.country, s.tests, s.updated_at
+  FROM admin_country_stats s
+  WHERE s.tests > 0
+    AND is_admin(auth.uid())
+  ORDER BY s.tests DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_tests_by_country() TO authenticated;
+
+COMMENT ON TABLE admin_daily_stats IS '管理后台每日汇总（测试提交、新用户、支付），由触发器增量维护';
+COMMENT ON TABLE admin_ip_stats IS '按 IP 汇总的测试提交数，由触发器增量维护';
+COMMENT ON TABLE admin_country_stats IS '按国家/地区汇总的测试提交数，由触发器增量维护';
+COMMENT ON TABLE admin_stat_users IS '每个用户的测试提交数，用于维护独立用户数';
+COMMENT ON FUNCTION refresh_admin_stat_rollups IS '从明细表全量重算管理后台汇总表';
+COMMENT ON FUNCTION get_tests_by_country IS '获取按国家/地区分组的测试统计';
+COMMENT ON VIEW admin_statistics IS '管理后台统计（读汇总表）';
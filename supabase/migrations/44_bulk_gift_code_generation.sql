@@ -0,0 +1,89 @@
+-- 批量生成礼品码
+-- 原来每个码一次 generate_gift_code() 调用（内部逐个 SELECT 查重）再加一次 INSERT，
+-- 前端兜底路径还要为每个候选码再查一次，一次活动生成几千个码需要上万次请求、耗时数分钟。
+-- generate_gift_codes_bulk 在一个事务里用一条 INSERT ... SELECT 生成整批：
+-- 查重交给 code 的唯一索引（ON CONFLICT DO NOTHING），冲突的候选码直接丢弃，
+-- 只为缺少的数量重新生成，直到凑满；任何一步失败整批回滚，不会留下半批码。
+-- 返回单个 jsonb 数组而不是 SETOF：PostgREST 的 max-rows（默认 1000）会截断集合结果，
+-- 码已经插入却只返回一部分
+
+-- 8 位随机码，字符集与 generate_gift_code() 相同（去掉易混淆的 I/O/0/1）。
+-- VOLATILE：在 INSERT ... SELECT 中每行调用一次
+CREATE OR REPLACE FUNCTION random_gift_code()
+RETURNS text
+LANGUAGE sql
+VOLATILE
+AS $$
+  SELECT string_agg(substr('ABCDEFGHJKLMNPQRSTUVWXYZ23456789', 1 + floor(random() * 32)::integer, 1), '')
+  FROM generate_series(1, 8);
+$$;
+
+CREATE OR REPLACE FUNCTION generate_gift_codes_bulk(
+  p_count integer,
+  p_max_redemptions integer DEFAULT 1,
+  p_expires_in_days integer DEFAULT NULL,
+  p_free_analyses_count integer DEFAULT 15,
+  p_created_by uuid DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_created_by uuid := COALESCE(p_created_by, auth.uid());
+  v_expires_at timestamptz;
+  v_missing integer := p_count;
+  v_codes jsonb := '[]'::jsonb;
+  v_batch jsonb;
+  v_attempt integer := 0;
+BEGIN
+  IF NOT is_admin(v_created_by) THEN
+    RAISE EXCEPTION 'Unauthorized: Only admins can generate gift codes';
+  END IF;
+  IF p_count IS NULL OR p_count < 1 OR p_count > 10000 THEN
+    RAISE EXCEPTION 'Gift code count must be between 1 and 10000, got %', p_count;
+  END IF;
+  IF p_expires_in_days IS NOT NULL THEN
+    v_expires_at := now() + make_interval(days => p_expires_in_days);
+  END IF;
+
+  -- 40 位随机空间，几千个码的一批通常一轮就够；重试上限只防止码空间接近耗尽时死循环
+  WHILE v_missing > 0 LOOP
+    v_attempt := v_attempt + 1;
+    IF v_attempt > 10 THEN
+      RAISE EXCEPTION 'Failed to generate % unique gift codes after 10 rounds', p_count;
+    END IF;
+
+    WITH inserted AS (
+      INSERT INTO gift_codes (code, max_redemptions, free_analyses_count, created_by, expires_at)
+      SELECT random_gift_code(), p_max_redemptions, p_free_analyses_count, v_created_by, v_expires_at
+      FROM generate_series(1, v_missing)
+      ON CONFLICT (code) DO NOTHING
+      RETURNING id, code, max_redemptions, free_analyses_count, expires_at, created_at
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted)), '[]'::jsonb) INTO v_batch FROM inserted;
+
+    v_codes := v_codes || v_batch;
+    v_missing := v_missing - jsonb_array_length(v_batch);
+  END LOOP;
+
+  INSERT INTO admin_logs (admin_id, action, target_type, details)
+  VALUES (v_created_by, 'generate_gift_codes', 'gift_codes', jsonb_build_object(
+    'count', p_count,
+    'max_redemptions', p_max_redemptions,
+    'expires_in_days', p_expires_in_days,
+    'free_analyses_count', p_free_analyses_count
+  ));
+
+  RETURN v_codes;
+END;
+$$;
+
+-- 由 generate_gift_codes 边缘函数校验登录用户后以 service role 调用
+REVOKE EXECUTE ON FUNCTION random_gift_code() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION generate_gift_codes_bulk(integer, integer, integer, integer, uuid) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION generate_gift_codes_bulk(integer, integer, integer, integer, uuid) TO service_role;
+
+COMMENT ON FUNCTION random_gift_code IS '生成一个 8 位随机礼品码（不查重）';
+COMMENT ON FUNCTION generate_gift_codes_bulk IS '单事务批量生成礼品码，依靠唯一索引处理重复，返回新码的 jsonb 数组';
@@ -0,0 +1,117 @@
+-- 礼品码兑换的并发安全
+-- 08 号迁移的 redeem_gift_code 先不加锁读出 current_redemptions，判断未满后再插入兑换记录、计数加一。
+-- 热门码在群里转发时几百人同一秒兑换，大家读到的都是同一个旧计数，全部通过检查，
+-- 实际兑换数超过 max_redemptions；同一用户连点两次还会撞上唯一约束直接报错。
+--
+-- 新实现：
+-- 0. 已兑换过、名额已满的请求不加锁直接返回；
+-- 1. 先插入兑换记录（ON CONFLICT DO NOTHING 判重），不锁礼品码行
+--    （外键只取 FOR KEY SHARE，与下面的 UPDATE 不冲突）；
+-- 2. 最后用一条带条件的 UPDATE 给计数加一：current_redemptions < max_redemptions 写在 WHERE 里，
+--    排队等锁的事务拿到锁后按最新的行重新判断，不会超发；不满足条件时删掉第 1 步的记录；
+-- 3. 礼品码行锁从第 2 步持有到提交，是唯一的串行点，持有时间只有一次提交；
+--    lock_timeout 限制排队时间，超时返回"请稍后重试"而不是一直挂起连接
+
+CREATE OR REPLACE FUNCTION redeem_gift_code(p_code text, p_user_id uuid)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+SET lock_timeout = '2s'
+AS $$
+DECLARE
+  v_gift_code gift_codes;
+  v_redemption_id uuid;
+  v_remaining integer;
+BEGIN
+  SELECT * INTO v_gift_code
+  FROM gift_codes
+  WHERE code = UPPER(p_code)
+    AND is_active = true
+    AND (expires_at IS NULL OR expires_at > now());
+
+  IF v_gift_code.id IS NULL THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '礼品码无效或已过期'
+    );
+  END IF;
+
+  -- 不加锁的快速判断：已兑换过、名额已满的请求（抢完之后的大多数）不进入锁队列。
+  -- 计数只增不减，读到的旧值只会偏小，漏判的由后面的条件 UPDATE 兜底
+  SELECT remaining_analyses INTO v_remaining
+  FROM gift_code_redemptions
+  WHERE gift_code_id = v_gift_code.id
+    AND user_id = p_user_id;
+
+  IF FOUND THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '您已经使用过此礼品码',
+      'remaining_analyses', v_remaining
+    );
+  END IF;
+
+  IF v_gift_code.current_redemptions >= v_gift_code.max_redemptions THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '此礼品码已达到最大使用次数'
+    );
+  END IF;
+
+  -- 同一用户并发的第二次兑换会等第一次提交后走到 DO NOTHING
+  INSERT INTO gift_code_redemptions (gift_code_id, user_id, remaining_analyses)
+  VALUES (v_gift_code.id, p_user_id, v_gift_code.free_analyses_count)
+  ON CONFLICT (gift_code_id, user_id) DO NOTHING
+  RETURNING id INTO v_redemption_id;
+
+  IF v_redemption_id IS NULL THEN
+    SELECT remaining_analyses INTO v_remaining
+    FROM gift_code_redemptions
+    WHERE gift_code_id = v_gift_code.id
+      AND user_id = p_user_id;
+
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '您已经使用过此礼品码',
+      'remaining_analyses', v_remaining
+    );
+  END IF;
+
+  BEGIN
+    UPDATE gift_codes
+    SET current_redemptions = current_redemptions + 1,
+        updated_at = now()
+    WHERE id = v_gift_code.id
+      AND current_redemptions < max_redemptions
+      AND is_active = true
+      AND (expires_at IS NULL OR expires_at > now());
+  EXCEPTION WHEN lock_not_available THEN
+    DELETE FROM gift_code_redemptions WHERE id = v_redemption_id;
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '当前兑换人数较多，请稍后重试',
+      'retryable', true
+    );
+  END;
+
+  IF NOT FOUND THEN
+    -- 等锁期间名额被抢完（或礼品码被停用、过期）
+    DELETE FROM gift_code_redemptions WHERE id = v_redemption_id;
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '此礼品码已达到最大使用次数'
+    );
+  END IF;
+
+  RETURN jsonb_build_object(
+    'success', true,
+    'message', '礼品码兑换成功！',
+    'free_analyses', v_gift_code.free_analyses_count
+  );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION redeem_gift_code(text, uuid) TO authenticated;
+
+COMMENT ON FUNCTION redeem_gift_code IS '兑换礼品码（条件更新计数，并发兑换不会超发）';
@@ -0,0 +1,163 @@
+-- 每个用户已完成的分析购买数，支撑阶梯定价
+-- get_user_analysis_price() 原来每次调用都按 user_id 扫出该用户的全部订单，再逐行做 items 的 jsonb 包含判断；
+-- 它在下单（create_stripe_checkout）前的热路径上。改为读由触发器维护的计数行，一次主键查找。
+-- user_pricing_info 视图同样改读计数。
+-- purchase_counter_drift() 与 orders 全量对账，refresh_user_purchase_counters() 全量重算（回填 / 修复）
+
+CREATE TABLE IF NOT EXISTS user_purchase_counters (
+  user_id uuid PRIMARY KEY,
+  completed_analyses integer NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE user_purchase_counters ENABLE ROW LEVEL SECURITY;
+
+-- 与 orders 的策略一致：用户看自己的，管理员看全部（user_pricing_info 是 security_invoker 视图）
+CREATE POLICY "Users can view own purchase counter" ON user_purchase_counters
+  FOR SELECT TO authenticated USING (user_id = auth.uid());
+CREATE POLICY "Admins can view all purchase counters" ON user_purchase_counters
+  FOR SELECT TO authenticated USING (is_admin(auth.uid()));
+CREATE POLICY "Service role can manage purchase counters" ON user_purchase_counters
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+
+-- 计入阶梯定价的订单：已完成、有用户、包含 DeepSeek 分析
+CREATE OR REPLACE FUNCTION is_completed_analysis_order(p_row orders)
+RETURNS boolean
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT p_row.status = 'completed'
+    AND p_row.user_id IS NOT NULL
+    AND p_row.items::jsonb @> '[{"type": "deepseek_analysis"}]'::jsonb;
+$$;
+
+-- 已购次数 → 下一次价格（分）：¥3.99 → ¥2.99 → ¥0.99
+CREATE OR REPLACE FUNCTION analysis_price_for(p_completed integer)
+RETURNS integer
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE WHEN p_completed <= 0 THEN 399 WHEN p_completed = 1 THEN 299 ELSE 99 END;
+$$;
+
+CREATE OR REPLACE FUNCTION track_purchase_counters()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND is_completed_analysis_order(OLD) THEN
+    UPDATE user_purchase_counters
+    SET completed_analyses = completed_analyses - 1,
+        updated_at = now()
+    WHERE user_id = OLD.user_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND is_completed_analysis_order(NEW) THEN
+    INSERT INTO user_purchase_counters (user_id, completed_analyses)
+    VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE
+    SET completed_analyses = user_purchase_counters.completed_analyses + 1,
+        updated_at = now();
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- 与 orders 全量对账：计数与重新统计不一致的用户
+CREATE OR REPLACE FUNCTION purchase_counter_drift()
+RETURNS TABLE (user_id uuid, stored integer, actual integer)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  SELECT coalesce(c.user_id, o.user_id), coalesce(c.completed_analyses, 0), coalesce(o.completed, 0)
+  FROM user_purchase_counters c
+  FULL JOIN (
+    SELECT o.user_id, count(*)::integer AS completed
+    FROM orders o
+    WHERE is_completed_analysis_order(o)
+    GROUP BY o.user_id
+  ) o ON o.user_id = c.user_id
+  WHERE coalesce(c.completed_analyses, 0) <> coalesce(o.completed, 0);
+$$;
+
+CREATE OR REPLACE FUNCTION refresh_user_purchase_counters()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  -- 重算期间阻塞订单写入，避免和触发器的增量更新交错
+  LOCK TABLE orders IN SHARE ROW EXCLUSIVE MODE;
+
+  DELETE FROM user_purchase_counters;
+
+  INSERT INTO user_purchase_counters (user_id, completed_analyses)
+  SELECT o.user_id, count(*)
+  FROM orders o
+  WHERE is_completed_analysis_order(o)
+  GROUP BY o.user_id;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION track_purchase_counters() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION purchase_counter_drift() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION refresh_user_purchase_counters() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION purchase_counter_drift() TO service_role;
+GRANT EXECUTE ON FUNCTION refresh_user_purchase_counters() TO service_role;
+
+DROP TRIGGER IF EXISTS track_purchase_counters_insert_delete ON orders;
+CREATE TRIGGER track_purchase_counters_insert_delete
+  AFTER INSERT OR DELETE ON orders
+  FOR EACH ROW EXECUTE FUNCTION track_purchase_counters();
+
+-- 支付完成（status 变为 completed）走这里；其它字段的更新不影响计数
+DROP TRIGGER IF EXISTS track_purchase_counters_update ON orders;
+CREATE TRIGGER track_purchase_counters_update
+  AFTER UPDATE OF status, user_id, items ON orders
+  FOR EACH ROW EXECUTE FUNCTION track_purchase_counters();
+
+-- 回填（与触发器在同一事务内）
+SELECT refresh_user_purchase_counters();
+
+-- plpgsql 而不是 sql：SECURITY DEFINER 函数不会被内联，sql 函数每次调用都要重新规划，plpgsql 会缓存计划
+CREATE OR REPLACE FUNCTION get_user_analysis_price(p_user_id uuid)
+RETURNS integer
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_completed integer;
+BEGIN
+  SELECT completed_analyses INTO v_completed
+  FROM user_purchase_counters
+  WHERE user_id = p_user_id;
+
+  RETURN analysis_price_for(coalesce(v_completed, 0));
+END;
+$$;
+
+-- 列与原视图一致
+CREATE OR REPLACE VIEW user_pricing_info AS
+SELECT
+  p.id as user_id,
+  p.email,
+  coalesce(c.completed_analyses, 0)::bigint as completed_analyses,
+  analysis_price_for(coalesce(c.completed_analyses, 0)) as next_price
+FROM profiles p
+LEFT JOIN user_purchase_counters c ON c.user_id = p.id;
+
+ALTER VIEW user_pricing_info SET (security_invoker = on);
+
+COMMENT ON TABLE user_purchase_counters IS '每个用户已完成的 DeepSeek 分析购买数，由 orders 上的触发器维护';
+COMMENT ON FUNCTION is_completed_analysis_order IS '订单是否计入阶梯定价（已完成的 DeepSeek 分析订单）';
+COMMENT ON FUNCTION analysis_price_for IS '按已购次数计算下一次分析价格（分）';
+COMMENT ON FUNCTION purchase_counter_drift IS '购买计数与 orders 对账，返回不一致的用户';
+COMMENT ON FUNCTION refresh_user_purchase_counters IS '从 orders 全量重算购买计数';
+COMMENT ON FUNCTION get_user_analysis_price IS '根据用户购买计数计算分析价格';
+COMMENT ON VIEW user_pricing_info IS '用户定价信息视图（读购买计数）';
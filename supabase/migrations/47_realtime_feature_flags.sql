@@ -0,0 +1,115 @@
+-- 功能开关缓存与变更推送
+-- 前端每次用到 deepseek_enabled / payment_enabled 都要查询 system_config / system_settings。
+-- 改为由触发器同步的 feature_flags 表：一次查询拿到全部开关，前端 featureFlags（src/db/featureFlags.ts）
+-- 缓存结果，并订阅这张表的 Realtime 变更，管理员切换开关后打开着的页面立即拿到新值。
+-- 只推送 feature_flags 而不是两张原表：system_settings 里还存着 deepseek_api_key 等配置
+
+CREATE TABLE IF NOT EXISTS feature_flags (
+  flag text PRIMARY KEY,
+  enabled boolean NOT NULL,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE feature_flags ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view feature flags" ON feature_flags
+  FOR SELECT TO anon, authenticated USING (true);
+CREATE POLICY "Service role can manage feature flags" ON feature_flags
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+
+-- payment_enabled 的 setting_value 历史上存过 true / {"value": true} / {"value": "true"}，无法识别时视为开启
+CREATE OR REPLACE FUNCTION parse_payment_enabled(p_value jsonb)
+RETURNS boolean
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN jsonb_typeof(p_value) = 'boolean' THEN p_value::boolean
+    WHEN jsonb_typeof(p_value -> 'value') = 'boolean' THEN (p_value -> 'value')::boolean
+    WHEN jsonb_typeof(p_value -> 'value') = 'string' THEN p_value ->> 'value' = 'true'
+    ELSE true
+  END;
+$$;
+
+CREATE OR REPLACE FUNCTION apply_feature_flag(p_flag text, p_enabled boolean)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF p_enabled IS NULL THEN
+    DELETE FROM feature_flags WHERE flag = p_flag;
+    RETURN;
+  END IF;
+
+  INSERT INTO feature_flags (flag, enabled)
+  VALUES (p_flag, p_enabled)
+  ON CONFLICT (flag) DO UPDATE
+  SET enabled = EXCLUDED.enabled,
+      updated_at = now()
+  WHERE feature_flags.enabled IS DISTINCT FROM EXCLUDED.enabled;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_config_feature_flags()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    IF OLD.config_key = 'deepseek_enabled' THEN
+      PERFORM apply_feature_flag('deepseek_enabled', NULL);
+    END IF;
+  ELSIF NEW.config_key = 'deepseek_enabled' THEN
+    PERFORM apply_feature_flag('deepseek_enabled', NEW.config_value = 'true');
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_settings_feature_flags()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    IF OLD.setting_key = 'payment_enabled' THEN
+      PERFORM apply_feature_flag('payment_enabled', NULL);
+    END IF;
+  ELSIF NEW.setting_key = 'payment_enabled' THEN
+    PERFORM apply_feature_flag('payment_enabled', parse_payment_enabled(NEW.setting_value));
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION apply_feature_flag(text, boolean) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION sync_config_feature_flags() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION sync_settings_feature_flags() FROM PUBLIC, anon, authenticated;
+
+DROP TRIGGER IF EXISTS sync_config_feature_flags ON system_config;
+CREATE TRIGGER sync_config_feature_flags
+  AFTER INSERT OR UPDATE OR DELETE ON system_config
+  FOR EACH ROW EXECUTE FUNCTION sync_config_feature_flags();
+
+DROP TRIGGER IF EXISTS sync_settings_feature_flags ON system_settings;
+CREATE TRIGGER sync_settings_feature_flags
+  AFTER INSERT OR UPDATE OR DELETE ON system_settings
+  FOR EACH ROW EXECUTE FUNCTION sync_settings_feature_flags();
+
+-- 回填
+SELECT apply_feature_flag('deepseek_enabled', config_value = 'true')
+FROM system_config WHERE config_key = 'deepseek_enabled';
+SELECT apply_feature_flag('payment_enabled', parse_payment_enabled(setting_value))
+FROM system_settings WHERE setting_key = 'payment_enabled';
+
+ALTER PUBLICATION supabase_realtime ADD TABLE public.feature_flags;
+
+COMMENT ON TABLE feature_flags IS '功能开关（由 system_config / system_settings 上的触发器同步），前端缓存并订阅其 Realtime 变更';
+COMMENT ON FUNCTION parse_payment_enabled IS '解析 payment_enabled 的 setting_value';
+COMMENT ON FUNCTION apply_feature_flag IS '写入功能开关，值不变时不更新（不产生推送）';
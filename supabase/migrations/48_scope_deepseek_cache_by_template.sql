@@ -0,0 +1,93 @@
+-- DeepSeek 分析缓存按提示词模板隔离
+-- 付费（generate_deepseek_analysis）和免费（generate_deepseek_analysis_free）两个函数的提示词不同，
+-- 但 37 号迁移的缓存键只含测试数据 + 语言 + 模型 + 提示词版本，两边会互相命中对方的分析；
+-- invalidate_deepseek_cache 按版本清理时也会删掉另一个函数仍然有效的缓存。
+-- 现在缓存键、缓存表、命中统计都带上 template（'paid' / 'free'），各函数的版本号独立递增，失效只作用于本模板。
+
+-- 旧缓存键不含模板，无法判断出自哪个函数，直接清空（只是缓存，会重新生成）
+DELETE FROM deepseek_analysis_cache;
+
+ALTER TABLE deepseek_analysis_cache ADD COLUMN IF NOT EXISTS template text NOT NULL;
+ALTER TABLE deepseek_analysis_cache
+  ADD CONSTRAINT deepseek_analysis_cache_template_check CHECK (template IN ('paid', 'free'));
+
+DROP INDEX IF EXISTS idx_deepseek_analysis_cache_prompt_version;
+CREATE INDEX IF NOT EXISTS idx_deepseek_analysis_cache_template_version
+  ON deepseek_analysis_cache(template, prompt_version);
+
+-- 历史统计两个函数混在一起，记为 'mixed'
+ALTER TABLE deepseek_cache_stats ADD COLUMN IF NOT EXISTS template text NOT NULL DEFAULT 'mixed';
+ALTER TABLE deepseek_cache_stats ALTER COLUMN template DROP DEFAULT;
+ALTER TABLE deepseek_cache_stats DROP CONSTRAINT IF EXISTS deepseek_cache_stats_pkey;
+ALTER TABLE deepseek_cache_stats ADD PRIMARY KEY (day, template, prompt_version);
+
+DROP FUNCTION IF EXISTS record_deepseek_cache_lookup(text, text, boolean);
+CREATE OR REPLACE FUNCTION record_deepseek_cache_lookup(
+  p_cache_key text,
+  p_template text,
+  p_prompt_version text,
+  p_hit boolean
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO deepseek_cache_stats (day, template, prompt_version, hits, misses)
+  VALUES (CURRENT_DATE, p_template, p_prompt_version, CASE WHEN p_hit THEN 1 ELSE 0 END, CASE WHEN p_hit THEN 0 ELSE 1 END)
+  ON CONFLICT (day, template, prompt_version) DO UPDATE
+  SET hits = deepseek_cache_stats.hits + EXCLUDED.hits,
+      misses = deepseek_cache_stats.misses + EXCLUDED.misses;
+
+  IF p_hit THEN
+    UPDATE deepseek_analysis_cache
+    SET hit_count = hit_count + 1, last_hit_at = now()
+    WHERE cache_key = p_cache_key;
+  END IF;
+END;
+$$;
+
+-- 失效：某个模板的提示词改动后调用，只删除该模板其他版本的缓存，以及所有已过期的缓存
+-- p_keep_version 为 NULL 时清空该模板的全部缓存
+DROP FUNCTION IF EXISTS invalidate_deepseek_cache(text);
+CREATE OR REPLACE FUNCTION invalidate_deepseek_cache(p_template text, p_keep_version text DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  v_deleted integer;
+BEGIN
+  DELETE FROM deepseek_analysis_cache
+  WHERE expires_at <= now()
+     OR (template = p_template AND (p_keep_version IS NULL OR prompt_version <> p_keep_version));
+  GET DIAGNOSTICS v_deleted = ROW_COUNT;
+  RETURN v_deleted;
+END;
+$$;
+
+DROP VIEW IF EXISTS deepseek_cache_report;
+CREATE VIEW deepseek_cache_report WITH (security_invoker = true) AS
+SELECT
+  s.day,
+  s.template,
+  s.prompt_version,
+  s.hits,
+  s.misses,
+  CASE WHEN s.hits + s.misses > 0
+    THEN round(s.hits::numeric / (s.hits + s.misses), 4)
+    ELSE 0 END AS hit_rate,
+  (SELECT count(*) FROM deepseek_analysis_cache c
+    WHERE c.template = s.template AND c.prompt_version = s.prompt_version AND c.expires_at > now()) AS live_entries
+FROM deepseek_cache_stats s
+ORDER BY s.day DESC, s.template, s.prompt_version;
+
+REVOKE EXECUTE ON FUNCTION record_deepseek_cache_lookup(text, text, text, boolean) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION invalidate_deepseek_cache(text, text) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION record_deepseek_cache_lookup(text, text, text, boolean) TO service_role;
+GRANT EXECUTE ON FUNCTION invalidate_deepseek_cache(text, text) TO service_role;
+
+COMMENT ON COLUMN deepseek_analysis_cache.template IS '提示词模板：paid = generate_deepseek_analysis，free = generate_deepseek_analysis_free';
+COMMENT ON FUNCTION invalidate_deepseek_cache(text, text) IS '删除指定模板非当前提示词版本的缓存，以及所有已过期的缓存';
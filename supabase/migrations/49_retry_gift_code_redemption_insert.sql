@@ -0,0 +1,119 @@
+-- 礼品码兑换：插入兑换记录时的锁等待超时同样返回可重试
+-- 45 号迁移的 lock_timeout 作用于整个函数，但只有计数 UPDATE 包在 lock_not_available 处理里。
+-- 同一用户并发的两次兑换，第二次的 INSERT ... ON CONFLICT 要等第一次的事务结束；
+-- 第一次排在礼品码行锁后面时，第二次等满 2 秒超时，异常未被捕获，前端收到的是 RPC 报错而不是
+-- {retryable: true}。现在 INSERT 也放进同样的异常处理，超时时子事务回滚，没有要清理的记录。
+-- 函数其余部分与 45 号迁移相同
+
+CREATE OR REPLACE FUNCTION redeem_gift_code(p_code text, p_user_id uuid)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+SET lock_timeout = '2s'
+AS $$
+DECLARE
+  v_gift_code gift_codes;
+  v_redemption_id uuid;
+  v_remaining integer;
+BEGIN
+  SELECT * INTO v_gift_code
+  FROM gift_codes
+  WHERE code = UPPER(p_code)
+    AND is_active = true
+    AND (expires_at IS NULL OR expires_at > now());
+
+  IF v_gift_code.id IS NULL THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '礼品码无效或已过期'
+    );
+  END IF;
+
+  -- 不加锁的快速判断：已兑换过、名额已满的请求（抢完之后的大多数）不进入锁队列。
+  -- 计数只增不减，读到的旧值只会偏小，漏判的由后面的条件 UPDATE 兜底
+  SELECT remaining_analyses INTO v_remaining
+  FROM gift_code_redemptions
+  WHERE gift_code_id = v_gift_code.id
+    AND user_id = p_user_id;
+
+  IF FOUND THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '您已经使用过此礼品码',
+      'remaining_analyses', v_remaining
+    );
+  END IF;
+
+  IF v_gift_code.current_redemptions >= v_gift_code.max_redemptions THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '此礼品码已达到最大使用次数'
+    );
+  END IF;
+
+  -- 同一用户并发的第二次兑换会等第一次提交后走到 DO NOTHING；
+  -- 等待的是唯一索引上对方事务的锁，同样受 lock_timeout 限制
+  BEGIN
+    INSERT INTO gift_code_redemptions (gift_code_id, user_id, remaining_analyses)
+    VALUES (v_gift_code.id, p_user_id, v_gift_code.free_analyses_count)
+    ON CONFLICT (gift_code_id, user_id) DO NOTHING
+    RETURNING id INTO v_redemption_id;
+  EXCEPTION WHEN lock_not_available THEN
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '当前兑换人数较多，请稍后重试',
+      'retryable', true
+    );
+  END;
+
+  IF v_redemption_id IS NULL THEN
+    SELECT remaining_analyses INTO v_remaining
+    FROM gift_code_redemptions
+    WHERE gift_code_id = v_gift_code.id
+      AND user_id = p_user_id;
+
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '您已经使用过此礼品码',
+      'remaining_analyses', v_remaining
+    );
+  END IF;
+
+  BEGIN
+    UPDATE gift_codes
+    SET current_redemptions = current_redemptions + 1,
+        updated_at = now()
+    WHERE id = v_gift_code.id
+      AND current_redemptions < max_redemptions
+      AND is_active = true
+      AND (expires_at IS NULL OR expires_at > now());
+  EXCEPTION WHEN lock_not_available THEN
+    DELETE FROM gift_code_redemptions WHERE id = v_redemption_id;
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '当前兑换人数较多，请稍后重试',
+      'retryable', true
+    );
+  END;
+
+  IF NOT FOUND THEN
+    -- 等锁期间名额被抢完（或礼品码被停用、过期）
+    DELETE FROM gift_code_redemptions WHERE id = v_redemption_id;
+    RETURN jsonb_build_object(
+      'success', false,
+      'message', '此礼品码已达到最大使用次数'
+    );
+  END IF;
+
+  RETURN jsonb_build_object(
+    'success', true,
+    'message', '礼品码兑换成功！',
+    'free_analyses', v_gift_code.free_analyses_count
+  );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION redeem_gift_code(text, uuid) TO authenticated;
+
+COMMENT ON FUNCTION redeem_gift_code IS '兑换礼品码（条件更新计数，并发兑换不会超发）';
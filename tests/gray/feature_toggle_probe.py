@@ -0,0 +1,217 @@
+"""Feature flag flip propagation: how long until every open page sees the new value.
+
+The browser flag client (``src/db/featureFlags.ts``) caches
+``deepseek_enabled`` / ``payment_enabled`` and updates them from the
+Realtime changes of ``feature_flags`` (migration 47), which triggers keep in
+sync with ``system_config`` / ``system_settings``. This opens ``--clients``
+Realtime connections with the anon key, subscribed the way the flag client
+is, then flips the flag through the table the admin page writes (service role
+key) and times, per flip, how long each client took to receive the new
+value::
+
+    python tests/gray/feature_toggle_probe.py --clients 50 --flips 10
+    python tests/gray/feature_toggle_probe.py --flag payment_enabled --clients 200 --ttl 60
+
+Latency runs from just before the PATCH is sent to the client receiving the
+change, so it includes the write, the trigger, the replication slot and the
+Realtime fan-out. Clients that have not seen a flip after ``--timeout``
+seconds are counted as missed. ``--ttl`` prints, for comparison, what a
+pure TTL cache of that many seconds would give (staleness uniform over the
+TTL). The flag is put back to its original value at the end.
+``SUPABASE_URL``, ``SUPABASE_ANON_KEY`` and ``SUPABASE_SERVICE_ROLE_KEY``
+come from the environment or ``tests/config.json``. Needs ``aiohttp``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import pathlib
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "perf"))
+import loadgen  # noqa: E402
+
+HEARTBEAT_S = 25
+
+# Where the admin page writes each flag, and the value it writes.
+SOURCES = {
+    "deepseek_enabled": ("system_config", "config_key", lambda on: {"config_value": "true" if on else "false"}),
+    "payment_enabled": ("system_settings", "setting_key", lambda on: {"setting_value": {"value": on}}),
+}
+
+
+class Client:
+    """One Realtime connection subscribed to ``feature_flags`` (Phoenix protocol, vsn 1.0.0)."""
+
+    def __init__(self, session, url, anon_key, flag):
+        self.session = session
+        self.url = url
+        self.anon_key = anon_key
+        self.flag = flag
+        self.refs = itertools.count(1)
+        self.ws = None
+        self.subscribed = asyncio.Event()
+        self.seen = {}  # value -> time.perf_counter() of the first message carrying it
+        self.changed = asyncio.Event()
+
+    async def send(self, topic, event, payload):
+        ref = str(next(self.refs))
+        await self.ws.send_json({"topic": topic, "event": event, "payload": payload, "ref": ref, "join_ref": ref})
+
+    async def run(self):
+        self.ws = await self.session.ws_connect(self.url, heartbeat=None)
+        await self.send("realtime:feature-flags", "phx_join", {
+            "config": {
+                "broadcast": {"self": False},
+                "presence": {"key": ""},
+                "postgres_changes": [{"event": "*", "schema": "public", "table": "feature_flags"}],
+            },
+            "access_token": self.anon_key,
+        })
+        heartbeat = asyncio.create_task(self.heartbeat())
+        try:
+            async for message in self.ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                self.handle(json.loads(message.data), time.perf_counter())
+        finally:
+            heartbeat.cancel()
+
+    def handle(self, message, received):
+        event, payload = message.get("event"), message.get("payload") or {}
+        if event == "system" and payload.get("status") == "ok":
+            self.subscribed.set()  # the postgres_changes subscription is live
+        elif event == "postgres_changes":
+            data = payload.get("data") or {}
+            record = data.get("record") or data.get("new") or {}
+            if record.get("flag") == self.flag:
+                self.seen.setdefault(record.get("enabled"), received)
+                self.changed.set()
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_S)
+            await self.send("phoenix", "heartbeat", {})
+
+    async def wait_for(self, value, deadline):
+        while value not in self.seen:
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                return None
+        return self.seen[value]
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+
+async def current_value(session, rest, headers, flag):
+    async with session.get(f"{rest}/feature_flags", params={"flag": f"eq.{flag}", "select": "enabled"},
+                           headers=headers) as response:
+        rows = await response.json()
+    if response.status != 200:
+        raise SystemExit(f"reading feature_flags failed ({response.status}): {rows}")
+    if not rows:
+        raise SystemExit(f"{flag} is not in feature_flags (is migration 47 applied?)")
+    return rows[0]["enabled"]
+
+
+async def write_flag(session, rest, headers, flag, enabled):
+    table, key_column, body = SOURCES[flag]
+    async with session.patch(f"{rest}/{table}", params={key_column: f"eq.{flag}"}, json=body(enabled),
+                             headers={**headers, "Prefer": "return=minimal"}) as response:
+        if response.status >= 300:
+            raise SystemExit(f"writing {table}.{flag} failed ({response.status}): {await response.text()}")
+
+
+async def flip(clients, session, rest, headers, flag, value, timeout):
+    for client in clients:
+        client.seen.pop(value, None)
+    started = time.perf_counter()
+    await write_flag(session, rest, headers, flag, value)
+    written = time.perf_counter()
+    deadline = written + timeout
+    arrivals = await asyncio.gather(*(client.wait_for(value, deadline) for client in clients))
+    latencies = sorted((t - started) * 1000 for t in arrivals if t is not None)
+    return {"value": value, "write_ms": (written - started) * 1000, "latencies_ms": latencies,
+            "missed": sum(t is None for t in arrivals)}
+
+
+async def run(args, cfg):
+    base = cfg["SUPABASE_URL"].rstrip("/")
+    rest = f"{base}/rest/v1"
+    ws_url = f"{base.replace('http', 'ws', 1)}/realtime/v1/websocket?apikey={cfg['SUPABASE_ANON_KEY']}&vsn=1.0.0"
+    service = {"apikey": cfg["SUPABASE_SERVICE_ROLE_KEY"],
+               "Authorization": f"Bearer {cfg['SUPABASE_SERVICE_ROLE_KEY']}"}
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        original = await current_value(session, rest, service, args.flag)
+        clients = [Client(session, ws_url, cfg["SUPABASE_ANON_KEY"], args.flag) for _ in range(args.clients)]
+        tasks = [asyncio.create_task(client.run()) for client in clients]
+        flips = []
+        try:
+            started = time.perf_counter()
+            joined = await asyncio.gather(*(asyncio.wait_for(c.subscribed.wait(), args.timeout) for c in clients),
+                                          return_exceptions=True)
+            live = [c for c, result in zip(clients, joined) if result is True]
+            print(f"{len(live)}/{len(clients)} clients subscribed in {time.perf_counter() - started:.1f}s")
+            if not live:
+                return 1
+            value = original
+            for _ in range(args.flips):
+                value = not value
+                result = await flip(live, session, rest, service, args.flag, value, args.timeout)
+                flips.append(result)
+                lat = result["latencies_ms"]
+                print(f"  -> {str(value).lower():<5} write {result['write_ms']:6.1f} ms  "
+                      f"p50 {loadgen.percentile(lat, 50):7.1f}  p95 {loadgen.percentile(lat, 95):7.1f}  "
+                      f"max {lat[-1] if lat else 0:7.1f} ms  missed {result['missed']}")
+                await asyncio.sleep(args.interval)
+        finally:
+            if flips and flips[-1]["value"] != original:
+                await write_flag(session, rest, service, args.flag, original)
+            for client in clients:
+                await client.close()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = sorted(ms for result in flips for ms in result["latencies_ms"])
+    missed = sum(result["missed"] for result in flips)
+    print(f"{args.flag}: {len(flips)} flips x {len(live)} clients, {missed} deliveries missed")
+    print(f"{'':<14} {'p50':>9} {'p95':>9} {'max':>9}")
+    print(f"{'realtime push':<14} {loadgen.percentile(latencies, 50):7.1f}ms "
+          f"{loadgen.percentile(latencies, 95):7.1f}ms {latencies[-1] if latencies else 0:7.1f}ms")
+    if args.ttl:
+        ttl_ms = args.ttl * 1000
+        print(f"{f'TTL {args.ttl:g}s only':<14} {ttl_ms * 0.5:7.1f}ms {ttl_ms * 0.95:7.1f}ms {ttl_ms:7.1f}ms")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"flag": args.flag, "clients": len(live), "flips": flips}, f, indent=2)
+    return 0 if missed == 0 else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flag", default="deepseek_enabled", choices=sorted(SOURCES))
+    parser.add_argument("--clients", type=int, default=20, help="simulated pages, one Realtime connection each")
+    parser.add_argument("--flips", type=int, default=6, help="how many times to toggle the flag")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between flips")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for subscriptions / each flip")
+    parser.add_argument("--ttl", type=float, default=0, help="also print the staleness of a TTL-only cache (seconds)")
+    parser.add_argument("--json", dest="json_path", help="write every flip's latencies as JSON")
+    args = parser.parse_args(argv)
+
+    cfg = loadgen.load_config()
+    missing = [key for key in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY") if not cfg.get(key)]
+    if missing:
+        raise SystemExit(f"{', '.join(missing)} not set (environment or tests/config.json)")
+    return asyncio.run(run(args, cfg))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
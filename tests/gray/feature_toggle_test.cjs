@@ -6,7 +6,7 @@ const cfg = JSON.parse(fs.readFileSync(path.join(__dirname, '..', 'config.json')
 const supabase = createClient(process.env.SUPABASE_URL || cfg.SUPABASE_URL, process.env.SUPABASE_SERVICE_ROLE_KEY || cfg.SUPABASE_SERVICE_ROLE_KEY)
 
 async function setFlag(v) {
-  await supabase.from('system_config').update({ value: v ? 'true' : 'false' }).eq('key', 'deepseek_enabled')
+  await supabase.from('system_config').update({ config_value: v ? 'true' : 'false' }).eq('config_key', 'deepseek_enabled')
 }
 
 async function run() {
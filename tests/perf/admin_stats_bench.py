@@ -0,0 +1,262 @@
+"""AdminDashboard statistics latency: full-table aggregates vs rollups (migration 42).
+
+``admin_statistics`` and ``get_tests_by_ip()`` used to COUNT / COUNT
+DISTINCT / GROUP BY the whole of ``test_submissions`` and ``orders`` on every
+dashboard load. Migration 42 reads trigger-maintained rollup tables instead.
+This seeds a scratch database migrated to the app schema and times both the
+old queries (inlined below) and the current ones on the same data::
+
+    python tests/perf/admin_stats_bench.py --seed 1000000
+    python tests/perf/admin_stats_bench.py --runs 50 --writes 2000 --check
+    python tests/perf/admin_stats_bench.py --drop-seed
+
+Seeded rows (``user_agent`` / ``customer_name`` ``admin_stats_bench``) are
+copied in with triggers off (``session_replication_role = replica``, so also
+without the ``auth.users`` foreign keys; needs a superuser) and the rollups are
+then rebuilt with ``refresh_admin_stat_rollups()``. ``--writes`` times
+single-row submission inserts through the triggers, which is what the rollups
+cost, and rolls them back. ``--check`` compares the IP and country rollups with
+a full recount. The run exits non-zero on any mismatch. ``DATABASE_URL`` is a direct Postgres connection string. Needs
+``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+import uuid
+
+import asyncpg
+
+MARK = "admin_stats_bench"
+
+# As of migrations 07 (admin_statistics) and 06 (get_tests_by_ip).
+LEGACY = {
+    "admin_statistics": """
+SELECT
+  (SELECT COUNT(*) FROM test_submissions) as total_tests,
+  (SELECT COUNT(DISTINCT user_id) FROM test_submissions) as unique_users,
+  (SELECT COUNT(*) FROM orders WHERE status = 'completed') as total_payments,
+  (SELECT COALESCE(SUM(total_amount), 0) FROM orders WHERE status = 'completed') as total_revenue,
+  (SELECT COUNT(*) FROM test_submissions WHERE created_at > now() - interval '24 hours') as tests_today,
+  (SELECT COUNT(*) FROM orders WHERE status = 'completed' AND completed_at > now() - interval '24 hours') as payments_today,
+  (SELECT COUNT(*) FROM orders WHERE status = 'completed' AND total_amount = 399) as first_time_purchases,
+  (SELECT COUNT(*) FROM orders WHERE status = 'completed' AND total_amount = 299) as second_time_purchases,
+  (SELECT COUNT(*) FROM orders WHERE status = 'completed' AND total_amount = 99) as repeat_purchases
+""",
+    "get_tests_by_ip": """
+SELECT ts.ip_address, COUNT(*)::bigint as count, ts.country, ts.city
+FROM test_submissions ts
+WHERE ts.ip_address IS NOT NULL
+GROUP BY ts.ip_address, ts.country, ts.city
+ORDER BY count DESC
+LIMIT 100
+""",
+}
+
+CURRENT = {
+    "admin_statistics": "SELECT * FROM admin_statistics",
+    "get_tests_by_ip": "SELECT * FROM get_tests_by_ip()",
+}
+
+RECOUNT_IPS = """
+SELECT ip_address, country, city, count(*) FROM test_submissions
+WHERE ip_address IS NOT NULL GROUP BY 1, 2, 3
+"""
+ROLLUP_IPS = "SELECT ip_address, country, city, tests FROM admin_ip_stats WHERE tests > 0"
+RECOUNT_COUNTRIES = "SELECT country, count(*) FROM test_submissions GROUP BY 1"
+ROLLUP_COUNTRIES = "SELECT country, tests FROM admin_country_stats WHERE tests > 0"
+
+COUNTRIES = {
+    "中国": ["北京", "上海", "深圳", "杭州", "成都", "广州"],
+    "香港": ["香港"],
+    "台湾": ["台北"],
+    "新加坡": ["新加坡"],
+    "美国": ["纽约", "旧金山", "西雅图"],
+    "日本": ["东京", "大阪"],
+    None: [None],
+}
+COUNTRY_WEIGHTS = [70, 6, 4, 4, 8, 4, 4]
+TEST_TYPES = ["personality", "math_finance", "risk_preference", "trading"]
+PRICES = [399, 299, 99]
+
+
+def submissions(n, rng, now):
+    users = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(max(1, n // 5))]
+    ips = []
+    for _ in range(max(1, n // 10)):
+        country = rng.choices(list(COUNTRIES), COUNTRY_WEIGHTS)[0]
+        ips.append((f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+                    country, rng.choice(COUNTRIES[country])))
+    for _ in range(n):
+        ip, country, city = rng.choice(ips)
+        created = now - datetime.timedelta(seconds=rng.randrange(365 * 86400))
+        yield (rng.choice(users), rng.choice(TEST_TYPES), ip, MARK, country, city, rng.random() < 0.8, created)
+
+
+def orders(n, rng, now):
+    for _ in range(n):
+        created = now - datetime.timedelta(seconds=rng.randrange(365 * 86400))
+        completed = rng.random() < 0.7
+        yield ("[]", rng.choice(PRICES), "completed" if completed else "pending", MARK,
+               created + datetime.timedelta(minutes=5) if completed else None, created)
+
+
+async def copy_batches(conn, table, columns, rows, batch=100_000):
+    chunk = []
+    done = 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == batch:
+            await conn.copy_records_to_table(table, records=chunk, columns=columns)
+            done += len(chunk)
+            chunk = []
+            print(f"{table}: {done}", flush=True)
+    if chunk:
+        await conn.copy_records_to_table(table, records=chunk, columns=columns)
+
+
+async def seed(conn, n):
+    rng = random.Random(n)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    started = time.perf_counter()
+    async with conn.transaction():
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        await copy_batches(conn, "test_submissions",
+                           ["user_id", "test_type", "ip_address", "user_agent", "country", "city", "completed",
+                            "created_at"], submissions(n, rng, now))
+        await copy_batches(conn, "orders", ["items", "total_amount", "status", "customer_name", "completed_at",
+                                            "created_at"], orders(n // 10, rng, now))
+    await conn.execute("ANALYZE test_submissions; ANALYZE orders")
+    print(f"seeded {n} submissions and {n // 10} orders in {time.perf_counter() - started:.1f}s")
+    await refresh(conn)
+
+
+async def drop_seed(conn):
+    async with conn.transaction():
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        print(await conn.execute("DELETE FROM test_submissions WHERE user_agent = $1", MARK))
+        print(await conn.execute("DELETE FROM orders WHERE customer_name = $1", MARK))
+    await refresh(conn)
+
+
+async def refresh(conn):
+    if await conn.fetchval("SELECT to_regproc('refresh_admin_stat_rollups') IS NOT NULL"):
+        started = time.perf_counter()
+        await conn.execute("SELECT refresh_admin_stat_rollups()")
+        print(f"rollups rebuilt in {time.perf_counter() - started:.1f}s")
+
+
+async def timed(conn, sql, runs):
+    stmt = await conn.prepare(sql)
+    await stmt.fetch()  # warm the cache
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await stmt.fetch()
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+
+async def bench_reads(conn, runs):
+    if not await conn.fetchval("SELECT to_regclass('admin_daily_stats') IS NOT NULL"):
+        raise SystemExit("migration 42 is not applied")
+    print(f"{'query':<18} {'before p50':>11} {'p95':>9}   {'after p50':>10} {'p95':>9}   speed-up")
+    for name, legacy in LEGACY.items():
+        before50, before95 = await timed(conn, legacy, runs)
+        after50, after95 = await timed(conn, CURRENT[name], runs)
+        print(f"{name:<18} {before50:>9.2f}ms {before95:>7.2f}ms   {after50:>8.2f}ms {after95:>7.2f}ms   "
+              f"{before50 / after50:>7.0f}x")
+
+
+async def compare_statistics(conn, label):
+    """Whether ``admin_statistics`` gives the same numbers as the legacy full-table query."""
+    # One statement, so both "last 24 hours" windows end at the same now().
+    old, new = await conn.fetchrow(f"SELECT to_jsonb(l), to_jsonb(c) FROM ({LEGACY['admin_statistics']}) l, "
+                                   f"({CURRENT['admin_statistics']}) c")
+    old, new = json.loads(old), json.loads(new)
+    differs = {key: (old[key], new[key]) for key in old if old[key] != new[key]}
+    print(f"{label}: admin_statistics " +
+          (f"differs from the full recount: {differs}" if differs else "matches the full recount") +
+          f" (refreshed_at {new['refreshed_at']})")
+    return not differs
+
+
+async def bench_writes(conn, n):
+    """Time single-row inserts through the rollup triggers; rolled back afterwards."""
+    rng = random.Random()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    stmt = await conn.prepare("INSERT INTO test_submissions (user_id, test_type, ip_address, user_agent, country, "
+                              "city, completed, created_at) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)")
+    latencies = []
+    tr = conn.transaction()
+    await tr.start()
+    try:
+        # Synthetic users are not in auth.users: skip the foreign key, keep the rollup trigger.
+        await conn.execute("ALTER TABLE test_submissions ENABLE ALWAYS TRIGGER track_submission_stats_insert_delete")
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        for row in submissions(n, rng, now):
+            row = (*row[:7], now)
+            started = time.perf_counter()
+            await stmt.fetch(*row)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        print(f"{n} single-row inserts through the rollup triggers: p50 {latencies[n // 2]:.3f} ms  "
+              f"p95 {latencies[int(n * 0.95)]:.3f} ms")
+        return await compare_statistics(conn, f"after {n} inserts")
+    finally:
+        await tr.rollback()
+
+
+async def check(conn):
+    ok = True
+    for label, recount, rollup in [("ip", RECOUNT_IPS, ROLLUP_IPS), ("country", RECOUNT_COUNTRIES, ROLLUP_COUNTRIES)]:
+        want = {tuple(row[:-1]): row[-1] for row in await conn.fetch(recount)}
+        have = {tuple(row[:-1]): row[-1] for row in await conn.fetch(rollup)}
+        drift = {key for key in want.keys() | have.keys() if want.get(key) != have.get(key)}
+        print(f"{label} rollup: {len(have)} rows, {len(drift)} differ from a full recount")
+        ok = ok and not drift
+    return ok
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if args.drop_seed:
+            await drop_seed(conn)
+            return 0
+        if args.seed:
+            await seed(conn, args.seed)
+        total = await conn.fetchval("SELECT count(*) FROM test_submissions")
+        print(f"{total} test submissions")
+        await bench_reads(conn, args.runs)
+        ok = await compare_statistics(conn, "seeded data")
+        if args.writes:
+            ok = await bench_writes(conn, args.writes) and ok
+        if args.check:
+            ok = await check(conn) and ok
+        return 0 if ok else 1
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic submissions first")
+    parser.add_argument("--drop-seed", action="store_true", help="delete the synthetic rows and exit")
+    parser.add_argument("--runs", type=int, default=20, help="timed runs of each dashboard query")
+    parser.add_argument("--writes", type=int, default=0, help="also time this many inserts through the triggers")
+    parser.add_argument("--check", action="store_true", help="compare the IP / country rollups with a full recount")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
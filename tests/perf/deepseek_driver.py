@@ -0,0 +1,160 @@
+"""Tail latency and concurrency limit of the DeepSeek edge functions.
+
+Run the edge function against ``mock_deepseek.py`` (``DEEPSEEK_API_URL``)
+and sweep the number of concurrent clients. Each level runs closed-loop for
+``--duration`` seconds: every client sends its next request as soon as the
+previous one returns. For each level the driver prints throughput,
+p50/p95/p99/max and the error mix, plus the peak concurrency the mock saw
+upstream. The concurrency limit is the last level that still raised
+throughput by ``--min-gain`` without going over ``--max-error-rate``::
+
+    python tests/perf/mock_deepseek.py --ttft-ms 2000 --tokens-per-sec 30 &
+    python tests/perf/deepseek_driver.py --levels 1,2,4,8,16,32 --duration 60 \\
+        --fixtures analyses.json --mock http://localhost:8799
+
+``generate_deepseek_analysis`` returns the saved analysis for a
+(testResultId, orderId) pair it has seen before, so only the first call per
+pair reaches the LLM. ``--fixtures`` takes a JSON list of
+``{"testResultId": ..., "orderId": ...}`` objects that are used in turn.
+Without it, the pair from ``tests/config.json`` is used, and after the first
+request the run measures the cached path. Needs ``aiohttp``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+import aiohttp
+
+import loadgen
+
+
+async def mock_stats(session, mock_url, reset=False):
+    if not mock_url:
+        return None
+    try:
+        path = "stats/reset" if reset else "stats"
+        async with session.request("POST" if reset else "GET", f"{mock_url.rstrip('/')}/{path}") as response:
+            return await response.json()
+    except aiohttp.ClientError:
+        return None
+
+
+async def run_level(session, url, headers, bodies, concurrency, duration, timeout):
+    """Closed loop with ``concurrency`` clients for ``duration`` seconds; one record per request."""
+    records = []
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            status, outcome, ok = await loadgen.fire(session, url, "POST", headers, next(bodies), timeout)
+            records.append({"latency_ms": (time.perf_counter() - sent) * 1000, "outcome": outcome, "ok": ok})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return records, time.perf_counter() - started
+
+
+def level_summary(concurrency, records, elapsed, upstream):
+    latencies = sorted(r["latency_ms"] for r in records)
+    outcomes = {}
+    for r in records:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "throughput_rps": sum(r["ok"] for r in records) / elapsed if elapsed else 0.0,
+        "error_rate": sum(not r["ok"] for r in records) / len(records) if records else 0.0,
+        "p50": loadgen.percentile(latencies, 50),
+        "p95": loadgen.percentile(latencies, 95),
+        "p99": loadgen.percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0,
+        "outcomes": outcomes,
+        "upstream_peak": upstream.get("peak_in_flight") if upstream else None,
+    }
+
+
+def concurrency_limit(levels, min_gain, max_error_rate):
+    """Last level that still added throughput without breaching the error budget."""
+    best = None
+    for level in levels:
+        if level["error_rate"] > max_error_rate:
+            break
+        if best is not None and level["throughput_rps"] < best["throughput_rps"] * (1 + min_gain):
+            break
+        best = level
+    return best["concurrency"] if best else None
+
+
+async def sweep(url, headers, bodies, levels, duration, timeout, mock_url, pause):
+    results = []
+    connector = aiohttp.TCPConnector(limit=max(levels) + 4, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for concurrency in levels:
+            print(f"-- {concurrency} concurrent client(s) for {duration:.0f}s", flush=True)
+            await mock_stats(session, mock_url, reset=True)
+            records, elapsed = await run_level(session, url, headers, bodies, concurrency, duration, timeout)
+            results.append(level_summary(concurrency, records, elapsed, await mock_stats(session, mock_url)))
+            await asyncio.sleep(pause)
+    return results
+
+
+def print_levels(levels, limit):
+    print()
+    print(f"{'clients':>7} {'reqs':>6} {'ok/s':>7} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  upstream peak")
+    for r in levels:
+        peak = "-" if r["upstream_peak"] is None else r["upstream_peak"]
+        print(f"{r['concurrency']:7d} {r['requests']:6d} {r['throughput_rps']:7.2f} {r['error_rate'] * 100:5.1f}% "
+              f"{r['p50']:8.0f} {r['p95']:8.0f} {r['p99']:8.0f} {r['max']:8.0f}  {peak}")
+        for outcome, count in r["outcomes"].items():
+            if not outcome.startswith("2"):
+                print(f"{'':>7} {count:6d}  {outcome}")
+    print()
+    print(f"concurrency limit: {limit if limit is not None else 'not reached at the first level'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", default="generate_deepseek_analysis",
+                        choices=["generate_deepseek_analysis", "generate_deepseek_analysis_free"])
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    parser.add_argument("--pause", type=float, default=2.0, help="seconds between levels")
+    parser.add_argument("--timeout", type=float, default=150.0, help="per-request timeout in seconds")
+    parser.add_argument("--fixtures", help="JSON list of {testResultId, orderId} to cycle through")
+    parser.add_argument("--language", default="zh", choices=["zh", "en"])
+    parser.add_argument("--mock", dest="mock_url", help="base URL of mock_deepseek.py, for upstream stats")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="throughput gain that counts as scaling")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", dest="json_path", help="write the per-level results as JSON")
+    args = parser.parse_args(argv)
+
+    cfg = loadgen.load_config()
+    if not cfg["EDGE_BASE"]:
+        raise SystemExit("EDGE_BASE is not set (environment or tests/config.json)")
+    url = f"{cfg['EDGE_BASE'].rstrip('/')}/{args.endpoint}"
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {cfg['AUTH_BEARER']}"}
+    if args.fixtures:
+        with open(args.fixtures, encoding="utf-8") as f:
+            pairs = json.load(f)
+    else:
+        pairs = [{"testResultId": cfg["TEST_RESULT_ID"], "orderId": cfg["ORDER_ID"]}]
+    bodies = itertools.cycle(
+        [{**pair, "testData": cfg["TEST_DATA"], "language": args.language} for pair in pairs]
+    )
+    levels = [int(level) for level in args.levels.split(",")]
+
+    results = asyncio.run(sweep(url, headers, bodies, levels, args.duration, args.timeout, args.mock_url, args.pause))
+    limit = concurrency_limit(results, args.min_gain, args.max_error_rate)
+    print_levels(results, limit)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"levels": results, "concurrency_limit": limit}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+"""Gift code generation throughput: per-code round trips vs one bulk call (migration 44).
+
+``giftCodeApi.generateGiftCode`` makes one code per call: an admin check,
+``generate_gift_code()`` (which itself probes ``gift_codes`` for the
+candidate) and an INSERT, i.e. three requests per code. Migration 44 adds
+``generate_gift_codes_bulk()``, which inserts a whole batch in one statement
+and leaves duplicates to the unique index. This times both against a scratch
+database migrated to the app schema::
+
+    python tests/perf/gift_code_bench.py --counts 100 1000 5000
+    python tests/perf/gift_code_bench.py --counts 5000 --rtt 60
+
+Every run happens in a transaction that is rolled back, so no codes are
+left behind. Both paths run as the first admin in ``profiles`` (or
+``--admin``). The local socket hides what each request costs from a
+browser, so ``--rtt`` adds that many milliseconds per round trip to model
+it. Each bulk batch is also checked to be complete and free of duplicates,
+and the run exits non-zero if one is not. ``DATABASE_URL`` is a direct
+Postgres connection string. Needs ``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import asyncpg
+
+# The three requests giftCodeApi.generateGiftCode makes for each code.
+ADMIN_CHECK = "SELECT role FROM profiles WHERE id = $1"
+NEXT_CODE = "SELECT generate_gift_code()"
+INSERT_CODE = """
+INSERT INTO gift_codes (code, max_redemptions, free_analyses_count, created_by, expires_at)
+VALUES ($1, 1, 15, $2, now() + interval '30 days')
+RETURNING *
+"""
+BULK = "SELECT generate_gift_codes_bulk($1, 1, 30, 15, $2)::text"
+
+
+async def round_trip(rtt):
+    if rtt:
+        await asyncio.sleep(rtt / 1000)
+
+
+async def per_code(conn, admin, n, rtt):
+    check, next_code, insert = (await conn.prepare(ADMIN_CHECK), await conn.prepare(NEXT_CODE),
+                                await conn.prepare(INSERT_CODE))
+    started = time.perf_counter()
+    for _ in range(n):
+        await round_trip(rtt)
+        await check.fetchval(admin)
+        await round_trip(rtt)
+        code = await next_code.fetchval()
+        await round_trip(rtt)
+        await insert.fetchrow(code, admin)
+    return time.perf_counter() - started, 3 * n
+
+
+async def bulk(conn, admin, n, rtt):
+    started = time.perf_counter()
+    await round_trip(rtt)
+    codes = json.loads(await conn.fetchval(BULK, n, admin))
+    elapsed = time.perf_counter() - started
+    distinct = len({c["code"] for c in codes})
+    if len(codes) != n or distinct != n:
+        print(f"bulk batch of {n}: got {len(codes)} codes, {distinct} distinct")
+        return elapsed, 1, False
+    return elapsed, 1, True
+
+
+async def rolled_back(conn, fn, *args):
+    tr = conn.transaction()
+    await tr.start()
+    try:
+        return await fn(conn, *args)
+    finally:
+        await tr.rollback()
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if not await conn.fetchval("SELECT to_regproc('generate_gift_codes_bulk') IS NOT NULL"):
+            raise SystemExit("migration 44 is not applied")
+        admin = args.admin or await conn.fetchval("SELECT id FROM profiles WHERE role = 'admin' ORDER BY created_at LIMIT 1")
+        if admin is None:
+            raise SystemExit("no admin in profiles (or pass --admin)")
+        existing = await conn.fetchval("SELECT count(*) FROM gift_codes")
+        print(f"{existing} existing gift codes, {args.rtt:g} ms per round trip")
+        print(f"{'codes':>6}   {'per-code':>9} {'requests':>9} {'codes/s':>9}   {'bulk':>9} {'codes/s':>9}   speed-up")
+        ok = True
+        for n in args.counts:
+            slow, slow_requests = await rolled_back(conn, per_code, admin, n, args.rtt)
+            fast, _, complete = await rolled_back(conn, bulk, admin, n, args.rtt)
+            ok = ok and complete
+            print(f"{n:>6}   {slow * 1000:>7.0f}ms {slow_requests:>9} {n / slow:>9.0f}   "
+                  f"{fast * 1000:>7.1f}ms {n / fast:>9.0f}   {slow / fast:>7.0f}x")
+        return 0 if ok else 1
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 5000], help="batch sizes to time")
+    parser.add_argument("--rtt", type=float, default=0, help="simulated milliseconds per client round trip")
+    parser.add_argument("--admin", help="profile id to generate as (default: the first admin)")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,370 @@
+"""Multi-step user-journey load over HTTP, without a browser.
+
+``loadgen.py`` hammers one endpoint. This runs whole virtual users: each
+one walks the sign-up-to-analysis journey of a new user, with think times
+between steps and its own state (tokens, ids) carried from one step to the
+next. Users arrive open-loop on the same constant or ramping schedules as
+``loadgen.py``::
+
+    python tests/perf/journeys.py --rate 2 --duration 60
+    python tests/perf/journeys.py --ramp 1:20 --duration 120 --json campaign.json
+    python tests/perf/journeys.py --rate 5 --think-scale 0    # no think times: raw step capacity
+
+The report gives journey-level throughput and duration, per-step latency
+and outcomes, and the step that saturated first: the first step whose p95
+over a time window rose above ``--saturation-factor`` times its p95 in the
+first window, or whose error rate passed ``--saturation-errors``.
+
+A journey is a list of :func:`step` entries built from :func:`function`,
+:func:`rest`, :func:`rpc` and :func:`auth` requests. Request bodies and
+paths may be callables of the :class:`VirtualUser`, ``save`` copies
+values out of a response into ``user.state`` for later steps, and ``ok``
+checks the decoded body of endpoints that report failure with HTTP 200::
+
+    step("login", function("login-password", lambda u: {"email": u.email, "password": u.password}),
+         save={"token": "token"}, think=(1, 3))
+
+``SUPABASE_URL``, ``SUPABASE_ANON_KEY``, ``EDGE_BASE``, ``GIFT_CODE`` and
+``TEST_DATA`` come from the environment or ``tests/config.json``. Needs
+``aiohttp``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+
+import loadgen
+
+
+@dataclass
+class VirtualUser:
+    index: int
+    email: str
+    password: str
+    cfg: dict
+    state: dict = field(default_factory=dict)
+
+
+@dataclass
+class Step:
+    name: str
+    request: object  # VirtualUser -> (method, url, headers, body)
+    save: dict = field(default_factory=dict)  # state key -> dotted path in the response
+    think: tuple = (0.0, 0.0)  # uniform think time after the step, seconds
+    ok: object = None  # optional payload -> bool, for endpoints that report failure in a 2xx body
+
+
+def step(name, request, save=None, think=(0.0, 0.0), ok=None):
+    return Step(name, request, save or {}, think, ok)
+
+
+def _value(value, user):
+    return value(user) if callable(value) else value
+
+
+def _anon_headers(user):
+    key = user.cfg["SUPABASE_ANON_KEY"]
+    return {"Content-Type": "application/json", "apikey": key, "Authorization": f"Bearer {key}"}
+
+
+def _user_headers(user):
+    headers = _anon_headers(user)
+    if "access_token" in user.state:
+        headers["Authorization"] = f"Bearer {user.state['access_token']}"
+    return headers
+
+
+def function(name, body=None):
+    """POST to an edge function, as the signed-in user when there is one."""
+    def build(user):
+        url = f"{user.cfg['EDGE_BASE'].rstrip('/')}/{name}"
+        return "POST", url, _user_headers(user), _value(body, user) or {}
+    return build
+
+
+def rest(table, body=None, method="POST", query=""):
+    """PostgREST request on ``table``; inserts ask for the new rows back."""
+    def build(user):
+        url = f"{user.cfg['SUPABASE_URL'].rstrip('/')}/rest/v1/{table}"
+        if query:
+            url += f"?{_value(query, user)}"
+        headers = {**_user_headers(user), "Prefer": "return=representation"}
+        return method, url, headers, _value(body, user)
+    return build
+
+
+def rpc(name, args=None):
+    def build(user):
+        url = f"{user.cfg['SUPABASE_URL'].rstrip('/')}/rest/v1/rpc/{name}"
+        return "POST", url, _user_headers(user), _value(args, user) or {}
+    return build
+
+
+def auth(path, body=None):
+    """Supabase Auth (GoTrue) request, e.g. ``auth("signup", ...)``."""
+    def build(user):
+        url = f"{user.cfg['SUPABASE_URL'].rstrip('/')}/auth/v1/{path}"
+        return "POST", url, _anon_headers(user), _value(body, user) or {}
+    return build
+
+
+def _credentials(user):
+    return {"email": user.email, "password": user.password}
+
+
+def _test_result(user):
+    data = user.cfg["TEST_DATA"] or {}
+    return {
+        "user_id": user.state.get("user_id"),
+        "personality_scores": data.get("personality_scores"),
+        "math_finance_scores": data.get("math_finance_scores"),
+        "risk_preference_scores": data.get("risk_preference_scores"),
+        "investment_style": data.get("investment_style"),
+        "euclidean_distance": data.get("euclidean_distance"),
+    }
+
+
+# The free-analysis function authenticates with Supabase Auth, not with the
+# login-password token, so new users also get a GoTrue session, as the app's
+# AuthContext does on sign-up.
+NEW_USER = [
+    step("register-password", function("register-password", _credentials), think=(2, 5)),
+    step("login-password", function("login-password", _credentials), save={"token": "token"}, think=(1, 2)),
+    step("auth-signup", auth("signup", _credentials),
+         save={"access_token": "access_token", "user_id": "user.id"}),
+    step("upsert-user", function("upsert-user", lambda u: {"email": u.email}), think=(30, 90)),
+    step("submit-test-results", rest("test_results", _test_result), save={"test_result_id": "0.id"}, think=(5, 15)),
+    # redeem_gift_code answers HTTP 200 with {"success": false, ...} for a used or invalid code.
+    step("redeem-gift-code", rpc("redeem_gift_code", lambda u: {
+        "p_code": u.cfg["GIFT_CODE"], "p_user_id": u.state["user_id"],
+    }), think=(2, 5), ok=lambda payload: isinstance(payload, dict) and payload.get("success") is not False),
+    step("generate-analysis-free", function("generate_deepseek_analysis_free", lambda u: {
+        "testResultId": u.state["test_result_id"], "testData": u.cfg["TEST_DATA"] or {}, "language": "zh",
+    })),
+]
+
+JOURNEYS = {"new-user": NEW_USER}
+
+
+def extract(payload, path):
+    """Follow a dotted path (``user.id``, ``0.id``) into a decoded JSON response."""
+    for part in path.split("."):
+        if isinstance(payload, list):
+            payload = payload[int(part)] if part.isdigit() and int(part) < len(payload) else None
+        elif isinstance(payload, dict):
+            payload = payload.get(part)
+        else:
+            return None
+    return payload
+
+
+async def run_step(session, user, s, timeout, started):
+    """Run one step; returns its record and whether the journey may continue."""
+    sent = time.perf_counter()
+    try:
+        method, url, headers, body = s.request(user)
+    except (KeyError, TypeError) as exc:
+        # State an earlier step should have saved is missing.
+        record = {"step": s.name, "at_s": sent - started, "latency_ms": 0.0, "outcome": f"state {exc}", "ok": False}
+        return record, False
+    try:
+        async with session.request(
+            method, url, headers=headers, json=body if method != "GET" else None,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            text = await response.text()
+            status = response.status
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            payload = None
+        outcome, ok = loadgen.classify(status, payload), loadgen.is_ok(status, payload)
+        if ok and s.ok and not s.ok(payload):
+            outcome, ok = f"{outcome} rejected", False
+    except asyncio.TimeoutError:
+        payload, outcome, ok = None, "timeout", False
+    except aiohttp.ClientError as exc:
+        payload, outcome, ok = None, f"client {type(exc).__name__}", False
+    if ok:
+        for key, path in s.save.items():
+            user.state[key] = extract(payload, path)
+    latency = (time.perf_counter() - sent) * 1000
+    return {"step": s.name, "at_s": sent - started, "latency_ms": latency, "outcome": outcome, "ok": ok}, ok
+
+
+async def run_user(session, user, journey, timeout, think_scale, rng, started, records, journeys):
+    begun = time.perf_counter()
+    completed = True
+    for s in journey:
+        record, ok = await run_step(session, user, s, timeout, started)
+        records.append(record)
+        if not ok:
+            completed = False
+            break
+        pause = rng.uniform(*s.think) * think_scale
+        if pause:
+            await asyncio.sleep(pause)
+    journeys.append({
+        "user": user.index,
+        "at_s": begun - started,
+        "seconds": time.perf_counter() - begun,
+        "completed": completed,
+        "failed_step": None if completed else s.name,
+    })
+
+
+async def run_journeys(cfg, journey, schedule, timeout, connections, think_scale, email_domain, seed):
+    records, journeys, tasks = [], [], []
+    rng = random.Random(seed)
+    run_id = f"{int(time.time())}"
+    connector = aiohttp.TCPConnector(limit=connections, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        for i, offset in enumerate(schedule):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            user = VirtualUser(i, f"journey-{run_id}-{i}@{email_domain}", f"Journey-{run_id}!", cfg)
+            tasks.append(asyncio.create_task(
+                run_user(session, user, journey, timeout, think_scale, rng, started, records, journeys)
+            ))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return records, journeys, elapsed
+
+
+def step_stats(records):
+    latencies = sorted(r["latency_ms"] for r in records)
+    return {
+        "count": len(records),
+        "ok": sum(r["ok"] for r in records),
+        "p50": loadgen.percentile(latencies, 50),
+        "p95": loadgen.percentile(latencies, 95),
+        "p99": loadgen.percentile(latencies, 99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def first_saturated(records, step_names, elapsed, windows, factor, error_rate):
+    """``(step, window start in seconds, reason)`` for the first step to saturate, or ``None``."""
+    width = elapsed / windows
+    baseline = {}
+    for w in range(windows):
+        for name in step_names:
+            window = [r for r in records if r["step"] == name and w * width <= r["at_s"] < (w + 1) * width]
+            if len(window) < 5:
+                continue
+            p95 = loadgen.percentile(sorted(r["latency_ms"] for r in window), 95)
+            errors = sum(not r["ok"] for r in window) / len(window)
+            baseline.setdefault(name, p95)
+            if errors > error_rate:
+                return name, w * width, f"error rate {errors:.0%}"
+            if w and p95 > factor * baseline[name]:
+                return name, w * width, f"p95 {baseline[name]:.0f} -> {p95:.0f} ms"
+    return None
+
+
+def summarize(records, journeys, elapsed, journey, windows, factor, error_rate):
+    step_names = [s.name for s in journey]
+    done = [j for j in journeys if j["completed"]]
+    durations = sorted(j["seconds"] for j in done)
+    saturated = first_saturated(records, step_names, elapsed, windows, factor, error_rate)
+    steps = {}
+    for name in step_names:
+        mine = [r for r in records if r["step"] == name]
+        outcomes = {}
+        for r in mine:
+            outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+        steps[name] = {**step_stats(mine), "outcomes": outcomes}
+    failed_at = {}
+    for j in journeys:
+        if not j["completed"]:
+            failed_at[j["failed_step"]] = failed_at.get(j["failed_step"], 0) + 1
+    return {
+        "users": len(journeys),
+        "completed": len(done),
+        "elapsed_s": elapsed,
+        "journeys_per_s": len(done) / elapsed if elapsed else 0.0,
+        "journey_seconds": {
+            "p50": loadgen.percentile(durations, 50),
+            "p95": loadgen.percentile(durations, 95),
+            "max": durations[-1] if durations else 0.0,
+        },
+        "failed_at": failed_at,
+        "steps": steps,
+        "first_saturated": (
+            {"step": saturated[0], "at_s": saturated[1], "reason": saturated[2]} if saturated else None
+        ),
+    }
+
+
+def print_summary(summary):
+    seconds = summary["journey_seconds"]
+    print(f"{summary['users']} users, {summary['completed']} completed the journey in "
+          f"{summary['elapsed_s']:.1f}s ({summary['journeys_per_s']:.2f} journeys/s)")
+    print(f"journey duration s  p50={seconds['p50']:.1f}  p95={seconds['p95']:.1f}  max={seconds['max']:.1f}")
+    print()
+    print(f"{'step':<24} {'count':>6} {'ok':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  ms")
+    for name, s in summary["steps"].items():
+        print(f"{name:<24} {s['count']:6d} {s['ok']:6d} {s['p50']:8.0f} {s['p95']:8.0f} {s['p99']:8.0f} {s['max']:8.0f}")
+        for outcome, count in s["outcomes"].items():
+            if not outcome.startswith("2") or outcome.endswith(" rejected"):
+                print(f"{'':<24} {count:6d}  {outcome}")
+    if summary["failed_at"]:
+        print("journeys stopped at: " + ", ".join(f"{k} x{v}" for k, v in summary["failed_at"].items()))
+    saturated = summary["first_saturated"]
+    if saturated:
+        print(f"first to saturate: {saturated['step']} from t={saturated['at_s']:.0f}s ({saturated['reason']})")
+    else:
+        print("no step saturated")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--journey", choices=sorted(JOURNEYS), default="new-user")
+    rate = parser.add_mutually_exclusive_group()
+    rate.add_argument("--rate", type=float, default=1.0, help="new users per second")
+    rate.add_argument("--ramp", type=loadgen.parse_ramp, metavar="FROM:TO", help="user arrival rate ramp")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of arrivals")
+    parser.add_argument("--poisson", action="store_true")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="multiply every think time (0 disables them)")
+    parser.add_argument("--email-domain", default="example.com")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--windows", type=int, default=10, help="time windows for saturation detection")
+    parser.add_argument("--saturation-factor", type=float, default=3.0)
+    parser.add_argument("--saturation-errors", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    cfg = loadgen.load_config()
+    missing = [k for k in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "EDGE_BASE") if not cfg.get(k)]
+    if missing:
+        raise SystemExit(f"{', '.join(missing)} not set (environment or tests/config.json)")
+    journey = JOURNEYS[args.journey]
+    if any(s.name == "redeem-gift-code" for s in journey) and not cfg.get("GIFT_CODE"):
+        # Every journey would stop at redeem-gift-code and the run would measure nothing past it.
+        raise SystemExit("GIFT_CODE not set (environment or tests/config.json)")
+    rate_from, rate_to = args.ramp or (args.rate, args.rate)
+    schedule = loadgen.arrival_times(rate_from, rate_to, args.duration, args.poisson, args.seed)
+
+    records, journeys, elapsed = asyncio.run(run_journeys(
+        cfg, journey, schedule, args.timeout, args.connections, args.think_scale, args.email_domain, args.seed,
+    ))
+    summary = summarize(records, journeys, elapsed, journey, args.windows, args.saturation_factor,
+                        args.saturation_errors)
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
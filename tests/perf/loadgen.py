@@ -0,0 +1,291 @@
+"""Open-loop load generator for the Supabase edge functions.
+
+Replaces ``stress_login.cjs``, which fired 200 logins in one ``Promise.all``
+and printed only ok/fail/ms. Here requests are started on a schedule,
+whether or not earlier ones have finished, so a slow backend shows up as
+growing latency instead of a quietly lower request rate. Latency is measured
+from the scheduled start of each request, which keeps client-side queueing
+in the numbers (no coordinated omission).
+
+    python tests/perf/loadgen.py login-password --rate 50 --duration 30
+    python tests/perf/loadgen.py login-password --ramp 10:200 --duration 60 --json login.json
+    python tests/perf/loadgen.py upsert-user --rate 20 --body '{"email": "load{i}@example.com"}' --csv upsert.csv
+    python tests/perf/loadgen.py generate_deepseek_analysis --rate 1 --duration 60 --timeout 120
+
+``EDGE_BASE``, ``AUTH_BEARER`` and the DeepSeek fixtures come from the
+environment or ``tests/config.json``, as in the Node scripts. ``--body`` is a
+JSON template; ``{i}`` is replaced with the request number. Every response is
+classified by HTTP status plus the body's ``code`` (``SUCCESS``/``FAIL``) or
+``error`` field. Needs ``aiohttp`` (``pip install -r tests/requirements.txt``).
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import pathlib
+import random
+import time
+
+import aiohttp
+
+TESTS_DIR = pathlib.Path(__file__).resolve().parent.parent
+FUNCTIONS_DIR = TESTS_DIR.parent / "supabase" / "functions"
+
+
+def load_config():
+    """``tests/config.json`` with environment overrides, like the Node scripts."""
+    with open(TESTS_DIR / "config.json", encoding="utf-8") as f:
+        cfg = json.load(f)
+    for key in cfg:
+        value = os.environ.get(key)
+        if value:
+            cfg[key] = json.loads(value) if key == "TEST_DATA" else value
+    return cfg
+
+
+def default_body(endpoint, cfg):
+    """Request body template for ``endpoint`` when ``--body`` is not given."""
+    if endpoint in ("login-password", "register-password"):
+        return {"email": "user{i}@example.com", "password": "password123"}
+    if endpoint == "upsert-user":
+        return {"email": "user{i}@example.com"}
+    if endpoint in ("generate_deepseek_analysis", "generate_deepseek_analysis_free"):
+        return {
+            "testResultId": cfg["TEST_RESULT_ID"],
+            "orderId": cfg["ORDER_ID"],
+            "testData": cfg["TEST_DATA"],
+            "language": "zh",
+        }
+    return {}
+
+
+def render(template, i):
+    """Fill ``{i}`` in every string of a JSON template."""
+    if isinstance(template, dict):
+        return {k: render(v, i) for k, v in template.items()}
+    if isinstance(template, list):
+        return [render(v, i) for v in template]
+    if isinstance(template, str):
+        return template.replace("{i}", str(i))
+    return template
+
+
+def arrival_times(rate_from, rate_to, duration, poisson=False, seed=0):
+    """Start offsets in seconds for a rate ramping linearly from ``rate_from`` to ``rate_to``.
+
+    A constant rate is the ramp with ``rate_from == rate_to``. The k-th
+    arrival is where the integrated rate reaches k (or a Poisson process with
+    that intensity when ``poisson`` is set).
+    """
+    slope = (rate_to - rate_from) / duration
+    rng = random.Random(seed)
+    times, total = [], 0.0
+    while True:
+        total += rng.expovariate(1.0) if poisson else 1.0
+        # Solve rate_from * t + slope * t^2 / 2 = total for t.
+        if abs(slope) < 1e-12:
+            t = total / rate_from if rate_from > 0 else math.inf
+        else:
+            discriminant = rate_from ** 2 + 2 * slope * total
+            t = (-rate_from + math.sqrt(discriminant)) / slope if discriminant >= 0 else math.inf
+        if t > duration:
+            return times
+        times.append(t)
+
+
+def classify(status, payload):
+    """``"200 SUCCESS"``, ``"401 Invalid credentials"``, ``"500 FAIL"``, ..."""
+    detail = ""
+    if isinstance(payload, dict):
+        detail = payload.get("code") or payload.get("error") or ""
+    return f"{status} {detail}".strip()
+
+
+def is_ok(status, payload):
+    return 200 <= status < 300 and not (isinstance(payload, dict) and payload.get("code") == "FAIL")
+
+
+async def fire(session, url, method, headers, body, timeout):
+    """One request; returns ``(status, outcome, ok)`` and never raises."""
+    try:
+        async with session.request(
+            method, url, headers=headers, json=body if method != "GET" else None,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            text = await response.text()
+            try:
+                payload = json.loads(text)
+            except ValueError:
+                payload = None
+            return response.status, classify(response.status, payload), is_ok(response.status, payload)
+    except asyncio.TimeoutError:
+        return 0, "timeout", False
+    except aiohttp.ClientError as exc:
+        return 0, f"client {type(exc).__name__}", False
+
+
+async def run_load(url, method, headers, template, schedule, timeout, connections, max_in_flight):
+    """Start one request per entry of ``schedule``; returns one record per request."""
+    records = []
+    in_flight = 0
+    connector = aiohttp.TCPConnector(limit=connections, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+
+        async def one(i, offset):
+            nonlocal in_flight
+            sent = time.perf_counter()
+            status, outcome, ok = await fire(session, url, method, headers, render(template, i), timeout)
+            done = time.perf_counter()
+            in_flight -= 1
+            records.append({
+                "i": i,
+                "scheduled_s": offset,
+                "send_lag_ms": (sent - started - offset) * 1000,
+                "latency_ms": (done - started - offset) * 1000,
+                "service_ms": (done - sent) * 1000,
+                "status": status,
+                "outcome": outcome,
+                "ok": ok,
+            })
+
+        tasks = []
+        for i, offset in enumerate(schedule):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= max_in_flight:
+                # Open loop: never wait for a slot, count the request as shed by the client.
+                records.append({"i": i, "scheduled_s": offset, "send_lag_ms": 0.0, "latency_ms": 0.0,
+                                "service_ms": 0.0, "status": 0, "outcome": "shed (max in flight)", "ok": False})
+                continue
+            in_flight += 1
+            tasks.append(asyncio.create_task(one(i, offset)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    records.sort(key=lambda r: r["i"])
+    return records, elapsed
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def histogram(values, buckets_ms=(5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)):
+    """Counts per latency bucket, keyed by the bucket's upper bound (``inf`` for the rest)."""
+    counts = {bound: 0 for bound in (*buckets_ms, math.inf)}
+    for value in values:
+        counts[next(bound for bound in counts if value <= bound)] += 1
+    return counts
+
+
+def summarize(records, elapsed, target):
+    completed = [r for r in records if not r["outcome"].startswith("shed")]
+    latencies = sorted(r["latency_ms"] for r in completed)
+    outcomes = {}
+    for r in records:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+    return {
+        "target": target,
+        "requests": len(records),
+        "ok": sum(r["ok"] for r in records),
+        "errors": sum(not r["ok"] for r in records),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(completed) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "max_send_lag_ms": max((r["send_lag_ms"] for r in completed), default=0.0),
+        "outcomes": dict(sorted(outcomes.items(), key=lambda item: -item[1])),
+        "histogram_ms": {("inf" if b == math.inf else b): n for b, n in histogram(latencies).items()},
+    }
+
+
+def print_summary(summary):
+    latency = summary["latency_ms"]
+    print(f"{summary['target']}: {summary['requests']} requests in {summary['elapsed_s']:.1f}s "
+          f"({summary['throughput_rps']:.1f} req/s), ok={summary['ok']} errors={summary['errors']}")
+    print(f"latency ms  p50={latency['p50']:.0f}  p95={latency['p95']:.0f}  "
+          f"p99={latency['p99']:.0f}  max={latency['max']:.0f}  (max send lag {summary['max_send_lag_ms']:.0f})")
+    print("outcomes:")
+    for outcome, count in summary["outcomes"].items():
+        print(f"  {count:7d}  {outcome}")
+    print("latency histogram:")
+    peak = max(summary["histogram_ms"].values(), default=0) or 1
+    for bound, count in summary["histogram_ms"].items():
+        label = f"<= {bound} ms" if bound != "inf" else "slower"
+        print(f"  {label:>12}  {count:7d}  {'#' * round(40 * count / peak)}")
+
+
+def write_csv(path, records):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]) if records else ["i"])
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def parse_ramp(value):
+    try:
+        low, high = (float(part) for part in value.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FROM:TO requests per second, got {value!r}")
+    return low, high
+
+
+def main(argv=None):
+    endpoints = sorted(p.name for p in FUNCTIONS_DIR.iterdir() if p.is_dir()) if FUNCTIONS_DIR.exists() else None
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("endpoint", choices=endpoints, help="edge function under supabase/functions")
+    rate = parser.add_mutually_exclusive_group()
+    rate.add_argument("--rate", type=float, default=10.0, help="constant arrival rate, requests per second")
+    rate.add_argument("--ramp", type=parse_ramp, metavar="FROM:TO", help="rate ramping linearly over --duration")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of arrivals")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of even spacing")
+    parser.add_argument("--method", default="POST")
+    parser.add_argument("--body", help="JSON body template, {i} is the request number")
+    parser.add_argument("--no-auth", action="store_true", help="do not send AUTH_BEARER")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--connections", type=int, default=100, help="keep-alive connection pool size")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="shed arrivals beyond this many open requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-error-rate", type=float, default=1.0, help="exit 1 above this error fraction")
+    parser.add_argument("--json", dest="json_path", help="write the summary as JSON")
+    parser.add_argument("--csv", dest="csv_path", help="write one row per request as CSV")
+    args = parser.parse_args(argv)
+
+    cfg = load_config()
+    if not cfg["EDGE_BASE"]:
+        raise SystemExit("EDGE_BASE is not set (environment or tests/config.json)")
+    url = f"{cfg['EDGE_BASE'].rstrip('/')}/{args.endpoint}"
+    headers = {"Content-Type": "application/json"}
+    if cfg.get("AUTH_BEARER") and not args.no_auth:
+        headers["Authorization"] = f"Bearer {cfg['AUTH_BEARER']}"
+    template = json.loads(args.body) if args.body else default_body(args.endpoint, cfg)
+    rate_from, rate_to = args.ramp or (args.rate, args.rate)
+    schedule = arrival_times(rate_from, rate_to, args.duration, args.poisson, args.seed)
+
+    records, elapsed = asyncio.run(run_load(
+        url, args.method.upper(), headers, template, schedule, args.timeout, args.connections, args.max_in_flight,
+    ))
+    summary = summarize(records, elapsed, f"{args.method.upper()} {args.endpoint}")
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    if args.csv_path:
+        write_csv(args.csv_path, records)
+    return 0 if summary["errors"] <= args.max_error_rate * summary["requests"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+"""Local stand-in for the DeepSeek chat completions API.
+
+``generate_deepseek_analysis*`` call ``callDeepSeekAPI``, which posts to
+``DEEPSEEK_API_URL`` (default ``https://api.deepseek.com/v1/chat/completions``).
+Pointing that variable here lets the edge functions be load-tested without a
+key and without paying per token, while still behaving like a slow LLM::
+
+    python tests/perf/mock_deepseek.py --ttft-ms 1500 --tokens-per-sec 40 --tokens 1200 --error-rate 0.01
+    # supabase/functions/.env for `supabase functions serve --env-file`:
+    #   DEEPSEEK_API_URL=http://host.docker.internal:8799/v1/chat/completions
+    #   DEEPSEEK_API_KEY=mock
+
+A completion takes ``--ttft-ms`` until the first token and then
+``--tokens`` / ``--tokens-per-sec`` seconds (both with ``--jitter``), capped
+by the request's ``max_tokens``. With ``"stream": true`` the tokens are sent
+as server-sent events at that rate, like the real API. ``--error-rate``
+answers 500 and ``--rate-limit-rate`` answers 429 at random;
+``--max-concurrency`` answers 429 to every request beyond that many in
+flight, the way a provider quota does. ``GET /stats`` returns counters and
+the peak concurrency since the last ``POST /stats/reset``; the driver in
+``deepseek_driver.py`` resets them before every concurrency level.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+DEFAULT_PORT = 8799
+
+STATUS_TEXT = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+FILLER = {
+    "zh": "根据你的测试结果，你在风险控制与情绪管理方面表现稳健，适合分散配置并保持长期纪律。",
+    "en": "Based on your results you manage risk and emotion steadily and suit a diversified, disciplined long-term plan. ",
+}
+
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "tokens": 0}
+
+    def reset(self):
+        self.peak_in_flight = self.in_flight
+        self.counts = dict.fromkeys(self.counts, 0)
+
+    def stats(self):
+        return {**self.counts, "in_flight": self.in_flight, "peak_in_flight": self.peak_in_flight}
+
+    def jittered(self, value):
+        jitter = self.args.jitter
+        return max(0.0, value * self.rng.uniform(1 - jitter, 1 + jitter))
+
+
+def content_tokens(request, count):
+    """``count`` pseudo-tokens of filler in the language the system prompt is written in."""
+    system = next((m.get("content", "") for m in request.get("messages", []) if m.get("role") == "system"), "")
+    language = "en" if system.startswith("You") else "zh"
+    text = FILLER[language] * (count // 20 + 1)
+    if language == "zh":
+        return list(text[:count])
+    return [word + " " for word in text.split()][:count]
+
+
+def completion(request, tokens, streaming_chunk=None):
+    base = {
+        "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+        "created": int(time.time()),
+        "model": request.get("model", "deepseek-chat"),
+    }
+    if streaming_chunk is not None:
+        delta = {"content": streaming_chunk} if streaming_chunk else {}
+        finish = None if streaming_chunk else "stop"
+        return {**base, "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+    prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 2
+    return {
+        **base,
+        "object": "chat.completion",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                  "total_tokens": prompt_tokens + len(tokens)},
+    }
+
+
+def head(status, headers):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+def json_response(status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    return head(status, {"Content-Type": "application/json", "Content-Length": len(body)}) + body
+
+
+def error_payload(message, kind):
+    return {"error": {"message": message, "type": kind, "code": kind}}
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length") or 0))
+    return method, path.split("?")[0], headers, body
+
+
+async def complete(state, request, writer):
+    args = state.args
+    tokens = content_tokens(request, min(args.tokens, int(request.get("max_tokens") or args.tokens)))
+    await asyncio.sleep(state.jittered(args.ttft_ms / 1000))
+    per_token = 1 / args.tokens_per_sec if args.tokens_per_sec > 0 else 0.0
+    if request.get("stream"):
+        writer.write(head(200, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache",
+                                "Transfer-Encoding": "chunked"}))
+        for token in tokens:
+            event = f"data: {json.dumps(completion(request, tokens, token), ensure_ascii=False)}\n\n".encode()
+            writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            await writer.drain()
+            await asyncio.sleep(state.jittered(per_token))
+        for event in (f"data: {json.dumps(completion(request, tokens, ''))}\n\n", "data: [DONE]\n\n"):
+            writer.write(f"{len(event.encode()):x}\r\n".encode() + event.encode() + b"\r\n")
+        writer.write(b"0\r\n\r\n")
+    else:
+        await asyncio.sleep(state.jittered(per_token * len(tokens)))
+        writer.write(json_response(200, completion(request, tokens)))
+    state.counts["tokens"] += len(tokens)
+
+
+async def handle(state, reader, writer):
+    try:
+        while True:
+            parsed = await read_request(reader)
+            if parsed is None:
+                break
+            method, path, headers, body = parsed
+            if method == "GET" and path == "/stats":
+                writer.write(json_response(200, state.stats()))
+            elif method == "POST" and path == "/stats/reset":
+                state.reset()
+                writer.write(json_response(200, state.stats()))
+            elif method == "POST" and path.endswith("/chat/completions"):
+                await serve_completion(state, json.loads(body or b"{}"), writer)
+            else:
+                writer.write(json_response(404, error_payload(f"no route for {method} {path}", "not_found")))
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_completion(state, request, writer):
+    args = state.args
+    state.counts["requests"] += 1
+    if args.max_concurrency and state.in_flight >= args.max_concurrency:
+        state.counts["rate_limited"] += 1
+        writer.write(json_response(429, error_payload("Rate limit reached: too many concurrent requests",
+                                                      "rate_limit_exceeded")))
+        return
+    roll = state.rng.random()
+    if roll < args.rate_limit_rate:
+        state.counts["rate_limited"] += 1
+        writer.write(json_response(429, error_payload("Rate limit reached for requests", "rate_limit_exceeded")))
+        return
+    state.in_flight += 1
+    state.peak_in_flight = max(state.peak_in_flight, state.in_flight)
+    try:
+        if roll < args.rate_limit_rate + args.error_rate:
+            await asyncio.sleep(state.jittered(args.ttft_ms / 1000))
+            state.counts["errors"] += 1
+            writer.write(json_response(500, error_payload("The server had an error while processing your request",
+                                                          "server_error")))
+            return
+        await complete(state, request, writer)
+        state.counts["ok"] += 1
+    finally:
+        state.in_flight -= 1
+
+
+async def serve(args):
+    state = MockState(args)
+    server = await asyncio.start_server(lambda r, w: handle(state, r, w), args.host, args.port)
+    print(f"mock DeepSeek on http://{args.host}:{args.port}/v1/chat/completions "
+          f"(ttft {args.ttft_ms}ms, {args.tokens_per_sec} tok/s, {args.tokens} tokens)")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttft-ms", type=float, default=1500, help="time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=40, help="generation speed after the first token")
+    parser.add_argument("--tokens", type=int, default=1200, help="completion length (capped by max_tokens)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative +/- jitter on every delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered with 429")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="429 beyond this many in flight (0: no cap)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
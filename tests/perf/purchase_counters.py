@@ -0,0 +1,216 @@
+"""Per-user purchase counters behind progressive pricing: drift check and lookup latency (migration 46).
+
+``get_user_analysis_price()`` reads ``user_purchase_counters``, which a
+trigger on ``orders`` keeps current, instead of counting the user's
+completed DeepSeek orders on every checkout. This reconciles the counters
+against ``orders`` and times the lookup against the migration 07 function
+(inlined below, in a scratch schema that is dropped afterwards)::
+
+    python tests/perf/purchase_counters.py --check
+    python tests/perf/purchase_counters.py --check --repair
+    python tests/perf/purchase_counters.py --seed 20000 --runs 2000 --writes 500
+    python tests/perf/purchase_counters.py --drop-seed
+
+``--check`` recounts the whole of ``orders`` (run it off-peak), prints the
+drifted users and exits non-zero if any remain. ``--repair`` first
+rebuilds every counter with ``refresh_user_purchase_counters()``, which
+blocks order writes while it runs, and checks again. Seeded users and orders
+(``customer_name`` ``purchase_counters``) are copied in with triggers off
+(``session_replication_role = replica``, needs a superuser) and the counters
+rebuilt afterwards. ``--writes`` completes that many pending seeded orders
+through the triggers, checks the counters inside the same transaction and
+rolls back. ``DATABASE_URL`` is a direct Postgres connection string. Needs
+``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+import uuid
+
+import asyncpg
+
+MARK = "purchase_counters"
+
+LEGACY_SCHEMA = "purchase_counters_legacy"
+
+# As of migration 07: count the user's completed analysis orders on every call.
+LEGACY = f"""
+CREATE SCHEMA {LEGACY_SCHEMA};
+CREATE FUNCTION {LEGACY_SCHEMA}.get_user_analysis_price(p_user_id uuid)
+RETURNS integer LANGUAGE plpgsql SECURITY DEFINER SET search_path = public AS $$
+DECLARE
+  completed_count integer;
+BEGIN
+  SELECT COUNT(*)::integer INTO completed_count
+  FROM orders
+  WHERE user_id = p_user_id
+    AND status = 'completed'
+    AND items::jsonb @> '[{{"type": "deepseek_analysis"}}]'::jsonb;
+  RETURN CASE WHEN completed_count = 0 THEN 399 WHEN completed_count = 1 THEN 299 ELSE 99 END;
+END;
+$$;
+"""
+
+ITEMS = json.dumps([{"type": "deepseek_analysis", "name": "DeepSeek 深度分析", "price": 3.99, "quantity": 1}])
+PRICES = [399, 299, 99]
+
+
+def orders(users, rng, now):
+    for user_id in users:
+        for i in range(rng.choice([0, 1, 1, 2, 3, 5, 8, 30])):
+            created = now - datetime.timedelta(seconds=rng.randrange(365 * 86400))
+            completed = rng.random() < 0.8
+            yield (user_id, ITEMS, PRICES[min(i, 2)], "completed" if completed else "pending", MARK,
+                   created + datetime.timedelta(minutes=5) if completed else None, created)
+
+
+async def seed(conn, n):
+    rng = random.Random(n)
+    users = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(n)]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    started = time.perf_counter()
+    async with conn.transaction():
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        await conn.copy_records_to_table(
+            "orders", columns=["user_id", "items", "total_amount", "status", "customer_name", "completed_at",
+                               "created_at"], records=list(orders(users, rng, now)))
+    await conn.execute("ANALYZE orders")
+    print(f"seeded orders for {n} users in {time.perf_counter() - started:.1f}s")
+    await refresh(conn)
+
+
+async def drop_seed(conn):
+    async with conn.transaction():
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        print(await conn.execute("DELETE FROM orders WHERE customer_name = $1", MARK))
+    await refresh(conn)
+
+
+async def refresh(conn):
+    started = time.perf_counter()
+    await conn.execute("SELECT refresh_user_purchase_counters()")
+    print(f"purchase counters rebuilt in {time.perf_counter() - started:.1f}s")
+
+
+async def timed(conn, sql, users):
+    stmt = await conn.prepare(sql)
+    await stmt.fetchval(users[0])  # warm the cache
+    latencies = []
+    for user_id in users:
+        started = time.perf_counter()
+        await stmt.fetchval(user_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+
+async def bench_lookups(conn, runs):
+    users = [r[0] for r in await conn.fetch(
+        "SELECT DISTINCT user_id FROM orders WHERE customer_name = $1 LIMIT $2", MARK, runs)]
+    if not users:
+        print("no seeded users to time (pass --seed)")
+        return True
+    await conn.execute(f"DROP SCHEMA IF EXISTS {LEGACY_SCHEMA} CASCADE")
+    await conn.execute(LEGACY)
+    try:
+        mismatched = await conn.fetchval(f"""
+            SELECT count(*) FROM unnest($1::uuid[]) u(id)
+            WHERE get_user_analysis_price(u.id) <> {LEGACY_SCHEMA}.get_user_analysis_price(u.id)""", users)
+        # The per-call count grows with the user's order history; the counter does not.
+        heavy = [r[0] for r in await conn.fetch(
+            "SELECT user_id FROM orders WHERE customer_name = $1 GROUP BY user_id HAVING count(*) >= 20 LIMIT $2",
+            MARK, runs)]
+        print(f"{len(users)} users ({len(heavy)} with 20+ orders), {mismatched} prices differ")
+        print(f"{'price lookup':<22} {'p50':>9} {'p95':>9}   {'20+ p50':>9} {'p95':>9}")
+        for label, function in [("per-call order count", f"{LEGACY_SCHEMA}.get_user_analysis_price"),
+                                ("purchase counter", "get_user_analysis_price")]:
+            p50, p95 = await timed(conn, f"SELECT {function}($1)", users)
+            heavy50, heavy95 = await timed(conn, f"SELECT {function}($1)", heavy) if heavy else (0, 0)
+            print(f"{label:<22} {p50:>7.3f}ms {p95:>7.3f}ms   {heavy50:>7.3f}ms {heavy95:>7.3f}ms")
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {LEGACY_SCHEMA} CASCADE")
+    return mismatched == 0
+
+
+async def check(conn, label):
+    started = time.perf_counter()
+    drift = await conn.fetch("SELECT * FROM purchase_counter_drift() ORDER BY user_id")
+    for user_id, stored, actual in drift[:20]:
+        print(f"  {user_id}: stored {stored}, actual {actual}")
+    if len(drift) > 20:
+        print(f"  ... {len(drift) - 20} more")
+    counters = await conn.fetchval("SELECT count(*) FROM user_purchase_counters")
+    print(f"{label}: {counters} counters, {len(drift)} drifted ({time.perf_counter() - started:.2f}s)")
+    return not drift
+
+
+async def bench_writes(conn, n):
+    """Complete pending seeded orders through the triggers; rolled back afterwards."""
+    ids = [r[0] for r in await conn.fetch(
+        "SELECT id FROM orders WHERE customer_name = $1 AND status = 'pending' LIMIT $2", MARK, n)]
+    stmt = await conn.prepare("UPDATE orders SET status = 'completed', completed_at = now() WHERE id = $1")
+    latencies = []
+    tr = conn.transaction()
+    await tr.start()
+    try:
+        for order_id in ids:
+            started = time.perf_counter()
+            await stmt.fetch(order_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        if latencies:
+            print(f"{len(ids)} orders completed through the triggers: p50 {latencies[len(ids) // 2]:.3f} ms  "
+                  f"p95 {latencies[int(len(ids) * 0.95)]:.3f} ms")
+        return await check(conn, f"after {len(ids)} completions")
+    finally:
+        await tr.rollback()
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if not await conn.fetchval("SELECT to_regclass('user_purchase_counters') IS NOT NULL"):
+            raise SystemExit("migration 46 is not applied")
+        if args.drop_seed:
+            await drop_seed(conn)
+            return 0
+        if args.seed:
+            await seed(conn, args.seed)
+        ok = True
+        if args.runs:
+            ok = await bench_lookups(conn, args.runs) and ok
+        if args.writes:
+            ok = await bench_writes(conn, args.writes) and ok
+        if args.check:
+            clean = await check(conn, "orders")
+            if not clean and args.repair:
+                await refresh(conn)
+                clean = await check(conn, "after repair")
+            ok = clean and ok
+        return 0 if ok else 1
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--check", action="store_true", help="reconcile the counters against orders")
+    parser.add_argument("--repair", action="store_true", help="with --check: rebuild the counters if any drifted")
+    parser.add_argument("--seed", type=int, default=0, help="insert orders for this many synthetic users first")
+    parser.add_argument("--drop-seed", action="store_true", help="delete the synthetic orders and exit")
+    parser.add_argument("--runs", type=int, default=0, help="time this many price lookups (seeded users)")
+    parser.add_argument("--writes", type=int, default=0, help="also complete this many orders through the triggers")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+"""Gift code redemption under contention: correctness and latency (migration 45).
+
+A popular code shared in a group chat gets redeemed by hundreds of users in
+the same second. This fires concurrent ``redeem_gift_code`` calls at a
+scratch database migrated to the app schema, through a pool of
+``--concurrency`` connections (one transaction per call, like PostgREST),
+and checks the result against the tables::
+
+    python tests/perf/redeem_contention.py --users 500 --concurrency 100
+    python tests/perf/redeem_contention.py --users 500 --concurrency 100 --legacy
+    python tests/perf/redeem_contention.py --scenario spread --codes 50 --repeat 1
+
+``hot`` sends every user at one code with ``--max-redemptions`` slots
+(default half the users). ``spread`` sends each user at a random one of
+``--codes`` codes. Each user redeems ``--repeat`` times (default 2, a
+double-click), all at once. A violation is any of the following:
+
+* a code redeemed more often than ``max_redemptions``;
+* ``current_redemptions`` disagreeing with the redemption rows;
+* the number of successful calls disagreeing with the rows;
+* a hot code left short of its slots when nobody was told to retry;
+* a call failing with an error instead of a result.
+
+``--legacy`` runs the migration 08 function (inlined below, in a scratch
+schema) against the same workload. The synthetic users, codes and legacy
+schema are removed afterwards. Users are inserted into ``profiles`` with
+``session_replication_role = replica`` (no ``auth.users`` rows), which
+needs a superuser. The run exits non-zero on any violation.
+``DATABASE_URL`` is a direct Postgres connection string. Needs ``asyncpg``.
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import time
+import uuid
+
+import asyncpg
+
+EMAIL_DOMAIN = "redeem-contention.invalid"
+CODE_PREFIX = "RC"
+LEGACY_SCHEMA = "redeem_contention_legacy"
+
+# As of migration 08: unlocked read of current_redemptions, then insert and increment.
+LEGACY = f"""
+CREATE SCHEMA {LEGACY_SCHEMA};
+CREATE FUNCTION {LEGACY_SCHEMA}.redeem_gift_code(p_code text, p_user_id uuid)
+RETURNS jsonb LANGUAGE plpgsql SET search_path = public AS $$
+DECLARE
+  v_gift_code gift_codes;
+  v_existing_redemption gift_code_redemptions;
+BEGIN
+  SELECT * INTO v_gift_code FROM gift_codes
+  WHERE code = UPPER(p_code) AND is_active = true AND (expires_at IS NULL OR expires_at > now());
+  IF v_gift_code.id IS NULL THEN
+    RETURN jsonb_build_object('success', false, 'message', '礼品码无效或已过期');
+  END IF;
+  SELECT * INTO v_existing_redemption FROM gift_code_redemptions
+  WHERE gift_code_id = v_gift_code.id AND user_id = p_user_id;
+  IF v_existing_redemption.id IS NOT NULL THEN
+    RETURN jsonb_build_object('success', false, 'message', '您已经使用过此礼品码',
+                              'remaining_analyses', v_existing_redemption.remaining_analyses);
+  END IF;
+  IF v_gift_code.current_redemptions >= v_gift_code.max_redemptions THEN
+    RETURN jsonb_build_object('success', false, 'message', '此礼品码已达到最大使用次数');
+  END IF;
+  INSERT INTO gift_code_redemptions (gift_code_id, user_id, remaining_analyses)
+  VALUES (v_gift_code.id, p_user_id, v_gift_code.free_analyses_count);
+  UPDATE gift_codes SET current_redemptions = current_redemptions + 1, updated_at = now()
+  WHERE id = v_gift_code.id;
+  RETURN jsonb_build_object('success', true, 'message', '礼品码兑换成功！',
+                            'free_analyses', v_gift_code.free_analyses_count);
+END;
+$$;
+"""
+
+OUTCOMES = {
+    "礼品码兑换成功！": "success",
+    "您已经使用过此礼品码": "already",
+    "此礼品码已达到最大使用次数": "full",
+    "当前兑换人数较多，请稍后重试": "busy",
+    "礼品码无效或已过期": "invalid",
+}
+
+CODE_STATE = """
+SELECT gc.code, gc.max_redemptions, gc.current_redemptions,
+       (SELECT count(*) FROM gift_code_redemptions r WHERE r.gift_code_id = gc.id) AS rows
+FROM gift_codes gc WHERE gc.code LIKE $1 || '%'
+"""
+
+
+async def seed(conn, users, codes, max_redemptions):
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    async with conn.transaction():
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        await conn.copy_records_to_table(
+            "profiles", columns=["id", "email"],
+            records=[(u, f"{u.hex[:12]}@{EMAIL_DOMAIN}") for u in user_ids])
+        await conn.copy_records_to_table(
+            "gift_codes", columns=["code", "max_redemptions", "free_analyses_count"],
+            records=[(f"{CODE_PREFIX}{i:06d}", max_redemptions, 15) for i in range(codes)])
+    return user_ids
+
+
+async def cleanup(conn):
+    async with conn.transaction():
+        await conn.execute("SET LOCAL session_replication_role = replica")
+        await conn.execute("DELETE FROM gift_code_redemptions WHERE gift_code_id IN "
+                           "(SELECT id FROM gift_codes WHERE code LIKE $1 || '%')", CODE_PREFIX)
+        await conn.execute("DELETE FROM gift_codes WHERE code LIKE $1 || '%'", CODE_PREFIX)
+        await conn.execute("DELETE FROM profiles WHERE email LIKE '%@' || $1", EMAIL_DOMAIN)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {LEGACY_SCHEMA} CASCADE")
+
+
+async def redeem(pool, function, code, user_id, latencies, outcomes, per_code):
+    async with pool.acquire() as conn:
+        started = time.perf_counter()
+        try:
+            result = json.loads(await conn.fetchval(f"SELECT {function}($1, $2)::text", code, user_id))
+            outcome = OUTCOMES.get(result["message"], result["message"])
+        except asyncpg.PostgresError as error:
+            outcome = f"error: {type(error).__name__}"
+        latencies.append((time.perf_counter() - started) * 1000)
+    outcomes[outcome] += 1
+    per_code[code][outcome] += 1
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run_scenario(args, conn, function):
+    codes = 1 if args.scenario == "hot" else args.codes
+    max_redemptions = args.max_redemptions or max(1, args.users // (2 * codes))
+    user_ids = await seed(conn, args.users, codes, max_redemptions)
+    rng = random.Random(args.users)
+    calls = []
+    for user_id in user_ids:
+        code = f"{CODE_PREFIX}{rng.randrange(codes):06d}"
+        calls += [(code, user_id)] * args.repeat
+    rng.shuffle(calls)
+
+    latencies, outcomes = [], collections.Counter()
+    per_code = collections.defaultdict(collections.Counter)
+    async with asyncpg.create_pool(args.dsn, min_size=args.concurrency, max_size=args.concurrency) as pool:
+        started = time.perf_counter()
+        await asyncio.gather(*(redeem(pool, function, code, user_id, latencies, outcomes, per_code)
+                               for code, user_id in calls))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"{function}: {len(calls)} calls from {args.users} users at {codes} code(s) with "
+          f"{max_redemptions} slot(s) each, {args.concurrency} connections")
+    print(f"  {len(calls) / elapsed:.0f} calls/s  p50 {percentile(latencies, 0.5):.1f} ms  "
+          f"p99 {percentile(latencies, 0.99):.1f} ms  max {latencies[-1]:.1f} ms")
+    print("  outcomes: " + ", ".join(f"{k} {v}" for k, v in outcomes.most_common()))
+
+    violations = [f"{k}: {v} call(s)" for k, v in outcomes.items() if k.startswith("error")]
+    for code, slots, counter, rows in await conn.fetch(CODE_STATE, CODE_PREFIX):
+        successes = per_code[code]["success"]
+        if rows > slots:
+            violations.append(f"{code}: {rows} redemptions for {slots} slots")
+        if counter != rows:
+            violations.append(f"{code}: current_redemptions {counter} but {rows} redemption rows")
+        if successes != rows:
+            violations.append(f"{code}: {successes} successful calls but {rows} redemption rows")
+        if args.scenario == "hot" and rows < min(slots, args.users) and not per_code[code]["busy"]:
+            violations.append(f"{code}: only {rows} of {slots} slots taken by {args.users} users")
+    for violation in violations[:20]:
+        print(f"  VIOLATION {violation}")
+    if len(violations) > 20:
+        print(f"  ... {len(violations) - 20} more")
+    print(f"  {len(violations)} violation(s)")
+    return not violations
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await cleanup(conn)
+        function = "redeem_gift_code"
+        if args.legacy:
+            await conn.execute(LEGACY)
+            function = f"{LEGACY_SCHEMA}.redeem_gift_code"
+        try:
+            ok = await run_scenario(args, conn, function)
+        finally:
+            await cleanup(conn)
+        return 0 if ok else 1
+    finally:
+        await conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres URL (default $DATABASE_URL)")
+    parser.add_argument("--scenario", choices=["hot", "spread"], default="hot")
+    parser.add_argument("--users", type=int, default=500, help="synthetic users redeeming")
+    parser.add_argument("--codes", type=int, default=50, help="codes in the spread scenario")
+    parser.add_argument("--max-redemptions", type=int, default=0,
+                        help="slots per code (default: half the users expected per code)")
+    parser.add_argument("--repeat", type=int, default=2, help="calls per user (double-clicks)")
+    parser.add_argument("--concurrency", type=int, default=100, help="connections in the pool")
+    parser.add_argument("--legacy", action="store_true", help="run the migration 08 function instead")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL is not set (or pass --dsn)")
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
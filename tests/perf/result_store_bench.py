@@ -0,0 +1,192 @@
+"""Local result store: save and lookup cost at growing history sizes, localStorage array versus IndexedDB.
+
+``testResultStorage`` used to keep every test result in one JSON array under
+``investment_test_results`` in localStorage, so each save and each
+``getTestResultById`` parsed (and a save re-serialised) the whole history.
+It now stores one IndexedDB record per result (``src/utils/resultStore.ts``),
+migrating the old array the first time the database is opened. This drives a
+real browser through Playwright against the Vite dev server, imports the
+shipped module into the page, and times both stores at each history size::
+
+    npm run dev &
+    python tests/perf/result_store_bench.py
+    python tests/perf/result_store_bench.py --sizes 10,1000,10000,30000 --runs 200 --json store.json
+
+For every size the page is reloaded with empty storage, ``N`` synthetic
+results (about 420 characters of JSON each) are written to the old
+localStorage key and the old implementation (inlined below) is timed on it;
+then the first call into the new module opens the database and migrates
+those ``N`` records (reported as ``migrate``), and the new store is timed on
+the migrated data. Saves that hit the localStorage quota are counted under
+``errors``; a history too large to write to localStorage at all is reported
+as ``quota exceeded`` and saved into the new store record by record instead. All timing happens inside
+the page (``performance.now()``), so the Playwright round trip is not
+included. Everything the bench writes stays in the throwaway browser
+profile. Needs ``playwright`` (``playwright install chromium``).
+"""
+
+import argparse
+import asyncio
+import json
+
+from playwright.async_api import async_playwright
+
+import loadgen
+
+DB_NAME = "investment_results"
+LEGACY_KEY = "investment_test_results"
+
+# Runs inside the page. The legacy store is the pre-IndexedDB testResultStorage.
+BENCH = """
+async ({ n, runs, dbName, legacyKey }) => {
+  localStorage.clear();
+  await new Promise((resolve, reject) => {
+    const request = indexedDB.deleteDatabase(dbName);
+    request.onsuccess = resolve;
+    request.onerror = () => reject(request.error);
+  });
+
+  // Shaped like what ResultPage saves.
+  const record = (id, i) => ({
+    id,
+    user_id: '00000000-0000-4000-8000-000000000001',
+    personality_scores: { openness: 61.5, conscientiousness: 72.25, extraversion: 48, agreeableness: 55.75,
+                          neuroticism: 38.5 },
+    math_finance_scores: { percentage: 80 },
+    risk_preference_scores: { risk_tolerance: 64, investment_horizon: 70, loss_aversion: 42 },
+    investment_style: '价值投资者',
+    euclidean_distance: 0.8123 + i * 1e-6,
+    completed_at: new Date(Date.UTC(2024, 0, 1) + i * 3600 * 1000).toISOString()
+  });
+  const seeded = Array.from({ length: n }, (_, i) => record(`bench-${i}`, i));
+  const pick = () => `bench-${Math.floor(Math.random() * n)}`;
+  const time = async (fn) => {
+    const latencies = [];
+    let errors = 0;
+    for (let i = 0; i < runs; i++) {
+      const started = performance.now();
+      try {
+        await fn(i);
+      } catch (error) {
+        errors++;
+      }
+      latencies.push(performance.now() - started);
+    }
+    return { latencies, errors };
+  };
+
+  const legacy = {
+    save(result) {
+      const results = JSON.parse(localStorage.getItem(legacyKey) || '[]');
+      results.push(result);
+      localStorage.setItem(legacyKey, JSON.stringify(results));
+    },
+    getById(id) {
+      const results = JSON.parse(localStorage.getItem(legacyKey) || '[]');
+      return results.find((r) => r.id === id) || null;
+    }
+  };
+  const seededJson = JSON.stringify(seeded);
+  let legacyResults = null;
+  try {
+    localStorage.setItem(legacyKey, seededJson);
+    legacyResults = {
+      save: await time((i) => legacy.save(record(`legacy-new-${i}`, n + i))),
+      lookup: await time(() => legacy.getById(pick()))
+    };
+    localStorage.setItem(legacyKey, seededJson);
+  } catch (error) {
+    localStorage.removeItem(legacyKey); // the history does not fit in localStorage at all
+  }
+
+  const { testResultStorage } = await import('/src/utils/localStorage.ts');
+  let migrateMs = null;
+  let migrated = true;
+  if (legacyResults) {
+    const started = performance.now();
+    migrated = (await testResultStorage.getTestResultById(pick())) !== null;
+    migrateMs = performance.now() - started;
+    migrated = migrated && localStorage.getItem(legacyKey) === null;
+  } else {
+    for (const result of seeded) await testResultStorage.saveTestResult(result);
+  }
+  const storeResults = {
+    migrate_ms: migrateMs,
+    migrated,
+    save: await time((i) => testResultStorage.saveTestResult(record(`new-${i}`, n + i))),
+    lookup: await time(async () => {
+      if (!(await testResultStorage.getTestResultById(pick()))) throw new Error('missing');
+    })
+  };
+  return { bytes: seededJson.length, legacy: legacyResults, store: storeResults };
+}
+"""
+
+
+def stats(timing):
+    latencies = sorted(timing["latencies"])
+    return {"p50": loadgen.percentile(latencies, 50), "p95": loadgen.percentile(latencies, 95),
+            "errors": timing["errors"]}
+
+
+async def run(args, sizes):
+    results = []
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=not args.headed)
+        try:
+            page = await browser.new_page()
+            for n in sizes:
+                await page.goto(args.base_url)
+                raw = await page.evaluate(BENCH, {"n": n, "runs": args.runs, "dbName": DB_NAME,
+                                                  "legacyKey": LEGACY_KEY})
+                legacy, store = raw["legacy"], raw["store"]
+                results.append({
+                    "records": n,
+                    "json_chars": raw["bytes"],
+                    "localStorage": {op: stats(legacy[op]) for op in ("save", "lookup")} if legacy else None,
+                    "indexedDB": {op: stats(store[op]) for op in ("save", "lookup")},
+                    "migrate_ms": store["migrate_ms"],
+                    "migrated": store["migrated"],
+                })
+        finally:
+            await browser.close()
+    return results
+
+
+def print_results(results):
+    print(f"{'records':>8} {'store':<13} {'save p50':>9} {'p95':>8} {'lookup p50':>11} {'p95':>8} {'errors':>7}")
+    for r in results:
+        for label in ("localStorage", "indexedDB"):
+            ops = r[label]
+            if ops is None:
+                print(f"{r['records']:>8} {label:<13} quota exceeded ({r['json_chars'] / 1024:.0f}K chars)")
+                continue
+            errors = sum(op["errors"] for op in ops.values())
+            print(f"{r['records']:>8} {label:<13} {ops['save']['p50']:7.3f}ms {ops['save']['p95']:6.3f}ms "
+                  f"{ops['lookup']['p50']:9.3f}ms {ops['lookup']['p95']:6.3f}ms {errors:>7}")
+        if r["migrate_ms"] is not None:
+            status = "" if r["migrated"] else "  MIGRATION INCOMPLETE"
+            print(f"{'':>8} migrate {r['records']} records ({r['json_chars'] / 1024:.0f}K chars): "
+                  f"{r['migrate_ms']:.1f}ms{status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5173/", help="Vite dev server (npm run dev)")
+    parser.add_argument("--sizes", default="10,1000,10000", help="comma-separated history sizes")
+    parser.add_argument("--runs", type=int, default=100, help="timed operations per store, size and operation")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--json", dest="json_path", help="write the results as JSON")
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    results = asyncio.run(run(args, sizes))
+    print_results(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0 if all(r["migrated"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
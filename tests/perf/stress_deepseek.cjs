@@ -16,7 +16,17 @@ async function call(language) {
   return res.status
 }
 
+// With MOCK_DEEPSEEK_URL (tests/perf/mock_deepseek.py) set, also report how many calls
+// reached DeepSeek. Concurrent duplicates are coalesced, so expect at most one per language.
+async function upstream(pathname) {
+  const base = process.env.MOCK_DEEPSEEK_URL
+  if (!base) return null
+  const res = await fetch(`${base.replace(/\/$/, '')}/${pathname}`, { method: pathname === 'stats' ? 'GET' : 'POST' })
+  return res.json()
+}
+
 async function run() {
+  await upstream('stats/reset')
   const tasks = []
   for (let i = 0; i < 50; i++) tasks.push(call(i % 2 === 0 ? 'zh' : 'en'))
   const start = Date.now()
@@ -25,6 +35,8 @@ async function run() {
   const ok = results.filter(s => s === 200).length
   const fail = results.length - ok
   process.stdout.write(`deepseek count=${results.length} ok=${ok} fail=${fail} ms=${duration}\n`)
+  const stats = await upstream('stats')
+  if (stats) process.stdout.write(`deepseek upstream calls=${stats.requests}\n`)
 }
 
 run()
@@ -0,0 +1,204 @@
+"""Time to first token of the DeepSeek analysis, streamed versus buffered.
+
+With ``"stream": true`` the analysis functions relay DeepSeek's tokens as
+server-sent events (``delta`` events, then ``done`` with the saved
+analysis); without it the client waits for the whole completion. This
+harness sends the same requests both ways, interleaved so both paths see the
+same backend conditions, and reports time to first token and total time for
+each::
+
+    python tests/perf/mock_deepseek.py --ttft-ms 1500 --tokens-per-sec 40 &
+    python tests/perf/ttft.py --endpoint generate_deepseek_analysis_free --requests 20 --vary
+    python tests/perf/ttft.py --requests 10 --fixtures analyses.json --json ttft.json
+
+For the buffered path the first token arrives with the response, so TTFT
+equals total time. Answers that come out of the analysis cache, or
+(``generate_deepseek_analysis``) out of an earlier analysis for the same
+order, skip DeepSeek altogether and are counted under ``cached``. To measure
+generation, run the function with ``DEEPSEEK_CACHE_DISABLED=true``, or pass
+``--vary`` to make every request's test data unique, and give the paid
+endpoint fresh ``--fixtures`` (``{"testResultId", "orderId"}`` pairs, one per
+request). Each free request uses up one free analysis. Needs ``aiohttp``.
+"""
+
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import time
+
+import aiohttp
+
+import loadgen
+
+PATHS = ("stream", "buffered")
+
+
+def request_body(base, i, vary):
+    """Request ``i``; with ``vary`` its test data differs from every other request's."""
+    body = copy.deepcopy(base)
+    if vary:
+        test_data = body.setdefault("testData", {})
+        test_data["euclidean_distance"] = round(float(test_data.get("euclidean_distance") or 0) + (i + 1) * 1e-4, 6)
+    return body
+
+
+async def buffered(session, url, headers, body, timeout):
+    started = time.perf_counter()
+    record = {"path": "buffered", "ok": False, "cached": False, "chars": 0, "error": None}
+    try:
+        async with session.post(url, json=body, headers=headers,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            try:
+                payload = await response.json(content_type=None)
+            except ValueError:
+                payload = None
+        elapsed = (time.perf_counter() - started) * 1000
+        data = (payload or {}).get("data") or {}
+        record.update(ttft_ms=elapsed, total_ms=elapsed)
+        if response.status == 200 and (payload or {}).get("code") == "SUCCESS":
+            record.update(ok=True, cached=bool(data.get("cached") or data.get("cache_hit")),
+                          chars=len((data.get("analysis") or {}).get("analysis_content") or ""))
+        else:
+            record["error"] = loadgen.classify(response.status, payload)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        elapsed = (time.perf_counter() - started) * 1000
+        record.update(ttft_ms=elapsed, total_ms=elapsed, error=type(exc).__name__)
+    return record
+
+
+async def streamed(session, url, headers, body, timeout):
+    started = time.perf_counter()
+    record = {"path": "stream", "ok": False, "cached": False, "chars": 0, "error": None, "ttft_ms": None}
+    try:
+        async with session.post(url, json={**body, "stream": True}, headers=headers,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                try:
+                    payload = await response.json(content_type=None)
+                except ValueError:
+                    payload = None
+                record["error"] = loadgen.classify(response.status, payload)
+            else:
+                event = "message"
+                async for raw in response.content:
+                    line = raw.decode("utf-8").rstrip("\r\n")
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:"):
+                        data = json.loads(line[5:].strip())
+                        if event == "delta":
+                            if record["ttft_ms"] is None:
+                                record["ttft_ms"] = (time.perf_counter() - started) * 1000
+                            record["chars"] += len(data.get("content") or "")
+                        elif event == "done":
+                            record.update(ok=True, cached=bool(data.get("cached") or data.get("cache_hit")))
+                        elif event == "error":
+                            record["error"] = f"stream error|{data.get('message')}"
+                if not record["ok"] and record["error"] is None:
+                    record["error"] = "stream ended without done"
+    except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        record["error"] = type(exc).__name__
+    record["total_ms"] = (time.perf_counter() - started) * 1000
+    if record["ttft_ms"] is None:
+        record["ttft_ms"] = record["total_ms"]
+    return record
+
+
+async def run(url, headers, bodies, requests, concurrency, timeout):
+    """``requests`` rounds, each one streamed and one buffered request, ``concurrency`` rounds at a time."""
+    records = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one_round(i):
+        async with gate:
+            # Alternate which path goes first so neither always sees the warmer backend.
+            order = PATHS if i % 2 == 0 else PATHS[::-1]
+            for path in order:
+                send = streamed if path == "stream" else buffered
+                records.append({"round": i, **await send(session, url, headers, next(bodies), timeout)})
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency * 2 + 2)) as session:
+        await asyncio.gather(*(one_round(i) for i in range(requests)))
+    return records
+
+
+def summarize(records):
+    summary = {}
+    for path in PATHS:
+        rows = [r for r in records if r["path"] == path]
+        ok = [r for r in rows if r["ok"]]
+        generated = [r for r in ok if not r["cached"]]
+        ttft = sorted(r["ttft_ms"] for r in generated)
+        total = sorted(r["total_ms"] for r in generated)
+        errors = {}
+        for r in rows:
+            if r["error"]:
+                errors[r["error"]] = errors.get(r["error"], 0) + 1
+        summary[path] = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "cached": len(ok) - len(generated),
+            "ttft_p50": loadgen.percentile(ttft, 50),
+            "ttft_p95": loadgen.percentile(ttft, 95),
+            "total_p50": loadgen.percentile(total, 50),
+            "total_p95": loadgen.percentile(total, 95),
+            "total_max": total[-1] if total else 0.0,
+            "errors": errors,
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'path':>8} {'reqs':>5} {'ok':>5} {'cached':>6} {'ttft p50':>9} {'ttft p95':>9} "
+          f"{'total p50':>10} {'total p95':>10} {'max':>8}")
+    for path, s in summary.items():
+        print(f"{path:>8} {s['requests']:5d} {s['ok']:5d} {s['cached']:6d} {s['ttft_p50']:9.0f} {s['ttft_p95']:9.0f} "
+              f"{s['total_p50']:10.0f} {s['total_p95']:10.0f} {s['total_max']:8.0f}")
+        for error, count in s["errors"].items():
+            print(f"{'':>8} {count:5d}  {error}")
+    print("(ms; percentiles over generated answers only, cached answers are counted but excluded)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoint", default="generate_deepseek_analysis",
+                        choices=["generate_deepseek_analysis", "generate_deepseek_analysis_free"])
+    parser.add_argument("--requests", type=int, default=10, help="rounds; each sends one streamed and one buffered request")
+    parser.add_argument("--concurrency", type=int, default=1, help="rounds in flight at once")
+    parser.add_argument("--timeout", type=float, default=180.0, help="per-request timeout in seconds")
+    parser.add_argument("--fixtures", help="JSON list of {testResultId, orderId} to cycle through")
+    parser.add_argument("--language", default="zh", choices=["zh", "en"])
+    parser.add_argument("--vary", action="store_true", help="make every request's test data unique (cache misses)")
+    parser.add_argument("--json", dest="json_path", help="write the summary and every request as JSON")
+    args = parser.parse_args(argv)
+
+    cfg = loadgen.load_config()
+    if not cfg["EDGE_BASE"]:
+        raise SystemExit("EDGE_BASE is not set (environment or tests/config.json)")
+    url = f"{cfg['EDGE_BASE'].rstrip('/')}/{args.endpoint}"
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {cfg['AUTH_BEARER']}"}
+    if args.fixtures:
+        with open(args.fixtures, encoding="utf-8") as f:
+            pairs = json.load(f)
+    else:
+        pairs = [{"testResultId": cfg["TEST_RESULT_ID"], "orderId": cfg["ORDER_ID"]}]
+    fixtures = itertools.cycle(pairs)
+    counter = itertools.count()
+    bodies = (
+        request_body({**next(fixtures), "testData": cfg["TEST_DATA"], "language": args.language}, i, args.vary)
+        for i in counter
+    )
+
+    records = asyncio.run(run(url, headers, bodies, args.requests, args.concurrency, args.timeout))
+    summary = summarize(records)
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "requests": records}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
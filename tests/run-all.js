@@ -1,6 +1,14 @@
 const { execSync } = require('child_process')
 function run(cmd) { execSync(cmd, { stdio: 'inherit' }) }
+function hasPythonModule(name) {
+  try { execSync(`python3 -c "import ${name}"`, { stdio: 'ignore' }); return true } catch { return false }
+}
+// loadgen.py needs aiohttp: pip install -r tests/requirements.txt
+if (!hasPythonModule('aiohttp')) {
+  console.error('tests/perf/loadgen.py needs aiohttp; run: pip install -r tests/requirements.txt')
+  process.exit(1)
+}
 run('node tests/security/injection_test.cjs')
 run('node tests/gray/feature_toggle_test.js')
-run('node tests/perf/stress_login.cjs')
+run('python3 tests/perf/loadgen.py login-password --rate 20 --duration 10')
 run('node tests/perf/stress_deepseek.cjs')
@@ -2,6 +2,78 @@ import asyncio
 from playwright import async_api
 from playwright.async_api import expect
 
+import accounts
+import steps
+import waits
+
+async def run_case(context):
+    # Open a new page in the browser context
+    page = await context.new_page()
+    
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
+        try:
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+        except async_api.Error:
+            pass
+    
+    # Interact with the page elements to simulate user flow
+    # -> Click the '登录后开始' button to proceed to login or registration page.
+    frame = context.pages[-1]
+    # Click the '登录后开始' button to go to login or registration page
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
+    async with steps.step(page, elem, "Click the '登录后开始' button to go to login or registration page"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Click the '没有账号？去注册' button to go to the registration page.
+    frame = context.pages[-1]
+    # Click the '没有账号？去注册' button to go to the registration page
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
+    async with steps.step(page, elem, "Click the '没有账号？去注册' button to go to the registration page"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Enter the email '1062250152@qq.com' and password '12345678' into the registration form and submit.
+    frame = context.pages[-1]
+    # Enter the email address into the email input field
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
+    async with steps.step(page, elem, "Enter the email address into the email input field"):
+        await elem.fill(accounts.current().email)
+    
+
+    frame = context.pages[-1]
+    # Enter the password into the password input field
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
+    async with steps.step(page, elem, "Enter the password into the password input field"):
+        await elem.fill(accounts.current().password)
+    
+
+    frame = context.pages[-1]
+    # Click the '注册' button to submit the registration form
+    elem = frame.locator('xpath=html/body/div').nth(0)
+    async with steps.step(page, elem, "Click the '注册' button to submit the registration form"):
+        await elem.click(timeout=5000)
+    
+
+    # --> Assertions to verify final state
+    frame = context.pages[-1]
+    try:
+        await expect(frame.locator('text=Registration Successful! Your credentials have been saved securely.').first).to_be_visible(timeout=30000)
+    except AssertionError:
+        raise AssertionError("Test failed: The registration process did not complete successfully. The system did not generate a one-time password, copy credentials to clipboard, or prompt the user to save them as expected.")
+    await waits.settle(page)
+
+
 async def run_test():
     pw = None
     browser = None
@@ -26,66 +98,8 @@ async def run_test():
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
-        try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
-        except async_api.Error:
-            pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click the '登录后开始' button to proceed to login or registration page.
-        frame = context.pages[-1]
-        # Click the '登录后开始' button to go to login or registration page
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Click the '没有账号？去注册' button to go to the registration page.
-        frame = context.pages[-1]
-        # Click the '没有账号？去注册' button to go to the registration page
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Enter the email '1062250152@qq.com' and password '12345678' into the registration form and submit.
-        frame = context.pages[-1]
-        # Enter the email address into the email input field
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@qq.com')
-        
-
-        frame = context.pages[-1]
-        # Enter the password into the password input field
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('12345678')
-        
-
-        frame = context.pages[-1]
-        # Click the '注册' button to submit the registration form
-        elem = frame.locator('xpath=html/body/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=Registration Successful! Your credentials have been saved securely.').first).to_be_visible(timeout=30000)
-        except AssertionError:
-            raise AssertionError("Test failed: The registration process did not complete successfully. The system did not generate a one-time password, copy credentials to clipboard, or prompt the user to save them as expected.")
-        await asyncio.sleep(5)
+        # Run the test case steps inside the prepared context
+        await run_case(context)
     
     finally:
         if context:
@@ -95,5 +109,6 @@ async def run_test():
         if pw:
             await pw.stop()
             
-asyncio.run(run_test())
+if __name__ == "__main__":
+    asyncio.run(run_test())
     
\ No newline at end of file
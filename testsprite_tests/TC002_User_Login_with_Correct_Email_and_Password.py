@@ -2,6 +2,70 @@ import asyncio
 from playwright import async_api
 from playwright.async_api import expect
 
+import accounts
+import steps
+import waits
+
+async def run_case(context):
+    # Open a new page in the browser context
+    page = await context.new_page()
+    
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
+        try:
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+        except async_api.Error:
+            pass
+    
+    # Interact with the page elements to simulate user flow
+    # -> Click the '登录后开始' button to navigate to the login page.
+    frame = context.pages[-1]
+    # Click the '登录后开始' button to go to the login page.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
+    async with steps.step(page, elem, "Click the '登录后开始' button to go to the login page."):
+        await elem.click(timeout=5000)
+    
+
+    # -> Input the registered email and password, then click the login button.
+    frame = context.pages[-1]
+    # Input the registered email address.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
+    async with steps.step(page, elem, "Input the registered email address."):
+        await elem.fill(accounts.current().email)
+    
+
+    frame = context.pages[-1]
+    # Input the correct password.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
+    async with steps.step(page, elem, "Input the correct password."):
+        await elem.fill(accounts.current().password)
+    
+
+    frame = context.pages[-1]
+    # Click the login button to attempt login.
+    elem = frame.locator('xpath=html/body/div').nth(0)
+    async with steps.step(page, elem, "Click the login button to attempt login."):
+        await elem.click(timeout=5000)
+    
+
+    # --> Assertions to verify final state
+    frame = context.pages[-1]
+    try:
+        await expect(frame.locator('text=Login Successful! Welcome to your dashboard').first).to_be_visible(timeout=5000)
+    except AssertionError:
+        raise AssertionError('Test case failed: The login was not successful, or the user was not redirected to the home page as expected.')
+    await waits.settle(page)
+
+
 async def run_test():
     pw = None
     browser = None
@@ -26,59 +90,8 @@ async def run_test():
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
-        try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
-        except async_api.Error:
-            pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click the '登录后开始' button to navigate to the login page.
-        frame = context.pages[-1]
-        # Click the '登录后开始' button to go to the login page.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Input the registered email and password, then click the login button.
-        frame = context.pages[-1]
-        # Input the registered email address.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@qq.com')
-        
-
-        frame = context.pages[-1]
-        # Input the correct password.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('12345678')
-        
-
-        frame = context.pages[-1]
-        # Click the login button to attempt login.
-        elem = frame.locator('xpath=html/body/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=Login Successful! Welcome to your dashboard').first).to_be_visible(timeout=5000)
-        except AssertionError:
-            raise AssertionError('Test case failed: The login was not successful, or the user was not redirected to the home page as expected.')
-        await asyncio.sleep(5)
+        # Run the test case steps inside the prepared context
+        await run_case(context)
     
     finally:
         if context:
@@ -88,5 +101,6 @@ async def run_test():
         if pw:
             await pw.stop()
             
-asyncio.run(run_test())
+if __name__ == "__main__":
+    asyncio.run(run_test())
     
\ No newline at end of file
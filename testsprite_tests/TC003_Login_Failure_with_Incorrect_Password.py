@@ -2,6 +2,68 @@ import asyncio
 from playwright import async_api
 from playwright.async_api import expect
 
+import accounts
+import steps
+import waits
+
+async def run_case(context):
+    # Open a new page in the browser context
+    page = await context.new_page()
+    
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
+        try:
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+        except async_api.Error:
+            pass
+    
+    # Interact with the page elements to simulate user flow
+    # -> Click the '登录后开始' button to navigate to the login page.
+    frame = context.pages[-1]
+    # Click the '登录后开始' button to go to the login page.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
+    async with steps.step(page, elem, "Click the '登录后开始' button to go to the login page."):
+        await elem.click(timeout=5000)
+    
+
+    # -> Input the valid email '1062250152@qq.com' into the email field and input an incorrect password 'wrongpassword' into the password field.
+    frame = context.pages[-1]
+    # Input the valid registered email into the email field.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
+    async with steps.step(page, elem, "Input the valid registered email into the email field."):
+        await elem.fill(accounts.current().email)
+    
+
+    frame = context.pages[-1]
+    # Input an incorrect password into the password field.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
+    async with steps.step(page, elem, "Input an incorrect password into the password field."):
+        await elem.fill('wrongpassword')
+    
+
+    # -> Click the login button to attempt login with invalid credentials.
+    frame = context.pages[-1]
+    # Click the login button to submit the login form with invalid credentials.
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button').nth(0)
+    async with steps.step(page, elem, "Click the login button to submit the login form with invalid credentials."):
+        await elem.click(timeout=5000)
+    
+
+    # --> Assertions to verify final state
+    frame = context.pages[-1]
+    await expect(frame.locator('text=登录').first).to_be_visible(timeout=30000)
+    await waits.settle(page)
+
+
 async def run_test():
     pw = None
     browser = None
@@ -26,57 +88,8 @@ async def run_test():
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
-        try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
-        except async_api.Error:
-            pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click the '登录后开始' button to navigate to the login page.
-        frame = context.pages[-1]
-        # Click the '登录后开始' button to go to the login page.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Input the valid email '1062250152@qq.com' into the email field and input an incorrect password 'wrongpassword' into the password field.
-        frame = context.pages[-1]
-        # Input the valid registered email into the email field.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@qq.com')
-        
-
-        frame = context.pages[-1]
-        # Input an incorrect password into the password field.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('wrongpassword')
-        
-
-        # -> Click the login button to attempt login with invalid credentials.
-        frame = context.pages[-1]
-        # Click the login button to submit the login form with invalid credentials.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        await expect(frame.locator('text=登录').first).to_be_visible(timeout=30000)
-        await asyncio.sleep(5)
+        # Run the test case steps inside the prepared context
+        await run_case(context)
     
     finally:
         if context:
@@ -86,5 +99,6 @@ async def run_test():
         if pw:
             await pw.stop()
             
-asyncio.run(run_test())
+if __name__ == "__main__":
+    asyncio.run(run_test())
     
\ No newline at end of file
@@ -2,6 +2,42 @@ import asyncio
 from playwright import async_api
 from playwright.async_api import expect
 
+import session
+import waits
+
+# Start signed in from the cached session; this case is not about the login flow.
+USES_SESSION = True
+
+async def run_case(context):
+    # Open a new page in the browser context
+    page = await context.new_page()
+    
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
+        try:
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+        except async_api.Error:
+            pass
+    
+    # Interact with the page elements to simulate user flow
+    # --> Assertions to verify final state
+    frame = context.pages[-1]
+    try:
+        await expect(frame.locator('text=Administrator email added successfully').first).to_be_visible(timeout=1000)
+    except AssertionError:
+        raise AssertionError("Test failed: The administrator email was not added and saved in lowercase as required by the test plan.")
+    await waits.settle(page)
+
+
 async def run_test():
     pw = None
     browser = None
@@ -22,63 +58,12 @@ async def run_test():
             ],
         )
         
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
+        # Create a new browser context (like an incognito window) that is already signed in
+        context = await browser.new_context(storage_state=await session.storage_state())
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
-        try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
-        except async_api.Error:
-            pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click the '登录后开始' (Login to start) button to proceed to login.
-        frame = context.pages[-1]
-        # Click the '登录后开始' (Login to start) button to go to login page.
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Input the administrator email and password, then submit login.
-        frame = context.pages[-1]
-        # Input administrator email
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@qq.com')
-        
-
-        frame = context.pages[-1]
-        # Input administrator password
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('12345678')
-        
-
-        frame = context.pages[-1]
-        # Click the login button to submit credentials
-        elem = frame.locator('xpath=html/body/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=Administrator email added successfully').first).to_be_visible(timeout=1000)
-        except AssertionError:
-            raise AssertionError("Test failed: The administrator email was not added and saved in lowercase as required by the test plan.")
-        await asyncio.sleep(5)
+        # Run the test case steps inside the prepared context
+        await run_case(context)
     
     finally:
         if context:
@@ -88,5 +73,6 @@ async def run_test():
         if pw:
             await pw.stop()
             
-asyncio.run(run_test())
+if __name__ == "__main__":
+    asyncio.run(run_test())
     
\ No newline at end of file
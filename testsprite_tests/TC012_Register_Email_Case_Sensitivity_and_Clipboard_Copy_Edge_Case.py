@@ -2,6 +2,154 @@ import asyncio
 from playwright import async_api
 from playwright.async_api import expect
 
+import accounts
+import steps
+import waits
+
+async def run_case(context):
+    # Open a new page in the browser context
+    page = await context.new_page()
+    
+    # Navigate to your target URL and wait until the network request is committed
+    await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
+    
+    # Wait for the main page to reach DOMContentLoaded state (optional for stability)
+    try:
+        await page.wait_for_load_state("domcontentloaded", timeout=3000)
+    except async_api.Error:
+        pass
+    
+    # Iterate through all iframes and wait for them to load as well
+    for frame in page.frames:
+        try:
+            await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+        except async_api.Error:
+            pass
+    
+    # Interact with the page elements to simulate user flow
+    # -> Click the '登录后开始' (Login to Start) button to proceed to login/registration page.
+    frame = context.pages[-1]
+    # Click the '登录后开始' (Login to Start) button to go to login/registration page
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
+    async with steps.step(page, elem, "Click the '登录后开始' (Login to Start) button to go to login/registration page"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Click the '没有账号？去注册' button to go to registration form.
+    frame = context.pages[-1]
+    # Click the '没有账号？去注册' button to go to registration form
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
+    async with steps.step(page, elem, "Click the '没有账号？去注册' button to go to registration form"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Input upper-case email and password, then click register.
+    frame = context.pages[-1]
+    # Input upper-case email for registration
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
+    async with steps.step(page, elem, "Input upper-case email for registration"):
+        await elem.fill(accounts.current().email.upper())
+    
+
+    frame = context.pages[-1]
+    # Input password for registration
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
+    async with steps.step(page, elem, "Input password for registration"):
+        await elem.fill(accounts.current().password)
+    
+
+    frame = context.pages[-1]
+    # Click the register button
+    elem = frame.locator('xpath=html/body/div').nth(0)
+    async with steps.step(page, elem, "Click the register button"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Attempt registration with the same email in lower-case to verify case insensitivity.
+    frame = context.pages[-1]
+    # Input lower-case email for registration attempt
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
+    async with steps.step(page, elem, "Input lower-case email for registration attempt"):
+        await elem.fill(accounts.current().email)
+    
+
+    frame = context.pages[-1]
+    # Input password for registration attempt
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
+    async with steps.step(page, elem, "Input password for registration attempt"):
+        await elem.fill(accounts.current().password)
+    
+
+    frame = context.pages[-1]
+    # Click the register button to submit lower-case email registration
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button').nth(0)
+    async with steps.step(page, elem, "Click the register button to submit lower-case email registration"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Test clipboard copy of credentials handling when clipboard permissions are denied.
+    frame = context.pages[-1]
+    # Click '没有账号？去注册' to go back to registration or relevant page to test clipboard copy fallback
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
+    async with steps.step(page, elem, "Click '没有账号？去注册' to go back to registration or relevant page to test clipboard copy fallback"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Simulate clipboard permission denial scenario or find UI element to test clipboard copy fallback messaging.
+    frame = context.pages[-1]
+    # Click '已有账号？去登录' to go to login page where clipboard copy might be tested
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
+    async with steps.step(page, elem, "Click '已有账号？去登录' to go to login page where clipboard copy might be tested"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Try to simulate clipboard permission denial or find a way to trigger clipboard copy fallback messaging.
+    frame = context.pages[-1]
+    # Input email for login attempt
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
+    async with steps.step(page, elem, "Input email for login attempt"):
+        await elem.fill(accounts.current().email)
+    
+
+    frame = context.pages[-1]
+    # Input password for login attempt
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
+    async with steps.step(page, elem, "Input password for login attempt"):
+        await elem.fill(accounts.current().password)
+    
+
+    frame = context.pages[-1]
+    # Click login button to proceed and check clipboard copy behavior
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button').nth(0)
+    async with steps.step(page, elem, "Click login button to proceed and check clipboard copy behavior"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Explore admin page to find clipboard copy functionality or credentials display to test clipboard permission denial fallback.
+    await page.mouse.wheel(0, 500)
+    
+
+    # -> Explore user management tab to check for clipboard copy or credentials display functionality.
+    frame = context.pages[-1]
+    # Click '用户管理' tab to explore user management for clipboard copy or credentials display elements
+    elem = frame.locator('xpath=html/body/div/div/main/div/div/div[5]/div/button[2]').nth(0)
+    async with steps.step(page, elem, "Click '用户管理' tab to explore user management for clipboard copy or credentials display elements"):
+        await elem.click(timeout=5000)
+    
+
+    # -> Scroll down to check if more user management options or clipboard copy elements appear.
+    await page.mouse.wheel(0, 200)
+    
+
+    # --> Assertions to verify final state
+    frame = context.pages[-1]
+    await expect(frame.locator(f'text={accounts.current().email}').first).to_be_visible(timeout=30000)
+    await expect(frame.locator('text=管理员').first).to_be_visible(timeout=30000)
+    await expect(frame.locator('text=设为管理员').first).to_be_visible(timeout=30000)
+    await expect(frame.locator('text=用户管理').first).to_be_visible(timeout=30000)
+    await waits.settle(page)
+
+
 async def run_test():
     pw = None
     browser = None
@@ -26,133 +174,8 @@ async def run_test():
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:4173", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
-        try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
-        except async_api.Error:
-            pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Click the '登录后开始' (Login to Start) button to proceed to login/registration page.
-        frame = context.pages[-1]
-        # Click the '登录后开始' (Login to Start) button to go to login/registration page
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[3]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Click the '没有账号？去注册' button to go to registration form.
-        frame = context.pages[-1]
-        # Click the '没有账号？去注册' button to go to registration form
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Input upper-case email and password, then click register.
-        frame = context.pages[-1]
-        # Input upper-case email for registration
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@QQ.COM')
-        
-
-        frame = context.pages[-1]
-        # Input password for registration
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('12345678')
-        
-
-        frame = context.pages[-1]
-        # Click the register button
-        elem = frame.locator('xpath=html/body/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Attempt registration with the same email in lower-case to verify case insensitivity.
-        frame = context.pages[-1]
-        # Input lower-case email for registration attempt
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@qq.com')
-        
-
-        frame = context.pages[-1]
-        # Input password for registration attempt
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('12345678')
-        
-
-        frame = context.pages[-1]
-        # Click the register button to submit lower-case email registration
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Test clipboard copy of credentials handling when clipboard permissions are denied.
-        frame = context.pages[-1]
-        # Click '没有账号？去注册' to go back to registration or relevant page to test clipboard copy fallback
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Simulate clipboard permission denial scenario or find UI element to test clipboard copy fallback messaging.
-        frame = context.pages[-1]
-        # Click '已有账号？去登录' to go to login page where clipboard copy might be tested
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Try to simulate clipboard permission denial or find a way to trigger clipboard copy fallback messaging.
-        frame = context.pages[-1]
-        # Input email for login attempt
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('1062250152@qq.com')
-        
-
-        frame = context.pages[-1]
-        # Input password for login attempt
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[2]/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('12345678')
-        
-
-        frame = context.pages[-1]
-        # Click login button to proceed and check clipboard copy behavior
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[2]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Explore admin page to find clipboard copy functionality or credentials display to test clipboard permission denial fallback.
-        await page.mouse.wheel(0, 500)
-        
-
-        # -> Explore user management tab to check for clipboard copy or credentials display functionality.
-        frame = context.pages[-1]
-        # Click '用户管理' tab to explore user management for clipboard copy or credentials display elements
-        elem = frame.locator('xpath=html/body/div/div/main/div/div/div[5]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Scroll down to check if more user management options or clipboard copy elements appear.
-        await page.mouse.wheel(0, 200)
-        
-
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        await expect(frame.locator('text=1062250152@qq.com').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=管理员').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=设为管理员').first).to_be_visible(timeout=30000)
-        await expect(frame.locator('text=用户管理').first).to_be_visible(timeout=30000)
-        await asyncio.sleep(5)
+        # Run the test case steps inside the prepared context
+        await run_case(context)
     
     finally:
         if context:
@@ -162,5 +185,6 @@ async def run_test():
         if pw:
             await pw.stop()
             
-asyncio.run(run_test())
+if __name__ == "__main__":
+    asyncio.run(run_test())
     
\ No newline at end of file
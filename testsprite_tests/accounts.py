@@ -0,0 +1,47 @@
+"""Test accounts for the TC scripts.
+
+The cases used to hard-code ``1062250152@qq.com``, so two cases running at
+the same time (TC001 registering it while TC012 re-registers it, for
+example) raced on the same Supabase user. Cases now ask :func:`current` for
+their account. A standalone run and a single-worker suite run get the
+default account. ``run_suite.py`` binds a distinct account to every worker
+from the list in ``--accounts`` / ``TC_ACCOUNTS_FILE``, a JSON file shaped
+like::
+
+    [{"email": "e2e-w0@example.com", "password": "..."}, ...]
+"""
+
+import contextvars
+import json
+import os
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Account:
+    email: str
+    password: str
+
+
+DEFAULT_ACCOUNT = Account("1062250152@qq.com", "12345678")
+
+_current = contextvars.ContextVar("tc_account", default=DEFAULT_ACCOUNT)
+
+
+def load(path=None):
+    """Accounts from ``path`` (or ``TC_ACCOUNTS_FILE``); just the default account if neither is set."""
+    path = path or os.environ.get("TC_ACCOUNTS_FILE")
+    if not path:
+        return [DEFAULT_ACCOUNT]
+    with open(path, encoding="utf-8") as f:
+        return [Account(a["email"], a["password"]) for a in json.load(f)]
+
+
+def current():
+    """The account bound to the running worker."""
+    return _current.get()
+
+
+def bind(account):
+    """Bind ``account`` to the current task, i.e. to one runner worker."""
+    _current.set(account)
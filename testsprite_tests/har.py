@@ -0,0 +1,174 @@
+"""HAR record-and-replay of the Supabase traffic behind the TC scripts.
+
+``run_suite.py --har record`` runs the cases live and saves every request to
+the Supabase project (Auth, PostgREST, edge functions) per case under
+``.har/<case>.har``, together with the signed-in storage state the case
+started from. ``--har replay`` serves those responses back, so the cases run
+offline against the preview build with no backend at all::
+
+    python testsprite_tests/run_suite.py --har record    # one live run
+    python testsprite_tests/run_suite.py --har replay    # any number of offline reruns
+
+Replay goes through ``context.route_from_har`` first, which only answers
+byte-identical requests. Everything it does not know falls back to a matcher
+keyed on method, path and a normalized query string and body: JSON keys are
+sorted, UUIDs, timestamps, e-mail addresses and tokens are replaced with
+placeholders, so ids minted by the live backend or a different worker
+account do not break the match. Repeated identical requests get the recorded
+responses in order.
+
+A request that matches neither is aborted and reported as stale: the app now
+sends something the recording has never seen, and the case needs to be
+recorded again (``--har record TC007``).
+"""
+
+import base64
+import json
+import pathlib
+import re
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import session
+
+SUITE_DIR = pathlib.Path(__file__).resolve().parent
+HAR_DIR = SUITE_DIR / ".har"
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (OFF, RECORD, REPLAY)
+
+# Keys whose values change on every run and say nothing about which request it is.
+VOLATILE_KEYS = {
+    "access_token", "refresh_token", "token", "created_at", "updated_at", "completed_at",
+    "redeemed_at", "expires_at", "code_challenge", "gotrue_meta_security",
+}
+PLACEHOLDERS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I), "<uuid>"),
+    (re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"), "<timestamp>"),
+    (re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+"), "<email>"),
+]
+# The body is replayed decoded, so headers describing the wire encoding must go.
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def har_path(case_id):
+    return HAR_DIR / f"{case_id}.har"
+
+
+def state_path(case_id):
+    return HAR_DIR / f"{case_id}.state.json"
+
+
+def url_pattern():
+    """Glob for the Supabase project the preview build talks to."""
+    return f"{session.supabase_config()[0]}/**"
+
+
+def _normalize_text(text):
+    for pattern, placeholder in PLACEHOLDERS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def normalize(value):
+    """Strip run-specific detail from a decoded JSON value."""
+    if isinstance(value, dict):
+        return {k: "<volatile>" if k in VOLATILE_KEYS else normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    if isinstance(value, str):
+        return _normalize_text(value)
+    return value
+
+
+def request_key(method, url, body):
+    """Match key for a request: method, path, normalized query and normalized body."""
+    parts = urlsplit(url)
+    query = sorted((k, _normalize_text(v)) for k, v in parse_qsl(parts.query, keep_blank_values=True))
+    if body:
+        try:
+            body = json.dumps(normalize(json.loads(body)), sort_keys=True, ensure_ascii=False)
+        except ValueError:
+            body = _normalize_text(body)
+    return method.upper(), parts.path, json.dumps(query, ensure_ascii=False), body or ""
+
+
+class Replay:
+    """Normalized-key index of one case's HAR and the requests it could not answer."""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)["log"]["entries"]
+        self.index = {}
+        for entry in entries:
+            request = entry["request"]
+            body = (request.get("postData") or {}).get("text", "")
+            self.index.setdefault(request_key(request["method"], request["url"], body), []).append(entry["response"])
+        self.served = {}
+        self.stale = []
+
+    async def handle(self, route, request):
+        key = request_key(request.method, request.url, request.post_data)
+        responses = self.index.get(key)
+        if not responses:
+            self.stale.append(f"{request.method} {urlsplit(request.url).path}")
+            await route.abort("internetdisconnected")
+            return
+        # Replay repeated requests in recorded order; keep answering with the last one.
+        count = self.served.get(key, 0)
+        self.served[key] = count + 1
+        response = responses[min(count, len(responses) - 1)]
+        content = response.get("content", {})
+        body = content.get("text", "")
+        body = base64.b64decode(body) if content.get("encoding") == "base64" else body.encode()
+        await route.fulfill(
+            status=response["status"],
+            headers={
+                h["name"]: h["value"] for h in response["headers"]
+                if h["name"].lower() not in DROPPED_RESPONSE_HEADERS
+            },
+            body=body,
+        )
+
+
+async def attach(context, case_id, mode):
+    """Set up recording or replay on a fresh context; returns the :class:`Replay` when replaying."""
+    if mode == OFF:
+        return None
+    pattern = url_pattern()
+    if mode == RECORD:
+        HAR_DIR.mkdir(exist_ok=True)
+        await context.route_from_har(har_path(case_id), url=pattern, update=True, update_content="embed")
+        return None
+    if not har_path(case_id).exists():
+        raise FileNotFoundError(f"no recording for {case_id}; run it once with --har record")
+    replay = Replay(har_path(case_id))
+    # Routes registered later run first: exact HAR matches, then the normalized matcher.
+    await context.route(pattern, replay.handle)
+    await context.route_from_har(har_path(case_id), url=pattern, not_found="fallback")
+    return replay
+
+
+def save_state(case_id, state):
+    """Keep the storage state a recorded case started from, for replaying it later."""
+    HAR_DIR.mkdir(exist_ok=True)
+    state_path(case_id).write_text(json.dumps(state), encoding="utf-8")
+
+
+def recorded_state(case_id):
+    """The recorded storage state, with the session's expiry pushed into the future.
+
+    The recorded access token has long expired; left as is, supabase-js would
+    try to refresh it, and the refresh response in the HAR belongs to a
+    different refresh token.
+    """
+    state = json.loads(state_path(case_id).read_text(encoding="utf-8"))
+    for origin in state["origins"]:
+        for item in origin["localStorage"]:
+            if item["name"].endswith("-auth-token"):
+                saved = json.loads(item["value"])
+                saved["expires_at"] = int(time.time()) + 3600
+                item["value"] = json.dumps(saved)
+    return state
@@ -0,0 +1,65 @@
+"""JSON and JUnit reports for ``run_suite.py``.
+
+A report covers one runner invocation: one shard, one process or the whole
+suite. Reports from several processes or machines can be merged into one
+before the JUnit file is written for CI.
+"""
+
+import json
+import xml.etree.ElementTree as ET
+
+
+def to_dict(results, browsers, launch_seconds, total_seconds, shard="1/1"):
+    return {
+        "shard": shard,
+        "browsers": browsers,
+        "launch_seconds": launch_seconds,
+        "total_seconds": total_seconds,
+        "cases": [vars(r) for r in results],
+    }
+
+
+def write_json(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge(reports):
+    """Combine shard reports. Shards run side by side, so wall time is the slowest shard."""
+    cases = sorted((c for r in reports for c in r["cases"]), key=lambda c: c["case_id"])
+    return {
+        "shard": ",".join(r["shard"] for r in reports),
+        "browsers": sum(r["browsers"] for r in reports),
+        "launch_seconds": sum(r["launch_seconds"] for r in reports),
+        "total_seconds": max((r["total_seconds"] for r in reports), default=0.0),
+        "cases": cases,
+    }
+
+
+def write_junit(path, report):
+    cases = report["cases"]
+    suite = ET.Element(
+        "testsuite",
+        name="testsprite_tests",
+        tests=str(len(cases)),
+        failures=str(sum(c["status"] == "failed" for c in cases)),
+        errors=str(sum(c["status"] == "error" for c in cases)),
+        time=f"{report['total_seconds']:.3f}",
+    )
+    for c in cases:
+        case = ET.SubElement(
+            suite,
+            "testcase",
+            classname="testsprite_tests",
+            name=f"{c['case_id']} {c['title']}",
+            time=f"{c['seconds']:.3f}",
+        )
+        if c["status"] in ("failed", "error"):
+            tag = "failure" if c["status"] == "failed" else "error"
+            ET.SubElement(case, tag, message=c["message"].splitlines()[0] if c["message"] else "").text = c["message"]
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
@@ -0,0 +1,355 @@
+"""Run the TestSprite cases against shared Chromium instances.
+
+Every ``TCxxx_*.py`` script exposes ``run_case(context)``. Run standalone, a
+script launches (and tears down) its own browser; this runner imports the
+cases instead, launches the browser once and gives each case a fresh
+``BrowserContext``. Per-case and total wall time are printed at the end,
+together with the launch cost that standalone runs would have paid and the
+time each case spent idle in :mod:`waits`. Cases that set ``USES_SESSION``
+start from the cached sign-in in :mod:`session` instead of the login UI.
+
+The cases are independent, so they can be spread out:
+
+* ``--workers N`` runs N cases at a time in this process, each in its own
+  context on one of ``--browsers`` shared browsers;
+* ``--processes P`` splits the selection across P runner processes;
+* ``--shard i/n`` runs the i-th of n slices, for fanning out over machines.
+
+Every worker across all shards and processes is bound to its own test
+account from ``--accounts`` (see :mod:`accounts`), so concurrent cases never
+register or sign in as the same user. All shards of one run must use the
+same ``--processes`` and ``--workers`` for the account slots to line up.
+Results can be written as JSON and JUnit; ``--merge`` combines the JSON
+reports of several shards into one. Step timings from :mod:`steps` are
+appended to the SQLite store in :mod:`trends` after every run. ``--har record``
+saves the Supabase traffic of every case and ``--har replay`` serves it back
+for offline reruns (see :mod:`har`).
+
+Usage::
+
+    python testsprite_tests/run_suite.py              # every TC in the folder
+    python testsprite_tests/run_suite.py TC002 TC003  # a subset, by id prefix
+    python testsprite_tests/run_suite.py --wait-mode event
+    python testsprite_tests/run_suite.py --compare-wait-modes  # fixed vs event
+    python testsprite_tests/run_suite.py --workers 4 --accounts accounts.json --junit junit.xml
+    python testsprite_tests/run_suite.py --shard 2/3 --json shard2.json
+    python testsprite_tests/run_suite.py --merge shard*.json --junit junit.xml
+    python testsprite_tests/run_suite.py --har record  # then --har replay, offline
+    python testsprite_tests/trends.py  # slowest steps and regressions
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from playwright import async_api
+
+import accounts
+import har
+import reports
+import session
+import steps
+import trends
+import waits
+
+SUITE_DIR = pathlib.Path(__file__).resolve().parent
+
+# Same flags as the standalone scripts, minus "--single-process": a
+# single-process Chromium cannot reliably host several contexts in a row.
+BROWSER_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+]
+
+DEFAULT_TIMEOUT_MS = 5000
+
+
+@dataclass
+class CaseResult:
+    case_id: str
+    title: str
+    status: str  # "passed", "failed" (assertion) or "error" (anything else)
+    seconds: float
+    idle_seconds: float = 0.0
+    message: str = ""
+    worker: str = ""
+    steps: list = field(default_factory=list)
+    stale_requests: list = field(default_factory=list)  # requests missing from the HAR in replay mode
+
+
+def discover_cases(selected=None):
+    """Return the TC scripts in suite order, optionally filtered by id prefix."""
+    paths = sorted(SUITE_DIR.glob("TC[0-9][0-9][0-9]_*.py"))
+    if selected:
+        paths = [p for p in paths if any(p.name.startswith(s) for s in selected)]
+    return paths
+
+
+def parse_shard(value):
+    """Parse ``"i/n"`` into ``(i, n)`` with 1 <= i <= n."""
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {value!r}")
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"shard index must be between 1 and {total}, got {index}")
+    return index, total
+
+
+def select_shard(paths, shard):
+    index, total = shard
+    return paths[index - 1 :: total]
+
+
+def account_slots(all_accounts, shard, subshard, workers):
+    """The accounts for this invocation's workers; slots never overlap across shards."""
+    offset = ((shard[0] - 1) * subshard[1] + (subshard[0] - 1)) * workers
+    needed = shard[1] * subshard[1] * workers
+    if len(all_accounts) < needed:
+        raise SystemExit(
+            f"{needed} test accounts are needed for {shard[1]} shard(s) x {subshard[1]} process(es) x "
+            f"{workers} worker(s), {len(all_accounts)} available; pass --accounts or set TC_ACCOUNTS_FILE"
+        )
+    return all_accounts[offset : offset + workers]
+
+
+def case_id(path):
+    return path.name.split("_", 1)[0]
+
+
+def case_title(path):
+    return path.stem.split("_", 1)[1].replace("_", " ")
+
+
+def load_case(path):
+    """Import a TC script as a module without triggering its ``__main__`` block."""
+    if str(SUITE_DIR) not in sys.path:
+        sys.path.insert(0, str(SUITE_DIR))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def launch_browser(pw):
+    started = time.perf_counter()
+    browser = await pw.chromium.launch(headless=True, args=BROWSER_ARGS)
+    return browser, time.perf_counter() - started
+
+
+async def run_one(browser, path, har_mode=har.OFF):
+    """Run a single case in its own context and classify the outcome."""
+    started = time.perf_counter()
+    idle = waits.track_idle()
+    step_log = steps.track()
+    context = replay = None
+    status, message = "passed", ""
+    try:
+        module = load_case(path)
+        context_options = {}
+        if getattr(module, "USES_SESSION", False):
+            if har_mode == har.REPLAY:
+                context_options["storage_state"] = har.recorded_state(case_id(path))
+            else:
+                context_options["storage_state"] = await session.storage_state()
+                if har_mode == har.RECORD:
+                    har.save_state(case_id(path), context_options["storage_state"])
+        context = await browser.new_context(**context_options)
+        context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+        replay = await har.attach(context, case_id(path), har_mode)
+        await module.run_case(context)
+    except AssertionError as exc:
+        status, message = "failed", str(exc)
+    except Exception as exc:
+        status = "error"
+        message = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+    finally:
+        if context:
+            await context.close()
+    return CaseResult(
+        case_id(path), case_title(path), status, time.perf_counter() - started, idle.seconds, message,
+        steps=step_log.steps, stale_requests=replay.stale if replay else [],
+    )
+
+
+async def run_suite(paths, workers=1, browsers=1, worker_accounts=None, har_mode=har.OFF):
+    """Run ``paths`` on ``workers`` concurrent workers sharing ``browsers`` browsers.
+
+    Worker ``i`` runs its cases as ``worker_accounts[i]``. Returns
+    ``(results, browsers_launched, launch_seconds, total_seconds)``.
+    """
+    worker_accounts = worker_accounts or [accounts.current()] * workers
+    started = time.perf_counter()
+    pending = list(paths)
+    results = []
+    launched = []
+
+    async def worker(index, browser):
+        accounts.bind(worker_accounts[index])
+        while pending:
+            path = pending.pop(0)
+            result = await run_one(browser, path, har_mode)
+            result.worker = f"{index}:{worker_accounts[index].email}"
+            print(f"{result.case_id}  {result.status:<6}  {result.seconds:7.2f}s  worker {index}", flush=True)
+            results.append(result)
+
+    pw = await async_api.async_playwright().start()
+    try:
+        launched = await asyncio.gather(*(launch_browser(pw) for _ in range(min(browsers, workers))))
+        pool = [browser for browser, _ in launched]
+        try:
+            await asyncio.gather(*(worker(i, pool[i % len(pool)]) for i in range(workers)))
+        finally:
+            for browser in pool:
+                await browser.close()
+    finally:
+        await pw.stop()
+    results.sort(key=lambda r: r.case_id)
+    launch_seconds = sum(seconds for _, seconds in launched)
+    return results, len(launched), launch_seconds, time.perf_counter() - started
+
+
+async def run_processes(args):
+    """Re-invoke this script once per sub-shard and merge the JSON reports they write."""
+    with tempfile.TemporaryDirectory() as tmp:
+        children = []
+        for k in range(1, args.processes + 1):
+            report_path = os.path.join(tmp, f"subshard{k}.json")
+            command = [
+                sys.executable, __file__, *args.cases,
+                "--shard", f"{args.shard[0]}/{args.shard[1]}",
+                "--subshard", f"{k}/{args.processes}",
+                "--workers", str(args.workers),
+                "--browsers", str(args.browsers),
+                "--wait-mode", args.wait_mode,
+                "--har", args.har,
+                "--json", report_path,
+            ]
+            if args.accounts:
+                command += ["--accounts", args.accounts]
+            command += ["--trend-db", args.trend_db] if args.trend_db else ["--no-trends"]
+            children.append((await asyncio.create_subprocess_exec(*command), report_path))
+        for process, _ in children:
+            await process.wait()
+        return reports.merge([reports.read_json(path) for _, path in children if os.path.exists(path)])
+
+
+def print_report(report):
+    cases = report["cases"]
+    print()
+    for c in cases:
+        print(f"{c['case_id']}  {c['status']:<6}  {c['seconds']:7.2f}s  (idle {c['idle_seconds']:6.2f}s)  {c['title']}")
+        if c["message"]:
+            print(f"        {c['message'].splitlines()[0]}")
+        if c.get("stale_requests"):
+            print(f"        stale recording, not in HAR: {', '.join(sorted(set(c['stale_requests'])))}")
+    passed = sum(c["status"] == "passed" for c in cases)
+    failed = sum(c["status"] == "failed" for c in cases)
+    errors = sum(c["status"] == "error" for c in cases)
+    launches = max(report["browsers"], 1)
+    print()
+    print(f"{len(cases)} cases: {passed} passed, {failed} failed, {errors} errors  [shard {report['shard']}]")
+    stale = [c["case_id"] for c in cases if c.get("stale_requests")]
+    if stale:
+        print(f"stale HAR recordings: {' '.join(stale)} (re-run them with --har record)")
+    print(
+        f"browser launch: {report['launch_seconds']:.2f}s for {report['browsers']} browser(s) "
+        f"(standalone scripts would pay ~{report['launch_seconds'] / launches * len(cases):.2f}s "
+        f"for {len(cases)} launches)"
+    )
+    print(f"sum of case time: {sum(c['seconds'] for c in cases):.2f}s")
+    print(
+        f"total wall time: {report['total_seconds']:.2f}s "
+        f"(idle in waits: {sum(c['idle_seconds'] for c in cases):.2f}s)"
+    )
+
+
+def print_comparison(before, after):
+    """Print per-case wall time of a fixed-wait run next to an event-wait run."""
+    after_by_id = {c["case_id"]: c for c in after["cases"]}
+    print()
+    print(f"wait mode        {waits.FIXED:>10}  {waits.EVENT:>10}")
+    for b in before["cases"]:
+        a = after_by_id[b["case_id"]]
+        print(f"{b['case_id']}  {b['status']:>6}/{a['status']:<6}  {b['seconds']:9.2f}s  {a['seconds']:9.2f}s")
+    before_total, after_total = before["total_seconds"], after["total_seconds"]
+    print(f"total            {before_total:9.2f}s  {after_total:9.2f}s  (saved {before_total - after_total:.2f}s)")
+
+
+def all_passed(report):
+    return all(c["status"] == "passed" for c in report["cases"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cases", nargs="*", help="case id prefixes to run, e.g. TC002 (default: all)")
+    parser.add_argument("--wait-mode", choices=waits.MODES, default=waits.get_mode())
+    parser.add_argument(
+        "--compare-wait-modes",
+        action="store_true",
+        help="run the selection once per wait mode and print before/after wall time",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="cases to run at a time in this process")
+    parser.add_argument("--browsers", type=int, default=1, help="browsers shared by the workers")
+    parser.add_argument("--processes", type=int, default=1, help="runner processes to split the selection across")
+    parser.add_argument("--shard", type=parse_shard, default=(1, 1), metavar="i/n", help="run only slice i of n")
+    parser.add_argument("--subshard", type=parse_shard, default=(1, 1), help=argparse.SUPPRESS)
+    parser.add_argument("--accounts", default=os.environ.get("TC_ACCOUNTS_FILE"), help="JSON list of test accounts")
+    parser.add_argument("--har", choices=har.MODES, default=har.OFF, help="record or replay Supabase traffic")
+    parser.add_argument("--json", dest="json_path", help="write the report as JSON")
+    parser.add_argument("--junit", dest="junit_path", help="write the report as JUnit XML")
+    parser.add_argument("--merge", nargs="+", metavar="REPORT", help="merge JSON reports instead of running")
+    parser.add_argument("--trend-db", default=str(trends.DEFAULT_DB), help="SQLite store for step timings")
+    parser.add_argument("--no-trends", dest="trend_db", action="store_const", const=None, help="do not record this run")
+    args = parser.parse_args(argv)
+
+    if args.merge:
+        report = reports.merge([reports.read_json(path) for path in args.merge])
+    elif args.processes > 1:
+        report = asyncio.run(run_processes(args))
+    else:
+        paths = select_shard(select_shard(discover_cases(args.cases), args.shard), args.subshard)
+        if not paths:
+            print("no TC scripts selected")
+            return 0
+        label = f"{args.shard[0]}/{args.shard[1]}"
+        if args.subshard != (1, 1):
+            label += f".{args.subshard[0]}/{args.subshard[1]}"
+        worker_accounts = account_slots(accounts.load(args.accounts), args.shard, args.subshard, args.workers)
+
+        if args.compare_wait_modes:
+            runs = []
+            for mode in (waits.FIXED, waits.EVENT):
+                print(f"== wait mode: {mode}")
+                waits.set_mode(mode)
+                outcome = asyncio.run(run_suite(paths, args.workers, args.browsers, worker_accounts, args.har))
+                runs.append(reports.to_dict(*outcome, label))
+                if args.trend_db:
+                    trends.record(args.trend_db, runs[-1], mode)
+            print_comparison(*runs)
+            return 0 if all(all_passed(run) for run in runs) else 1
+
+        waits.set_mode(args.wait_mode)
+        outcome = asyncio.run(run_suite(paths, args.workers, args.browsers, worker_accounts, args.har))
+        report = reports.to_dict(*outcome, label)
+        if args.trend_db:
+            trends.record(args.trend_db, report, args.wait_mode)
+
+    if args.json_path:
+        reports.write_json(args.json_path, report)
+    if args.junit_path:
+        reports.write_junit(args.junit_path, report)
+    print_report(report)
+    return 0 if all_passed(report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Cached Supabase sign-in for the TC scripts.
+
+Cases that are not about the login flow set ``USES_SESSION = True`` and get a
+context whose localStorage already holds a supabase-js session, so the app
+boots signed in and the UI login steps can be skipped. The session comes
+from the same Supabase Auth password grant that ``AuthContext`` uses
+(``signInWithPassword``), is fetched once per suite and is cached on disk
+under ``.auth/`` until shortly before its access token expires.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+import accounts
+
+SUITE_DIR = pathlib.Path(__file__).resolve().parent
+REPO_ROOT = SUITE_DIR.parent
+STATE_DIR = SUITE_DIR / ".auth"
+
+APP_ORIGIN = "http://localhost:4173"
+
+# Re-login when the cached token has less than this much life left.
+EXPIRY_MARGIN_SECONDS = 300
+
+_locks = {}
+
+
+def supabase_config():
+    """Return ``(url, anon_key)`` from the environment, falling back to the repo ``.env``."""
+    values = {}
+    env_file = REPO_ROOT / ".env"
+    if env_file.exists():
+        for line in env_file.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)
+                values[key.strip()] = value.strip()
+    url = os.environ.get("VITE_SUPABASE_URL") or values.get("VITE_SUPABASE_URL")
+    anon_key = os.environ.get("VITE_SUPABASE_ANON_KEY") or values.get("VITE_SUPABASE_ANON_KEY")
+    if not url or not anon_key:
+        raise RuntimeError("VITE_SUPABASE_URL and VITE_SUPABASE_ANON_KEY must be set")
+    return url.rstrip("/"), anon_key
+
+
+def storage_key(supabase_url):
+    """localStorage key supabase-js v2 uses for the session of ``supabase_url``."""
+    return f"sb-{urlparse(supabase_url).hostname.split('.')[0]}-auth-token"
+
+
+def sign_in(email, password):
+    """Password grant against Supabase Auth; returns the session object supabase-js stores."""
+    url, anon_key = supabase_config()
+    request = urllib.request.Request(
+        f"{url}/auth/v1/token?grant_type=password",
+        data=json.dumps({"email": email, "password": password}).encode(),
+        headers={"apikey": anon_key, "Authorization": f"Bearer {anon_key}", "Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=15) as response:
+        session = json.load(response)
+    session.setdefault("expires_at", int(time.time()) + int(session.get("expires_in", 3600)))
+    return session
+
+
+def build_storage_state(session, supabase_url):
+    """Playwright ``storage_state`` with ``session`` in the app origin's localStorage."""
+    return {
+        "cookies": [],
+        "origins": [
+            {
+                "origin": APP_ORIGIN,
+                "localStorage": [{"name": storage_key(supabase_url), "value": json.dumps(session)}],
+            }
+        ],
+    }
+
+
+def state_path(email):
+    digest = hashlib.sha1(email.lower().encode()).hexdigest()[:12]
+    return STATE_DIR / f"{digest}.json"
+
+
+def load_cached(email):
+    """Return the cached storage state for ``email`` if it is still comfortably valid."""
+    path = state_path(email)
+    try:
+        cached = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if cached.get("expires_at", 0) - EXPIRY_MARGIN_SECONDS <= time.time():
+        return None
+    return cached["storage_state"]
+
+
+def save(email, session, state):
+    STATE_DIR.mkdir(exist_ok=True)
+    payload = {"email": email, "expires_at": session["expires_at"], "storage_state": state}
+    state_path(email).write_text(json.dumps(payload), encoding="utf-8")
+
+
+async def storage_state(account=None):
+    """Signed-in storage state for ``account`` (default: the worker's account).
+
+    Logs in at most once per process and expiry window for each account.
+    """
+    account = account or accounts.current()
+    key = (id(asyncio.get_running_loop()), account.email.lower())
+    lock = _locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        state = load_cached(account.email)
+        if state is None:
+            session = await asyncio.to_thread(sign_in, account.email, account.password)
+            state = build_storage_state(session, supabase_config()[0])
+            save(account.email, session, state)
+        return state
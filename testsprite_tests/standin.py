@@ -0,0 +1,1146 @@
+"""In-memory stand-in for the Supabase project behind the app.
+
+The TC scripts drive the preview build on ``localhost:4173``, and every page
+then talks to the hosted Supabase project: Auth, PostgREST and the edge
+functions (``upsert-user``, ``login-password``, ``verify-token``,
+``generate_deepseek_analysis*``, the Stripe functions, ``admin_export``,
+``generate_gift_codes``).
+This module serves the same endpoints from one asyncio process with all
+state in memory, so the suite runs without network access, with millisecond
+backend latency and with the same data on every run::
+
+    python testsprite_tests/standin.py --port 54321
+    VITE_SUPABASE_URL=http://localhost:54321 VITE_SUPABASE_ANON_KEY=standin-anon-key \\
+        npm run build && npm run preview
+    VITE_SUPABASE_URL=http://localhost:54321 VITE_SUPABASE_ANON_KEY=standin-anon-key \\
+        python testsprite_tests/run_suite.py
+
+Vite inlines the ``VITE_*`` variables at build time, so the preview build has
+to be rebuilt against the stand-in. :mod:`session` reads the same variables,
+so ``USES_SESSION`` cases sign in against the stand-in as well.
+
+What is covered:
+
+* Auth: ``signup``, the ``password`` and ``refresh_token`` grants, ``user``
+  and ``logout``. Access tokens are unsigned JWTs carrying ``sub``/``email``.
+* PostgREST: ``select`` (columns and one level of embedding), the
+  ``eq/neq/gt/gte/lt/lte/in/is`` filters and ``or``/``and`` groups, ``order``,
+  ``limit``/``offset``,
+  insert, upsert, update and delete, ``Prefer: return=representation`` and
+  single-object responses; the ``admin_statistics`` and ``gift_code_stats``
+  views; the RPCs the app calls.
+* Edge functions, with the response shapes of the real ones. DeepSeek
+  returns a canned analysis and Stripe Checkout redirects straight to the
+  success page; the session is reported as paid. Analysis jobs
+  (``async: true``) are generated on the spot and polled with ``jobId``;
+  there is no Realtime endpoint, so the app falls back to polling.
+  ``stream: true`` answers with the whole event stream at once.
+
+Each account from ``--accounts`` / ``TC_ACCOUNTS_FILE`` (or the default
+account) is registered at start-up; the default account is the admin, as in
+the ``is_admin_email`` migration. Tables start empty apart from the
+``system_config`` / ``system_settings`` switches, which are on, and the
+``feature_flags`` rows the app reads them through; writes to the switches
+update ``feature_flags`` as the migration 47 triggers do.
+"""
+
+import argparse
+import asyncio
+import base64
+import datetime
+import hashlib
+import itertools
+import json
+import math
+import re
+import time
+import uuid
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import accounts
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 54321
+ANON_KEY = "standin-anon-key"
+ADMIN_EMAIL = accounts.DEFAULT_ACCOUNT.email
+TOKEN_TTL_SECONDS = 3600
+
+ID_NAMESPACE = uuid.UUID("5b0f5a4e-6d1c-4f57-9a59-2f0e7c1d3b11")
+GIFT_CODE_CHARS = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+# Column defaults applied on insert, standing in for the table DEFAULTs.
+TABLE_DEFAULTS = {
+    "users": {},
+    "profiles": {"role": "user"},
+    "system_config": {},
+    "system_settings": {},
+    "feature_flags": {},
+    "verification_codes": {},
+    "test_results": {},
+    "test_submissions": {},
+    "reports": {},
+    "orders": {"currency": "cny", "status": "pending", "stripe_session_id": None, "completed_at": None},
+    "deepseek_analyses": {},
+    "deepseek_jobs": {"status": "queued", "attempts": 0, "analysis_id": None, "error": None, "order_id": None},
+    "gift_codes": {
+        "max_redemptions": 1,
+        "current_redemptions": 0,
+        "free_analyses_count": 15,
+        "is_active": True,
+        "expires_at": None,
+        "created_by": None,
+    },
+    "gift_code_redemptions": {"remaining_analyses": 15},
+    "admin_logs": {},
+    "admin_emails": {},
+    "blocked_emails": {},
+}
+PRIMARY_KEYS = {"admin_emails": "email", "blocked_emails": "email", "feature_flags": "flag"}
+
+# Tables whose writes feed ``feature_flags`` (the migration 47 triggers).
+FLAG_SOURCE_TABLES = ("system_config", "system_settings")
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PATCH, PUT, DELETE, OPTIONS, HEAD",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Expose-Headers": "Content-Range, Content-Location, Content-Disposition",
+}
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+    403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed", 406: "Not Acceptable",
+    409: "Conflict", 500: "Internal Server Error",
+}
+
+# ``admin_export``: exportable tables and their CSV columns.
+EXPORT_TABLES = {
+    "test_submissions": ["id", "user_id", "test_type", "ip_address", "user_agent", "country", "city", "completed",
+                         "created_at"],
+    "profiles": ["id", "email", "role", "created_at", "updated_at"],
+    "admin_logs": ["id", "admin_id", "action", "target_type", "target_id", "details", "ip_address", "created_at"],
+}
+
+# ``get_score_norms`` metric names, in ``profile_vector`` order.
+SCORE_NORM_METRICS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism", "math", "risk")
+
+# ``generate_gift_codes``: batch size limit and CSV columns.
+GIFT_CODE_BATCH_MAX = 10000
+GIFT_CODE_CSV_COLUMNS = ["code", "free_analyses_count", "max_redemptions", "expires_at", "created_at"]
+
+CANNED_ANALYSIS = {
+    "zh": "## 投资心理深度分析\n\n这是离线测试环境生成的固定分析内容，用于端到端测试。\n\n"
+          "### 性格特征\n你的决策风格偏向理性与稳健。\n\n### 建议\n保持纪律，控制仓位。",
+    "en": "## In-depth Investment Psychology Analysis\n\nThis is fixed content from the offline test "
+          "backend, used for end-to-end tests.\n\n### Personality\nYour decisions lean rational "
+          "and steady.\n\n### Advice\nStay disciplined and size positions carefully.",
+}
+
+
+def now_iso():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def parse_payment_enabled(value):
+    """``payment_enabled`` setting value as the app reads it; unrecognised values mean on."""
+    if isinstance(value, bool):
+        return value
+    inner = value.get("value") if isinstance(value, dict) else None
+    if isinstance(inner, bool):
+        return inner
+    if isinstance(inner, str):
+        return inner == "true"
+    return True
+
+
+def make_token(user, ttl=TOKEN_TTL_SECONDS):
+    """Unsigned JWT with the claims supabase-js and the app look at."""
+    claims = {
+        "sub": user["id"],
+        "email": user["email"],
+        "role": "authenticated",
+        "aud": "authenticated",
+        "exp": int(time.time()) + ttl,
+    }
+    return f"{_b64({'alg': 'none', 'typ': 'JWT'})}.{_b64(claims)}.standin"
+
+
+def read_token(token):
+    """Claims of a stand-in token, or ``None`` if it is malformed or expired."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None
+    if claims.get("exp", 0) <= time.time():
+        return None
+    return claims
+
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.query = parse_qsl(parts.query, keep_blank_values=True)
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+    def param(self, name, default=None):
+        return next((value for key, value in self.query if key == name), default)
+
+    def bearer(self):
+        auth = self.headers.get("authorization", "")
+        return auth[7:] if auth.lower().startswith("bearer ") else ""
+
+
+class HttpError(Exception):
+    def __init__(self, status, payload):
+        super().__init__(payload)
+        self.status = status
+        self.payload = payload
+
+
+def pgrst_error(status, code, message, details=None):
+    return HttpError(status, {"code": code, "message": message, "details": details, "hint": None})
+
+
+class Store:
+    """All tables, auth users and refresh tokens of one stand-in process."""
+
+    def __init__(self):
+        self.tables = {name: [] for name in TABLE_DEFAULTS}
+        self.auth_users = {}
+        self.refresh_tokens = {}
+        self._ids = itertools.count(1)
+
+    def new_id(self):
+        return str(uuid.uuid5(ID_NAMESPACE, str(next(self._ids))))
+
+    def seed(self, seed_accounts):
+        self.insert("admin_emails", {"email": ADMIN_EMAIL})
+        self.insert("system_config", {"config_key": "deepseek_enabled", "config_value": "true"})
+        self.insert("system_settings", {"setting_key": "payment_enabled", "setting_value": {"value": True}})
+        for account in seed_accounts:
+            self.create_user(account.email, account.password)
+
+    # -- rows -------------------------------------------------------------
+
+    def insert(self, table, values):
+        row = {}
+        if PRIMARY_KEYS.get(table, "id") == "id":
+            row["id"] = self.new_id()
+        row.update(TABLE_DEFAULTS[table])
+        row["created_at"] = row["updated_at"] = now_iso()
+        if table == "gift_code_redemptions":
+            row["redeemed_at"] = row["created_at"]
+        row.update(values)
+        if table == "profiles":
+            self._profile_trigger(row)
+        self.tables[table].append(row)
+        if table in FLAG_SOURCE_TABLES:
+            self.sync_feature_flags()
+        return row
+
+    def upsert(self, table, values, conflict_key):
+        key = conflict_key or PRIMARY_KEYS.get(table, "id")
+        existing = self.find(table, **{key: values.get(key)}) if key in values else None
+        if existing is None:
+            return self.insert(table, values)
+        existing.update(values, updated_at=now_iso())
+        if table == "profiles":
+            self._profile_trigger(existing)
+        if table in FLAG_SOURCE_TABLES:
+            self.sync_feature_flags()
+        return existing
+
+    def sync_feature_flags(self):
+        """Rebuild ``feature_flags`` from the switches, as the migration 47 triggers keep it."""
+        flags = {}
+        config = self.find("system_config", config_key="deepseek_enabled")
+        if config is not None:
+            flags["deepseek_enabled"] = config.get("config_value") == "true"
+        setting = self.find("system_settings", setting_key="payment_enabled")
+        if setting is not None:
+            flags["payment_enabled"] = parse_payment_enabled(setting.get("setting_value"))
+        rows = self.tables["feature_flags"]
+        rows[:] = [r for r in rows if r["flag"] in flags]
+        for flag, enabled in flags.items():
+            row = self.find("feature_flags", flag=flag)
+            if row is None:
+                self.insert("feature_flags", {"flag": flag, "enabled": enabled})
+            elif row["enabled"] != enabled:
+                row.update(enabled=enabled, updated_at=now_iso())
+
+    def find(self, table, **match):
+        return next((r for r in self.tables[table] if all(r.get(k) == v for k, v in match.items())), None)
+
+    def _profile_trigger(self, row):
+        # handle_new_user / auto_assign_admin_role: admin emails always get the admin role.
+        if row.get("email") and self.is_admin_email(row["email"]):
+            row["role"] = "admin"
+
+    def is_admin_email(self, email):
+        email = email.lower()
+        return email == ADMIN_EMAIL or self.find("admin_emails", email=email) is not None
+
+    def is_admin(self, user_id):
+        user = self.user_by_id(user_id)
+        if user is None:
+            return False
+        profile = self.find("profiles", id=user_id)
+        return self.is_admin_email(user["email"]) or (profile is not None and profile.get("role") == "admin")
+
+    # -- auth -------------------------------------------------------------
+
+    def create_user(self, email, password):
+        email = email.lower()
+        if email in self.auth_users:
+            return self.auth_users[email]["user"]
+        created = now_iso()
+        user = {
+            "id": self.new_id(),
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": email,
+            "email_confirmed_at": created,
+            "confirmed_at": created,
+            "last_sign_in_at": None,
+            "app_metadata": {"provider": "email", "providers": ["email"]},
+            "user_metadata": {},
+            "identities": [],
+            "created_at": created,
+            "updated_at": created,
+        }
+        self.auth_users[email] = {"user": user, "password": password}
+        return user
+
+    def user_by_id(self, user_id):
+        return next((a["user"] for a in self.auth_users.values() if a["user"]["id"] == user_id), None)
+
+    def user_for_token(self, token):
+        claims = read_token(token) if token else None
+        return self.user_by_id(claims["sub"]) if claims else None
+
+    def session_for(self, user):
+        user["last_sign_in_at"] = now_iso()
+        refresh_token = hashlib.sha1(f"{user['id']}:{next(self._ids)}".encode()).hexdigest()
+        self.refresh_tokens[refresh_token] = user["id"]
+        return {
+            "access_token": make_token(user),
+            "token_type": "bearer",
+            "expires_in": TOKEN_TTL_SECONDS,
+            "expires_at": int(time.time()) + TOKEN_TTL_SECONDS,
+            "refresh_token": refresh_token,
+            "user": user,
+        }
+
+    def check_password(self, email, password):
+        entry = self.auth_users.get((email or "").lower())
+        if entry is None or entry["password"] != password:
+            return None
+        return entry["user"]
+
+    # -- views ------------------------------------------------------------
+
+    def view(self, name):
+        if name == "admin_statistics":
+            return [self._admin_statistics()]
+        if name == "gift_code_stats":
+            return [self._gift_code_stats(code) for code in self.tables["gift_codes"]]
+        raise pgrst_error(404, "PGRST205", f"Could not find the table 'public.{name}' in the schema cache")
+
+    def _admin_statistics(self):
+        day_ago = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=24)).isoformat()
+        submissions = self.tables["test_submissions"]
+        completed = [o for o in self.tables["orders"] if o["status"] == "completed"]
+        return {
+            "total_tests": len(submissions),
+            "unique_users": len({s.get("user_id") for s in submissions if s.get("user_id")}),
+            "total_payments": len(completed),
+            "total_revenue": sum(o.get("total_amount") or 0 for o in completed),
+            "tests_today": sum(s["created_at"] > day_ago for s in submissions),
+            "payments_today": sum((o.get("completed_at") or "") > day_ago for o in completed),
+            "first_time_purchases": sum(o.get("total_amount") == 399 for o in completed),
+            "second_time_purchases": sum(o.get("total_amount") == 299 for o in completed),
+            "repeat_purchases": sum(o.get("total_amount") == 99 for o in completed),
+            "refreshed_at": max([s["created_at"] for s in submissions]
+                                + [o.get("completed_at") or o["created_at"] for o in completed], default=None),
+        }
+
+    def _gift_code_stats(self, code):
+        redemptions = [r for r in self.tables["gift_code_redemptions"] if r["gift_code_id"] == code["id"]]
+        creator = self.find("profiles", id=code.get("created_by")) if code.get("created_by") else None
+        keys = ("id", "code", "max_redemptions", "current_redemptions", "free_analyses_count",
+                "is_active", "expires_at", "created_at")
+        return {
+            **{k: code.get(k) for k in keys},
+            "created_by_email": creator["email"] if creator else None,
+            "total_redemptions": len(redemptions),
+            "total_remaining_analyses": sum(r["remaining_analyses"] for r in redemptions),
+        }
+
+
+# -- PostgREST ----------------------------------------------------------------
+
+FILTER_OPS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns", "or"}
+
+
+def _coerce(text, sample):
+    """Turn a filter value from the query string into the type stored in the row."""
+    if isinstance(sample, bool):
+        return text == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return type(sample)(text)
+        except ValueError:
+            return text
+    return text
+
+
+def _matches(row, column, expression):
+    op, _, text = expression.partition(".")
+    negate = op == "not"
+    if negate:
+        op, _, text = text.partition(".")
+    value = row.get(column)
+    if op == "is":
+        result = value is {"null": None, "true": True, "false": False}[text]
+    elif op == "in":
+        result = value in [_coerce(v.strip('"'), value) for v in text.strip("()").split(",")]
+    elif op in FILTER_OPS:
+        result = FILTER_OPS[op](value, _coerce(text, value))
+    else:
+        raise pgrst_error(400, "PGRST100", f'"failed to parse filter ({expression})"')
+    return result != negate
+
+
+def _split_top_level(text):
+    """Split ``a.eq.1,and(b.eq."x,y",c.lt.2)`` on commas outside parentheses and quotes."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+            continue
+        quoted ^= char == '"'
+        if not quoted:
+            depth += char == "("
+            depth -= char == ")"
+        current += char
+    return [p for p in parts + [current] if p]
+
+
+def _matches_group(row, op, group):
+    """``or=(...)`` / ``and(...)`` logical filters, as used by the admin lists' keyset cursor."""
+    results = []
+    for term in _split_top_level(group[1:-1]):
+        if term.startswith(("or(", "and(")):
+            inner, _, rest = term.partition("(")
+            results.append(_matches_group(row, inner, "(" + rest))
+        else:
+            column, _, expression = term.partition(".")
+            kind, _, value = expression.partition(".")
+            results.append(_matches(row, column, f"{kind}.{value.strip(chr(34))}"))
+    return any(results) if op == "or" else all(results)
+
+
+def _split_select(select):
+    """Split ``a,b,table(c,d)`` on top-level commas."""
+    parts, depth, current = [], 0, ""
+    for char in select.replace(" ", "").replace("\n", ""):
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    return [p for p in parts + [current] if p]
+
+
+def project(store, table, row, select):
+    if not select or select == "*":
+        return dict(row)
+    out = {}
+    for part in _split_select(select):
+        if part == "*":
+            out.update(row)
+        elif "(" in part:
+            # One level of embedding through ``<singular>_id``, e.g. gift_codes(code) via gift_code_id.
+            embedded, columns = part[:-1].split("(", 1)
+            foreign = store.find(embedded, id=row.get(f"{embedded.rstrip('s')}_id"))
+            out[embedded] = project(store, embedded, foreign, columns) if foreign else None
+        else:
+            alias, _, column = part.rpartition(":")
+            column = column.split("::")[0]
+            out[alias or column] = row.get(column)
+    return out
+
+
+def select_rows(store, table, request):
+    rows = store.view(table) if table not in store.tables else store.tables[table]
+    filters = [(k, v) for k, v in request.query if k not in RESERVED_PARAMS]
+    rows = [r for r in rows if all(_matches(r, column, expr) for column, expr in filters)]
+    if request.param("or"):
+        rows = [r for r in rows if _matches_group(r, "or", request.param("or"))]
+    order = request.param("order")
+    if order:
+        for term in reversed(order.split(",")):
+            column, *modifiers = term.split(".")
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse="desc" in modifiers)
+            rows = present + missing if "nullsfirst" not in modifiers else missing + present
+    offset = int(request.param("offset", 0))
+    limit = request.param("limit")
+    return rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+
+
+def postgrest(store, request, table):
+    if table not in store.tables and table not in ("admin_statistics", "gift_code_stats"):
+        raise pgrst_error(404, "PGRST205", f"Could not find the table 'public.{table}' in the schema cache")
+    prefer = request.headers.get("prefer", "")
+    select = request.param("select")
+
+    if request.method in ("GET", "HEAD"):
+        rows = select_rows(store, table, request)
+        status = 200
+    elif request.method == "POST":
+        body = request.json()
+        values = body if isinstance(body, list) else [body]
+        if "resolution=merge-duplicates" in prefer:
+            rows = [store.upsert(table, v, request.param("on_conflict")) for v in values]
+        else:
+            rows = [store.insert(table, v) for v in values]
+        status = 201
+    elif request.method == "PATCH":
+        changes = request.json()
+        rows = select_rows(store, table, request)
+        for row in rows:
+            row.update(changes, updated_at=now_iso())
+        status = 200
+    elif request.method == "DELETE":
+        rows = select_rows(store, table, request)
+        store.tables[table][:] = [r for r in store.tables[table] if all(r is not d for d in rows)]
+        status = 200
+    else:
+        raise pgrst_error(405, "PGRST117", f"Unsupported HTTP method: {request.method}")
+    if request.method in ("PATCH", "DELETE") and table in FLAG_SOURCE_TABLES:
+        store.sync_feature_flags()
+
+    headers = {"Content-Range": f"0-{max(len(rows) - 1, 0)}/{len(rows) if 'count=' in prefer else '*'}"}
+    if request.method != "GET" and "return=representation" not in prefer:
+        return (204 if status == 200 else status), None, headers
+    payload = [project(store, table, r, select) for r in rows]
+    if "application/vnd.pgrst.object+json" in request.headers.get("accept", ""):
+        if len(payload) != 1:
+            raise pgrst_error(
+                406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                f"The result contains {len(payload)} rows",
+            )
+        payload = payload[0]
+    return status, payload, headers
+
+
+# -- RPC ----------------------------------------------------------------------
+
+
+def _require_admin(store, user_id):
+    if not store.is_admin(user_id):
+        raise pgrst_error(400, "P0001", "Unauthorized")
+
+
+def _completed_analysis_orders(store, user_id):
+    return [
+        o for o in store.tables["orders"]
+        if o.get("user_id") == user_id and o["status"] == "completed"
+        and any(item.get("type") == "deepseek_analysis" for item in o.get("items") or [])
+    ]
+
+
+def _profile_vector(result):
+    """``test_results.profile_vector`` (migration 40), or None when a score is missing."""
+    personality = result.get("personality_scores") or {}
+    values = [personality.get(k) for k in ("openness", "conscientiousness", "extraversion", "agreeableness",
+                                            "neuroticism")]
+    values.append((result.get("math_finance_scores") or {}).get("percentage"))
+    values.append((result.get("risk_preference_scores") or {}).get("risk_tolerance"))
+    if any(v is None for v in values):
+        return None
+    values[5] = values[5] / 10
+    return [float(v) for v in values]
+
+
+def _score_norms(store):
+    """``get_score_norms``: the histograms are counted from ``test_results`` on each call."""
+    buckets = {}
+    for result in store.tables["test_results"]:
+        vector = _profile_vector(result)
+        if vector is None:
+            continue
+        vector[5] = float(result["math_finance_scores"]["percentage"])  # the raw percentage, not /10
+        # round() of a non-negative numeric in Postgres rounds halves up
+        for metric, value in zip(SCORE_NORM_METRICS, vector):
+            counts = buckets.setdefault(metric, {})
+            bucket = math.floor(value + 0.5)
+            counts[bucket] = counts.get(bucket, 0) + 1
+    metrics = {}
+    for metric, counts in sorted(buckets.items()):
+        lo, hi = min(counts), max(counts)
+        metrics[metric] = {"min": lo, "counts": [counts.get(b, 0) for b in range(lo, hi + 1)]}
+    total = max((sum(m["counts"]) for m in metrics.values()), default=0)
+    return {"total": total, "generated_at": now_iso(), "metrics": metrics}
+
+
+def _new_gift_code(store):
+    while True:
+        digest = hashlib.sha1(str(next(store._ids)).encode()).digest()
+        code = "".join(GIFT_CODE_CHARS[b % len(GIFT_CODE_CHARS)] for b in digest[:8])
+        if store.find("gift_codes", code=code) is None:
+            return code
+
+
+def rpc(store, request, name):
+    args = request.json()
+    caller = store.user_for_token(request.bearer())
+    caller_id = caller["id"] if caller else None
+
+    if name == "generate_gift_code":
+        return _new_gift_code(store)
+    if name == "redeem_gift_code":
+        code = store.find("gift_codes", code=args["p_code"].upper(), is_active=True)
+        if code is None or (code["expires_at"] and code["expires_at"] <= now_iso()):
+            return {"success": False, "message": "礼品码无效或已过期"}
+        existing = store.find("gift_code_redemptions", gift_code_id=code["id"], user_id=args["p_user_id"])
+        if existing:
+            return {"success": False, "message": "您已经使用过此礼品码",
+                    "remaining_analyses": existing["remaining_analyses"]}
+        if code["current_redemptions"] >= code["max_redemptions"]:
+            return {"success": False, "message": "此礼品码已达到最大使用次数"}
+        store.insert("gift_code_redemptions", {
+            "gift_code_id": code["id"], "user_id": args["p_user_id"],
+            "remaining_analyses": code["free_analyses_count"],
+        })
+        code["current_redemptions"] += 1
+        code["updated_at"] = now_iso()
+        return {"success": True, "message": "礼品码兑换成功！", "free_analyses": code["free_analyses_count"]}
+    if name == "get_user_free_analyses":
+        return sum(
+            r["remaining_analyses"] for r in store.tables["gift_code_redemptions"]
+            if r["user_id"] == args["p_user_id"] and r["remaining_analyses"] > 0
+        )
+    if name == "consume_free_analysis":
+        open_redemptions = sorted(
+            (r for r in store.tables["gift_code_redemptions"]
+             if r["user_id"] == args["p_user_id"] and r["remaining_analyses"] > 0),
+            key=lambda r: r["redeemed_at"],
+        )
+        if not open_redemptions:
+            return False
+        open_redemptions[0]["remaining_analyses"] -= 1
+        return True
+    if name == "get_user_analysis_price":
+        completed = len(_completed_analysis_orders(store, args["p_user_id"]))
+        return 399 if completed == 0 else 299 if completed == 1 else 99
+    if name == "toggle_payment_system":
+        actor = args.get("user_id") or caller_id
+        _require_admin(store, actor)
+        store.upsert("system_settings", {
+            "setting_key": "payment_enabled", "setting_value": {"value": args["enabled"]}, "updated_by": actor,
+        }, "setting_key")
+        store.insert("admin_logs", {"admin_id": actor, "action": "toggle_payment_system",
+                                    "target_type": "system_settings", "details": {"enabled": args["enabled"]}})
+        return {"success": True, "enabled": args["enabled"]}
+    if name == "log_admin_action":
+        store.insert("admin_logs", {
+            "admin_id": args.get("p_admin_id") or caller_id, "action": args["p_action"],
+            "target_type": args.get("p_target_type"), "target_id": args.get("p_target_id"),
+            "details": args.get("p_details"),
+        })
+        return None
+    if name == "set_user_role":
+        _require_admin(store, args.get("p_actor_id") or caller_id)
+        profile = store.find("profiles", id=args["p_target_id"])
+        if profile is None:
+            raise pgrst_error(400, "P0001", "User not found")
+        profile["role"] = args["p_role"]
+        return {"success": True}
+    if name in ("add_admin_email", "remove_admin_email", "add_blocked_email", "remove_blocked_email"):
+        _require_admin(store, args.get("p_actor_id") or caller_id)
+        table = "admin_emails" if "admin" in name else "blocked_emails"
+        email = args["p_email"].lower()
+        if name.startswith("add_"):
+            store.upsert(table, {"email": email}, "email")
+        else:
+            store.tables[table][:] = [r for r in store.tables[table] if r["email"] != email]
+        return {"success": True}
+    if name in ("list_admin_emails", "list_blocked_emails"):
+        table = "admin_emails" if "admin" in name else "blocked_emails"
+        return sorted(r["email"] for r in store.tables[table])
+    if name == "get_tests_by_ip":
+        counts = {}
+        for s in store.tables["test_submissions"]:
+            if s.get("ip_address"):
+                entry = counts.setdefault(s["ip_address"], {"ip_address": s["ip_address"], "count": 0,
+                                                            "country": s.get("country"), "city": s.get("city")})
+                entry["count"] += 1
+        return sorted(counts.values(), key=lambda e: e["count"], reverse=True)[:100]
+    if name == "get_tests_by_country":
+        if not store.is_admin(caller_id):
+            return []
+        counts = {}
+        for s in store.tables["test_submissions"]:
+            entry = counts.setdefault(s.get("country"), {"country": s.get("country"), "count": 0,
+                                                         "updated_at": s["created_at"]})
+            entry["count"] += 1
+            entry["updated_at"] = max(entry["updated_at"], s["created_at"])
+        return sorted(counts.values(), key=lambda e: e["count"], reverse=True)
+    if name == "get_similar_investors":
+        # Exact nearest neighbours by a full scan instead of the HNSW index.
+        own = store.find("test_results", id=args["p_test_result_id"])
+        if own is None or (own.get("user_id") != caller_id and not store.is_admin(caller_id)):
+            return []
+        vector = _profile_vector(own)
+        if vector is None:
+            return []
+        neighbours = sorted(
+            (math.dist(v, vector), r["investment_style"]) for r in store.tables["test_results"]
+            if r.get("investment_style") and r.get("user_id") != own.get("user_id")
+            and (v := _profile_vector(r)) is not None
+        )[:min(max(args.get("p_k", 50), 1), 100)]
+        styles = {}
+        for distance, style in neighbours:
+            styles.setdefault(style, []).append(distance)
+        return [
+            {"investment_style": style, "investors": len(d), "share": round(len(d) / len(neighbours), 4),
+             "avg_distance": sum(d) / len(d)}
+            for style, d in sorted(styles.items(), key=lambda item: (-len(item[1]), item[0]))
+        ]
+    if name == "get_score_norms":
+        return _score_norms(store)
+    raise pgrst_error(404, "PGRST202", f"Could not find the function public.{name} in the schema cache")
+
+
+# -- Auth ---------------------------------------------------------------------
+
+
+def auth_error(status, code, message):
+    return HttpError(status, {"code": status, "error_code": code, "msg": message,
+                              "error": code, "error_description": message})
+
+
+def auth(store, request, endpoint):
+    if endpoint == "signup" and request.method == "POST":
+        body = request.json()
+        if not body.get("email") or len(body.get("password") or "") < 6:
+            raise auth_error(422, "weak_password", "Password should be at least 6 characters.")
+        if body["email"].lower() in store.auth_users:
+            raise auth_error(422, "user_already_exists", "User already registered")
+        return 200, store.session_for(store.create_user(body["email"], body["password"])), {}
+    if endpoint == "token" and request.method == "POST":
+        body = request.json()
+        if request.param("grant_type") == "refresh_token":
+            user = store.user_by_id(store.refresh_tokens.pop(body.get("refresh_token"), None))
+            if user is None:
+                raise auth_error(400, "refresh_token_not_found", "Invalid Refresh Token: Refresh Token Not Found")
+            return 200, store.session_for(user), {}
+        user = store.check_password(body.get("email"), body.get("password"))
+        if user is None:
+            raise auth_error(400, "invalid_credentials", "Invalid login credentials")
+        return 200, store.session_for(user), {}
+    if endpoint == "user" and request.method == "GET":
+        user = store.user_for_token(request.bearer())
+        if user is None:
+            raise auth_error(403, "bad_jwt", "invalid JWT: unable to parse or verify signature")
+        return 200, user, {}
+    if endpoint == "logout":
+        return 204, None, {}
+    raise auth_error(404, "not_found", f"Unsupported auth endpoint: {endpoint}")
+
+
+# -- Edge functions -------------------------------------------------------------
+
+
+def ok(data):
+    return 200, {"code": "SUCCESS", "message": "成功", "data": data}, {}
+
+
+def fail(message, status=400):
+    return status, {"code": "FAIL", "message": message}, {}
+
+
+def function_error(status, message):
+    return status, {"error": message}, {}
+
+
+def _role(store, user):
+    profile = store.find("profiles", id=user["id"])
+    return "admin" if store.is_admin(user["id"]) else (profile or {}).get("role", "user")
+
+
+def _save_analysis(store, user, body, order_id):
+    language = body.get("language") or "zh"
+    return store.insert("deepseek_analyses", {
+        "user_id": user["id"],
+        "test_result_id": body["testResultId"],
+        "order_id": order_id,
+        "analysis_content": CANNED_ANALYSIS.get(language, CANNED_ANALYSIS["zh"]),
+        "prompt_used": "standin",
+        "test_data_summary": {k: (body.get("testData") or {}).get(k) for k in (
+            "personality_scores", "math_finance_scores", "risk_preference_scores",
+            "trading_characteristics", "investment_style", "euclidean_distance")},
+    })
+
+
+def _sse(analysis, **extra):
+    """The ``delta``/``done`` event stream of a streamed analysis, one paragraph per delta."""
+    events = [("delta", {"content": part}) for part in re.split(r"(?<=\n\n)", analysis["analysis_content"]) if part]
+    events.append(("done", {"analysis": analysis, **extra}))
+    body = "".join(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n" for event, data in events)
+    return 200, body.encode(), {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+
+
+def _job(store, user, body, kind, analysis):
+    """A finished ``deepseek_jobs`` row: the stand-in generates immediately instead of queueing."""
+    job = store.insert("deepseek_jobs", {
+        "user_id": user["id"], "kind": kind, "test_result_id": body["testResultId"],
+        "order_id": body.get("orderId") or analysis["order_id"], "language": body.get("language") or "zh",
+        "test_data": body.get("testData"), "enqueued_at": now_iso(), "started_at": now_iso(),
+    })
+    job.update(status="succeeded", attempts=1, analysis_id=analysis["id"], finished_at=now_iso())
+    return ok({"job": job})
+
+
+def _job_status(store, user, job_id):
+    job = store.find("deepseek_jobs", id=job_id, user_id=user["id"])
+    if job is None:
+        return fail("任务不存在", 404)
+    return ok({"job": job, "position": None, "analysis": store.find("deepseek_analyses", id=job["analysis_id"])})
+
+
+def _csv_field(value):
+    if value is None:
+        return ""
+    text = json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else (
+        str(value).lower() if isinstance(value, bool) else str(value))
+    return '"' + text.replace('"', '""') + '"' if re.search(r'[",\r\n]', text) else text
+
+
+def _export(store, user, body):
+    """``admin_export``: the whole table, newest first, in one response instead of a stream."""
+    table, fmt = body.get("table"), body.get("format") or "csv"
+    if table not in EXPORT_TABLES:
+        return fail(f"不支持导出的表: {table}", 400)
+    if fmt not in ("csv", "ndjson"):
+        return fail(f"不支持的格式: {fmt}", 400)
+    if user is None:
+        return fail("未授权: 缺少认证token", 401)
+    if not store.is_admin(user["id"]):
+        return fail("权限不足: 仅管理员可导出", 403)
+    columns = EXPORT_TABLES[table]
+    rows = sorted(store.tables[table], key=lambda r: (r["created_at"], r.get("id") or ""), reverse=True)
+    if fmt == "ndjson":
+        text = "".join(json.dumps({c: r.get(c) for c in columns}, ensure_ascii=False) + "\n" for r in rows)
+    else:
+        text = "\ufeff" + ",".join(columns) + "\r\n" + "".join(
+            ",".join(_csv_field(r.get(c)) for c in columns) + "\r\n" for r in rows)
+    filename = f"{table}-{now_iso()[:10]}.{fmt}"
+    return 200, text.encode(), {
+        "Content-Type": "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-cache",
+    }
+
+
+def _positive_int(value, fallback):
+    if value is None or value == "":
+        return fallback
+    try:
+        n = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(value) from None
+    if not n.is_integer() or n <= 0:
+        raise ValueError(value)
+    return int(n)
+
+
+def _gift_codes(store, user, body):
+    """``generate_gift_codes``: insert the batch and return it as one CSV (``generate_gift_codes_bulk``)."""
+    try:
+        count = _positive_int(body.get("count"), None)
+    except ValueError:
+        count = None
+    if not count or count > GIFT_CODE_BATCH_MAX:
+        return fail(f"生成数量需在 1-{GIFT_CODE_BATCH_MAX} 之间", 400)
+    try:
+        max_redemptions = _positive_int(body.get("max_redemptions"), 1)
+        expires_in_days = _positive_int(body.get("expires_in_days"), None)
+        free_analyses_count = _positive_int(body.get("free_analyses_count"), 15)
+    except ValueError:
+        return fail("参数需为正整数", 400)
+    if user is None:
+        return fail("未授权: 缺少认证token", 401)
+    if not store.is_admin(user["id"]):
+        return fail("权限不足: 仅管理员可生成礼品码", 403)
+    expires_at = None
+    if expires_in_days is not None:
+        expires_at = (datetime.datetime.now(datetime.timezone.utc)
+                      + datetime.timedelta(days=expires_in_days)).isoformat()
+    codes = [store.insert("gift_codes", {
+        "code": _new_gift_code(store), "max_redemptions": max_redemptions,
+        "free_analyses_count": free_analyses_count, "created_by": user["id"], "expires_at": expires_at,
+    }) for _ in range(count)]
+    store.insert("admin_logs", {"admin_id": user["id"], "action": "generate_gift_codes", "target_type": "gift_codes",
+                                "details": {"count": count, "max_redemptions": max_redemptions,
+                                            "expires_in_days": expires_in_days,
+                                            "free_analyses_count": free_analyses_count}})
+    text = "\ufeff" + ",".join(GIFT_CODE_CSV_COLUMNS) + "\r\n" + "".join(
+        ",".join(_csv_field(code.get(c)) for c in GIFT_CODE_CSV_COLUMNS) + "\r\n" for code in codes)
+    filename = f"gift-codes-{now_iso()[:10]}-{count}.csv"
+    return 200, text.encode(), {
+        "Content-Type": "text/csv; charset=utf-8",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-cache",
+    }
+
+
+def edge_function(store, request, name):
+    body = request.json() if request.method == "POST" else {}
+    user = store.user_for_token(request.bearer())
+
+    if name == "upsert-user":
+        if not body.get("email"):
+            return function_error(400, "缺少邮箱参数")
+        return 200, {"data": store.upsert("users", {"email": body["email"].lower()}, "email")}, {}
+    if name == "register-password":
+        if not body.get("email") or not body.get("password"):
+            return function_error(400, "Invalid email or password")
+        store.create_user(body["email"], body["password"])
+        return 200, {"success": True}, {}
+    if name == "login-password":
+        email = (body.get("email") or "").lower()
+        if not email or not body.get("password"):
+            return function_error(400, "Invalid email or password")
+        if store.find("blocked_emails", email=email):
+            return function_error(403, "Account blocked")
+        if email not in store.auth_users:
+            return function_error(404, "User not found")
+        found = store.check_password(email, body["password"])
+        if found is None:
+            return function_error(401, "Invalid credentials")
+        return 200, {"success": True, "token": make_token(found), "user": {
+            "id": found["id"], "email": email, "role": _role(store, found), "created_at": found["created_at"],
+        }}, {}
+    if name == "verify-token":
+        token = request.bearer() or body.get("token")
+        if not token:
+            return function_error(401, "No authentication token provided")
+        found = store.user_for_token(token)
+        if found is None:
+            return function_error(401, "Invalid or expired token")
+        return 200, {"valid": True, "user": {
+            "id": found["id"], "email": found["email"], "role": _role(store, found),
+            "created_at": found["created_at"],
+        }}, {}
+    if name == "generate_deepseek_analysis":
+        if user is None:
+            return fail("未授权", 500)
+        if body.get("jobId"):
+            return _job_status(store, user, body["jobId"])
+        order = store.find("orders", id=body.get("orderId"), status="completed")
+        if order is None:
+            return fail("订单不存在或未支付", 500)
+        existing = store.find("deepseek_analyses", test_result_id=body.get("testResultId"), order_id=order["id"])
+        if existing:
+            return _sse(existing, cached=True) if body.get("stream") is True else ok({"analysis": existing, "cached": True})
+        analysis = _save_analysis(store, user, body, order["id"])
+        if body.get("async") is True:
+            return _job(store, user, body, "paid", analysis)
+        if body.get("stream") is True:
+            return _sse(analysis, cached=False, cache_hit=False)
+        return ok({"analysis": analysis, "cached": False})
+    if name == "generate_deepseek_analysis_free":
+        if not body.get("jobId") and (not body.get("testResultId") or not body.get("testData")):
+            return fail("缺少必要参数: testResultId 或 testData", 400)
+        if user is None:
+            return fail("未授权: 缺少认证token", 401)
+        if body.get("jobId"):
+            return _job_status(store, user, body["jobId"])
+        if not rpc_call(store, "consume_free_analysis", {"p_user_id": user["id"]}):
+            return fail("无可用免费次数", 400)
+        order = store.insert("orders", {
+            "user_id": user["id"], "items": [{"name": "DeepSeek Free Analysis", "price": 0, "quantity": 1}],
+            "total_amount": 0, "status": "completed", "test_result_id": body["testResultId"],
+        })
+        analysis = _save_analysis(store, user, body, order["id"])
+        if body.get("async") is True:
+            return _job(store, user, body, "free", analysis)
+        if body.get("stream") is True:
+            return _sse(analysis, cache_hit=False)
+        return ok({"analysis": analysis, "cache_hit": False})
+    if name == "create_stripe_checkout":
+        if not body.get("items"):
+            return fail("购物车不能为空", 500)
+        if not body.get("test_result_id"):
+            return fail("测试结果ID不能为空", 500)
+        items = [{"name": i["name"].strip(), "price": round(i["price"] * 100), "quantity": i["quantity"],
+                  "image_url": (i.get("image_url") or "").strip()} for i in body["items"]]
+        order = store.insert("orders", {
+            "user_id": user["id"] if user else None, "items": items,
+            "total_amount": sum(i["price"] * i["quantity"] for i in items),
+            "currency": (body.get("currency") or "cny").lower(), "test_result_id": body["test_result_id"],
+        })
+        session_id = f"cs_standin_{order['id'].replace('-', '')}"
+        order["stripe_session_id"] = session_id
+        # No hosted checkout page: send the browser straight to the success URL Stripe would use.
+        origin = request.headers.get("origin", "")
+        url = f"{origin}/payment-success?session_id={session_id}"
+        return ok({"url": url, "sessionId": session_id, "orderId": order["id"]})
+    if name == "verify_stripe_payment":
+        session_id = body.get("sessionId")
+        if not session_id:
+            return fail("缺少session_id参数", 500)
+        order = store.find("orders", stripe_session_id=session_id)
+        if order is None:
+            return fail(f"No such checkout.session: {session_id}", 500)
+        if order["status"] == "pending":
+            order.update(status="completed", completed_at=now_iso(), customer_email=user["email"] if user else None)
+        return ok({
+            "verified": True, "status": "paid", "sessionId": session_id,
+            "paymentIntentId": f"pi_standin_{order['id'][:8]}", "amount": order["total_amount"],
+            "currency": order["currency"], "customerEmail": order.get("customer_email"),
+            "customerName": None, "orderUpdated": order["status"] == "completed",
+            "orderId": order["id"], "testResultId": order.get("test_result_id"),
+        })
+    if name == "admin_export":
+        return _export(store, user, body)
+    if name == "generate_gift_codes":
+        return _gift_codes(store, user, body)
+    return function_error(404, f"Function not found: {name}")
+
+
+def rpc_call(store, name, args):
+    """Call an RPC from inside the stand-in, as the edge functions do with the service key."""
+    request = Request("POST", f"/rest/v1/rpc/{name}", {}, json.dumps(args).encode())
+    return rpc(store, request, name)
+
+
+# -- HTTP ---------------------------------------------------------------------
+
+
+def dispatch(store, request):
+    if request.method == "OPTIONS":
+        return 204, None, {}
+    parts = request.path.strip("/").split("/")
+    if parts[:2] == ["auth", "v1"] and len(parts) == 3:
+        return auth(store, request, parts[2])
+    if parts[:3] == ["rest", "v1", "rpc"] and len(parts) == 4:
+        return 200, rpc(store, request, parts[3]), {}
+    if parts[:2] == ["rest", "v1"] and len(parts) == 3:
+        return postgrest(store, request, parts[2])
+    if parts[:2] == ["functions", "v1"] and len(parts) == 3:
+        return edge_function(store, request, parts[2])
+    return 404, {"message": f"no route for {request.method} {request.path}"}, {}
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length") or 0))
+    return Request(method, target, headers, body)
+
+
+def encode_response(status, payload, headers):
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = b"" if payload is None and status == 204 else json.dumps(payload, ensure_ascii=False).encode()
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}"]
+    all_headers = {**CORS_HEADERS, "Content-Type": "application/json; charset=utf-8",
+                   "Content-Length": str(len(body)), **headers}
+    lines += [f"{key}: {value}" for key, value in all_headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def serve_connection(store, latency, reader, writer):
+    try:
+        while True:
+            request = await read_request(reader)
+            if request is None:
+                break
+            if latency:
+                await asyncio.sleep(latency)
+            try:
+                status, payload, headers = dispatch(store, request)
+            except HttpError as error:
+                status, payload, headers = error.status, error.payload, {}
+            except (KeyError, TypeError, ValueError) as error:
+                status, payload, headers = 400, {"message": f"bad request: {error!r}"}, {}
+            writer.write(encode_response(status, payload, headers))
+            await writer.drain()
+            if request.headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start(host=DEFAULT_HOST, port=DEFAULT_PORT, seed_accounts=None, latency_ms=0):
+    """Start a seeded stand-in on the running loop; returns ``(server, store)``."""
+    store = Store()
+    store.seed(seed_accounts if seed_accounts is not None else accounts.load())
+    server = await asyncio.start_server(
+        lambda r, w: serve_connection(store, latency_ms / 1000, r, w), host, port
+    )
+    return server, store
+
+
+async def serve(host, port, seed_accounts, latency_ms):
+    server, store = await start(host, port, seed_accounts, latency_ms)
+    print(f"stand-in Supabase on http://{host}:{port} (anon key {ANON_KEY}), "
+          f"{len(store.auth_users)} account(s) seeded")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--accounts", help="JSON list of accounts to register (default: TC_ACCOUNTS_FILE)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every response")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, accounts.load(args.accounts), args.latency_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
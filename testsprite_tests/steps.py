@@ -0,0 +1,99 @@
+"""Per-step timing for the TC scripts.
+
+Every click/fill in a case is wrapped in :func:`step`::
+
+    async with steps.step(page, elem, "Click the login button"):
+        await elem.click(timeout=5000)
+
+Three durations are recorded for each step:
+
+* ``locate_ms`` -- until the locator resolves to an element in the DOM
+  (``event`` mode only; ``fixed`` mode adds no wait of its own, so locating
+  happens inside the action and this is 0);
+* ``actionable_ms`` -- the wait strategy from :mod:`waits` (visible, network
+  idle, or the fixed sleep in ``fixed`` mode);
+* ``action_ms`` -- the body of the ``with`` block, i.e. the click or fill.
+
+The page URL and the slowest request that finished during the action are
+stored with the step, which is usually enough to tell whether a slow step is
+the page itself or an edge-function call behind it. Steps are only collected
+while a :class:`StepLog` is active for the case (``run_suite.py`` starts one
+per case); see :mod:`trends` for storage and reports.
+"""
+
+import contextlib
+import contextvars
+import time
+from urllib.parse import urlparse
+
+import waits
+
+_log = contextvars.ContextVar("tc_step_log", default=None)
+
+
+class StepLog:
+    """The steps recorded for one case, in order."""
+
+    def __init__(self):
+        self.steps = []
+
+
+def track():
+    """Start a fresh step log for the current task and return it."""
+    log = StepLog()
+    _log.set(log)
+    return log
+
+
+def _ms(started):
+    return (time.perf_counter() - started) * 1000
+
+
+def _request_ms(request):
+    timing = request.timing
+    if timing.get("responseEnd", -1) < 0:
+        return None
+    return timing["responseEnd"]
+
+
+@contextlib.asynccontextmanager
+async def step(page, elem, name):
+    """Wait for ``elem`` to be usable, run the body as the action and record the timings."""
+    log = _log.get()
+    locate_ms = 0.0
+    if waits.get_mode() == waits.EVENT:
+        started = time.perf_counter()
+        await elem.wait_for(state="attached")
+        locate_ms = _ms(started)
+
+    started = time.perf_counter()
+    await waits.before_action(page, elem)
+    actionable_ms = _ms(started)
+
+    finished = []
+    on_finished = finished.append
+    page.on("requestfinished", on_finished)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        action_ms = _ms(started)
+        page.remove_listener("requestfinished", on_finished)
+        if log is not None:
+            slowest, slowest_ms = "", None
+            for request in finished:
+                request_ms = _request_ms(request)
+                if request_ms is not None and (slowest_ms is None or request_ms > slowest_ms):
+                    slowest, slowest_ms = f"{request.method} {urlparse(request.url).path}", request_ms
+            log.steps.append(
+                {
+                    "index": len(log.steps),
+                    "name": name,
+                    "url": urlparse(page.url).path,
+                    "locate_ms": locate_ms,
+                    "actionable_ms": actionable_ms,
+                    "action_ms": action_ms,
+                    "slowest_request": slowest,
+                    "slowest_request_ms": slowest_ms,
+                }
+            )
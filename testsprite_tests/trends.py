@@ -0,0 +1,192 @@
+"""SQLite trend store for the per-step timings collected by :mod:`steps`.
+
+``run_suite.py`` appends every run here (``--trend-db``, default
+``.trends/e2e.sqlite``). The report compares the latest run with the runs
+before it::
+
+    python testsprite_tests/trends.py                     # slowest steps + regressions
+    python testsprite_tests/trends.py --top 30 --baseline 10 --threshold 0.25
+
+It prints the slowest steps of the latest run, the time spent per page and
+per slowest request (to separate slow pages from slow edge-function calls),
+and every step that got slower than the average of the previous ``--baseline``
+runs by more than ``--threshold`` (relative) and ``--min-delta-ms``.
+"""
+
+import argparse
+import datetime
+import pathlib
+import sqlite3
+import subprocess
+
+SUITE_DIR = pathlib.Path(__file__).resolve().parent
+DEFAULT_DB = SUITE_DIR / ".trends" / "e2e.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    git_sha TEXT,
+    wait_mode TEXT,
+    shard TEXT
+);
+CREATE TABLE IF NOT EXISTS cases (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    case_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    case_id TEXT NOT NULL,
+    step_index INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT,
+    locate_ms REAL NOT NULL,
+    actionable_ms REAL NOT NULL,
+    action_ms REAL NOT NULL,
+    slowest_request TEXT,
+    slowest_request_ms REAL
+);
+CREATE INDEX IF NOT EXISTS steps_run ON steps(run_id);
+CREATE INDEX IF NOT EXISTS steps_key ON steps(case_id, step_index);
+"""
+
+
+def connect(path=DEFAULT_DB):
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, timeout=30)
+    db.executescript(SCHEMA)
+    return db
+
+
+def git_sha():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SUITE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record(path, report, wait_mode):
+    """Store one ``run_suite`` report (see :mod:`reports`) as a new run; returns its id."""
+    with connect(path) as db:
+        run_id = db.execute(
+            "INSERT INTO runs (started_at, git_sha, wait_mode, shard) VALUES (?, ?, ?, ?)",
+            (datetime.datetime.now().isoformat(timespec="seconds"), git_sha(), wait_mode, report["shard"]),
+        ).lastrowid
+        for case in report["cases"]:
+            db.execute(
+                "INSERT INTO cases (run_id, case_id, status, seconds) VALUES (?, ?, ?, ?)",
+                (run_id, case["case_id"], case["status"], case["seconds"]),
+            )
+            db.executemany(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id, case["case_id"], s["index"], s["name"], s["url"], s["locate_ms"],
+                        s["actionable_ms"], s["action_ms"], s["slowest_request"], s["slowest_request_ms"],
+                    )
+                    for s in case.get("steps", [])
+                ],
+            )
+    return run_id
+
+
+STEP_TOTAL = "(locate_ms + actionable_ms + action_ms)"
+
+
+def latest_runs(db, count):
+    return [row[0] for row in db.execute("SELECT id FROM runs ORDER BY id DESC LIMIT ?", (count,))]
+
+
+def slowest_steps(db, run_id, top):
+    return db.execute(
+        f"""SELECT case_id, step_index, name, url, locate_ms, actionable_ms, action_ms,
+                   slowest_request, slowest_request_ms
+            FROM steps WHERE run_id = ? ORDER BY {STEP_TOTAL} DESC LIMIT ?""",
+        (run_id, top),
+    ).fetchall()
+
+
+def time_by(db, run_id, column, top):
+    """Total step time of ``run_id`` grouped by ``url`` or ``slowest_request``."""
+    return db.execute(
+        f"""SELECT {column}, COUNT(*), SUM({STEP_TOTAL}), SUM(action_ms)
+            FROM steps WHERE run_id = ? AND {column} != ''
+            GROUP BY {column} ORDER BY SUM({STEP_TOTAL}) DESC LIMIT ?""",
+        (run_id, top),
+    ).fetchall()
+
+
+def regressions(db, run_id, baseline_ids, threshold, min_delta_ms):
+    """Steps of ``run_id`` slower than their mean over ``baseline_ids``."""
+    if not baseline_ids:
+        return []
+    marks = ",".join("?" * len(baseline_ids))
+    rows = db.execute(
+        f"""SELECT cur.case_id, cur.step_index, cur.name, (cur.locate_ms + cur.actionable_ms + cur.action_ms),
+                   base.mean_ms, base.runs
+            FROM steps AS cur
+            JOIN (SELECT case_id, step_index, AVG({STEP_TOTAL}) AS mean_ms, COUNT(*) AS runs
+                  FROM steps WHERE run_id IN ({marks}) GROUP BY case_id, step_index) AS base
+              ON base.case_id = cur.case_id AND base.step_index = cur.step_index
+            WHERE cur.run_id = ?""",
+        (*baseline_ids, run_id),
+    ).fetchall()
+    flagged = [
+        row for row in rows
+        if row[3] - row[4] >= min_delta_ms and row[3] > row[4] * (1 + threshold)
+    ]
+    return sorted(flagged, key=lambda row: row[3] - row[4], reverse=True)
+
+
+def print_report(db, top, baseline, threshold, min_delta_ms):
+    run_ids = latest_runs(db, baseline + 1)
+    if not run_ids:
+        print("no runs recorded yet")
+        return
+    run_id, baseline_ids = run_ids[0], run_ids[1:]
+    started_at, sha, wait_mode = db.execute(
+        "SELECT started_at, git_sha, wait_mode FROM runs WHERE id = ?", (run_id,)
+    ).fetchone()
+    print(f"run {run_id}  {started_at}  git {sha or '-'}  wait mode {wait_mode}")
+
+    print("\nslowest steps (locate / actionable / action ms)")
+    for case_id, index, name, url, locate, actionable, action, request, request_ms in slowest_steps(db, run_id, top):
+        print(f"  {case_id} #{index:<3} {locate:8.0f} {actionable:8.0f} {action:8.0f}  {url}  {name}")
+        if request:
+            print(f"           slowest request {request} {request_ms:.0f}ms")
+
+    print("\ntime by page (steps / total ms / action ms)")
+    for url, count, total, action in time_by(db, run_id, "url", top):
+        print(f"  {count:4d} {total:10.0f} {action:10.0f}  {url}")
+
+    print("\ntime by slowest request (steps / total ms / action ms)")
+    for request, count, total, action in time_by(db, run_id, "slowest_request", top):
+        print(f"  {count:4d} {total:10.0f} {action:10.0f}  {request}")
+
+    print(f"\nregressions against the previous {len(baseline_ids)} run(s)")
+    flagged = regressions(db, run_id, baseline_ids, threshold, min_delta_ms)
+    for case_id, index, name, current, mean, runs in flagged:
+        print(f"  {case_id} #{index:<3} {mean:8.0f} -> {current:8.0f} ms (+{current - mean:.0f}, n={runs})  {name}")
+    if not flagged:
+        print("  none")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--baseline", type=int, default=5, help="previous runs to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slow-down to flag")
+    parser.add_argument("--min-delta-ms", type=float, default=200, help="absolute slow-down to flag")
+    args = parser.parse_args(argv)
+    with connect(args.db) as db:
+        print_report(db, args.top, args.baseline, args.threshold, args.min_delta_ms)
+
+
+if __name__ == "__main__":
+    main()
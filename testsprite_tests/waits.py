@@ -0,0 +1,123 @@
+"""Wait strategies the TC scripts use around their actions.
+
+The generated scripts sleep 3s before every action and 5s before closing the
+context. Those sleeps stand in for "the app has rendered", "the network has
+gone quiet" and "the element can be used", so the ``event`` mode waits for
+exactly those signals instead:
+
+* ``fixed`` (default) -- the original fixed sleeps, unchanged.
+* ``event`` -- app-ready, network-idle and actionability waits; nothing
+  sleeps for longer than it has to.
+
+Pick the mode with ``TC_WAIT_MODE=fixed|event`` for standalone scripts, or
+``run_suite.py --wait-mode``. Time spent inside these helpers is added to the
+counter returned by :func:`track_idle`, so the runner can report how much of
+each case was idle waiting.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import time
+
+from playwright import async_api
+
+FIXED = "fixed"
+EVENT = "event"
+MODES = (FIXED, EVENT)
+
+FIXED_ACTION_DELAY_MS = 3000
+FIXED_SETTLE_SECONDS = 5
+
+NETWORK_IDLE_TIMEOUT_MS = 3000
+APP_READY_TIMEOUT_MS = 10000
+
+# The React app mounts into #root; it is ready once something is rendered there.
+APP_READY_SCRIPT = "() => document.querySelector('#root')?.childElementCount > 0"
+
+_mode = os.environ.get("TC_WAIT_MODE", FIXED)
+_idle = contextvars.ContextVar("tc_wait_idle", default=None)
+
+
+class IdleCounter:
+    """Accumulates the seconds one case spent inside the wait helpers."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+
+def set_mode(mode):
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"unknown wait mode {mode!r}, expected one of {MODES}")
+    _mode = mode
+
+
+def get_mode():
+    return _mode
+
+
+def track_idle():
+    """Start a fresh idle counter for the current task and return it."""
+    counter = IdleCounter()
+    _idle.set(counter)
+    return counter
+
+
+@contextlib.contextmanager
+def _timed():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        counter = _idle.get()
+        if counter is not None:
+            counter.seconds += time.perf_counter() - started
+
+
+async def app_ready(page):
+    """Wait until the React root has rendered; a slow app is left to the action timeout."""
+    try:
+        await page.wait_for_function(APP_READY_SCRIPT, timeout=APP_READY_TIMEOUT_MS)
+    except async_api.Error:
+        pass
+
+
+async def network_idle(page):
+    """Wait for in-flight requests (Supabase, edge functions) to finish, best effort."""
+    try:
+        await page.wait_for_load_state("networkidle", timeout=NETWORK_IDLE_TIMEOUT_MS)
+    except async_api.Error:
+        pass
+
+
+async def before_action(page, elem):
+    """Wait before clicking or filling ``elem``."""
+    with _timed():
+        if _mode == FIXED:
+            await page.wait_for_timeout(FIXED_ACTION_DELAY_MS)
+            return
+        await app_ready(page)
+        await network_idle(page)
+        # click()/fill() check enabled/stable themselves; make sure the element exists and shows.
+        await elem.wait_for(state="visible")
+
+
+async def pause(page, seconds):
+    """Replacement for a bare ``asyncio.sleep`` after navigation."""
+    with _timed():
+        if _mode == FIXED:
+            await asyncio.sleep(seconds)
+            return
+        await app_ready(page)
+        await network_idle(page)
+
+
+async def settle(page):
+    """Wait before the case returns and its context is closed."""
+    with _timed():
+        if _mode == FIXED:
+            await asyncio.sleep(FIXED_SETTLE_SECONDS)
+            return
+        await network_idle(page)